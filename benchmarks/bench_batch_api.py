@@ -0,0 +1,73 @@
+"""Throughput and peak memory of Batch API submissions against the local fake.
+
+Spools generated prompts into batch input files, runs them on a
+FakeBatchClient backed by MockLLM, and streams the results back. Peak
+traced memory stays flat as the number of prompts grows, since neither the
+inputs nor the outputs are held in memory::
+
+    python benchmarks/bench_batch_api.py --prompts 200000 --output batch.json
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from common import environment, write_results
+
+from openhands_playground.llm.batch_api import BatchRunner, FakeBatchClient
+from openhands_playground.llm.llms import MockLLM
+
+
+def requests(count: int) -> Iterator[Dict[str, Any]]:
+    for i in range(count):
+        content = f"Request {i}: summarize the attached document in one sentence."
+        yield {"model": "gpt-4o", "messages": [{"role": "user", "content": content}]}
+
+
+def run(prompts: int, batch_size: int) -> Dict[str, Any]:
+    """Run one job and report its duration and peak traced memory."""
+    with tempfile.TemporaryDirectory() as directory:
+        client = FakeBatchClient(MockLLM(), directory=directory)
+        runner = BatchRunner(client, poll_interval=0, max_requests_per_batch=batch_size)
+        tracemalloc.start()
+        start = time.perf_counter()
+        results = failures = 0
+        for result in runner.run(requests(prompts)):
+            results += 1
+            failures += not result.ok
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "prompts": prompts,
+        "results": results,
+        "failures": failures,
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(prompts / seconds),
+        "peak_memory_kib": round(peak / 1024),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = sorted({max(1, args.prompts // 10), args.prompts})
+    write_results(
+        {
+            "benchmark": "batch_api",
+            "environment": environment(),
+            "config": {"prompts": args.prompts, "batch_size": args.batch_size},
+            "results": [run(size, args.batch_size) for size in sizes],
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Memory of many forked agent sessions: plain message lists versus Conversations.
+
+Every session starts from the same system prompt and few-shot examples and
+adds its own turns, whose messages are parsed from JSON like API responses.
+Plain sessions copy the shared prefix into a new list of dicts; Conversation
+sessions fork it. Memory is measured with tracemalloc, before and after every
+Conversation is serialized for a request::
+
+    python benchmarks/bench_conversation.py --sessions 10000 --output conversation.json
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common import environment, write_results
+
+from openhands_playground.llm import Conversation
+
+Message = Dict[str, str]
+
+
+def prefix(examples: int, chars: int) -> List[Message]:
+    """A system prompt followed by few-shot question and answer pairs."""
+    messages = [{"role": "system", "content": "You are a helpful coding agent. " * (chars // 32)}]
+    for i in range(examples):
+        messages.append({"role": "user", "content": f"Example question {i} ".ljust(chars, ".")})
+        messages.append({"role": "assistant", "content": f"Example answer {i} ".ljust(chars, ".")})
+    return messages
+
+
+def turn(session: int, index: int, chars: int) -> Tuple[Message, Message]:
+    """A user message and the assistant reply, decoded from JSON like a response body."""
+    user = f"Session {session} asks question {index} ".ljust(chars, ".")
+    reply = f"Session {session} gets answer {index} ".ljust(chars, ".")
+    return (
+        json.loads(json.dumps({"role": "user", "content": user})),
+        json.loads(json.dumps({"role": "assistant", "content": reply})),
+    )
+
+
+def dict_lists(shared: List[Message], sessions: int, turns: int, chars: int) -> List[Any]:
+    """Sessions held as plain lists of dicts."""
+    histories = []
+    for session in range(sessions):
+        history = [dict(message) for message in shared]
+        for index in range(turns):
+            history.extend(turn(session, index, chars))
+        histories.append(history)
+    return histories
+
+
+def conversations(shared: List[Message], sessions: int, turns: int, chars: int) -> List[Any]:
+    """Sessions held as Conversations forked from one shared prefix."""
+    root = Conversation(shared)
+    histories = []
+    for session in range(sessions):
+        history = root.fork()
+        for index in range(turns):
+            history.extend(turn(session, index, chars))
+        histories.append(history)
+    return histories
+
+
+def measure(build: Callable[[], List[Any]], serialize: bool = False) -> Dict[str, Any]:
+    """Bytes allocated by the sessions a function builds, and how long it took."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    histories = build()
+    seconds = time.perf_counter() - start
+    built = tracemalloc.get_traced_memory()[0]
+    result: Dict[str, Any] = {"build_seconds": round(seconds, 3), "bytes": built}
+    if serialize:
+        start = time.perf_counter()
+        for history in histories:
+            history.to_messages()
+        result["serialize_seconds"] = round(time.perf_counter() - start, 3)
+        result["serialized_bytes"] = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    result["bytes_per_session"] = round(result["bytes"] / len(histories))
+    return result
+
+
+def fork_cost(shared: List[Message], depth: int, forks: int) -> Dict[str, float]:
+    """Microseconds per fork of a long history, by list copy and by Conversation.fork."""
+    history = list(shared)
+    for index in range(depth):
+        history.extend(turn(0, index, 16))
+    conversation = Conversation(history)
+
+    start = time.perf_counter()
+    for _ in range(forks):
+        [dict(message) for message in history]
+    copy_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(forks):
+        conversation.fork()
+    fork_seconds = time.perf_counter() - start
+    return {
+        "history_messages": len(history),
+        "dict_list_copy_us": round(copy_seconds / forks * 1e6, 3),
+        "conversation_fork_us": round(fork_seconds / forks * 1e6, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=5, help="Exchanges added per session")
+    parser.add_argument("--examples", type=int, default=10, help="Few-shot pairs in the prefix")
+    parser.add_argument("--chars", type=int, default=200, help="Characters per message")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    shared = prefix(args.examples, args.chars)
+    scenario = (shared, args.sessions, args.turns, args.chars)
+    plain = measure(lambda: dict_lists(*scenario))
+    compact = measure(lambda: conversations(*scenario), serialize=True)
+    write_results(
+        {
+            "benchmark": "conversation",
+            "environment": environment(),
+            "config": {
+                "sessions": args.sessions,
+                "turns": args.turns,
+                "examples": args.examples,
+                "chars": args.chars,
+            },
+            "results": {
+                "dict_lists": plain,
+                "conversations": compact,
+                "memory_ratio": round(plain["bytes"] / compact["bytes"], 2),
+                "serialized_memory_ratio": round(plain["bytes"] / compact["serialized_bytes"], 2),
+                "fork": fork_cost(shared, depth=100, forks=1000),
+            },
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
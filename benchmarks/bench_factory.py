@@ -0,0 +1,94 @@
+"""Per-request cost of getting an LLM from LLMFactory.
+
+Compares creating an instance per request as before, when every create_llm
+parsed the .env file again, with the cached .env loading and with shared
+instances (``create_llm(..., shared=True)``). Reports microseconds per call
+for the mock and openai providers; nothing is sent over the network::
+
+    python benchmarks/bench_factory.py --calls 2000 --output factory.json
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from common import environment, write_results
+from dotenv import load_dotenv
+
+from openhands_playground.llm import LLMFactory
+
+
+def time_calls(call: Callable[[], Any], calls: int, repeats: int) -> float:
+    """Best time per call over several repeats, in microseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def scenarios(provider: str, dotenv_path: str) -> Dict[str, Callable[[], Any]]:
+    """The ways to get an LLM for one request, keyed by name."""
+    kwargs: Dict[str, Any] = {"api_key": "sk-bench"} if provider == "openai" else {}
+
+    def reparse_env() -> Any:
+        # What create_llm did before .env loading was cached
+        load_dotenv(dotenv_path)
+        return LLMFactory.create_llm(provider, load_env=False, **kwargs)
+
+    return {
+        "new_instance_reparse_env": reparse_env,
+        "new_instance_cached_env": lambda: LLMFactory.create_llm(provider, **kwargs),
+        "shared_instance": lambda: LLMFactory.create_llm(provider, shared=True, **kwargs),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000, help="Calls per repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        # A small .env file like the one the project documents
+        dotenv_path = os.path.join(directory, ".env")
+        with open(dotenv_path, "w") as f:
+            f.write("OPENAI_API_KEY=sk-bench\nPLAYGROUND_SETTING=1\n")
+        os.chdir(directory)
+
+        for provider in ("mock", "openai"):
+            timings = {
+                name: time_calls(call, args.calls, args.repeats)
+                for name, call in scenarios(provider, dotenv_path).items()
+            }
+            baseline = timings["new_instance_reparse_env"]
+            for name, us in timings.items():
+                results.append(
+                    {
+                        "provider": provider,
+                        "scenario": name,
+                        "us_per_call": round(us, 2),
+                        "speedup": round(baseline / us, 1),
+                    }
+                )
+        LLMFactory.clear_shared()
+
+    write_results(
+        {
+            "benchmark": "factory",
+            "environment": environment(),
+            "config": {"calls": args.calls, "repeats": args.repeats},
+            "results": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Overhead of the call instrumentation, with and without hooks.
+
+Times MockLLM.generate (with no simulated latency) on an instance without
+hooks, with a no-op hook and with a MetricsCollector, and reports nanoseconds
+per call and the overhead relative to the instance without hooks::
+
+    python benchmarks/bench_hooks.py --calls 200000 --output hooks.json
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from common import environment, write_results
+
+from openhands_playground.llm import LLMHook, MetricsCollector
+from openhands_playground.llm.llms import MockLLM
+
+
+def time_calls(call: Callable[[], Any], calls: int, repeats: int) -> float:
+    """Best time per call over several repeats, in nanoseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            call()
+        best = min(best, (time.perf_counter_ns() - start) / calls)
+    return best
+
+
+def scenarios() -> Dict[str, Callable[[], Any]]:
+    """The calls to compare, keyed by name."""
+    bare = MockLLM()
+    no_op = MockLLM()
+    no_op.add_hook(LLMHook())
+
+    collected = MockLLM()
+    collected.add_hook(MetricsCollector())
+
+    return {
+        "no_hooks": lambda: bare.generate("prompt"),
+        "noop_hook": lambda: no_op.generate("prompt"),
+        "metrics_collector": lambda: collected.generate("prompt"),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000, help="Calls per repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    timings = {
+        name: round(time_calls(call, args.calls, args.repeats), 1)
+        for name, call in scenarios().items()
+    }
+    baseline = timings["no_hooks"]
+    results = [
+        {"scenario": name, "ns_per_call": ns, "overhead_ns": round(ns - baseline, 1)}
+        for name, ns in timings.items()
+    ]
+    write_results(
+        {
+            "benchmark": "hooks",
+            "environment": environment(),
+            "config": {"calls": args.calls, "repeats": args.repeats},
+            "results": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
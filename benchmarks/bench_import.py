@@ -0,0 +1,98 @@
+"""Cold-start cost of importing the package and creating providers.
+
+Runs every scenario in a fresh interpreter, so nothing is cached in
+``sys.modules``, and reports the best wall time, the number of modules loaded
+and whether the OpenAI SDK was imported. The ``eager_providers`` scenario
+imports every provider up front, as the package did before providers were
+resolved lazily, to show the savings::
+
+    python benchmarks/bench_import.py --repeats 10 --output import.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from common import environment, write_results
+
+# Code timed in a fresh interpreter, keyed by scenario name
+SCENARIOS: Dict[str, str] = {
+    "interpreter": "pass",
+    "import_package": "import openhands_playground",
+    "create_mock": (
+        "from openhands_playground import LLMFactory\n"
+        "LLMFactory.create_llm('mock', load_env=False)"
+    ),
+    "create_openai": (
+        "from openhands_playground import LLMFactory\n"
+        "LLMFactory.create_llm('openai', api_key='sk-bench', load_env=False)"
+    ),
+    "eager_providers": (
+        "import openhands_playground\n"
+        "import openhands_playground.llm.llms.mock_llm\n"
+        "import openhands_playground.llm.llms.openai_llm\n"
+        "import dotenv"
+    ),
+}
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": len(sys.modules),
+                  "openai_loaded": "openai" in sys.modules}}))
+"""
+
+
+def run_scenario(code: str, repeats: int) -> Dict[str, Any]:
+    """Best time of a snippet over fresh interpreters, with its module count."""
+    env = dict(os.environ)
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [source, env.get("PYTHONPATH")]))
+
+    samples: List[Dict[str, Any]] = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(code=code)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout
+        samples.append(json.loads(output))
+
+    best = min(samples, key=lambda sample: sample["seconds"])
+    return {
+        "ms": round(best["seconds"] * 1000, 2),
+        "modules": best["modules"],
+        "openai_loaded": best["openai_loaded"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5, help="Interpreters per scenario")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    timings = {name: run_scenario(code, args.repeats) for name, code in SCENARIOS.items()}
+    results = [{"scenario": name, **timing} for name, timing in timings.items()]
+    saved = timings["eager_providers"]["ms"] - timings["import_package"]["ms"]
+    write_results(
+        {
+            "benchmark": "import",
+            "environment": environment(),
+            "config": {"repeats": args.repeats},
+            "results": results,
+            "lazy_import_savings_ms": round(saved, 2),
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Latency and throughput benchmark of the LLM call patterns.
+
+Drives a MockLLM with simulated latency through serial, threaded, asyncio and
+batched call patterns and reports throughput, p50/p95/p99 latency and traced
+memory per request as JSON. Comparing the results with the simulated latency
+shows the library's own overhead and how well each pattern scales::
+
+    python benchmarks/bench_llm.py --requests 500 --latency 0.01 --output run.json
+    python benchmarks/bench_llm.py --baseline run.json
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common import environment, latency_summary, load_results, write_results
+
+from openhands_playground.llm.base import BaseLLM
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.simulation import (
+    FixedLatency,
+    LatencyModel,
+    LongTailLatency,
+    NormalLatency,
+)
+from openhands_playground.llm.wrapper import LLMWrapper
+
+
+class TimedLLM(LLMWrapper):
+    """Records the duration of every generate call that reaches it."""
+
+    def __init__(self, llm: BaseLLM) -> None:
+        super().__init__(llm)
+        self.latencies: List[float] = []
+
+    def generate(self, prompt: str, *args: Any, **kwargs: Any) -> str:
+        start = time.perf_counter()
+        try:
+            return self.llm.generate(prompt, *args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def agenerate(self, prompt: str, *args: Any, **kwargs: Any) -> str:
+        start = time.perf_counter()
+        try:
+            return await self.llm.agenerate(prompt, *args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def run_serial(llm: BaseLLM, prompts: List[str], concurrency: int) -> int:
+    """One call after the other; returns the number of failed calls."""
+    errors = 0
+    for prompt in prompts:
+        try:
+            llm.generate(prompt)
+        except Exception:
+            errors += 1
+    return errors
+
+
+def run_threaded(llm: BaseLLM, prompts: List[str], concurrency: int) -> int:
+    """Calls spread over a thread pool."""
+
+    def call(prompt: str) -> bool:
+        try:
+            llm.generate(prompt)
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return sum(not ok for ok in executor.map(call, prompts))
+
+
+def run_asyncio(llm: BaseLLM, prompts: List[str], concurrency: int) -> int:
+    """Coroutines on one event loop, bounded by a semaphore."""
+
+    async def main() -> int:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(prompt: str) -> str:
+            async with semaphore:
+                return await llm.agenerate(prompt)
+
+        results = await asyncio.gather(*(call(p) for p in prompts), return_exceptions=True)
+        return sum(isinstance(r, Exception) for r in results)
+
+    return asyncio.run(main())
+
+
+def run_batched(llm: BaseLLM, prompts: List[str], concurrency: int) -> int:
+    """The generate_many batch helper."""
+    results = llm.generate_many(prompts, max_concurrency=concurrency)
+    return sum(not r.ok for r in results)
+
+
+def run_async_batched(llm: BaseLLM, prompts: List[str], concurrency: int) -> int:
+    """The agenerate_many batch helper."""
+    results = asyncio.run(llm.agenerate_many(prompts, max_concurrency=concurrency))
+    return sum(not r.ok for r in results)
+
+
+PATTERNS: Dict[str, Callable[[BaseLLM, List[str], int], int]] = {
+    "serial": run_serial,
+    "threaded": run_threaded,
+    "asyncio": run_asyncio,
+    "batched": run_batched,
+    "async_batched": run_async_batched,
+}
+
+
+def make_latency_model(distribution: str, latency: float) -> LatencyModel:
+    """Build the latency model named on the command line."""
+    if distribution == "fixed":
+        return FixedLatency(latency)
+    if distribution == "normal":
+        return NormalLatency(latency, stddev=latency / 4)
+    if distribution == "longtail":
+        return LongTailLatency(median=latency)
+    raise ValueError(f"Unknown distribution: '{distribution}'")
+
+
+def measure(
+    pattern: str, args: argparse.Namespace, trace_memory: bool
+) -> Tuple[TimedLLM, int, float, int]:
+    """Run one pattern on a fresh LLM.
+
+    Returns:
+        The timed LLM, the number of errors, the wall time and the peak
+        traced memory in bytes (0 unless traced)
+    """
+    model = make_latency_model(args.distribution, args.latency)
+    llm = TimedLLM(
+        MockLLM(
+            latency=model,
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+    )
+    prompts = [f"Benchmark prompt {i}" for i in range(args.requests)]
+    concurrency = 1 if pattern == "serial" else args.concurrency
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        errors = PATTERNS[pattern](llm, prompts, concurrency)
+        wall_time = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return llm, errors, wall_time, peak
+
+
+def bench_pattern(pattern: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one call pattern."""
+    llm, errors, wall_time, _ = measure(pattern, args, trace_memory=False)
+    concurrency = 1 if pattern == "serial" else args.concurrency
+    throughput = args.requests / wall_time
+    # Throughput if every call took exactly the mean simulated latency
+    mean_latency = make_latency_model(args.distribution, args.latency).mean
+    ideal = concurrency / mean_latency if mean_latency > 0 else None
+
+    result: Dict[str, Any] = {
+        "pattern": pattern,
+        "requests": args.requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_time_s": round(wall_time, 4),
+        "throughput_rps": round(throughput, 2),
+        "efficiency": round(throughput / ideal, 3) if ideal else None,
+        "latency_ms": latency_summary(llm.latencies),
+    }
+    if not args.no_memory:
+        _, _, _, peak = measure(pattern, args, trace_memory=True)
+        result["memory_bytes_per_request"] = round(peak / args.requests, 1)
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]) -> None:
+    """Print throughput and p99 changes relative to a baseline run."""
+    previous = {r["pattern"]: r for r in baseline.get("results", [])}
+    for result in results:
+        before = previous.get(result["pattern"])
+        if before is None:
+            continue
+        throughput = result["throughput_rps"] / before["throughput_rps"] - 1
+        p99_before = before["latency_ms"]["p99"]
+        p99 = result["latency_ms"]["p99"] / p99_before - 1 if p99_before else 0.0
+        print(
+            f"{result['pattern']:>14}: throughput {throughput:+.1%}, p99 {p99:+.1%}",
+            file=sys.stderr,
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Calls per pattern")
+    parser.add_argument("--concurrency", type=int, default=16, help="Calls in flight")
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="Mean (or median) latency in seconds"
+    )
+    parser.add_argument(
+        "--distribution", choices=["fixed", "normal", "longtail"], default="fixed"
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--patterns",
+        nargs="+",
+        choices=sorted(PATTERNS),
+        default=list(PATTERNS),
+        help="Call patterns to run",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory pass")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = [bench_pattern(pattern, args) for pattern in args.patterns]
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "baseline", "patterns")
+    }
+    write_results(
+        {"benchmark": "llm", "environment": environment(), "config": config, "results": results},
+        args.output,
+    )
+    if args.baseline:
+        compare(results, load_results(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Throughput of CPU-heavy post-processing on the event loop vs a process pool.
+
+Each request goes to a MockLLM with a fixed latency and its response is
+validated by a CPU-bound function. The baseline runs the validation inline
+in the coroutine, blocking the event loop; the pipeline runs it in worker
+processes while the loop keeps the calls in flight::
+
+    python benchmarks/bench_pipeline.py --requests 400 --processes 4 --output pipeline.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from common import environment, write_results
+
+from openhands_playground.llm.batching import aiter_batch
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.pipeline import Pipeline
+
+DOCUMENT = json.dumps([{"id": i, "tags": ["a", "b", "c"], "score": i / 7} for i in range(2000)])
+
+
+def validate(text: str) -> int:
+    """Stand-in for parsing and validating a large structured response."""
+    records = json.loads(DOCUMENT)
+    return sum(1 for record in records if record["score"] >= 0) + len(text)
+
+
+async def inline(requests: int, latency: float, concurrency: int) -> float:
+    llm = MockLLM(latency=latency)
+
+    async def call(prompt: str) -> str:
+        return str(validate(await llm.agenerate(prompt)))
+
+    start = time.perf_counter()
+    async for _ in aiter_batch(call, (f"q{i}" for i in range(requests)), concurrency):
+        pass
+    return time.perf_counter() - start
+
+
+async def pipelined(requests: int, latency: float, concurrency: int, processes: int) -> float:
+    with Pipeline(
+        MockLLM(latency=latency),
+        postprocess=validate,
+        processes=processes,
+        max_concurrency=concurrency,
+    ) as pipe:
+        # Start the workers before timing
+        await pipe.arun(["warm-up"] * processes)
+        start = time.perf_counter()
+        async for _ in pipe.aiter(f"q{i}" for i in range(requests)):
+            pass
+        return time.perf_counter() - start
+
+
+def run(requests: int, latency: float, concurrency: int, processes: int) -> Dict[str, Any]:
+    baseline = asyncio.run(inline(requests, latency, concurrency))
+    pipeline = asyncio.run(pipelined(requests, latency, concurrency, processes))
+    return {
+        "requests": requests,
+        "processes": processes,
+        "inline_requests_per_second": round(requests / baseline, 1),
+        "pipeline_requests_per_second": round(requests / pipeline, 1),
+        "speedup": round(baseline / pipeline, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock LLM latency")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=None, help="Defaults to the CPUs")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    processes = args.processes or Pipeline(MockLLM()).processes
+    write_results(
+        {
+            "benchmark": "pipeline",
+            "environment": environment(),
+            "config": {
+                "requests": args.requests,
+                "latency": args.latency,
+                "concurrency": args.concurrency,
+            },
+            "results": [run(args.requests, args.latency, args.concurrency, processes)],
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
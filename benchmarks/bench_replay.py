@@ -0,0 +1,98 @@
+"""Index build time and lookup latency of replayed recordings.
+
+Writes a recording of synthetic chat responses, then reports how long the
+index takes to build, the size of the log and index, and the time per
+ReplayLLM call for recorded and unrecorded requests::
+
+    python benchmarks/bench_replay.py --records 1000000 --output replay.json
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List, Optional
+
+from common import environment, latency_summary, write_results
+
+from openhands_playground.llm.exceptions import ReplayMissError
+from openhands_playground.llm.llms import ReplayLLM
+from openhands_playground.llm.recording import Recorder, Recording, build_index
+
+
+def prompt(i: int) -> str:
+    return f"Request {i}: summarize the attached document in one sentence."
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--response-words", type=int, default=100)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    response = " ".join(["word"] * args.response_words)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calls.log")
+        start = time.perf_counter()
+        with Recorder(path) as recorder:
+            for i in range(args.records):
+                recorder.record(
+                    {"model": "gpt-4o", "messages": [{"role": "user", "content": prompt(i)}]},
+                    f"{i} {response}",
+                )
+        record_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_index(path)
+        index_seconds = time.perf_counter() - start
+
+        llm = ReplayLLM("gpt-4o", recording=Recording(path))
+        rng = random.Random(0)
+        hits: List[float] = []
+        for _ in range(args.lookups):
+            i = rng.randrange(args.records)
+            start = time.perf_counter()
+            llm.generate(prompt(i))
+            hits.append(time.perf_counter() - start)
+
+        misses: List[float] = []
+        for i in range(args.lookups):
+            start = time.perf_counter()
+            try:
+                llm.generate(prompt(args.records + i))
+            except ReplayMissError:
+                pass
+            misses.append(time.perf_counter() - start)
+        llm.close()
+
+        sizes = {
+            "log_bytes": os.path.getsize(path),
+            "index_bytes": os.path.getsize(path + ".idx"),
+        }
+
+    write_results(
+        {
+            "benchmark": "replay",
+            "environment": environment(),
+            "config": {
+                "records": args.records,
+                "lookups": args.lookups,
+                "response_words": args.response_words,
+            },
+            "results": {
+                "record_us_per_call": round(record_seconds / args.records * 1e6, 2),
+                "index_build_seconds": round(index_seconds, 3),
+                **sizes,
+                "hit_latency_ms": latency_summary(hits),
+                "miss_latency_ms": latency_summary(misses),
+            },
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Interactive latency under a bulk backlog, with and without priority scheduling.
+
+A bulk tenant queues a large backlog on a latency-simulating MockLLM while
+interactive requests arrive at a steady rate. Sent as the same tenant, the
+interactive requests wait behind the whole backlog (fifo); as another tenant
+of the same class they get half of the capacity (fair); in a higher priority
+class they overtake the backlog (priority)::
+
+    python benchmarks/bench_scheduler.py --bulk 400 --interactive 40 --output scheduler.json
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from common import environment, latency_summary, write_results
+
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    RequestScheduler,
+    ScheduledLLM,
+)
+
+
+async def run(
+    bulk: int, interactive: int, latency: float, concurrency: int, scheduling: str
+) -> Dict[str, Any]:
+    """Run one scenario and report the latency of each kind of request."""
+    scheduler = RequestScheduler(max_concurrency=concurrency)
+    llm = MockLLM(latency=latency)
+    backfill = ScheduledLLM(llm, scheduler, priority=BACKGROUND, tenant="backfill")
+    chat = ScheduledLLM(
+        llm,
+        scheduler,
+        priority=INTERACTIVE if scheduling == "priority" else BACKGROUND,
+        tenant="backfill" if scheduling == "fifo" else "chat",
+    )
+    latencies: Dict[str, List[float]] = {"backfill": [], "chat": []}
+
+    async def timed(scheduled: ScheduledLLM, kind: str, prompt: str) -> None:
+        start = time.perf_counter()
+        await scheduled.agenerate(prompt)
+        latencies[kind].append(time.perf_counter() - start)
+
+    tasks = [asyncio.ensure_future(timed(backfill, "backfill", f"b{i}")) for i in range(bulk)]
+    # Interactive requests arrive at the rate the LLM can serve them
+    for i in range(interactive):
+        tasks.append(asyncio.ensure_future(timed(chat, "chat", f"c{i}")))
+        await asyncio.sleep(latency / concurrency)
+    await asyncio.gather(*tasks)
+
+    return {
+        "scheduling": scheduling,
+        "chat_latency_ms": latency_summary(latencies["chat"]),
+        "backfill_latency_ms": latency_summary(latencies["backfill"]),
+        "priorities": scheduler.snapshot()["priorities"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bulk", type=int, default=200)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock LLM latency")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    scenario = (args.bulk, args.interactive, args.latency, args.concurrency)
+    write_results(
+        {
+            "benchmark": "scheduler",
+            "environment": environment(),
+            "config": {
+                "bulk": args.bulk,
+                "interactive": args.interactive,
+                "latency": args.latency,
+                "concurrency": args.concurrency,
+            },
+            "results": [
+                asyncio.run(run(*scenario, scheduling))
+                for scheduling in ("fifo", "fair", "priority")
+            ],
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
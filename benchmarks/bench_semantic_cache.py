@@ -0,0 +1,91 @@
+"""Hit rate, lookup cost and latency saved by the semantic cache.
+
+Sends a stream of questions, a share of which are rephrasings (case,
+punctuation, filler words) of earlier ones, through a SemanticCacheLLM in
+front of a MockLLM with a fixed delay::
+
+    python benchmarks/bench_semantic_cache.py --requests 5000 --output semantic.json
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from common import environment, latency_summary, write_results
+
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.semantic_cache import SemanticCache, SemanticCacheLLM
+
+TOPICS = ["python", "rust", "go", "java", "sql", "bash", "docker", "git", "css", "http"]
+TASKS = [
+    "reverse a list",
+    "read a csv file",
+    "parse json",
+    "sort a dictionary by value",
+    "start a web server",
+    "handle errors",
+    "write unit tests",
+    "format dates",
+]
+PHRASINGS = [
+    "How do I {task} in {topic}?",
+    "how to {task} in {topic}",
+    "Please, {task} in {topic}.",
+]
+
+
+def questions(count: int, repeat_share: float, seed: int) -> List[str]:
+    """Questions where ``repeat_share`` of them rephrase an earlier one."""
+    rng = random.Random(seed)
+    asked: List[str] = []
+    result = []
+    for i in range(count):
+        if asked and rng.random() < repeat_share:
+            task, topic = rng.choice(asked).split("|")
+        else:
+            task, topic = f"{rng.choice(TASKS)} {i}", rng.choice(TOPICS)
+            asked.append(f"{task}|{topic}")
+        result.append(rng.choice(PHRASINGS).format(task=task, topic=topic))
+    return result
+
+
+def run(requests: int, repeat_share: float, delay: float) -> Dict[str, Any]:
+    """Send the questions and report cache effectiveness."""
+    llm = SemanticCacheLLM(MockLLM(latency=delay), SemanticCache(max_entries=requests))
+    latencies = []
+    for question in questions(requests, repeat_share, seed=0):
+        start = time.perf_counter()
+        llm.generate(question, temperature=0)
+        latencies.append(time.perf_counter() - start)
+    stats = llm.stats
+    return {
+        "requests": requests,
+        "repeat_share": repeat_share,
+        "hit_rate": round(stats.hit_rate, 3),
+        "hit_latency_ms": round(stats.hit_seconds / max(stats.hits, 1) * 1000, 3),
+        "saved_seconds": round(stats.saved_seconds, 3),
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--delay", type=float, default=0.005, help="Mock LLM latency")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    write_results(
+        {
+            "benchmark": "semantic_cache",
+            "environment": environment(),
+            "config": {"requests": args.requests, "delay": args.delay},
+            "results": [run(args.requests, share, args.delay) for share in (0.2, 0.5)],
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
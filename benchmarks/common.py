@@ -0,0 +1,56 @@
+"""Helpers shared by the benchmark scripts."""
+
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+
+
+def percentile(ordered: Sequence[float], quantile: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(quantile * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, float]:
+    """Mean, p50, p95, p99 and max of latencies given in seconds, in milliseconds."""
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered) if ordered else 0.0
+    return {
+        "mean": round(mean * 1000, 3),
+        "p50": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99": round(percentile(ordered, 0.99) * 1000, 3),
+        "max": round((ordered[-1] if ordered else 0.0) * 1000, 3),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Describe where a benchmark ran, so results can be compared fairly."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def write_results(payload: Dict[str, Any], output: Optional[str]) -> None:
+    """Write results as JSON to a file, or to stdout if no path is given."""
+    text = json.dumps(payload, indent=2)
+    if output is None:
+        print(text)
+        return
+    with open(output, "w") as f:
+        f.write(text + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Read results previously written by :func:`write_results`."""
+    with open(path) as f:
+        data: Dict[str, Any] = json.load(f)
+    return data
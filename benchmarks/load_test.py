@@ -0,0 +1,227 @@
+"""End-to-end load test of OpenAILLM against a local stub server.
+
+Starts ``openhands_playground.testing.stub_server`` in a subprocess, so that
+its CPU time is not counted, and drives an OpenAILLM pointed at it over real
+HTTP at each concurrency level. For every level it reports throughput,
+p50/p95/p99 latency, time to first token when streaming, and the client
+process CPU time per request, which covers request serialization,
+connection handling and response parsing::
+
+    python benchmarks/load_test.py --concurrency 1 4 16 64 --requests 400 --latency 0.05
+    python benchmarks/load_test.py --mode sync --stream --output load.json
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8000/v1
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from common import environment, latency_summary, write_results
+
+from openhands_playground.llm.clients import HTTPSettings
+from openhands_playground.llm.llms import OpenAILLM
+from openhands_playground.llm.retry import RetryPolicy
+
+# Latency and time to first token of one call, in seconds; None if it failed
+Sample = Tuple[Optional[float], Optional[float]]
+
+
+@contextmanager
+def stub_server(args: argparse.Namespace) -> Iterator[str]:
+    """Run a stub server in a subprocess and yield its base URL."""
+    command = [
+        sys.executable,
+        "-m",
+        "openhands_playground.testing",
+        "--port",
+        "0",
+        "--latency",
+        str(args.latency),
+        "--error-rate",
+        str(args.error_rate),
+        "--reply-words",
+        str(args.reply_words),
+    ]
+    if args.tokens_per_second:
+        command += ["--tokens-per-second", str(args.tokens_per_second)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        assert process.stdout is not None
+        base_url = process.stdout.readline().strip()
+        if not base_url:
+            raise RuntimeError("Stub server exited before printing its URL")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def make_llm(base_url: str, concurrency: int) -> OpenAILLM:
+    """An OpenAILLM with a pool sized for the concurrency level and no retries."""
+    return OpenAILLM(
+        api_key="stub",
+        base_url=base_url,
+        http_settings=HTTPSettings(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ),
+        retry_policy=RetryPolicy(max_attempts=1),
+    )
+
+
+def call(llm: OpenAILLM, messages: List[Dict[str, str]], stream: bool) -> Sample:
+    """One sync call."""
+    start = time.perf_counter()
+    try:
+        if not stream:
+            llm.chat(messages)
+            return time.perf_counter() - start, None
+        response = llm.stream_chat(messages)
+        response.read()
+        return time.perf_counter() - start, response.stats.time_to_first_token
+    except Exception:
+        return None, None
+
+
+async def acall(llm: OpenAILLM, messages: List[Dict[str, str]], stream: bool) -> Sample:
+    """One async call."""
+    start = time.perf_counter()
+    try:
+        if not stream:
+            await llm.achat(messages)
+            return time.perf_counter() - start, None
+        response = llm.astream_chat(messages)
+        await response.read()
+        return time.perf_counter() - start, response.stats.time_to_first_token
+    except Exception:
+        return None, None
+
+
+class Measurement:
+    """Samples of the measured calls, with the wall and CPU time they took."""
+
+    def __init__(self) -> None:
+        self.samples: List[Sample] = []
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+
+    @contextmanager
+    def timing(self) -> Iterator[None]:
+        """Time the calls made inside the block."""
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        yield
+        self.wall_time = time.perf_counter() - start
+        self.cpu_time = time.process_time() - cpu_start
+
+
+def run_sync(
+    llm: OpenAILLM, warmup: List[str], prompts: List[str], concurrency: int, stream: bool
+) -> Measurement:
+    """Calls spread over a thread pool."""
+    measurement = Measurement()
+
+    def one(prompt: str) -> Sample:
+        return call(llm, [{"role": "user", "content": prompt}], stream)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, warmup))
+        with measurement.timing():
+            measurement.samples = list(executor.map(one, prompts))
+    return measurement
+
+
+def run_async(
+    llm: OpenAILLM, warmup: List[str], prompts: List[str], concurrency: int, stream: bool
+) -> Measurement:
+    """Coroutines on one event loop, bounded by a semaphore."""
+    measurement = Measurement()
+
+    async def main() -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(prompt: str) -> Sample:
+            async with semaphore:
+                return await acall(llm, [{"role": "user", "content": prompt}], stream)
+
+        try:
+            await asyncio.gather(*(bounded(p) for p in warmup))
+            with measurement.timing():
+                measurement.samples = await asyncio.gather(*(bounded(p) for p in prompts))
+        finally:
+            await llm.aclose()
+
+    asyncio.run(main())
+    return measurement
+
+
+def bench_level(base_url: str, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Load-test one concurrency level on a fresh client."""
+    run = run_async if args.mode == "async" else run_sync
+    # Open the connections before measuring
+    warmup = [f"Warmup prompt {i}" for i in range(concurrency)]
+    prompts = [f"Load test prompt {i}" for i in range(args.requests)]
+    llm = make_llm(base_url, concurrency)
+    try:
+        measurement = run(llm, warmup, prompts, concurrency, args.stream)
+    finally:
+        llm.close()
+
+    samples = measurement.samples
+    latencies = [latency for latency, _ in samples if latency is not None]
+    result: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "requests": len(prompts),
+        "errors": len(samples) - len(latencies),
+        "wall_time_s": round(measurement.wall_time, 4),
+        "throughput_rps": round(len(prompts) / measurement.wall_time, 2),
+        "cpu_ms_per_request": round(measurement.cpu_time / len(prompts) * 1000, 3),
+        "latency_ms": latency_summary(latencies),
+    }
+    if args.stream:
+        result["ttft_ms"] = latency_summary([ttft for _, ttft in samples if ttft is not None])
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Levels to sweep"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Calls per level")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    parser.add_argument("--stream", action="store_true", help="Stream the responses")
+    parser.add_argument("--latency", type=float, default=0.05, help="Server time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reply-words", type=int, default=32)
+    parser.add_argument("--base-url", help="Use a running stub server instead of starting one")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    if args.base_url:
+        results = [bench_level(args.base_url, level, args) for level in args.concurrency]
+    else:
+        with stub_server(args) as base_url:
+            results = [bench_level(base_url, level, args) for level in args.concurrency]
+    write_results(
+        {
+            "benchmark": "load_test",
+            "environment": environment(),
+            "config": config,
+            "results": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,23 @@
 """LLM module for OpenHands Playground."""
 
 from .base import BaseLLM
+from .batching import BatchResult
+from .conversation import Conversation
+from .exceptions import FatalLLMError, LLMError, RetryableLLMError
 from .factory import LLMFactory
+from .hooks import CallInfo, LLMHook, TokenUsage
+from .metrics import MetricsCollector
 
-__all__ = ["BaseLLM", "LLMFactory"]
+__all__ = [
+    "BaseLLM",
+    "BatchResult",
+    "CallInfo",
+    "Conversation",
+    "FatalLLMError",
+    "LLMError",
+    "LLMFactory",
+    "LLMHook",
+    "MetricsCollector",
+    "RetryableLLMError",
+    "TokenUsage",
+]
@@ -1,12 +1,45 @@
 """Abstract base class for LLM implementations."""
 
+import asyncio
+import contextvars
+import functools
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from .batching import (
+    DEFAULT_MAX_CONCURRENCY,
+    BatchResult,
+    aiter_batch,
+    arun_batch,
+    iter_batch,
+    run_batch,
+)
+from .conversation import Messages
+from .hooks import LLMHook, instrument, uninstrument
+from .streaming import AsyncTextStream, TextStream
+
+LLMType = TypeVar("LLMType", bound="BaseLLM")
 
 
 class BaseLLM(ABC):
     """Abstract base class for all LLM implementations."""
 
+    # Hooks observing this instance's calls; replaced, never mutated, so that
+    # calls in flight keep iterating over a consistent tuple
+    _hooks: Tuple[LLMHook, ...] = ()
+
     def __init__(self, model_name: str, **kwargs: Any) -> None:
         """Initialize the LLM with a model name and optional parameters.
 
@@ -44,7 +77,7 @@ class BaseLLM(ABC):
     @abstractmethod
     def chat(
         self,
-        messages: List[Dict[str, str]],
+        messages: Messages,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         **kwargs: Any,
@@ -52,7 +85,8 @@ class BaseLLM(ABC):
         """Generate a chat response based on conversation history.
 
         Args:
-            messages: List of message dictionaries with 'role' and 'content' keys
+            messages: List of message dictionaries with 'role' and 'content'
+                keys, or a Conversation
             max_tokens: Maximum number of tokens to generate
             temperature: Sampling temperature (0.0 to 1.0)
             **kwargs: Additional generation parameters
@@ -65,6 +99,447 @@ class BaseLLM(ABC):
         """
         pass
 
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Asynchronously generate text based on the given prompt.
+
+        The default implementation runs :meth:`generate` in the event loop's
+        default executor. Providers with a native async client should override it.
+
+        Args:
+            prompt: The input prompt for text generation
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 1.0)
+            **kwargs: Additional generation parameters
+
+        Returns:
+            Generated text response
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(
+            contextvars.copy_context().run,
+            self.generate,
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs,
+        )
+        return await loop.run_in_executor(None, call)
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Asynchronously generate a chat response based on conversation history.
+
+        The default implementation runs :meth:`chat` in the event loop's
+        default executor. Providers with a native async client should override it.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 1.0)
+            **kwargs: Additional generation parameters
+
+        Returns:
+            Generated chat response
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(
+            contextvars.copy_context().run,
+            self.chat,
+            messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs,
+        )
+        return await loop.run_in_executor(None, call)
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream generated text chunk by chunk.
+
+        The default implementation yields the whole :meth:`generate` response as
+        a single chunk. Providers with native streaming should override it.
+
+        Args:
+            prompt: The input prompt for text generation
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 1.0)
+            **kwargs: Additional generation parameters
+
+        Returns:
+            A TextStream whose ``stats`` report time-to-first-token and total
+            latency once it has been consumed
+        """
+        call = functools.partial(
+            self.generate, prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return TextStream(_single_chunk(call))
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a chat response chunk by chunk.
+
+        The default implementation yields the whole :meth:`chat` response as a
+        single chunk. Providers with native streaming should override it.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 1.0)
+            **kwargs: Additional generation parameters
+
+        Returns:
+            A TextStream whose ``stats`` report time-to-first-token and total
+            latency once it has been consumed
+        """
+        call = functools.partial(
+            self.chat, messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return TextStream(_single_chunk(call))
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Asynchronous :meth:`stream_generate` built on :meth:`agenerate`."""
+        call = functools.partial(
+            self.agenerate, prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return AsyncTextStream(_asingle_chunk(call))
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Asynchronous :meth:`stream_chat` built on :meth:`achat`."""
+        call = functools.partial(
+            self.achat, messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return AsyncTextStream(_asingle_chunk(call))
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate several candidate responses to the same prompt.
+
+        The default implementation makes ``n`` concurrent :meth:`generate`
+        calls. Providers that can return several choices from one request
+        should override it, so that the prompt is only sent and billed once.
+        With a temperature of 0 the candidates are likely to be identical.
+
+        Args:
+            prompt: The input prompt for text generation
+            n: Number of candidates to generate
+            max_tokens: Maximum number of tokens to generate per candidate
+            temperature: Sampling temperature (0.0 to 1.0)
+            **kwargs: Additional generation parameters
+
+        Returns:
+            The n candidates
+
+        Raises:
+            ValueError: If n is less than 1
+        """
+        call = functools.partial(
+            self.generate, prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return _fan_out(call, n)
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate several candidate chat responses to the same conversation.
+
+        The default implementation makes ``n`` concurrent :meth:`chat` calls;
+        see :meth:`generate_n`.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            n: Number of candidates to generate
+            max_tokens: Maximum number of tokens to generate per candidate
+            temperature: Sampling temperature (0.0 to 1.0)
+            **kwargs: Additional generation parameters
+
+        Returns:
+            The n candidates
+
+        Raises:
+            ValueError: If n is less than 1
+        """
+        call = functools.partial(
+            self.chat, messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return _fan_out(call, n)
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Asynchronous :meth:`generate_n` built on :meth:`agenerate`."""
+        call = functools.partial(
+            self.agenerate, prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return await _afan_out(call, n)
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Asynchronous :meth:`chat_n` built on :meth:`achat`."""
+        call = functools.partial(
+            self.achat, messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return await _afan_out(call, n)
+
+    def generate_many(
+        self,
+        prompts: Iterable[str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Generate text for many prompts concurrently.
+
+        Calls run on a thread pool sharing this instance (and its client). A
+        failing prompt does not abort the batch; its error is captured in the
+        corresponding result.
+
+        Args:
+            prompts: The input prompts
+            max_tokens: Maximum number of tokens to generate per prompt
+            temperature: Sampling temperature (0.0 to 1.0)
+            max_concurrency: Maximum number of calls in flight
+            **kwargs: Additional generation parameters
+
+        Returns:
+            One BatchResult per prompt, in input order
+        """
+        call = functools.partial(
+            self.generate, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return run_batch(call, prompts, max_concurrency)
+
+    def chat_many(
+        self,
+        conversations: Iterable[Messages],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Generate chat responses for many conversations concurrently.
+
+        Args:
+            conversations: Message lists or Conversations, one per conversation
+            max_tokens: Maximum number of tokens to generate per conversation
+            temperature: Sampling temperature (0.0 to 1.0)
+            max_concurrency: Maximum number of calls in flight
+            **kwargs: Additional generation parameters
+
+        Returns:
+            One BatchResult per conversation, in input order
+        """
+        call = functools.partial(
+            self.chat, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return run_batch(call, conversations, max_concurrency)
+
+    def iter_generate_many(
+        self,
+        prompts: Iterable[str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> Iterator[BatchResult]:
+        """Like :meth:`generate_many`, but yield results as they finish.
+
+        Prompts are consumed lazily, so generators of any length are supported.
+        Use ``BatchResult.index`` to map a result back to its prompt.
+        """
+        call = functools.partial(
+            self.generate, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return iter_batch(call, prompts, max_concurrency)
+
+    def iter_chat_many(
+        self,
+        conversations: Iterable[Messages],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> Iterator[BatchResult]:
+        """Like :meth:`chat_many`, but yield results as they finish."""
+        call = functools.partial(
+            self.chat, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return iter_batch(call, conversations, max_concurrency)
+
+    async def agenerate_many(
+        self,
+        prompts: Iterable[str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Asynchronous :meth:`generate_many` built on :meth:`agenerate`."""
+        call = functools.partial(
+            self.agenerate, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return await arun_batch(call, prompts, max_concurrency)
+
+    async def achat_many(
+        self,
+        conversations: Iterable[Messages],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Asynchronous :meth:`chat_many` built on :meth:`achat`."""
+        call = functools.partial(
+            self.achat, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return await arun_batch(call, conversations, max_concurrency)
+
+    def aiter_generate_many(
+        self,
+        prompts: Iterable[str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> AsyncIterator[BatchResult]:
+        """Asynchronous :meth:`iter_generate_many` built on :meth:`agenerate`."""
+        call = functools.partial(
+            self.agenerate, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return aiter_batch(call, prompts, max_concurrency)
+
+    def aiter_chat_many(
+        self,
+        conversations: Iterable[Messages],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> AsyncIterator[BatchResult]:
+        """Asynchronous :meth:`iter_chat_many` built on :meth:`achat`."""
+        call = functools.partial(
+            self.achat, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return aiter_batch(call, conversations, max_concurrency)
+
+    @property
+    def hooks(self) -> Tuple[LLMHook, ...]:
+        """The hooks observing this instance's calls."""
+        return self._hooks
+
+    def add_hook(self, hook: LLMHook) -> None:
+        """Observe this instance's calls with a hook.
+
+        Hooks only see calls made on this instance; to observe a wrapped LLM's
+        own calls, add the hook to it as well. Instances without hooks are
+        not instrumented at all.
+
+        Args:
+            hook: Receives before_call, after_call and on_error callbacks
+        """
+        if not self._hooks:
+            instrument(self)
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook: LLMHook) -> None:
+        """Stop observing calls with a hook.
+
+        Raises:
+            ValueError: If the hook was not added
+        """
+        if hook not in self._hooks:
+            raise ValueError(f"Hook {hook!r} is not registered")
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+        if not self._hooks:
+            uninstrument(self)
+
+    def close(self) -> None:
+        """Release resources such as HTTP connections held by the LLM.
+
+        The default implementation does nothing. Calling it more than once is
+        safe.
+        """
+        # Deliberately a no-op: subclasses without resources need not override it
+        return None
+
+    async def aclose(self) -> None:
+        """Release resources, including those used by the coroutine API.
+
+        The default implementation calls :meth:`close`.
+        """
+        self.close()
+
+    def __enter__(self: LLMType) -> LLMType:
+        return self
+
+    def __exit__(
+        self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException], tb: Any
+    ) -> None:
+        self.close()
+
+    async def __aenter__(self: LLMType) -> LLMType:
+        return self
+
+    async def __aexit__(
+        self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException], tb: Any
+    ) -> None:
+        await self.aclose()
+
     def __str__(self) -> str:
         """String representation of the LLM."""
         return f"{self.__class__.__name__}(model={self.model_name})"
@@ -75,3 +550,45 @@ class BaseLLM(ABC):
             f"{self.__class__.__name__}(model_name='{self.model_name}', "
             f"config={self.config})"
         )
+
+
+def check_samples(n: int) -> None:
+    """Validate the number of candidates requested from a multi-sample call.
+
+    Raises:
+        ValueError: If n is less than 1
+    """
+    if n < 1:
+        raise ValueError(f"n must be at least 1, got {n}")
+
+
+def _fan_out(call: Callable[[], str], n: int) -> List[str]:
+    """Make n concurrent calls and return their results, raising the first error."""
+    check_samples(n)
+    if n == 1:
+        return [call()]
+    # run_batch runs each call in a copy of the caller's context, so that the
+    # calls count as part of the caller's instrumented call
+    results = run_batch(lambda _: call(), range(n), min(n, DEFAULT_MAX_CONCURRENCY))
+    outputs = []
+    for result in results:
+        if result.error is not None:
+            raise result.error
+        outputs.append(result.output or "")
+    return outputs
+
+
+async def _afan_out(call: Callable[[], Awaitable[str]], n: int) -> List[str]:
+    """Asynchronous :func:`_fan_out`."""
+    check_samples(n)
+    return list(await asyncio.gather(*(call() for _ in range(n))))
+
+
+def _single_chunk(call: Callable[[], str]) -> Iterator[str]:
+    """Lazily yield the result of a non-streaming call as one chunk."""
+    yield call()
+
+
+async def _asingle_chunk(call: Callable[[], Awaitable[str]]) -> AsyncIterator[str]:
+    """Lazily yield the result of a non-streaming coroutine as one chunk."""
+    yield await call()
@@ -0,0 +1,441 @@
+"""Offline chat completions through the OpenAI Batch and Files APIs.
+
+Requests are written to JSONL files of at most ``max_requests_per_batch``
+lines, uploaded and submitted as batch jobs, which the provider runs within
+its completion window at a lower price. Results are streamed back from the
+output files line by line and mapped to the position of their request, so
+inputs and outputs of any size are processed with flat memory.
+
+FakeBatchClient implements the same subset of the client API locally on top
+of any BaseLLM, for tests and dry runs.
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+)
+
+from .base import BaseLLM
+from .batching import BatchResult
+from .exceptions import BatchJobError, DeadlineExceededError, LLMError, error_for_status
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Provider limits per batch: 50,000 requests and a 200 MB input file
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+# Batch statuses after which the job's files no longer change
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+_CUSTOM_ID_PREFIX = "request-"
+
+
+@dataclass
+class BatchJob:
+    """A submitted batch covering a contiguous range of request positions.
+
+    Attributes:
+        id: The batch ID
+        input_file_id: ID of the uploaded input file
+        first_index: Position of the batch's first request in the input
+        count: Number of requests in the batch
+        status: Last status seen, such as 'in_progress' or 'completed'
+        errors: Messages of job-level errors, e.g. a rejected input file
+    """
+
+    id: str
+    input_file_id: str
+    first_index: int
+    count: int
+    status: str = "validating"
+    errors: List[str] = field(default_factory=list)
+
+
+class BatchRunner:
+    """Submits chat requests as batch jobs and yields their results."""
+
+    def __init__(
+        self,
+        client: Any,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+        max_requests_per_batch: int = MAX_BATCH_REQUESTS,
+        max_bytes_per_batch: int = MAX_BATCH_BYTES,
+        max_wait: Optional[float] = None,
+        delete_files: bool = True,
+        metadata: Optional[Mapping[str, str]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            client: An OpenAI client, or a FakeBatchClient
+            poll_interval: Seconds between status checks of pending batches
+            completion_window: Time the provider has to complete a batch
+            max_requests_per_batch: Requests per batch; larger inputs are
+                split into several batches
+            max_bytes_per_batch: Size limit of an input file
+            max_wait: Seconds to wait for the batches before cancelling them
+                and raising DeadlineExceededError; no limit if None
+            delete_files: Whether to delete the uploaded and produced files
+                once their results were read
+            metadata: Metadata attached to every batch, e.g. the job name
+            sleep: Waits between polls
+        """
+        if max_requests_per_batch < 1:
+            raise ValueError("max_requests_per_batch must be at least 1")
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.max_requests_per_batch = max_requests_per_batch
+        self.max_bytes_per_batch = max_bytes_per_batch
+        self.max_wait = max_wait
+        self.delete_files = delete_files
+        self.metadata = dict(metadata) if metadata else None
+        self._sleep = sleep
+
+    def run(self, requests: Iterable[Mapping[str, Any]]) -> Iterator[BatchResult]:
+        """Submit chat completions requests and yield their results.
+
+        Args:
+            requests: Chat completions parameters, one mapping per request.
+                They are read lazily and spooled to disk.
+
+        Yields:
+            One BatchResult per request, indexed by its position in
+            ``requests``, in the order the batches complete
+        """
+        jobs = self.submit(requests)
+        yield from self.results(jobs)
+
+    def submit(self, requests: Iterable[Mapping[str, Any]]) -> List[BatchJob]:
+        """Write, upload and submit the requests as one or more batches.
+
+        Args:
+            requests: Chat completions parameters, one mapping per request
+
+        Returns:
+            The submitted batches, in input order
+        """
+        jobs: List[BatchJob] = []
+        lines = (_request_line(index, params) for index, params in enumerate(requests))
+        first_index = 0
+        pending: Optional[bytes] = None
+        while True:
+            with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as f:
+                path = f.name
+                count = size = 0
+                for line in itertools.chain([pending] if pending else [], lines):
+                    pending = None
+                    if count and (
+                        count >= self.max_requests_per_batch
+                        or size + len(line) > self.max_bytes_per_batch
+                    ):
+                        pending = line
+                        break
+                    f.write(line)
+                    count += 1
+                    size += len(line)
+            try:
+                if count:
+                    jobs.append(self._submit_file(path, first_index, count))
+            finally:
+                os.remove(path)
+            first_index += count
+            if pending is None:
+                return jobs
+
+    def results(self, jobs: List[BatchJob]) -> Iterator[BatchResult]:
+        """Wait for submitted batches and yield the results of each as it completes.
+
+        Args:
+            jobs: Batches returned by submit
+
+        Yields:
+            One BatchResult per request of the batches
+
+        Raises:
+            DeadlineExceededError: If max_wait passes first; the pending
+                batches are cancelled
+        """
+        pending = list(jobs)
+        deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+        while pending:
+            for job in list(pending):
+                batch = self.client.batches.retrieve(job.id)
+                job.status = batch.status
+                if batch.status in TERMINAL_STATUSES:
+                    pending.remove(job)
+                    job.errors = _job_errors(batch)
+                    yield from self._collect(job, batch)
+            if not pending:
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                for job in pending:
+                    self.client.batches.cancel(job.id)
+                raise DeadlineExceededError(
+                    f"{len(pending)} batches did not complete within {self.max_wait} seconds"
+                )
+            self._sleep(self.poll_interval)
+
+    def _submit_file(self, path: str, first_index: int, count: int) -> BatchJob:
+        with open(path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        options: Dict[str, Any] = {}
+        if self.metadata:
+            options["metadata"] = self.metadata
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            **options,
+        )
+        return BatchJob(batch.id, uploaded.id, first_index, count, batch.status)
+
+    def _collect(self, job: BatchJob, batch: Any) -> Iterator[BatchResult]:
+        """Yield the results of a finished batch, then report requests without one."""
+        seen = bytearray(job.count)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for result in self._read_results(file_id):
+                offset = result.index - job.first_index
+                if 0 <= offset < job.count and not seen[offset]:
+                    seen[offset] = 1
+                    yield result
+
+        reason = "; ".join(job.errors) or f"batch {job.status}"
+        for offset, done in enumerate(seen):
+            if not done:
+                yield BatchResult(
+                    job.first_index + offset,
+                    error=BatchJobError(f"Batch {job.id} has no result for the request: {reason}"),
+                )
+
+        if self.delete_files:
+            for file_id in (job.input_file_id, batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    with contextlib.suppress(Exception):
+                        self.client.files.delete(file_id)
+
+    def _read_results(self, file_id: str) -> Iterator[BatchResult]:
+        with self.client.files.with_streaming_response.content(file_id) as response:
+            for line in response.iter_lines():
+                if line.strip():
+                    yield parse_result_line(line)
+
+
+def parse_result_line(line: str) -> BatchResult:
+    """Turn a line of a batch output or error file into a BatchResult.
+
+    Args:
+        line: The JSON line
+
+    Returns:
+        The result of the request named by the line's custom_id
+    """
+    record = json.loads(line)
+    index = int(record["custom_id"][len(_CUSTOM_ID_PREFIX) :])
+    response = record.get("response") or {}
+    status = response.get("status_code")
+    body = response.get("body") or {}
+    if status == 200:
+        return BatchResult(index, output=body["choices"][0]["message"].get("content") or "")
+
+    error: Dict[str, Any] = body.get("error") or record.get("error") or {}
+    message = f"OpenAI batch error: {error.get('message', 'unknown error')}"
+    if status is None:
+        return BatchResult(index, error=BatchJobError(message))
+    return BatchResult(index, error=error_for_status(status, message, code=error.get("code")))
+
+
+def _request_line(index: int, params: Mapping[str, Any]) -> bytes:
+    record = {
+        "custom_id": f"{_CUSTOM_ID_PREFIX}{index}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": dict(params),
+    }
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+def _job_errors(batch: Any) -> List[str]:
+    errors = getattr(batch, "errors", None)
+    data = getattr(errors, "data", None) or []
+    return [str(getattr(error, "message", error)) for error in data]
+
+
+class FakeBatchClient:
+    """In-process stand-in for the Files and Batches APIs of an OpenAI client.
+
+    Batches are run on ``llm`` once they have been polled
+    ``polls_until_complete`` times. Files live in ``directory`` and are read
+    and written line by line, like the real service.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        directory: Optional[str] = None,
+        polls_until_complete: int = 1,
+    ) -> None:
+        """Initialize the fake client.
+
+        Args:
+            llm: Answers the requests of the batches
+            directory: Where files are stored; a temporary directory if None
+            polls_until_complete: Status checks a batch stays in progress
+        """
+        self.llm = llm
+        self.polls_until_complete = polls_until_complete
+        self._temporary: Optional[tempfile.TemporaryDirectory] = None
+        if directory is None:
+            self._temporary = tempfile.TemporaryDirectory()
+            directory = self._temporary.name
+        self.directory = directory
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self.files = _FakeFiles(self)
+        self.batches = _FakeBatches(self)
+
+    def close(self) -> None:
+        """Remove the temporary directory, if one was created."""
+        if self._temporary is not None:
+            self._temporary.cleanup()
+
+    def _new_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}-{next(self._ids)}"
+
+    def _path(self, file_id: str) -> str:
+        return os.path.join(self.directory, f"{file_id}.jsonl")
+
+    def _run(self, batch: Dict[str, Any]) -> None:
+        """Answer every request of a batch, writing the output and error files."""
+        output_id, error_id = self._new_id("file"), self._new_id("file")
+        succeeded = failed = 0
+        with open(self._path(batch["input_file_id"]), encoding="utf-8") as requests, open(
+            self._path(output_id), "w", encoding="utf-8"
+        ) as output, open(self._path(error_id), "w", encoding="utf-8") as errors:
+            for line in requests:
+                request = json.loads(line)
+                body = request["body"]
+                try:
+                    content = self.llm.chat(
+                        body["messages"],
+                        max_tokens=body.get("max_tokens"),
+                        temperature=body.get("temperature"),
+                    )
+                except LLMError as e:
+                    failed += 1
+                    status = e.status_code or 500
+                    response = {"status_code": status, "body": {"error": {"message": str(e)}}}
+                    _write_line(errors, request["custom_id"], response)
+                    continue
+                succeeded += 1
+                response = {
+                    "status_code": 200,
+                    "body": {
+                        "model": body.get("model"),
+                        "choices": [
+                            {"index": 0, "message": {"role": "assistant", "content": content}}
+                        ],
+                    },
+                }
+                _write_line(output, request["custom_id"], response)
+        for file_id, count in ((output_id, succeeded), (error_id, failed)):
+            if not count:
+                os.remove(self._path(file_id))
+        batch.update(
+            status="completed",
+            output_file_id=output_id if succeeded else None,
+            error_file_id=error_id if failed else None,
+            request_counts=SimpleNamespace(
+                total=succeeded + failed, completed=succeeded, failed=failed
+            ),
+        )
+
+
+def _write_line(f: IO[str], custom_id: str, response: Dict[str, Any]) -> None:
+    record = {"id": f"batch_req_{custom_id}", "custom_id": custom_id, "response": response}
+    f.write(json.dumps(record) + "\n")
+
+
+class _FakeFiles:
+    def __init__(self, client: FakeBatchClient) -> None:
+        self._client = client
+        self.with_streaming_response = self
+
+    def create(self, file: IO[bytes], purpose: str) -> Any:
+        file_id = self._client._new_id("file")
+        with open(self._client._path(file_id), "wb") as f:
+            for chunk in iter(lambda: file.read(1 << 16), b""):
+                f.write(chunk)
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    @contextlib.contextmanager
+    def content(self, file_id: str) -> Iterator[Any]:
+        with open(self._client._path(file_id), encoding="utf-8") as f:
+            yield SimpleNamespace(iter_lines=lambda: (line.rstrip("\n") for line in f))
+
+    def delete(self, file_id: str) -> Any:
+        os.remove(self._client._path(file_id))
+        return SimpleNamespace(id=file_id, deleted=True)
+
+
+class _FakeBatches:
+    def __init__(self, client: FakeBatchClient) -> None:
+        self._client = client
+
+    def create(
+        self,
+        input_file_id: str,
+        endpoint: str,
+        completion_window: str,
+        metadata: Optional[Mapping[str, str]] = None,
+    ) -> Any:
+        batch_id = self._client._new_id("batch")
+        self._client._batches[batch_id] = {
+            "id": batch_id,
+            "status": "validating",
+            "input_file_id": input_file_id,
+            "output_file_id": None,
+            "error_file_id": None,
+            "errors": None,
+            "metadata": metadata,
+            "polls": 0,
+        }
+        return self.retrieve(batch_id, poll=False)
+
+    def retrieve(self, batch_id: str, poll: bool = True) -> Any:
+        batch = self._client._batches[batch_id]
+        if poll and batch["status"] not in TERMINAL_STATUSES:
+            batch["polls"] += 1
+            batch["status"] = "in_progress"
+            if batch["polls"] >= self._client.polls_until_complete:
+                self._client._run(batch)
+        return SimpleNamespace(**batch)
+
+    def cancel(self, batch_id: str) -> Any:
+        batch = self._client._batches[batch_id]
+        if batch["status"] not in TERMINAL_STATUSES:
+            batch["status"] = "cancelled"
+        return SimpleNamespace(**batch)
@@ -0,0 +1,157 @@
+"""Bounded-concurrency batch execution for LLM calls."""
+
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Default number of calls kept in flight by the *_many methods
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single item of a batched call.
+
+    Attributes:
+        index: Position of the item in the input sequence
+        output: Generated text, or None if the call failed
+        error: Exception raised by the call, or None if it succeeded
+    """
+
+    index: int
+    output: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call succeeded."""
+        return self.error is None
+
+
+def _check_concurrency(max_concurrency: int) -> None:
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+
+def _run_one(call: Callable[[T], str], index: int, item: T) -> BatchResult:
+    try:
+        return BatchResult(index, output=call(item))
+    except Exception as e:
+        return BatchResult(index, error=e)
+
+
+def iter_batch(
+    call: Callable[[T], str], items: Iterable[T], max_concurrency: int
+) -> Iterator[BatchResult]:
+    """Run a sync call over items on a thread pool, yielding results as they finish.
+
+    At most ``max_concurrency`` calls are in flight, and items are pulled from
+    ``items`` lazily, so arbitrarily long inputs are processed with flat memory.
+    Each call runs in its own copy of the caller's context, like the tasks of
+    :func:`aiter_batch`, so context-scoped hooks and metrics see it.
+
+    Args:
+        call: Function producing the text for one item
+        items: Inputs to process
+        max_concurrency: Maximum number of concurrent calls
+
+    Yields:
+        One BatchResult per item, in completion order
+    """
+    _check_concurrency(max_concurrency)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    pending: Set["Future[BatchResult]"] = set()
+    try:
+        for index, item in enumerate(items):
+            context = contextvars.copy_context()
+            pending.add(executor.submit(context.run, _run_one, call, index, item))
+            if len(pending) >= max_concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Drop queued work if the consumer stopped iterating early
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_batch(
+    call: Callable[[T], Awaitable[str]], items: Iterable[T], max_concurrency: int
+) -> AsyncIterator[BatchResult]:
+    """Run a coroutine over items, yielding results as they finish.
+
+    At most ``max_concurrency`` tasks are in flight; the rest of ``items`` is
+    only consumed as slots free up.
+
+    Args:
+        call: Coroutine function producing the text for one item
+        items: Inputs to process
+        max_concurrency: Maximum number of concurrent calls
+
+    Yields:
+        One BatchResult per item, in completion order
+    """
+    _check_concurrency(max_concurrency)
+
+    async def run_one(index: int, item: T) -> BatchResult:
+        try:
+            return BatchResult(index, output=await call(item))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return BatchResult(index, error=e)
+
+    pending: Set["asyncio.Future[BatchResult]"] = set()
+    try:
+        for index, item in enumerate(items):
+            pending.add(asyncio.ensure_future(run_one(index, item)))
+            if len(pending) >= max_concurrency:
+                done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def run_batch(
+    call: Callable[[T], str], items: Iterable[T], max_concurrency: int
+) -> List[BatchResult]:
+    """Run a sync call over items concurrently and return results in input order."""
+    results = list(iter_batch(call, items, max_concurrency))
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+async def arun_batch(
+    call: Callable[[T], Awaitable[str]], items: Iterable[T], max_concurrency: int
+) -> List[BatchResult]:
+    """Run a coroutine over items concurrently and return results in input order."""
+    results = [result async for result in aiter_batch(call, items, max_concurrency)]
+    results.sort(key=lambda result: result.index)
+    return results
@@ -0,0 +1,507 @@
+"""Response caching for LLM calls."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from .base import BaseLLM
+from .conversation import Conversation, Messages
+from .streaming import AsyncTextStream, TextStream
+from .wrapper import LLMWrapper
+
+# Decides whether a request may be cached, given its temperature and extra kwargs
+CachePredicate = Callable[[Optional[float], Dict[str, Any]], bool]
+
+
+def make_request_key(
+    model_name: str,
+    kind: str,
+    payload: Any,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    kwargs: Dict[str, Any],
+) -> str:
+    """Build a canonical key identifying an LLM request.
+
+    The request is serialized as JSON with sorted keys and no whitespace, so
+    logically identical requests map to the same key regardless of dict order.
+
+    Args:
+        model_name: The model the request targets
+        kind: The kind of call, e.g. 'generate' or 'chat'
+        payload: The prompt or message list
+        max_tokens: Maximum number of tokens to generate
+        temperature: Sampling temperature
+        kwargs: Additional generation parameters
+
+    Returns:
+        A hex SHA-256 digest of the canonical request
+    """
+    if isinstance(payload, Conversation):
+        payload = payload.to_messages()
+    request = {
+        "model": model_name,
+        "kind": kind,
+        "input": payload,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "kwargs": kwargs,
+    }
+    canonical = json.dumps(
+        request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=repr
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(temperature: Optional[float], kwargs: Dict[str, Any]) -> bool:
+    """Default cache predicate: only cache greedy, single-sample requests."""
+    return temperature == 0 and kwargs.get("n", 1) == 1
+
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness.
+
+    Attributes:
+        hits: Lookups answered from the cache
+        misses: Cacheable lookups that had to call the LLM
+        bypassed: Requests the predicate excluded from caching
+    """
+
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of cacheable lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CacheBackend(ABC):
+    """Abstract storage for cached responses."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store a response under a key."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every cached response."""
+
+    def close(self) -> None:
+        """Release resources held by the backend.
+
+        The default implementation does nothing. Calling it more than once is
+        safe.
+        """
+        # Deliberately a no-op: backends without resources need not override it
+        return None
+
+
+class InMemoryCache(CacheBackend):
+    """Thread-safe in-process LRU cache with optional TTL and size bound."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total UTF-8 size of cached responses, if bounded
+            ttl: Seconds after which an entry expires, if any
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float], int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response, evicting least recently used entries as needed."""
+        size = len(value.encode("utf-8"))
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._size += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+
+class SQLiteCache(CacheBackend):
+    """Persistent cache in a SQLite database in WAL mode.
+
+    WAL mode lets several processes read and write the same cache file
+    concurrently. Each thread uses its own connection; :meth:`close` closes
+    all of them, and the cache reconnects if it is used again.
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: Optional[float] = None) -> None:
+        """Initialize the cache, creating the database if needed.
+
+        Args:
+            path: Location of the SQLite database file
+            ttl: Seconds after which an entry expires, if any
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if absent or expired."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM responses WHERE key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response under a key."""
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at),
+        )
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        self._connection().execute("DELETE FROM responses")
+
+    def prune(self) -> int:
+        """Delete expired entries.
+
+        Returns:
+            The number of deleted entries
+        """
+        cursor = self._connection().execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the connections of every thread, checkpointing the WAL file."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+    def __len__(self) -> int:
+        return int(self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(self._local, "connection", None)
+        if connection is None:
+            # Only the owning thread uses the connection, but close() may run
+            # on any thread
+            connection = sqlite3.connect(
+                str(self.path), timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                self._local.connection = connection
+                self._connections.append(connection)
+        return connection
+
+
+def resolve_cache(cache: Union[CacheBackend, str]) -> CacheBackend:
+    """Turn a cache specification into a backend.
+
+    Args:
+        cache: A CacheBackend instance, 'memory' for a default InMemoryCache,
+            or 'sqlite:<path>' for a SQLiteCache at the given path
+
+    Returns:
+        The cache backend
+
+    Raises:
+        ValueError: If the specification is not recognized
+    """
+    if isinstance(cache, CacheBackend):
+        return cache
+    if cache == "memory":
+        return InMemoryCache()
+    if cache.startswith("sqlite:"):
+        return SQLiteCache(cache[len("sqlite:") :])
+    raise ValueError(
+        f"Unsupported cache: '{cache}'. Use a CacheBackend, 'memory' or 'sqlite:<path>'"
+    )
+
+
+class CachedLLM(LLMWrapper):
+    """LLM wrapper that answers repeated requests from a cache."""
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        backend: Union[CacheBackend, str] = "memory",
+        predicate: CachePredicate = is_deterministic,
+    ) -> None:
+        """Initialize the caching wrapper.
+
+        Args:
+            llm: The LLM whose responses are cached
+            backend: Cache backend or specification accepted by resolve_cache
+            predicate: Decides which requests may be cached; by default only
+                requests with temperature 0
+        """
+        super().__init__(llm)
+        self.backend = resolve_cache(backend)
+        self.predicate = predicate
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Return a cached response or generate and cache one."""
+        key = self._key("generate", prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.llm.generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(key, response)
+        return response
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Return a cached chat response or generate and cache one."""
+        key = self._key("chat", messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.llm.chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(key, response)
+        return response
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate` backed by the wrapped LLM's agenerate."""
+        key = self._key("generate", prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.llm.agenerate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(key, response)
+        return response
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat` backed by the wrapped LLM's achat."""
+        key = self._key("chat", messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.llm.achat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(key, response)
+        return response
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a cached response, or stream and cache the full text on completion."""
+        key = self._key("generate", prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return TextStream([cached])
+        stream = self.llm.stream_generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(key, stream.text))
+        return stream
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a cached chat response, or stream and cache it on completion."""
+        key = self._key("chat", messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return TextStream([cached])
+        stream = self.llm.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(key, stream.text))
+        return stream
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        key = self._key("generate", prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return AsyncTextStream(_aiter_one(cached))
+        stream = self.llm.astream_generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(key, stream.text))
+        return stream
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+        key = self._key("chat", messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return AsyncTextStream(_aiter_one(cached))
+        stream = self.llm.astream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(key, stream.text))
+        return stream
+
+    def close(self) -> None:
+        """Close the cache backend and the wrapped LLM."""
+        self.backend.close()
+        super().close()
+
+    async def aclose(self) -> None:
+        """Close the cache backend and the wrapped LLM, including its async resources."""
+        self.backend.close()
+        await super().aclose()
+
+    def _key(
+        self,
+        kind: str,
+        payload: Any,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Optional[str]:
+        """Return the cache key, or None if the request must not be cached."""
+        if not self.predicate(temperature, kwargs):
+            with self._stats_lock:
+                self.stats.bypassed += 1
+            return None
+        return make_request_key(self.model_name, kind, payload, max_tokens, temperature, kwargs)
+
+    def _lookup(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        cached = self.backend.get(key)
+        with self._stats_lock:
+            if cached is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return cached
+
+    def _store(self, key: Optional[str], response: str) -> None:
+        if key is not None:
+            self.backend.set(key, response)
+
+
+async def _aiter_one(text: str) -> AsyncIterator[str]:
+    """Yield a cached response as a single chunk."""
+    yield text
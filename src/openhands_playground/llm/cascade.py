@@ -0,0 +1,442 @@
+"""Model cascades: answer with a cheap model first, escalating only when needed.
+
+A CascadeLLM holds tiers ordered from the cheapest and fastest model to the
+most capable one. Each response is checked by acceptance checks; a response
+that fails a check, or a call that fails, escalates the request to the next
+tier. The last tier's response is always accepted. In parallel mode every
+tier is called at once and the first acceptable response wins, cancelling
+the calls still running.
+
+Per-tier hit rates, and estimates of the latency and cost saved compared
+with sending everything to the last tier, are available from stats().
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .base import BaseLLM
+from .conversation import Messages
+from .hooks import TokenUsage
+from .metrics import DEFAULT_PRICES, ModelPrice
+from .pipeline import parse_json
+from .tokens import TokenCounter
+
+# Decides whether a response is good enough to return
+AcceptanceCheck = Callable[[str], bool]
+
+
+def min_length(chars: int) -> AcceptanceCheck:
+    """Accept responses of at least ``chars`` characters, ignoring surrounding whitespace."""
+
+    def check(text: str) -> bool:
+        return len(text.strip()) >= chars
+
+    return check
+
+
+def is_json(text: str) -> bool:
+    """Accept responses that parse as JSON, optionally inside a Markdown code fence."""
+    try:
+        parse_json(text)
+    except ValueError:
+        return False
+    return True
+
+
+@dataclass
+class Tier:
+    """One model of a cascade, with its acceptance checks and statistics.
+
+    Attributes:
+        llm: The tier's LLM
+        checks: Checks its responses must pass, besides the cascade's own
+        price: Price used for cost estimates; looked up by model name in
+            DEFAULT_PRICES if None, and free if unknown
+        name: Name used in stats; derived from the LLM if empty
+        calls: Calls sent to the tier
+        completed: Calls that returned a response
+        accepted: Responses returned to the caller
+        rejected: Responses that failed a check
+        errors: Calls that failed
+        cancelled: Calls cancelled in parallel mode once another tier won
+        seconds: Total duration of the completed calls
+        cost: Estimated cost of the completed calls, in USD
+    """
+
+    llm: BaseLLM
+    checks: Sequence[AcceptanceCheck] = ()
+    price: Optional[ModelPrice] = None
+    name: str = ""
+    calls: int = 0
+    completed: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    seconds: float = 0.0
+    cost: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.name:
+            self.name = str(self.llm)
+        if self.price is None:
+            self.price = DEFAULT_PRICES.get(self.llm.model_name)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the requests reaching this tier that it answered."""
+        return self.accepted / self.calls if self.calls else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        """Mean duration of the completed calls."""
+        return self.seconds / self.completed if self.completed else 0.0
+
+
+class CascadeLLM(BaseLLM):
+    """LLM escalating requests through tiers of models until a response is accepted.
+
+    Streams use the single-chunk defaults of BaseLLM, since a response can
+    only be checked once it is complete.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[Union[BaseLLM, Tier]],
+        checks: Sequence[AcceptanceCheck] = (),
+        parallel: bool = False,
+        model_name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the cascade.
+
+        Args:
+            tiers: LLMs, or Tiers to set per-tier checks and prices, from the
+                cheapest to the most capable
+            checks: Checks every tier's response must pass, except the last's
+            parallel: Call every tier at once and return the first acceptable
+                response instead of escalating one tier at a time
+            model_name: Name reported by the cascade; built from the tiers'
+                model names if None
+            **kwargs: Additional configuration parameters
+
+        Raises:
+            ValueError: If there are no tiers
+        """
+        if not tiers:
+            raise ValueError("CascadeLLM needs at least one tier")
+        self.tiers = [t if isinstance(t, Tier) else Tier(t) for t in tiers]
+        default_name = "cascade:" + "+".join(t.llm.model_name for t in self.tiers)
+        super().__init__(model_name or default_name, **kwargs)
+        self.checks = list(checks)
+        self.parallel = parallel
+        self.requests = 0
+        self.seconds = 0.0
+        self.baseline_cost = 0.0
+        self._counter = TokenCounter(model_name=self.tiers[-1].llm.model_name)
+        self._lock = threading.Lock()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate text with the first tier whose response is accepted.
+
+        Raises:
+            LLMError: The last tier's error if no tier produced an accepted response
+        """
+        return self._call(
+            lambda llm: llm.generate(prompt, max_tokens, temperature, **kwargs),
+            self._counter.count_text(prompt),
+        )
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Chat with the first tier whose response is accepted.
+
+        Raises:
+            LLMError: The last tier's error if no tier produced an accepted response
+        """
+        return self._call(
+            lambda llm: llm.chat(messages, max_tokens, temperature, **kwargs),
+            self._counter.count_messages(messages),
+        )
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+        return await self._acall(
+            lambda llm: llm.agenerate(prompt, max_tokens, temperature, **kwargs),
+            self._counter.count_text(prompt),
+        )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+        return await self._acall(
+            lambda llm: llm.achat(messages, max_tokens, temperature, **kwargs),
+            self._counter.count_messages(messages),
+        )
+
+    @property
+    def latency_saved(self) -> float:
+        """Estimated seconds saved compared with sending every request to the last tier."""
+        last = self.tiers[-1]
+        if not last.completed:
+            return 0.0
+        return self.requests * last.mean_seconds - self.seconds
+
+    @property
+    def cost_saved(self) -> float:
+        """Estimated USD saved compared with sending every request to the last tier."""
+        return self.baseline_cost - sum(tier.cost for tier in self.tiers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier hit rates and the estimated latency and cost saved."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "latency_saved": self.latency_saved,
+                "cost_saved": self.cost_saved,
+                "tiers": [
+                    {
+                        "name": t.name,
+                        "calls": t.calls,
+                        "accepted": t.accepted,
+                        "rejected": t.rejected,
+                        "errors": t.errors,
+                        "cancelled": t.cancelled,
+                        "hit_rate": t.hit_rate,
+                        "mean_seconds": t.mean_seconds,
+                        "cost": t.cost,
+                    }
+                    for t in self.tiers
+                ],
+            }
+
+    def close(self) -> None:
+        """Close every tier."""
+        for tier in self.tiers:
+            tier.llm.close()
+
+    async def aclose(self) -> None:
+        """Close every tier, including its async resources."""
+        for tier in self.tiers:
+            await tier.llm.aclose()
+
+    def _call(self, call: Callable[[BaseLLM], str], prompt_tokens: int) -> str:
+        start = time.perf_counter()
+        if self.parallel:
+            text = self._call_parallel(call, prompt_tokens)
+        else:
+            text = self._call_sequential(call, prompt_tokens)
+        self._finish(start, prompt_tokens, text)
+        return text
+
+    async def _acall(self, call: Callable[[BaseLLM], Awaitable[str]], prompt_tokens: int) -> str:
+        start = time.perf_counter()
+        if self.parallel:
+            text = await self._acall_parallel(call, prompt_tokens)
+        else:
+            text = await self._acall_sequential(call, prompt_tokens)
+        self._finish(start, prompt_tokens, text)
+        return text
+
+    def _call_sequential(self, call: Callable[[BaseLLM], str], prompt_tokens: int) -> str:
+        for index, tier in enumerate(self.tiers):
+            self._begin(tier)
+            start = time.perf_counter()
+            try:
+                text = call(tier.llm)
+            except Exception:
+                self._fail(tier)
+                if index == len(self.tiers) - 1:
+                    raise
+                continue
+            self._complete(tier, prompt_tokens, text, start)
+            if self._decide(index, text):
+                return text
+        raise AssertionError("unreachable: the last tier always answers or raises")
+
+    async def _acall_sequential(
+        self, call: Callable[[BaseLLM], Awaitable[str]], prompt_tokens: int
+    ) -> str:
+        for index, tier in enumerate(self.tiers):
+            self._begin(tier)
+            start = time.perf_counter()
+            try:
+                text = await call(tier.llm)
+            except Exception:
+                self._fail(tier)
+                if index == len(self.tiers) - 1:
+                    raise
+                continue
+            self._complete(tier, prompt_tokens, text, start)
+            if self._decide(index, text):
+                return text
+        raise AssertionError("unreachable: the last tier always answers or raises")
+
+    def _call_parallel(self, call: Callable[[BaseLLM], str], prompt_tokens: int) -> str:
+        def attempt(tier: Tier) -> str:
+            start = time.perf_counter()
+            try:
+                text = call(tier.llm)
+            except Exception:
+                self._fail(tier)
+                raise
+            self._complete(tier, prompt_tokens, text, start)
+            return text
+
+        # Sync calls cannot be interrupted: losing tiers finish in the
+        # background and only their results are discarded
+        executor = ThreadPoolExecutor(max_workers=len(self.tiers))
+        pending: Dict["Future[str]", int] = {}
+        error: Optional[BaseException] = None
+        try:
+            for index, tier in enumerate(self.tiers):
+                self._begin(tier)
+                pending[executor.submit(attempt, tier)] = index
+            while pending:
+                done, _ = wait(set(pending), return_when=FIRST_COMPLETED)
+                winner, error = self._settle(done, pending, error)
+                if winner is not None:
+                    return winner
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+        if error is None:
+            raise RuntimeError("Parallel cascade ended without a response or an error")
+        raise error
+
+    async def _acall_parallel(
+        self, call: Callable[[BaseLLM], Awaitable[str]], prompt_tokens: int
+    ) -> str:
+        async def attempt(tier: Tier) -> str:
+            start = time.perf_counter()
+            try:
+                text = await call(tier.llm)
+            except asyncio.CancelledError:
+                with self._lock:
+                    tier.cancelled += 1
+                raise
+            except Exception:
+                self._fail(tier)
+                raise
+            self._complete(tier, prompt_tokens, text, start)
+            return text
+
+        pending: Dict["asyncio.Future[str]", int] = {}
+        error: Optional[BaseException] = None
+        try:
+            for index, tier in enumerate(self.tiers):
+                self._begin(tier)
+                pending[asyncio.ensure_future(attempt(tier))] = index
+            while pending:
+                done, _ = await asyncio.wait(set(pending), return_when=FIRST_COMPLETED)
+                winner, error = self._settle(done, pending, error)
+                if winner is not None:
+                    return winner
+        finally:
+            for task in pending:
+                task.cancel()
+        if error is None:
+            raise RuntimeError("Parallel cascade ended without a response or an error")
+        raise error
+
+    def _settle(
+        self,
+        done: Iterable[Any],
+        pending: Dict[Any, int],
+        error: Optional[BaseException],
+    ) -> Tuple[Optional[str], Optional[BaseException]]:
+        """Check completed parallel calls in tier order.
+
+        Args:
+            done: Completed futures, removed from ``pending``
+            pending: Futures still to settle, mapped to their tier index
+            error: Error to raise if nothing is accepted, so far
+
+        Returns:
+            The first accepted response, or None, and the error to raise if
+            no response is accepted: the last tier's, or else the first seen
+        """
+        winner: Optional[str] = None
+        for future in sorted(done, key=pending.__getitem__):
+            index = pending.pop(future)
+            failure = future.exception()
+            if failure is not None:
+                if error is None or index == len(self.tiers) - 1:
+                    error = failure
+            elif winner is None and self._decide(index, future.result()):
+                winner = future.result()
+        return winner, error
+
+    def _decide(self, index: int, text: str) -> bool:
+        """Record whether a tier's response is accepted; the last tier's always is."""
+        tier = self.tiers[index]
+        checks = list(self.checks) + list(tier.checks)
+        accepted = index == len(self.tiers) - 1 or all(check(text) for check in checks)
+        with self._lock:
+            if accepted:
+                tier.accepted += 1
+            else:
+                tier.rejected += 1
+        return accepted
+
+    def _begin(self, tier: Tier) -> None:
+        with self._lock:
+            tier.calls += 1
+
+    def _fail(self, tier: Tier) -> None:
+        with self._lock:
+            tier.errors += 1
+
+    def _complete(self, tier: Tier, prompt_tokens: int, text: str, start: float) -> None:
+        usage = TokenUsage(prompt_tokens, self._counter.count_text(text))
+        with self._lock:
+            tier.completed += 1
+            tier.seconds += time.perf_counter() - start
+            if tier.price is not None:
+                tier.cost += tier.price.cost(usage)
+
+    def _finish(self, start: float, prompt_tokens: int, text: str) -> None:
+        price = self.tiers[-1].price
+        usage = TokenUsage(prompt_tokens, self._counter.count_text(text))
+        with self._lock:
+            self.requests += 1
+            self.seconds += time.perf_counter() - start
+            if price is not None:
+                self.baseline_cost += price.cost(usage)
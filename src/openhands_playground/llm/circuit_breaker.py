@@ -0,0 +1,595 @@
+"""Circuit breakers that fail fast while an LLM endpoint is degraded."""
+
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .base import BaseLLM
+from .conversation import Messages
+from .exceptions import CircuitOpenError, LLMError
+from .streaming import AsyncTextStream, TextStream
+from .wrapper import LLMWrapper
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Whether an error says something about the endpoint's health.
+
+    Transient errors (timeouts, server errors, rate limits) and unexpected
+    exceptions count; errors caused by the request itself, such as an
+    invalid request or a context length error, do not.
+    """
+    if isinstance(error, LLMError):
+        return error.retryable
+    return isinstance(error, Exception)
+
+
+class CircuitBreaker:
+    """Tracks the health of one endpoint and rejects calls while it is failing.
+
+    Outcomes are counted in a rolling time window. Once at least
+    ``minimum_calls`` calls ended in it and the share of failed or slow calls
+    reaches ``failure_threshold``, the circuit opens: calls are rejected with
+    CircuitOpenError, without waiting on the endpoint, for ``open_seconds``.
+    The circuit then turns half-open and lets ``half_open_calls`` trial calls
+    through; it closes if they all succeed and opens again if any fails.
+
+    The breaker is thread-safe and can be shared by every LLM talking to the
+    same endpoint, see get_circuit_breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        minimum_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+        slow_call_seconds: Optional[float] = None,
+        is_failure: Callable[[BaseException], bool] = is_endpoint_failure,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a closed breaker.
+
+        Args:
+            failure_threshold: Share of failed or slow calls that opens the circuit
+            minimum_calls: Calls in the window needed before it may open
+            window_seconds: Length of the rolling window
+            open_seconds: How long calls are rejected before trial calls
+            half_open_calls: Trial calls that must succeed to close the circuit
+            slow_call_seconds: Calls taking longer count as failures; calls are
+                never slow if None
+            is_failure: Decides which exceptions count as failures
+            clock: Time source, in seconds
+        """
+        if not 0.0 < failure_threshold <= 1.0:
+            raise ValueError(f"failure_threshold must be in (0, 1], got {failure_threshold}")
+        if minimum_calls < 1 or half_open_calls < 1:
+            raise ValueError("minimum_calls and half_open_calls must be at least 1")
+        if window_seconds <= 0 or open_seconds < 0:
+            raise ValueError("window_seconds must be positive and open_seconds not negative")
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.is_failure = is_failure
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window = _RollingWindow(window_seconds)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._current_state()
+
+    def allows_calls(self) -> bool:
+        """Whether a call made now would be let through."""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and self._trials < self.half_open_calls)
+
+    def acquire(self) -> None:
+        """Let a call through, or reject it.
+
+        Every call let through must be followed by record_success,
+        record_failure, record or release.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all
+                trial calls in flight
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self._opened_at + self.open_seconds - self._clock())
+        raise CircuitOpenError(
+            f"Circuit is {state}; call rejected without contacting the endpoint",
+            retry_after=retry_after,
+        )
+
+    def record(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a call let through by acquire.
+
+        Args:
+            latency: Duration of the call in seconds
+            error: The exception the call raised, if any; exceptions that
+                ``is_failure`` rejects count as successes
+        """
+        if error is not None and self.is_failure(error):
+            self.record_failure(latency)
+        else:
+            self.record_success(latency)
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful call; it still fails if slower than slow_call_seconds."""
+        if self.slow_call_seconds is not None and latency > self.slow_call_seconds:
+            self._record(latency, failed=True)
+        else:
+            self._record(latency, failed=False)
+
+    def record_failure(self, latency: float) -> None:
+        """Record a failed call."""
+        self._record(latency, failed=True)
+
+    def release(self) -> None:
+        """Give back a call let through by acquire without recording an outcome.
+
+        Used for calls that were cancelled or abandoned before the endpoint
+        answered.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def reset(self) -> None:
+        """Close the circuit and forget the recorded calls."""
+        with self._lock:
+            self._close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and window statistics, e.g. for dashboards."""
+        with self._lock:
+            state = self._current_state()
+            now = self._clock()
+            calls, failures, latency_sum = self._window.totals(now)
+            return {
+                "state": state,
+                "calls": calls,
+                "failures": failures,
+                "failure_rate": failures / calls if calls else 0.0,
+                "mean_latency": latency_sum / calls if calls else None,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "retry_after": (
+                    max(0.0, self._opened_at + self.open_seconds - now) if state == OPEN else 0.0
+                ),
+            }
+
+    def _record(self, latency: float, failed: bool) -> None:
+        with self._lock:
+            now = self._clock()
+            state = self._current_state()
+            if state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._close()
+                return
+            if state == OPEN:
+                # A call started before the circuit opened
+                return
+            self._window.add(now, latency, failed)
+            calls, failures, _ = self._window.totals(now)
+            if calls >= self.minimum_calls and failures >= self.failure_threshold * calls:
+                self._open(now)
+
+    def _current_state(self) -> str:
+        """The state, moving from open to half-open once open_seconds passed."""
+        if self._state == OPEN and self._clock() >= self._opened_at + self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+        return self._state
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._window = _RollingWindow(self.window_seconds)
+        self._trials = 0
+        self._trial_successes = 0
+
+
+class _RollingWindow:
+    """Call counts over the last ``seconds``, kept in a ring of time slots.
+
+    Recording and summing are O(slots), independent of the call rate.
+    """
+
+    SLOTS = 10
+
+    def __init__(self, seconds: float) -> None:
+        self.slot_seconds = seconds / self.SLOTS
+        # Per slot: [epoch, calls, failures, latency_sum]
+        self._slots: List[List[float]] = [[-1, 0, 0, 0.0] for _ in range(self.SLOTS)]
+
+    def add(self, now: float, latency: float, failed: bool) -> None:
+        epoch = int(now // self.slot_seconds)
+        slot = self._slots[epoch % self.SLOTS]
+        if slot[0] != epoch:
+            slot[:] = [epoch, 0, 0, 0.0]
+        slot[1] += 1
+        slot[2] += failed
+        slot[3] += latency
+
+    def totals(self, now: float) -> Tuple[int, int, float]:
+        oldest = int(now // self.slot_seconds) - self.SLOTS
+        calls = failures = 0
+        latency_sum = 0.0
+        for epoch, slot_calls, slot_failures, slot_latency in self._slots:
+            if epoch > oldest:
+                calls += int(slot_calls)
+                failures += int(slot_failures)
+                latency_sum += slot_latency
+        return calls, failures, latency_sum
+
+
+class CircuitBreakerLLM(LLMWrapper):
+    """LLM wrapper that fails fast with CircuitOpenError while the breaker is open.
+
+    Streams count as successful once their first chunk arrives, and as failed
+    if they raise before it.
+    """
+
+    def __init__(self, llm: BaseLLM, breaker: Optional[CircuitBreaker] = None) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            llm: The LLM whose calls are guarded
+            breaker: The breaker to use, e.g. one shared per endpoint via
+                get_circuit_breaker; a new one with default settings if None
+        """
+        super().__init__(llm)
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def is_healthy(self) -> bool:
+        """Whether the breaker currently lets calls through; used by RouterLLM."""
+        return self.breaker.allows_calls()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate text unless the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit rejects the call
+        """
+        return self._call(
+            lambda: self.llm.generate(
+                prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a chat response unless the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit rejects the call
+        """
+        return self._call(
+            lambda: self.llm.chat(
+                messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+        return await self._acall(
+            lambda: self.llm.agenerate(
+                prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+        return await self._acall(
+            lambda: self.llm.achat(
+                messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate n candidates unless the circuit is open."""
+        return self._call(
+            lambda: self.llm.generate_n(
+                prompt, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate n chat candidates unless the circuit is open."""
+        return self._call(
+            lambda: self.llm.chat_n(
+                messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`generate_n`."""
+        return await self._acall(
+            lambda: self.llm.agenerate_n(
+                prompt, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`chat_n`."""
+        return await self._acall(
+            lambda: self.llm.achat_n(
+                messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+        )
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream generated text unless the circuit is open."""
+        return TextStream(
+            self._iter_stream(
+                lambda: self.llm.stream_generate(
+                    prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+                )
+            )
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a chat response unless the circuit is open."""
+        return TextStream(
+            self._iter_stream(
+                lambda: self.llm.stream_chat(
+                    messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+                )
+            )
+        )
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        return AsyncTextStream(
+            self._aiter_stream(
+                lambda: self.llm.astream_generate(
+                    prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+                )
+            )
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+        return AsyncTextStream(
+            self._aiter_stream(
+                lambda: self.llm.astream_chat(
+                    messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+                )
+            )
+        )
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        self.breaker.acquire()
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self.breaker.record(time.perf_counter() - start, e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success(time.perf_counter() - start)
+        return result
+
+    async def _acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self.breaker.acquire()
+        start = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception as e:
+            self.breaker.record(time.perf_counter() - start, e)
+            raise
+        except BaseException:
+            # Cancelled before the endpoint answered
+            self.breaker.release()
+            raise
+        self.breaker.record_success(time.perf_counter() - start)
+        return result
+
+    def _iter_stream(self, open_stream: Callable[[], TextStream]) -> Iterator[str]:
+        self.breaker.acquire()
+        start = time.perf_counter()
+        recorded = False
+        try:
+            for chunk in open_stream():
+                if not recorded:
+                    recorded = True
+                    self.breaker.record_success(time.perf_counter() - start)
+                yield chunk
+        except Exception as e:
+            if not recorded:
+                recorded = True
+                self.breaker.record(time.perf_counter() - start, e)
+            raise
+        finally:
+            if not recorded:
+                # Abandoned before the first chunk, or finished without any
+                self.breaker.release()
+
+    async def _aiter_stream(self, open_stream: Callable[[], AsyncTextStream]) -> AsyncIterator[str]:
+        self.breaker.acquire()
+        start = time.perf_counter()
+        recorded = False
+        try:
+            async for chunk in open_stream():
+                if not recorded:
+                    recorded = True
+                    self.breaker.record_success(time.perf_counter() - start)
+                yield chunk
+        except Exception as e:
+            if not recorded:
+                recorded = True
+                self.breaker.record(time.perf_counter() - start, e)
+            raise
+        finally:
+            if not recorded:
+                self.breaker.release()
+
+
+_registry_lock = threading.Lock()
+_registry: Dict[Hashable, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(key: Hashable, **settings: Any) -> CircuitBreaker:
+    """Return the process-wide breaker for an endpoint, creating it on first use.
+
+    Every LLM using the same key shares one breaker, so all instances talking
+    to a degraded endpoint stop calling it together. The settings are only
+    used when the breaker is created.
+
+    Args:
+        key: Identifies the endpoint, e.g. (provider, model_name, base_url)
+        **settings: CircuitBreaker arguments for a new breaker
+
+    Returns:
+        The shared CircuitBreaker
+    """
+    with _registry_lock:
+        breaker = _registry.get(key)
+        if breaker is None:
+            breaker = _registry[key] = CircuitBreaker(**settings)
+        return breaker
+
+
+def circuit_breaker_states() -> Dict[Hashable, Dict[str, Any]]:
+    """Snapshot of every shared breaker, keyed like get_circuit_breaker."""
+    with _registry_lock:
+        breakers = list(_registry.items())
+    return {key: breaker.snapshot() for key, breaker in breakers}
+
+
+def reset_circuit_breakers(keys: Optional[List[Hashable]] = None) -> None:
+    """Forget shared breakers, so that they are recreated with new settings.
+
+    Args:
+        keys: The keys to forget; all breakers if None
+    """
+    with _registry_lock:
+        if keys is None:
+            _registry.clear()
+        else:
+            for key in keys:
+                _registry.pop(key, None)
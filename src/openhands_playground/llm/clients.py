@@ -0,0 +1,133 @@
+"""Process-wide sharing of HTTP clients between LLM instances."""
+
+import asyncio
+import inspect
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class HTTPSettings:
+    """Connection pool settings of a provider HTTP client.
+
+    Attributes:
+        max_connections: Maximum number of open connections
+        max_keepalive_connections: Maximum number of idle connections kept open
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Whether to negotiate HTTP/2 (requires the 'h2' package)
+        timeout: Request timeout in seconds
+        connect_timeout: Timeout for establishing a connection, in seconds
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    timeout: float = 600.0
+    connect_timeout: float = 5.0
+
+
+class ClientRegistry:
+    """Reference-counted registry of clients shared by key.
+
+    The first ``acquire`` of a key builds the client; later ones return the
+    same object. A client is closed when the last holder releases it. Async
+    clients are additionally keyed by the running event loop, because their
+    connection pools cannot be used from another loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Any, int]] = {}
+
+    def acquire(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the shared client for a key, building it on first use.
+
+        Args:
+            key: Identifies interchangeable clients, e.g. (api_key, base_url, settings)
+            factory: Builds the client when none is registered for the key
+
+        Returns:
+            The shared client
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                client = factory()
+                self._entries[key] = (client, 1)
+                return client
+            client, references = entry
+            self._entries[key] = (client, references + 1)
+            return client
+
+    def acquire_async(self, key: Hashable, factory: Callable[[], Any]) -> Tuple[Hashable, Any]:
+        """Return the shared async client for a key on the running event loop.
+
+        Returns:
+            The loop-specific key to release the client with, and the client
+        """
+        loop_key = (key, asyncio.get_running_loop())
+        return loop_key, self.acquire(loop_key, factory)
+
+    def release(self, key: Hashable) -> None:
+        """Drop one reference to a client, closing it if it was the last.
+
+        Async clients must be released with :meth:`arelease` instead.
+        """
+        client = self._decrement(key)
+        if client is not None:
+            client.close()
+
+    async def arelease(self, key: Hashable) -> None:
+        """Drop one reference to a client, closing it (awaiting if needed) if it was the last."""
+        client = self._decrement(key)
+        if client is not None:
+            result = client.close()
+            if inspect.isawaitable(result):
+                await result
+
+    def forget(self, key: Hashable) -> None:
+        """Drop one reference without closing the client.
+
+        Used for async clients whose event loop has gone away, since they can
+        no longer be closed from it.
+        """
+        self._decrement(key)
+
+    def close_all(self) -> None:
+        """Close every sync client and forget all entries.
+
+        Async clients are forgotten without being closed; release them with
+        :meth:`arelease` from their event loop to close them deterministically.
+        """
+        with self._lock:
+            clients: List[Any] = [client for client, _ in self._entries.values()]
+            self._entries.clear()
+        for client in clients:
+            if not inspect.iscoroutinefunction(client.close):
+                client.close()
+
+    def references(self, key: Hashable) -> int:
+        """Number of holders of the client registered under a key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry else 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _decrement(self, key: Hashable) -> Optional[Any]:
+        """Drop a reference; return the client if it should now be closed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            client, references = entry
+            if references > 1:
+                self._entries[key] = (client, references - 1)
+                return None
+            del self._entries[key]
+            return client
@@ -0,0 +1,79 @@
+"""Environment configuration loaded from .env files once per process."""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+_loaded_lock = threading.Lock()
+# Result of loading each .env file, keyed by (location, override)
+_loaded: Dict[Tuple[str, bool], bool] = {}
+
+
+def load_env(dotenv_path: Optional[str] = None, override: bool = False) -> bool:
+    """Load variables from a .env file into ``os.environ``, once per file.
+
+    The first call for a file searches for and parses it; later calls return
+    the cached result without touching the filesystem, so this is cheap
+    enough to call every time an LLM is created. Use :func:`reload_env`
+    after the file changed.
+
+    Args:
+        dotenv_path: Path of the .env file. If None, the file is searched in
+            the working directory and its parents, and the result is cached
+            per working directory.
+        override: Whether values from the file replace variables that are
+            already set
+
+    Returns:
+        True if a .env file was found and loaded
+    """
+    key = (_location(dotenv_path), override)
+    loaded = _loaded.get(key)
+    if loaded is not None:
+        return loaded
+
+    with _loaded_lock:
+        loaded = _loaded.get(key)
+        if loaded is None:
+            loaded = _load(dotenv_path, override)
+            _loaded[key] = loaded
+    return loaded
+
+
+def reload_env(dotenv_path: Optional[str] = None, override: bool = False) -> bool:
+    """Load a .env file again, even if it was loaded before.
+
+    Args:
+        dotenv_path: Path of the .env file, or None to search for it
+        override: Whether values from the file replace variables that are
+            already set
+
+    Returns:
+        True if a .env file was found and loaded
+    """
+    with _loaded_lock:
+        loaded = _load(dotenv_path, override)
+        _loaded[(_location(dotenv_path), override)] = loaded
+    return loaded
+
+
+def reset_env_cache() -> None:
+    """Forget which .env files were loaded, so the next load_env reads them."""
+    with _loaded_lock:
+        _loaded.clear()
+
+
+def _location(dotenv_path: Optional[str]) -> str:
+    if dotenv_path is None:
+        return "search:" + os.getcwd()
+    return os.path.abspath(dotenv_path)
+
+
+def _load(dotenv_path: Optional[str], override: bool) -> bool:
+    # python-dotenv is imported on first use to keep the package import fast
+    from dotenv import find_dotenv, load_dotenv
+
+    path = find_dotenv(usecwd=True) if dotenv_path is None else dotenv_path
+    if not path or not os.path.isfile(path):
+        return False
+    return load_dotenv(path, override=override)
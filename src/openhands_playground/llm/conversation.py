@@ -0,0 +1,230 @@
+"""Compact conversation histories sharing their common prefixes.
+
+A :class:`Conversation` stores its messages as slotted records in a
+persistent prefix tree: appending adds one node pointing at the previous
+last message, and forking shares every message so far, so both are O(1)
+however long the history is. Thousands of sessions branching off the same
+system prompt and few-shot examples hold one copy of them.
+
+Conversations are sequences of OpenAI-style message dicts and can be passed
+to ``chat`` wherever a message list is accepted. The dicts are built on first
+use and cached: each record keeps its own dict, shared by every fork, and
+each conversation keeps the list for its latest message.
+"""
+
+import sys
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+
+class MessageRecord:
+    """One message of a conversation.
+
+    Roles are interned, so every record with the same role shares one string.
+
+    Attributes:
+        role: The author of the message, e.g. 'user'
+        content: The text of the message
+        fields: Other keys of the message, such as 'name', if any
+    """
+
+    __slots__ = ("role", "content", "fields", "_dict")
+
+    def __init__(self, role: str, content: str, fields: Optional[Dict[str, str]] = None) -> None:
+        self.role = sys.intern(role)
+        self.content = content
+        self.fields = fields or None
+        self._dict: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_dict(cls, message: Mapping[str, str]) -> "MessageRecord":
+        """Build a record from an OpenAI-style message dict."""
+        fields = {key: value for key, value in message.items() if key not in ("role", "content")}
+        return cls(message["role"], message.get("content") or "", fields)
+
+    def as_dict(self) -> Dict[str, str]:
+        """The message as an OpenAI-style dict, built once and shared; do not modify it."""
+        if self._dict is None:
+            message = {"role": self.role, "content": self.content}
+            if self.fields:
+                message.update(self.fields)
+            self._dict = message
+        return self._dict
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(role={self.role!r}, content={self.content!r})"
+
+
+class _Node:
+    """A message and the node of the message before it."""
+
+    __slots__ = ("record", "parent", "length", "messages")
+
+    def __init__(self, record: MessageRecord, parent: Optional["_Node"]) -> None:
+        self.record = record
+        self.parent = parent
+        self.length: int = 1 if parent is None else parent.length + 1
+        # The serialized conversation ending here, once requested
+        self.messages: Optional[List[Dict[str, str]]] = None
+
+
+class Conversation(Sequence[Dict[str, str]]):
+    """A conversation history sharing its messages with the conversations it was forked from.
+
+    A conversation is a handle on the last message of the history.
+    :meth:`append` moves the handle to a new message, and :meth:`fork` returns
+    another handle on the same message; appending to one does not change the
+    other. Both are O(1), and messages are never copied.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, messages: Iterable[Union[Mapping[str, str], MessageRecord]] = ()) -> None:
+        """Initialize the conversation.
+
+        Args:
+            messages: Initial messages, as OpenAI-style dicts or MessageRecords
+        """
+        self._node: Optional[_Node] = None
+        self.extend(messages)
+
+    def append(self, role: str, content: str, **fields: str) -> "Conversation":
+        """Add a message at the end of the conversation.
+
+        Args:
+            role: The author of the message, e.g. 'user' or 'assistant'
+            content: The text of the message
+            **fields: Other keys of the message, such as ``name``
+
+        Returns:
+            This conversation, so that calls can be chained
+        """
+        return self.append_record(MessageRecord(role, content, fields))
+
+    def append_record(self, record: MessageRecord) -> "Conversation":
+        """Add an existing record, shared rather than copied, at the end of the conversation."""
+        self._node = _Node(record, self._node)
+        return self
+
+    def extend(self, messages: Iterable[Union[Mapping[str, str], MessageRecord]]) -> "Conversation":
+        """Add messages, as OpenAI-style dicts or MessageRecords, at the end of the conversation."""
+        for message in messages:
+            if not isinstance(message, MessageRecord):
+                message = MessageRecord.from_dict(message)
+            self.append_record(message)
+        return self
+
+    def fork(self) -> "Conversation":
+        """Return a conversation continuing independently from the same messages."""
+        fork = Conversation()
+        fork._node = self._node
+        return fork
+
+    def records(self) -> List[MessageRecord]:
+        """The message records, oldest first."""
+        records = []
+        node = self._node
+        while node is not None:
+            records.append(node.record)
+            node = node.parent
+        records.reverse()
+        return records
+
+    def prefixes(self) -> Iterator[Tuple[Hashable, MessageRecord]]:
+        """Walk the history backwards, from the last message to the first.
+
+        Yields:
+            For every message, a key identifying the history ending with it
+            and the message's record. Conversations sharing that history,
+            such as forks, share the key, so it can index values computed
+            over the history; new messages never change it.
+        """
+        node = self._node
+        while node is not None:
+            yield node, node.record
+            node = node.parent
+
+    def to_messages(self) -> List[Dict[str, str]]:
+        """The conversation as a list of OpenAI-style message dicts.
+
+        The list is built on first use and cached until the conversation
+        changes. Later calls after an append extend a copy of the cached list
+        of the nearest earlier message, so a growing conversation is not
+        serialized from scratch on every turn. Do not modify the list or its
+        dicts.
+        """
+        node = self._node
+        if node is None:
+            return []
+        if node.messages is not None:
+            return node.messages
+
+        pending = []
+        ancestor: Optional[_Node] = node
+        while ancestor is not None and ancestor.messages is None:
+            pending.append(ancestor.record)
+            ancestor = ancestor.parent
+        messages: List[Dict[str, str]] = []
+        if ancestor is not None:
+            messages.extend(ancestor.messages or ())
+            # Keep one cached list per history rather than one per turn
+            ancestor.messages = None
+        messages.extend(record.as_dict() for record in reversed(pending))
+        node.messages = messages
+        return messages
+
+    @property
+    def last(self) -> Optional[MessageRecord]:
+        """The last message, or None if the conversation is empty."""
+        return None if self._node is None else self._node.record
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, str]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Dict[str, str]]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        if index == -1 and self._node is not None:
+            return self._node.record.as_dict()
+        return self.to_messages()[index]
+
+    def __len__(self) -> int:
+        return 0 if self._node is None else self._node.length
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(self.to_messages())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Conversation):
+            return self._node is other._node or self.to_messages() == other.to_messages()
+        if isinstance(other, list):
+            return self.to_messages() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Conversation({self.to_messages()!r})"
+
+
+# A chat request's messages, as accepted by BaseLLM.chat and its variants
+Messages = Union[List[Dict[str, str]], Conversation]
+
+
+def as_message_list(messages: Sequence[Dict[str, str]]) -> List[Dict[str, str]]:
+    """The messages as a plain list, serializing a Conversation if necessary."""
+    if isinstance(messages, Conversation):
+        return messages.to_messages()
+    return messages if isinstance(messages, list) else list(messages)
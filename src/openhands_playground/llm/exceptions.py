@@ -0,0 +1,120 @@
+"""Exception hierarchy for LLM calls."""
+
+from typing import Optional
+
+
+class LLMError(Exception):
+    """Base class for errors raised by LLM implementations."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Initialize the error.
+
+        Args:
+            message: Human-readable description of the failure
+            status_code: HTTP status code returned by the provider, if any
+            retry_after: Seconds the provider asked us to wait before retrying
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Whether repeating the same request may succeed."""
+        return False
+
+
+class RetryableLLMError(LLMError):
+    """A transient failure; the same request may succeed if retried."""
+
+    @property
+    def retryable(self) -> bool:
+        """Whether repeating the same request may succeed."""
+        return True
+
+
+class FatalLLMError(LLMError):
+    """A permanent failure; retrying the same request will not help."""
+
+
+class RateLimitError(RetryableLLMError):
+    """The provider rejected the request because a rate limit was hit."""
+
+
+class LLMTimeoutError(RetryableLLMError):
+    """The request timed out."""
+
+
+class LLMConnectionError(RetryableLLMError):
+    """The provider could not be reached."""
+
+
+class ServerError(RetryableLLMError):
+    """The provider failed to process the request (5xx and similar)."""
+
+
+class AuthenticationError(FatalLLMError):
+    """The credentials are missing, invalid or lack permission."""
+
+
+class InvalidRequestError(FatalLLMError):
+    """The provider rejected the request as malformed or unsupported."""
+
+
+class ContextLengthExceededError(InvalidRequestError):
+    """The request does not fit into the model's context window."""
+
+
+class QuotaExceededError(FatalLLMError):
+    """The account has run out of quota or credit."""
+
+
+class ReplayMissError(FatalLLMError):
+    """A replayed recording has no response for the request."""
+
+
+class BatchJobError(LLMError):
+    """A batch job failed, expired or was cancelled before processing the request."""
+
+
+class DeadlineExceededError(LLMError):
+    """The call's deadline passed before it could complete."""
+
+
+class CircuitOpenError(RetryableLLMError):
+    """The call was rejected without being sent because the endpoint's circuit is open."""
+
+
+def error_for_status(
+    status_code: int,
+    message: str,
+    code: Optional[str] = None,
+    retry_after: Optional[float] = None,
+) -> LLMError:
+    """Map an HTTP error response of an OpenAI-compatible API onto the hierarchy.
+
+    Args:
+        status_code: The HTTP status code
+        message: Human-readable description of the failure
+        code: The provider's error code, such as 'insufficient_quota'
+        retry_after: Seconds the provider asked us to wait before retrying
+
+    Returns:
+        The matching LLMError
+    """
+    if status_code == 429:
+        if code == "insufficient_quota":
+            return QuotaExceededError(message, status_code)
+        return RateLimitError(message, status_code, retry_after)
+    if status_code in (401, 403):
+        return AuthenticationError(message, status_code)
+    if code == "context_length_exceeded":
+        return ContextLengthExceededError(message, status_code)
+    if status_code in (408, 409) or status_code >= 500:
+        return ServerError(message, status_code, retry_after)
+    return InvalidRequestError(message, status_code)
@@ -0,0 +1,262 @@
+"""Exporters writing LLM call metrics and spans to files or endpoints.
+
+Both exporters only use the standard library: metrics are rendered in the
+Prometheus text format and spans in the OTLP/JSON encoding of OpenTelemetry.
+"""
+
+import json
+import os
+import secrets
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.request import Request, urlopen
+
+from .hooks import CallInfo, LLMHook
+from .metrics import Histogram, MetricsCollector
+
+
+class PrometheusExporter:
+    """Renders a MetricsCollector in the Prometheus text exposition format."""
+
+    def __init__(self, collector: MetricsCollector, prefix: str = "llm") -> None:
+        """Initialize the exporter.
+
+        Args:
+            collector: The metrics to export
+            prefix: Prefix of every metric name
+        """
+        self.collector = collector
+        self.prefix = prefix
+
+    def render(self) -> str:
+        """Render the current metrics."""
+        p = self.prefix
+        models = self.collector.models()
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+
+        family("requests_total", "counter", "Completed LLM calls.")
+        for model, m in models.items():
+            lines.append(f'{p}_requests_total{{model="{_escape(model)}"}} {m.calls}')
+
+        family("errors_total", "counter", "Failed LLM calls by error type.")
+        for model, m in models.items():
+            for error_type, count in sorted(m.errors_by_type.items()):
+                lines.append(
+                    f'{p}_errors_total{{model="{_escape(model)}",error="{error_type}"}} {count}'
+                )
+
+        family("tokens_total", "counter", "Tokens used by LLM calls.")
+        for model, m in models.items():
+            for kind, count in (
+                ("prompt", m.prompt_tokens),
+                ("completion", m.completion_tokens),
+                ("cached", m.cached_tokens),
+            ):
+                lines.append(
+                    f'{p}_tokens_total{{model="{_escape(model)}",type="{kind}"}} {count}'
+                )
+
+        family("cost_usd_total", "counter", "Estimated cost of LLM calls in USD.")
+        for model, m in models.items():
+            lines.append(f'{p}_cost_usd_total{{model="{_escape(model)}"}} {m.cost:.6f}')
+
+        family("request_duration_seconds", "histogram", "Duration of LLM calls.")
+        for model, m in models.items():
+            lines.extend(_histogram_lines(f"{p}_request_duration_seconds", model, m.latency))
+
+        family(
+            "time_to_first_token_seconds", "histogram", "Time to first token of streams."
+        )
+        for model, m in models.items():
+            lines.extend(
+                _histogram_lines(f"{p}_time_to_first_token_seconds", model, m.time_to_first_token)
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Atomically write the metrics to a file, e.g. for node_exporter's textfile collector."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def push(self, url: str, job: str = "openhands_playground", timeout: float = 5.0) -> None:
+        """Push the metrics to a Prometheus Pushgateway.
+
+        Args:
+            url: Base URL of the Pushgateway, e.g. 'http://localhost:9091'
+            job: Job label the metrics are grouped under
+            timeout: Request timeout in seconds
+        """
+        request = Request(
+            f"{url.rstrip('/')}/metrics/job/{job}",
+            data=self.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4"},
+            method="PUT",
+        )
+        with urlopen(request, timeout=timeout):
+            pass
+
+
+class OTelSpanExporter(LLMHook):
+    """Hook exporting every call as an OpenTelemetry span in OTLP/JSON.
+
+    Spans follow the OpenTelemetry GenAI semantic conventions and are
+    buffered, then appended as one JSON line per batch to a file and/or posted
+    to an OTLP/HTTP traces endpoint such as 'http://localhost:4318/v1/traces'.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        service_name: str = "openhands-playground",
+        batch_size: int = 100,
+        timeout: float = 5.0,
+    ) -> None:
+        """Initialize the exporter.
+
+        Args:
+            path: File to append batches of spans to
+            endpoint: OTLP/HTTP traces endpoint to post batches to
+            service_name: Value of the service.name resource attribute
+            batch_size: Number of spans buffered before they are flushed
+            timeout: Request timeout for the endpoint, in seconds
+
+        Raises:
+            ValueError: If neither a path nor an endpoint is given
+        """
+        if path is None and endpoint is None:
+            raise ValueError("OTelSpanExporter needs a path or an endpoint")
+        self.path = path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def after_call(self, info: CallInfo, result: Any) -> None:
+        """Buffer the span of a successful call."""
+        self._add(info)
+
+    def on_error(self, info: CallInfo, error: BaseException) -> None:
+        """Buffer the span of a failed call."""
+        self._add(info)
+
+    def flush(self) -> None:
+        """Export the buffered spans."""
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+
+        payload = json.dumps(self._request_body(spans))
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(payload + "\n")
+        if self.endpoint is not None:
+            request = Request(
+                self.endpoint,
+                data=payload.encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urlopen(request, timeout=self.timeout):
+                pass
+
+    def close(self) -> None:
+        """Export any remaining spans."""
+        self.flush()
+
+    def _add(self, info: CallInfo) -> None:
+        with self._lock:
+            self._spans.append(_span(info))
+            full = len(self._spans) >= self.batch_size
+        if full:
+            self.flush()
+
+    def _request_body(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {"scope": {"name": "openhands_playground.llm"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+
+def _span(info: CallInfo) -> Dict[str, Any]:
+    """Convert a call into an OTLP/JSON span."""
+    operation = "chat" if "chat" in info.method else "text_completion"
+    start_ns = int(info.started_at * 1e9)
+    end_ns = start_ns + int((info.duration or 0.0) * 1e9)
+    attributes = [
+        _attribute("gen_ai.operation.name", operation),
+        _attribute("gen_ai.request.model", info.model_name),
+        _attribute("gen_ai.system", info.llm_class),
+        _attribute("llm.method", info.method),
+    ]
+    if info.usage is not None:
+        attributes.append(_attribute("gen_ai.usage.input_tokens", info.usage.prompt_tokens))
+        attributes.append(_attribute("gen_ai.usage.output_tokens", info.usage.completion_tokens))
+        attributes.append(_attribute("gen_ai.usage.cached_tokens", info.usage.cached_tokens))
+    if info.time_to_first_token is not None:
+        attributes.append(_attribute("llm.time_to_first_token", info.time_to_first_token))
+
+    status: Dict[str, Any] = {"code": 1}
+    if info.error is not None:
+        attributes.append(_attribute("error.type", type(info.error).__name__))
+        status = {"code": 2, "message": str(info.error)}
+
+    return {
+        "traceId": secrets.token_hex(16),
+        "spanId": secrets.token_hex(8),
+        "name": f"{operation} {info.model_name}",
+        "kind": 3,  # SPAN_KIND_CLIENT
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(end_ns),
+        "attributes": attributes,
+        "status": status,
+    }
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode an OTLP/JSON attribute; integers are encoded as strings."""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _histogram_lines(name: str, model: str, histogram: Histogram) -> List[str]:
+    label = f'model="{_escape(model)}"'
+    lines = []
+    for bound, count in histogram.cumulative():
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f'{name}_bucket{{{label},le="{le}"}} {count}')
+    lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+    return lines
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,29 +1,84 @@
 """Factory for creating LLM instances."""
 
-from typing import Any, Dict, List, Optional, Type, cast
-
-from dotenv import load_dotenv
+import functools
+import importlib
+import inspect
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 from .base import BaseLLM
-from .llms.mock_llm import MockLLM
-from .llms.openai_llm import OpenAILLM
+from .clients import ClientRegistry
+
+# Aliased since create_llm has a load_env parameter
+from .config import load_env as load_dotenv
+from .hooks import LLMHook
+from .rate_limit import get_rate_limiter, reset_rate_limiters
+
+# The optional layers (caching, circuit breakers, coalescing, routing and
+# cascades) are imported where they are used, so that they cost nothing at
+# startup unless requested
+if TYPE_CHECKING:
+    from .cache import CacheBackend
+    from .cascade import AcceptanceCheck, CascadeLLM
+    from .llms.mock_llm import MockLLM
+    from .llms.openai_llm import OpenAILLM
+    from .router import RouterLLM
+
+# Entry point group third-party packages register providers under, e.g. in
+# pyproject.toml: [project.entry-points."openhands_playground.llms"]
+ENTRY_POINT_GROUP = "openhands_playground.llms"
 
 
 class LLMFactory:
     """Factory class for creating LLM instances."""
 
-    # Registry of available LLM providers
-    _providers: Dict[str, Type[BaseLLM]] = {
-        "mock": MockLLM,
-        "openai": OpenAILLM,
+    # Registry of available LLM providers: classes, or "module:Class" paths
+    # imported on first use so that unused providers cost nothing at startup
+    _providers: Dict[str, Union[str, Type[BaseLLM]]] = {
+        "mock": "openhands_playground.llm.llms.mock_llm:MockLLM",
+        "openai": "openhands_playground.llm.llms.openai_llm:OpenAILLM",
+        "replay": "openhands_playground.llm.llms.replay_llm:ReplayLLM",
     }
 
+    # Whether providers registered as entry points were added to _providers
+    _entry_points_loaded = False
+
+    # Per-(provider, model) limits as (requests_per_minute, tokens_per_minute)
+    _rate_limits: Dict[Tuple[str, str], Tuple[Optional[float], Optional[float]]] = {}
+
+    # Settings of the circuit breakers guarding each provider's endpoints
+    _circuit_breakers: Dict[str, Dict[str, Any]] = {}
+
+    # Process-wide HTTP clients shared by the instances this factory creates
+    _client_registry = ClientRegistry()
+
+    # Instances returned by create_llm(shared=True), keyed by their arguments
+    _instances: Dict[Tuple[Hashable, ...], BaseLLM] = {}
+    _instances_lock = threading.Lock()
+
     @classmethod
     def create_llm(
         self,
         provider: str,
         model_name: Optional[str] = None,
         load_env: bool = True,
+        cache: Optional[Union["CacheBackend", str]] = None,
+        coalesce: bool = False,
+        hooks: Optional[Sequence[LLMHook]] = None,
+        shared: bool = False,
         **kwargs: Any,
     ) -> BaseLLM:
         """Create an LLM instance based on the provider.
@@ -31,7 +86,21 @@ class LLMFactory:
         Args:
             provider: The LLM provider name (e.g., 'openai', 'mock')
             model_name: The specific model to use (provider-specific defaults if None)
-            load_env: Whether to load environment variables from .env file
+            load_env: Whether to load environment variables from the .env
+                file; it is only read the first time, see config.load_env
+            cache: Response cache to put in front of the LLM: a CacheBackend,
+                'memory' or 'sqlite:<path>'. No caching if None.
+            coalesce: Whether concurrent identical greedy calls share one upstream
+                call. Only calls passing ``temperature=0`` are coalesced: with
+                the default ``temperature=None`` the provider samples, so each
+                call is sent on its own. Wrap the LLM in a SingleFlightLLM with
+                a predicate to coalesce other calls.
+            hooks: Hooks observing the calls made on the returned LLM, such as
+                a MetricsCollector
+            shared: Whether to return the instance created by an earlier call
+                with the same arguments instead of a new one. Shared instances
+                are used by several threads at once and must not be closed by
+                their users; see clear_shared.
             **kwargs: Additional parameters to pass to the LLM constructor
 
         Returns:
@@ -39,62 +108,238 @@ class LLMFactory:
 
         Raises:
             ValueError: If the provider is not supported
+            TypeError: If shared is True and an argument is not hashable
         """
         # Load environment variables if requested
         if load_env:
             load_dotenv()
 
-        # Validate provider
-        if provider not in self._providers:
-            available_providers = ", ".join(self._providers.keys())
-            raise ValueError(
-                f"Unsupported LLM provider: '{provider}'. "
-                f"Available providers: {available_providers}"
-            )
+        if shared:
+            key = _instance_key(provider, model_name, cache, coalesce, hooks, kwargs)
+            llm = self._instances.get(key)
+            if llm is not None:
+                return llm
+            with self._instances_lock:
+                llm = self._instances.get(key)
+                if llm is None:
+                    llm = self.create_llm(
+                        provider, model_name, False, cache, coalesce, hooks, **kwargs
+                    )
+                    self._instances[key] = llm
+            return llm
 
-        # Get the LLM class
-        llm_class = self._providers[provider]
+        # Validate provider and get the LLM class
+        llm_class = self._resolve_provider(provider)
 
         # Prepare constructor arguments
         constructor_args = kwargs.copy()
         if model_name is not None:
             constructor_args["model_name"] = model_name
 
-        # Create and return the LLM instance
-        return llm_class(**constructor_args)
+        # Attach the shared rate limiter configured for this provider and model
+        limit_key = (provider, model_name or _default_model_name(llm_class))
+        if (
+            limit_key in self._rate_limits
+            and "rate_limiter" in _constructor_parameters(llm_class)
+            and "rate_limiter" not in constructor_args
+        ):
+            constructor_args["rate_limiter"] = get_rate_limiter(
+                limit_key, *self._rate_limits[limit_key]
+            )
+
+        # Share HTTP clients with other instances of providers that support it
+        if (
+            "client_registry" in _constructor_parameters(llm_class)
+            and "client_registry" not in constructor_args
+        ):
+            constructor_args["client_registry"] = self._client_registry
+
+        # Create the LLM instance
+        llm = llm_class(**constructor_args)
+
+        # Wrap it with the requested layers: the circuit breaker sits
+        # innermost so that it only sees calls reaching the endpoint, and the
+        # cache outermost so that hits never wait on in-flight calls
+        if provider in self._circuit_breakers:
+            from .circuit_breaker import CircuitBreakerLLM, get_circuit_breaker
+
+            endpoint = (provider, llm.model_name, getattr(llm, "base_url", None))
+            llm = CircuitBreakerLLM(
+                llm, get_circuit_breaker(endpoint, **self._circuit_breakers[provider])
+            )
+        if coalesce:
+            from .singleflight import SingleFlightLLM
+
+            llm = SingleFlightLLM(llm)
+        if cache is not None:
+            from .cache import CachedLLM
+
+            llm = CachedLLM(llm, cache)
+
+        # Hooks observe the calls as the caller sees them, including cache hits
+        for hook in hooks or ():
+            llm.add_hook(hook)
+
+        return llm
 
     @classmethod
-    def register_provider(cls, name: str, llm_class: Type[BaseLLM]) -> None:
+    def register_provider(cls, name: str, llm_class: Union[str, Type[BaseLLM]]) -> None:
         """Register a new LLM provider.
 
         Args:
             name: The provider name
-            llm_class: The LLM class that extends BaseLLM
+            llm_class: The LLM class that extends BaseLLM, or its import path
+                as 'package.module:Class' (or 'package.module.Class') to
+                import it only when the provider is first used
 
         Raises:
             TypeError: If llm_class doesn't extend BaseLLM
         """
-        if not issubclass(llm_class, BaseLLM):
+        if not isinstance(llm_class, str) and not (
+            isinstance(llm_class, type) and issubclass(llm_class, BaseLLM)
+        ):
             raise TypeError(f"LLM class must extend BaseLLM, got {llm_class}")
 
         cls._providers[name] = llm_class
+        cls._forget_shared(name)
+
+    @classmethod
+    def set_rate_limit(
+        cls,
+        provider: str,
+        model_name: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        """Configure client-side rate limits for a provider and model.
+
+        Every LLM created afterwards for this provider and model shares one
+        limiter, so they draw from a common budget. Only providers that accept
+        a ``rate_limiter`` argument (such as 'openai') can be limited.
+
+        Args:
+            provider: The provider name
+            model_name: The model name
+            requests_per_minute: Request limit, or None for no request limit
+            tokens_per_minute: Estimated token limit, or None for no token limit
+        """
+        key = (provider, model_name)
+        cls._rate_limits[key] = (requests_per_minute, tokens_per_minute)
+        reset_rate_limiters([key])
+        cls._forget_shared(provider)
+
+    @classmethod
+    def set_circuit_breaker(cls, provider: str, enabled: bool = True, **settings: Any) -> None:
+        """Guard the LLMs created afterwards for a provider with circuit breakers.
+
+        LLMs talking to the same endpoint, identified by
+        ``(provider, model_name, base_url)``, share one breaker; see
+        circuit_breaker.circuit_breaker_states for their state.
+
+        Args:
+            provider: The provider name
+            enabled: Whether to add breakers; False removes them for new LLMs
+            **settings: CircuitBreaker arguments, such as failure_threshold
+                or open_seconds
+        """
+        from .circuit_breaker import circuit_breaker_states, reset_circuit_breakers
+
+        if enabled:
+            cls._circuit_breakers[provider] = settings
+        else:
+            cls._circuit_breakers.pop(provider, None)
+        endpoints: List[Hashable] = [
+            key for key in circuit_breaker_states() if isinstance(key, tuple) and key[0] == provider
+        ]
+        reset_circuit_breakers(endpoints)
+        cls._forget_shared(provider)
+
+    @classmethod
+    def close_clients(cls) -> None:
+        """Close all shared HTTP clients, e.g. at process shutdown.
+
+        Instances that still use them must not be called afterwards.
+        """
+        cls._client_registry.close_all()
+
+    @classmethod
+    def clear_shared(cls, close: bool = True) -> None:
+        """Forget the instances returned by create_llm(shared=True).
+
+        Args:
+            close: Whether to close them; only do so once no thread uses them
+        """
+        with cls._instances_lock:
+            instances = list(cls._instances.values())
+            cls._instances.clear()
+        if close:
+            for llm in instances:
+                llm.close()
+
+    @classmethod
+    def _forget_shared(cls, provider: str) -> None:
+        """Stop sharing the instances of a provider whose configuration changed.
+
+        They are not closed since callers may still hold them.
+        """
+        with cls._instances_lock:
+            for key in [key for key in cls._instances if key[0] == provider]:
+                del cls._instances[key]
 
     @classmethod
     def get_available_providers(cls) -> List[str]:
         """Get a list of available LLM providers.
 
+        Includes providers registered as entry points; none of them is imported.
+
         Returns:
             List of provider names
         """
+        cls._load_entry_points()
         return list(cls._providers.keys())
 
+    @classmethod
+    def _resolve_provider(cls, provider: str) -> Type[BaseLLM]:
+        """Return the class of a provider, importing it if needed.
+
+        Raises:
+            ValueError: If the provider is not registered
+            TypeError: If the imported object doesn't extend BaseLLM
+        """
+        if provider not in cls._providers:
+            cls._load_entry_points()
+        if provider not in cls._providers:
+            available_providers = ", ".join(cls._providers.keys())
+            raise ValueError(
+                f"Unsupported LLM provider: '{provider}'. "
+                f"Available providers: {available_providers}"
+            )
+
+        llm_class = cls._providers[provider]
+        if isinstance(llm_class, str):
+            llm_class = _import_provider(llm_class)
+            cls._providers[provider] = llm_class
+        return llm_class
+
+    @classmethod
+    def _load_entry_points(cls) -> None:
+        """Add the providers registered as entry points, once.
+
+        Providers registered explicitly take precedence.
+        """
+        if cls._entry_points_loaded:
+            return
+        for name, path in _discover_entry_points().items():
+            cls._providers.setdefault(name, path)
+        cls._entry_points_loaded = True
+
     @classmethod
     def create_openai_llm(
         cls,
         model_name: str = "gpt-3.5-turbo",
         api_key: Optional[str] = None,
         **kwargs: Any,
-    ) -> OpenAILLM:
+    ) -> "OpenAILLM":
         """Convenience method to create an OpenAI LLM.
 
         Args:
@@ -106,12 +351,12 @@ class LLMFactory:
             OpenAI LLM instance
         """
         return cast(
-            OpenAILLM,
+            "OpenAILLM",
             cls.create_llm("openai", model_name=model_name, api_key=api_key, **kwargs),
         )
 
     @classmethod
-    def create_mock_llm(cls, model_name: str = "mock-model", **kwargs: Any) -> MockLLM:
+    def create_mock_llm(cls, model_name: str = "mock-model", **kwargs: Any) -> "MockLLM":
         """Convenience method to create a Mock LLM.
 
         Args:
@@ -121,4 +366,163 @@ class LLMFactory:
         Returns:
             Mock LLM instance
         """
-        return cast(MockLLM, cls.create_llm("mock", model_name=model_name, **kwargs))
+        return cast("MockLLM", cls.create_llm("mock", model_name=model_name, **kwargs))
+
+    @classmethod
+    def create_router(
+        cls,
+        backends: Sequence[Mapping[str, Any]],
+        strategy: str = "round_robin",
+        **kwargs: Any,
+    ) -> "RouterLLM":
+        """Create a RouterLLM over backends created from the registry.
+
+        Args:
+            backends: One mapping per backend with its ``provider``, and
+                optionally its ``weight`` and ``name``; the other entries are
+                passed to create_llm, e.g.
+                ``{"provider": "openai", "model_name": "gpt-4o", "weight": 2}``
+            strategy: One of 'round_robin', 'least_outstanding' and 'ewma'
+            **kwargs: Additional RouterLLM parameters, such as max_attempts
+
+        Returns:
+            Router over the created backends
+
+        Raises:
+            ValueError: If a backend has no provider or the strategy is unknown
+        """
+        from .router import Backend, RouterLLM
+
+        created = []
+        for spec in backends:
+            options = dict(spec)
+            if "provider" not in options:
+                raise ValueError(f"Backend {spec!r} has no provider")
+            provider = options.pop("provider")
+            weight = options.pop("weight", 1.0)
+            name = options.pop("name", "")
+            created.append(Backend(cls.create_llm(provider, **options), weight, name))
+        return RouterLLM(created, strategy=strategy, **kwargs)
+
+    @classmethod
+    def create_cascade(
+        cls,
+        tiers: Sequence[Mapping[str, Any]],
+        checks: Sequence["AcceptanceCheck"] = (),
+        **kwargs: Any,
+    ) -> "CascadeLLM":
+        """Create a CascadeLLM over tiers created from the registry.
+
+        Args:
+            tiers: One mapping per tier, from the cheapest model to the most
+                capable, with its ``provider`` and optionally its ``checks``,
+                ``price`` and ``name``; the other entries are passed to
+                create_llm, e.g. ``{"provider": "openai", "model_name": "gpt-4o-mini"}``
+            checks: Checks every tier's response must pass, except the last's
+            **kwargs: Additional CascadeLLM parameters, such as parallel
+
+        Returns:
+            Cascade over the created tiers
+
+        Raises:
+            ValueError: If a tier has no provider
+        """
+        from .cascade import CascadeLLM, Tier
+
+        created = []
+        for spec in tiers:
+            options = dict(spec)
+            if "provider" not in options:
+                raise ValueError(f"Tier {spec!r} has no provider")
+            provider = options.pop("provider")
+            tier_checks = options.pop("checks", ())
+            price = options.pop("price", None)
+            name = options.pop("name", "")
+            llm = cls.create_llm(provider, **options)
+            created.append(Tier(llm, tier_checks, price, name))
+        return CascadeLLM(created, checks=checks, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def _constructor_parameters(llm_class: Type[BaseLLM]) -> Mapping[str, inspect.Parameter]:
+    """Return the parameters of an LLM class's constructor, inspected once."""
+    return inspect.signature(llm_class).parameters
+
+
+def _default_model_name(llm_class: Type[BaseLLM]) -> str:
+    """Return the default model_name of an LLM class's constructor, if any."""
+    parameter = _constructor_parameters(llm_class).get("model_name")
+    if parameter is None or parameter.default is inspect.Parameter.empty:
+        return ""
+    return str(parameter.default)
+
+
+def _instance_key(
+    provider: str,
+    model_name: Optional[str],
+    cache: Optional[Union["CacheBackend", str]],
+    coalesce: bool,
+    hooks: Optional[Sequence[LLMHook]],
+    kwargs: Dict[str, Any],
+) -> Tuple[Hashable, ...]:
+    """Key identifying the arguments of a shared instance.
+
+    Raises:
+        TypeError: If an argument is not hashable
+    """
+    key = (
+        provider,
+        model_name,
+        cache,
+        coalesce,
+        tuple(hooks or ()),
+        frozenset((name, _freeze(value)) for name, value in kwargs.items()),
+    )
+    try:
+        hash(key)
+    except TypeError as e:
+        raise TypeError(f"Shared LLMs need hashable arguments: {e}") from e
+    return key
+
+
+def _freeze(value: Any) -> Any:
+    """Make dicts, lists and sets hashable so they can be part of a key."""
+    if isinstance(value, Mapping):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def _import_provider(path: str) -> Type[BaseLLM]:
+    """Import an LLM class from 'package.module:Class' or 'package.module.Class'.
+
+    Raises:
+        TypeError: If the object doesn't extend BaseLLM
+    """
+    module_name, separator, attribute = path.partition(":")
+    if not separator:
+        module_name, _, attribute = path.rpartition(".")
+
+    target: Any = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        target = getattr(target, part)
+
+    if not (isinstance(target, type) and issubclass(target, BaseLLM)):
+        raise TypeError(f"LLM class must extend BaseLLM, got {target} from '{path}'")
+    return target
+
+
+def _discover_entry_points() -> Dict[str, str]:
+    """Map provider names registered as entry points to their import paths."""
+    from importlib.metadata import entry_points
+
+    selected: Any
+    try:
+        selected = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # Python < 3.10 has no selection by group
+        all_entry_points: Any = entry_points()
+        selected = all_entry_points.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point.value for entry_point in selected}
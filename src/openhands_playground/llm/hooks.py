@@ -0,0 +1,274 @@
+"""Per-call instrumentation hooks for LLMs.
+
+Hooks registered with :meth:`BaseLLM.add_hook` see each ``generate``/``chat``
+call on an instance, including the async, streaming and multi-sample
+(``generate_n``/``chat_n``) variants, before it is made, after it succeeds and
+when it fails, together with its timing and token usage. Only instances with
+hooks are instrumented, so calls on all others run the plain methods without
+any overhead.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Methods instrumented on LLM instances with hooks
+CALL_METHODS = (
+    "generate",
+    "chat",
+    "agenerate",
+    "achat",
+    "generate_n",
+    "chat_n",
+    "agenerate_n",
+    "achat_n",
+)
+STREAM_METHODS = ("stream_generate", "stream_chat", "astream_generate", "astream_chat")
+
+
+@dataclass
+class TokenUsage:
+    """Tokens consumed by a call, as reported by the provider.
+
+    Attributes:
+        prompt_tokens: Tokens in the request, including cached ones
+        completion_tokens: Tokens generated in the response
+        cached_tokens: Prompt tokens served from the provider's prompt cache
+    """
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt and completion tokens together."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            self.prompt_tokens + other.prompt_tokens,
+            self.completion_tokens + other.completion_tokens,
+            self.cached_tokens + other.cached_tokens,
+        )
+
+
+@dataclass
+class CallInfo:
+    """Describes one instrumented call; hooks receive the same object throughout.
+
+    Attributes:
+        model_name: Model of the LLM that was called
+        llm_class: Class name of the LLM that was called
+        method: Name of the method that was called, e.g. 'achat'
+        started_at: Wall-clock start time, in seconds since the epoch
+        duration: Seconds the call took; for streams, until the last chunk
+        time_to_first_token: Seconds until the first chunk, for streams
+        usage: Token usage reported by the provider, if any
+        error: The exception the call failed with, if any
+        metadata: Free-form data hooks can use to pass state between callbacks
+    """
+
+    model_name: str
+    llm_class: str
+    method: str
+    started_at: float = field(default_factory=time.time)
+    duration: Optional[float] = None
+    time_to_first_token: Optional[float] = None
+    usage: Optional[TokenUsage] = None
+    error: Optional[BaseException] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    _owner: Any = field(default=None, repr=False, compare=False)
+
+    @property
+    def streaming(self) -> bool:
+        """Whether the call returned a stream."""
+        return self.method in STREAM_METHODS
+
+
+class LLMHook:
+    """Base class of call hooks; override the callbacks you need.
+
+    Exceptions raised by a hook are logged and do not affect the call.
+    """
+
+    def before_call(self, info: CallInfo) -> None:
+        """Called before the call is made."""
+
+    def after_call(self, info: CallInfo, result: Any) -> None:
+        """Called after the call succeeded, with its result.
+
+        For streams this happens once the stream is exhausted, and the result
+        is the full text. For multi-sample calls the result is the list of
+        candidates.
+        """
+
+    def on_error(self, info: CallInfo, error: BaseException) -> None:
+        """Called after the call failed."""
+
+
+_current_call: contextvars.ContextVar[Optional[CallInfo]] = contextvars.ContextVar(
+    "current_llm_call", default=None
+)
+
+
+def current_call() -> Optional[CallInfo]:
+    """The instrumented call running in this context, if any."""
+    return _current_call.get()
+
+
+def report_usage(usage: TokenUsage) -> None:
+    """Attach token usage to the instrumented call running in this context.
+
+    Providers call this once they know the usage of a response. Usage of
+    several requests made by one call (e.g. retries) is added up.
+    """
+    info = _current_call.get()
+    if info is not None:
+        info.usage = usage if info.usage is None else info.usage + usage
+
+
+def instrument(llm: Any) -> None:
+    """Route an instance's call and stream methods through its hooks.
+
+    The wrappers are stored on the instance and shadow the class methods.
+    """
+    cls = type(llm)
+    for name in CALL_METHODS + STREAM_METHODS:
+        method = getattr(cls, name)
+        if name in STREAM_METHODS:
+            wrapper = _instrument_stream(name, method)
+        elif asyncio.iscoroutinefunction(method):
+            wrapper = _instrument_async(name, method)
+        else:
+            wrapper = _instrument_sync(name, method)
+        setattr(llm, name, types.MethodType(wrapper, llm))
+
+
+def uninstrument(llm: Any) -> None:
+    """Undo :func:`instrument`, so the class methods are called directly again."""
+    for name in CALL_METHODS + STREAM_METHODS:
+        llm.__dict__.pop(name, None)
+
+
+def _start(llm: Any, name: str) -> Optional[CallInfo]:
+    """Begin a call, or return None if it is part of a call already being observed."""
+    current = _current_call.get()
+    if current is not None and current._owner is llm:
+        return None
+    info = CallInfo(llm.model_name, type(llm).__name__, name, _owner=llm)
+    _dispatch(llm._hooks, "before_call", info)
+    return info
+
+
+def _instrument_sync(name: str, fn: F) -> F:
+    @functools.wraps(fn)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        hooks = self._hooks
+        info = _start(self, name)
+        if info is None:
+            return fn(self, *args, **kwargs)
+
+        token = _current_call.set(info)
+        start = time.perf_counter()
+        try:
+            result = fn(self, *args, **kwargs)
+        except BaseException as e:
+            _fail(hooks, info, e, time.perf_counter() - start)
+            raise
+        finally:
+            _current_call.reset(token)
+        info.duration = time.perf_counter() - start
+        _dispatch(hooks, "after_call", info, result)
+        return result
+
+    return cast(F, wrapper)
+
+
+def _instrument_async(name: str, fn: F) -> F:
+    @functools.wraps(fn)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        hooks = self._hooks
+        info = _start(self, name)
+        if info is None:
+            return await fn(self, *args, **kwargs)
+
+        token = _current_call.set(info)
+        start = time.perf_counter()
+        try:
+            result = await fn(self, *args, **kwargs)
+        except BaseException as e:
+            _fail(hooks, info, e, time.perf_counter() - start)
+            raise
+        finally:
+            _current_call.reset(token)
+        info.duration = time.perf_counter() - start
+        _dispatch(hooks, "after_call", info, result)
+        return result
+
+    return cast(F, wrapper)
+
+
+def _instrument_stream(name: str, fn: F) -> F:
+    """Instrument a method returning a TextStream or AsyncTextStream.
+
+    The call completes when the stream is exhausted, fails or is closed
+    early, not when the method returns.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        hooks = self._hooks
+        info = _start(self, name)
+        if info is None:
+            return fn(self, *args, **kwargs)
+
+        token = _current_call.set(info)
+        try:
+            stream = fn(self, *args, **kwargs)
+        except BaseException as e:
+            _fail(hooks, info, e, 0.0)
+            raise
+        finally:
+            _current_call.reset(token)
+
+        def finished(stats: Any) -> None:
+            info.duration = stats.total_latency
+            info.time_to_first_token = stats.time_to_first_token
+            if stats.usage is not None:
+                info.usage = stats.usage
+            _dispatch(hooks, "after_call", info, stream.text)
+
+        def failed(error: BaseException) -> None:
+            info.time_to_first_token = stream.stats.time_to_first_token
+            _fail(hooks, info, error, stream.elapsed)
+
+        stream.add_done_callback(finished)
+        stream.add_error_callback(failed)
+        return stream
+
+    return cast(F, wrapper)
+
+
+def _fail(hooks: Sequence[LLMHook], info: CallInfo, error: BaseException, duration: float) -> None:
+    info.duration = duration
+    info.error = error
+    _dispatch(hooks, "on_error", info, error)
+
+
+def _dispatch(hooks: Sequence[LLMHook], callback: str, *args: Any) -> None:
+    """Invoke a callback on every hook, logging rather than raising failures."""
+    for hook in hooks:
+        try:
+            getattr(hook, callback)(*args)
+        except Exception:
+            logger.exception("LLM hook %r failed in %s", hook, callback)
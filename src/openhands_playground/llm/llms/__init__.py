@@ -1,6 +1,30 @@
-"""LLM provider implementations."""
+"""LLM provider implementations.
 
-from .mock_llm import MockLLM
-from .openai_llm import OpenAILLM
+Providers are imported on first access so that importing this package does
+not import the SDKs of providers that are never used.
+"""
 
-__all__ = ["MockLLM", "OpenAILLM"]
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .mock_llm import MockLLM
+    from .openai_llm import OpenAILLM
+    from .replay_llm import ReplayLLM
+
+_PROVIDER_MODULES = {
+    "MockLLM": ".mock_llm",
+    "OpenAILLM": ".openai_llm",
+    "ReplayLLM": ".replay_llm",
+}
+
+__all__ = ["MockLLM", "OpenAILLM", "ReplayLLM"]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _PROVIDER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,21 +1,51 @@
 """Mock LLM implementation for testing and development."""
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional, Union
 
-from ..base import BaseLLM
+from ..base import BaseLLM, check_samples
+from ..conversation import Messages
+from ..exceptions import ServerError
+from ..simulation import LatencyModel, as_latency_model
+from ..streaming import AsyncTextStream, TextStream, split_chunks
 
 
 class MockLLM(BaseLLM):
     """Mock LLM implementation that generates predictable responses."""
 
-    def __init__(self, model_name: str = "mock-model", **kwargs: Any) -> None:
+    def __init__(
+        self,
+        model_name: str = "mock-model",
+        latency: Union[float, LatencyModel] = 0.0,
+        tokens_per_second: Optional[float] = None,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
         """Initialize the Mock LLM.
 
         Args:
             model_name: The mock model name
+            latency: Simulated time to first token, in seconds or as a
+                LatencyModel (see ``simulation``). The sync methods sleep,
+                the async methods await without blocking the event loop.
+            tokens_per_second: Simulated generation rate; each word of the
+                response then takes ``1 / tokens_per_second`` seconds. No
+                generation time if None.
+            error_rate: Probability that a call fails with a ServerError
+            seed: Seed for the latency and error sampling, for reproducible runs
             **kwargs: Additional configuration parameters
         """
         super().__init__(model_name, **kwargs)
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"error_rate must be between 0 and 1, got {error_rate}")
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self._latency_model = as_latency_model(latency)
+        self._rng = random.Random(seed)
         self._responses = [
             "This is a mock response from the LLM.",
             "Here's another simulated AI response.",
@@ -41,7 +71,297 @@ class MockLLM(BaseLLM):
 
         Returns:
             Mock generated text response
+
+        Raises:
+            ServerError: If a simulated failure is injected
+        """
+        response = self._generate_response(prompt, max_tokens, temperature)
+        self._sleep(self._response_time(response))
+        self._maybe_fail()
+        return response
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a mock chat response.
+
+        Args:
+            messages: Conversation history
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            Mock chat response
+
+        Raises:
+            ServerError: If a simulated failure is injected
+        """
+        response = self._chat_response(messages, max_tokens, temperature)
+        self._sleep(self._response_time(response))
+        self._maybe_fail()
+        return response
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a mock text response without blocking the event loop.
+
+        Args:
+            prompt: The input prompt (used for deterministic responses)
+            max_tokens: Maximum tokens (affects response length simulation)
+            temperature: Temperature (affects randomness simulation)
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            Mock generated text response
+
+        Raises:
+            ServerError: If a simulated failure is injected
+        """
+        response = self._generate_response(prompt, max_tokens, temperature)
+        await self._asleep(self._response_time(response))
+        self._maybe_fail()
+        return response
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a mock chat response without blocking the event loop.
+
+        Args:
+            messages: Conversation history
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            Mock chat response
+
+        Raises:
+            ServerError: If a simulated failure is injected
+        """
+        response = self._chat_response(messages, max_tokens, temperature)
+        await self._asleep(self._response_time(response))
+        self._maybe_fail()
+        return response
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate distinct mock candidates in the time of one response.
+
+        The first candidate is the response :meth:`generate` returns; the
+        others are numbered variants of it, like the choices of a single
+        request with OpenAI's ``n`` parameter.
+
+        Args:
+            prompt: The input prompt (used for deterministic responses)
+            n: Number of candidates to generate
+            max_tokens: Maximum tokens (affects response length simulation)
+            temperature: Temperature (affects randomness simulation)
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            The n mock candidates
+
+        Raises:
+            ValueError: If n is less than 1
+            ServerError: If a simulated failure is injected
+        """
+        samples = self._samples(self._generate_response(prompt, max_tokens, temperature), n)
+        self._sleep(self._response_time(samples[-1]))
+        self._maybe_fail()
+        return samples
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate distinct mock chat candidates in the time of one response.
+
+        Args:
+            messages: Conversation history
+            n: Number of candidates to generate
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            The n mock candidates; the first is the response :meth:`chat` returns
+
+        Raises:
+            ValueError: If n is less than 1
+            ServerError: If a simulated failure is injected
+        """
+        samples = self._samples(self._chat_response(messages, max_tokens, temperature), n)
+        self._sleep(self._response_time(samples[-1]))
+        self._maybe_fail()
+        return samples
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate distinct mock candidates without blocking the event loop."""
+        samples = self._samples(self._generate_response(prompt, max_tokens, temperature), n)
+        await self._asleep(self._response_time(samples[-1]))
+        self._maybe_fail()
+        return samples
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate distinct mock chat candidates without blocking the event loop."""
+        samples = self._samples(self._chat_response(messages, max_tokens, temperature), n)
+        await self._asleep(self._response_time(samples[-1]))
+        self._maybe_fail()
+        return samples
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream the mock text response word by word.
+
+        Args:
+            prompt: The input prompt (used for deterministic responses)
+            max_tokens: Maximum tokens (affects response length simulation)
+            temperature: Temperature (affects randomness simulation)
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            Stream of the same text :meth:`generate` returns
+        """
+        response = self._generate_response(prompt, max_tokens, temperature)
+        return TextStream(self._iter_chunks(response))
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream the mock chat response word by word.
+
+        Args:
+            messages: Conversation history
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            **kwargs: Additional parameters (ignored)
+
+        Returns:
+            Stream of the same text :meth:`chat` returns
         """
+        response = self._chat_response(messages, max_tokens, temperature)
+        return TextStream(self._iter_chunks(response))
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Stream the mock text response word by word without blocking."""
+        response = self._generate_response(prompt, max_tokens, temperature)
+        return AsyncTextStream(self._aiter_chunks(response))
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Stream the mock chat response word by word without blocking."""
+        response = self._chat_response(messages, max_tokens, temperature)
+        return AsyncTextStream(self._aiter_chunks(response))
+
+    def _iter_chunks(self, response: str) -> Iterator[str]:
+        """Yield response chunks at the simulated latency and generation rate."""
+        self._sleep(self._latency_model.sample(self._rng))
+        self._maybe_fail()
+        for chunk in split_chunks(response):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield chunk
+
+    async def _aiter_chunks(self, response: str) -> AsyncIterator[str]:
+        """Async counterpart of :meth:`_iter_chunks`."""
+        await self._asleep(self._latency_model.sample(self._rng))
+        self._maybe_fail()
+        for chunk in split_chunks(response):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield chunk
+
+    def _response_time(self, response: str) -> float:
+        """Sample the simulated time to produce a complete response."""
+        seconds = self._latency_model.sample(self._rng)
+        if self.tokens_per_second:
+            seconds += len(split_chunks(response)) / self.tokens_per_second
+        return seconds
+
+    @staticmethod
+    def _samples(response: str, n: int) -> List[str]:
+        """Number the variants of a response to make n distinct candidates."""
+        check_samples(n)
+        return [response] + [f"{response} [sample {i + 1}]" for i in range(1, n)]
+
+    def _maybe_fail(self) -> None:
+        """Raise a simulated server error with probability ``error_rate``."""
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            raise ServerError(f"[MOCK] Simulated server error from {self.model_name}", 503)
+
+    @staticmethod
+    def _sleep(seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    @staticmethod
+    async def _asleep(seconds: float) -> None:
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def _generate_response(
+        self, prompt: str, max_tokens: Optional[int], temperature: Optional[float]
+    ) -> str:
+        """Build the deterministic mock response for a prompt."""
         # Use prompt hash for deterministic responses in tests
         response_index = hash(prompt) % len(self._responses)
         base_response = self._responses[response_index]
@@ -60,24 +380,13 @@ class MockLLM(BaseLLM):
 
         return f"[MOCK] {base_response}"
 
-    def chat(
+    def _chat_response(
         self,
-        messages: List[Dict[str, str]],
-        max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None,
-        **kwargs: Any,
+        messages: Messages,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
     ) -> str:
-        """Generate a mock chat response.
-
-        Args:
-            messages: Conversation history
-            max_tokens: Maximum tokens to generate
-            temperature: Sampling temperature
-            **kwargs: Additional parameters (ignored)
-
-        Returns:
-            Mock chat response
-        """
+        """Build the contextual mock response for a conversation."""
         if not messages:
             return "[MOCK] Hello! How can I help you today?"
 
@@ -1,11 +1,35 @@
 """OpenAI LLM implementation."""
 
+import asyncio
 import os
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+)
 
-from openai import OpenAI
+import httpx
+import openai
+from openai import APIStatusError, AsyncOpenAI, OpenAI
 
-from ..base import BaseLLM
+from ..base import BaseLLM, check_samples
+from ..batch_api import BatchRunner
+from ..batching import BatchResult
+from ..clients import ClientRegistry, HTTPSettings
+from ..conversation import Messages
+from ..exceptions import LLMConnectionError, LLMError, LLMTimeoutError, error_for_status
+from ..hooks import TokenUsage, report_usage
+from ..rate_limit import RateLimiter, estimate_request_tokens
+from ..recording import Recorder, chat_params
+from ..retry import HedgePolicy, RetryPolicy
+from ..streaming import AsyncTextStream, TextStream
 
 
 class OpenAILLM(BaseLLM):
@@ -15,6 +39,13 @@ class OpenAILLM(BaseLLM):
         self,
         model_name: str = "gpt-3.5-turbo",
         api_key: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        base_url: Optional[str] = None,
+        http_settings: Optional[HTTPSettings] = None,
+        client_registry: Optional[ClientRegistry] = None,
+        recorder: Optional[Recorder] = None,
         **kwargs: Any,
     ) -> None:
         """Initialize the OpenAI LLM.
@@ -22,9 +53,31 @@ class OpenAILLM(BaseLLM):
         Args:
             model_name: The OpenAI model to use (e.g., 'gpt-3.5-turbo', 'gpt-4')
             api_key: OpenAI API key (if not provided, will use OPENAI_API_KEY env var)
+            rate_limiter: Client-side limiter every request waits on before
+                being sent; it adapts to the x-ratelimit-* response headers
+            retry_policy: Retries transient failures with backoff; replaces the
+                OpenAI client's built-in retries when set
+            hedge_policy: Sends a duplicate request when one is unusually slow
+            base_url: URL of an OpenAI-compatible API (defaults to OpenAI's)
+            http_settings: Connection pool limits, keep-alive and HTTP/2 of the
+                underlying HTTP client (the OpenAI SDK defaults if None)
+            client_registry: Shares clients, and so their connection pools, with
+                other instances using the same key, base URL and settings
+            recorder: Appends every successful request and its response,
+                including streamed chunks and usage, to a recording that
+                ReplayLLM can serve offline
             **kwargs: Additional configuration parameters
         """
         super().__init__(model_name, **kwargs)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        self.base_url = base_url
+        self.client_registry = client_registry
+        self.recorder = recorder
+        if http_settings is None and client_registry is not None:
+            http_settings = HTTPSettings()
+        self.http_settings = http_settings
 
         # Get API key from parameter or environment variable
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
@@ -34,8 +87,77 @@ class OpenAILLM(BaseLLM):
                 "or set the OPENAI_API_KEY environment variable."
             )
 
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=self.api_key)
+        # Initialize OpenAI client; the async client is created on first use
+        self._client_options: Dict[str, Any] = {}
+        if retry_policy is not None:
+            self._client_options["max_retries"] = 0
+        if base_url is not None:
+            self._client_options["base_url"] = base_url
+        self._client_key: Hashable = (
+            self.api_key,
+            base_url,
+            self.http_settings,
+            self._client_options.get("max_retries"),
+        )
+        if client_registry is not None:
+            self.client = client_registry.acquire(self._client_key, self._build_client)
+        else:
+            self.client = self._build_client()
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_client_key: Optional[Hashable] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """The AsyncOpenAI client used by the coroutine API.
+
+        Shared clients are bound to the running event loop, so a new one is
+        acquired when the instance is used from another loop.
+        """
+        if self.client_registry is None:
+            if self._async_client is None:
+                self._async_client = self._build_async_client()
+            return self._async_client
+
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client_key is not None:
+                self.client_registry.forget(self._async_client_key)
+            self._async_client_key, self._async_client = self.client_registry.acquire_async(
+                self._client_key, self._build_async_client
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    def close(self) -> None:
+        """Release the HTTP clients.
+
+        Shared clients are closed once no instance uses them anymore. An async
+        client is only dropped here; use :meth:`aclose` to close it as well.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self.client_registry is not None:
+            self.client_registry.release(self._client_key)
+            if self._async_client_key is not None:
+                self.client_registry.forget(self._async_client_key)
+        else:
+            self.client.close()
+        self._async_client = None
+        self._async_client_key = None
+
+    async def aclose(self) -> None:
+        """Release the HTTP clients, closing the async client on this loop."""
+        if self._async_client is not None and not self._closed:
+            if self._async_client_key is not None and self.client_registry is not None:
+                await self.client_registry.arelease(self._async_client_key)
+            else:
+                await self._async_client.close()
+            self._async_client = None
+            self._async_client_key = None
+        self.close()
 
     def generate(
         self,
@@ -56,38 +178,75 @@ class OpenAILLM(BaseLLM):
             Generated text response
 
         Raises:
-            Exception: If the OpenAI API call fails
+            LLMError: If the OpenAI API call fails; RetryableLLMError subclasses
+                mark transient failures
         """
-        try:
-            # Prepare API parameters
-            api_params = {
-                "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
-                **kwargs,
-            }
+        messages = [{"role": "user", "content": prompt}]
+        return self.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
 
-            if max_tokens is not None:
-                api_params["max_tokens"] = max_tokens
-            if temperature is not None:
-                api_params["temperature"] = temperature
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a chat response using OpenAI's chat API.
 
-            # Make API call
-            response = self.client.chat.completions.create(**api_params)
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 2.0)
+            **kwargs: Additional OpenAI API parameters
 
-            # Extract and return the generated text
-            return response.choices[0].message.content or ""
+        Returns:
+            Generated chat response
 
-        except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}") from e
+        Raises:
+            LLMError: If the OpenAI API call fails; RetryableLLMError subclasses
+                mark transient failures
+        """
+        api_params = self._build_params(messages, max_tokens, temperature, kwargs)
 
-    def chat(
+        # Make API call
+        response = self._request(api_params)
+        return self._handle_response(api_params, response)
+
+    async def agenerate(
         self,
-        messages: List[Dict[str, str]],
+        prompt: str,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         **kwargs: Any,
     ) -> str:
-        """Generate a chat response using OpenAI's chat API.
+        """Generate text using the AsyncOpenAI client.
+
+        Args:
+            prompt: The input prompt for text generation
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 2.0)
+            **kwargs: Additional OpenAI API parameters
+
+        Returns:
+            Generated text response
+
+        Raises:
+            LLMError: If the OpenAI API call fails; RetryableLLMError subclasses
+                mark transient failures
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return await self.achat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a chat response using the AsyncOpenAI client.
 
         Args:
             messages: List of message dictionaries with 'role' and 'content' keys
@@ -99,22 +258,536 @@ class OpenAILLM(BaseLLM):
             Generated chat response
 
         Raises:
-            Exception: If the OpenAI API call fails
+            LLMError: If the OpenAI API call fails; RetryableLLMError subclasses
+                mark transient failures
         """
-        try:
-            # Prepare API parameters
-            api_params = {"model": self.model_name, "messages": messages, **kwargs}
+        api_params = self._build_params(messages, max_tokens, temperature, kwargs)
 
-            if max_tokens is not None:
-                api_params["max_tokens"] = max_tokens
-            if temperature is not None:
-                api_params["temperature"] = temperature
+        # Make API call without blocking the event loop
+        response = await self._arequest(api_params)
+        return self._handle_response(api_params, response)
 
-            # Make API call
-            response = self.client.chat.completions.create(**api_params)
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate several candidate responses with a single request.
 
-            # Extract and return the generated text
-            return response.choices[0].message.content or ""
+        See :meth:`chat_n`.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return self.chat_n(messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate several candidate chat responses with a single request.
+
+        The candidates come from the choices of one request with OpenAI's
+        ``n`` parameter, so the prompt is sent and billed once and all of
+        them arrive after a single round-trip. Responses with several choices
+        are not recorded.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            n: Number of candidates to generate
+            max_tokens: Maximum number of tokens to generate per candidate
+            temperature: Sampling temperature (0.0 to 2.0)
+            **kwargs: Additional OpenAI API parameters
+
+        Returns:
+            The n candidates, in choice order
+
+        Raises:
+            ValueError: If n is less than 1
+            LLMError: If the OpenAI API call fails; RetryableLLMError subclasses
+                mark transient failures
+        """
+        api_params = self._build_n_params(messages, n, max_tokens, temperature, kwargs)
+        response = self._request(api_params)
+        return self._handle_choices(api_params, response)
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`generate_n` using the AsyncOpenAI client."""
+        messages = [{"role": "user", "content": prompt}]
+        return await self.achat_n(
+            messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`chat_n` using the AsyncOpenAI client."""
+        api_params = self._build_n_params(messages, n, max_tokens, temperature, kwargs)
+        response = await self._arequest(api_params)
+        return self._handle_choices(api_params, response)
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream generated text as the OpenAI API produces it.
 
+        Args:
+            prompt: The input prompt for text generation
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 2.0)
+            **kwargs: Additional OpenAI API parameters
+
+        Returns:
+            A TextStream of content deltas
+
+        Raises:
+            LLMError: If the OpenAI API call fails while iterating
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return self.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a chat response using ``stream=True`` on the chat API.
+
+        The request is sent when iteration starts. The token usage reported
+        at the end of the stream is available as ``stream.stats.usage``.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 2.0)
+            **kwargs: Additional OpenAI API parameters
+
+        Returns:
+            A TextStream of content deltas
+
+        Raises:
+            LLMError: If the OpenAI API call fails while iterating
+        """
+        api_params = self._build_params(messages, max_tokens, temperature, kwargs)
+
+        def record_usage(usage: TokenUsage) -> None:
+            stream.stats.usage = usage
+
+        stream = TextStream(self._iter_deltas(api_params, record_usage))
+        return stream
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Stream generated text using the AsyncOpenAI client."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.astream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Stream a chat response using the AsyncOpenAI client."""
+        api_params = self._build_params(messages, max_tokens, temperature, kwargs)
+
+        def record_usage(usage: TokenUsage) -> None:
+            stream.stats.usage = usage
+
+        stream = AsyncTextStream(self._aiter_deltas(api_params, record_usage))
+        return stream
+
+    def iter_batch_chat(
+        self,
+        conversations: Iterable[Messages],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        runner: Optional[BatchRunner] = None,
+        **kwargs: Any,
+    ) -> Iterator[BatchResult]:
+        """Answer conversations offline through the Batch API.
+
+        Unlike :meth:`iter_chat_many`, no request is sent synchronously: the
+        conversations are uploaded as batch jobs, which the provider
+        completes within its completion window at a discount. Suited to
+        large evaluation jobs that can wait for their results.
+
+        Args:
+            conversations: The conversations to answer; read lazily
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0.0 to 2.0)
+            runner: Submits and polls the batches; one polling every 30
+                seconds with this instance's client if None
+            **kwargs: Additional OpenAI API parameters
+
+        Yields:
+            One BatchResult per conversation, indexed by its position, in the
+            order the batches complete
+        """
+        runner = runner if runner is not None else BatchRunner(self.client)
+        requests = (
+            self._build_params(messages, max_tokens, temperature, kwargs)
+            for messages in conversations
+        )
+        return runner.run(requests)
+
+    def iter_batch_generate(
+        self,
+        prompts: Iterable[str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        runner: Optional[BatchRunner] = None,
+        **kwargs: Any,
+    ) -> Iterator[BatchResult]:
+        """Generate text for prompts offline through the Batch API.
+
+        See :meth:`iter_batch_chat`.
+        """
+        conversations = ([{"role": "user", "content": prompt}] for prompt in prompts)
+        return self.iter_batch_chat(conversations, max_tokens, temperature, runner, **kwargs)
+
+    def _iter_deltas(
+        self, api_params: Dict[str, Any], on_usage: Callable[[TokenUsage], None]
+    ) -> Iterator[str]:
+        """Send a streaming request and yield the content deltas.
+
+        The usage reported in the final chunk is passed to ``on_usage``. The
+        response is closed however iteration ends, returning its connection
+        to the pool.
+        """
+        response = self._request(_stream_params(api_params), hedge=False)
+        recorded = self._stream_recording(api_params, on_usage)
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield recorded.add(chunk.choices[0].delta.content)
+                recorded.usage(_token_usage(chunk))
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}") from e
+            raise translate_error(e) from e
+        finally:
+            response.close()
+        recorded.finish()
+
+    async def _aiter_deltas(
+        self, api_params: Dict[str, Any], on_usage: Callable[[TokenUsage], None]
+    ) -> AsyncIterator[str]:
+        """Async counterpart of :meth:`_iter_deltas`."""
+        response = await self._arequest(_stream_params(api_params), hedge=False)
+        recorded = self._stream_recording(api_params, on_usage)
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield recorded.add(chunk.choices[0].delta.content)
+                recorded.usage(_token_usage(chunk))
+        except Exception as e:
+            raise translate_error(e) from e
+        finally:
+            await response.close()
+        recorded.finish()
+
+    def _stream_recording(
+        self, api_params: Dict[str, Any], on_usage: Callable[[TokenUsage], None]
+    ) -> "_StreamRecording":
+        """Collect a stream, correcting the limiter's token estimate once usage arrives."""
+        if self.rate_limiter is None:
+            return _StreamRecording(self.recorder, api_params, on_usage)
+        rate_limiter = self.rate_limiter
+        estimate = self._estimate_tokens(api_params)
+
+        def reconcile(usage: TokenUsage) -> None:
+            rate_limiter.record_usage(estimate, usage.total_tokens)
+            on_usage(usage)
+
+        return _StreamRecording(self.recorder, api_params, reconcile)
+
+    def _handle_response(self, api_params: Dict[str, Any], response: Any) -> str:
+        """Report and record a chat completion, and return its text."""
+        content: str = response.choices[0].message.content or ""
+        usage = _token_usage(response)
+        if usage is not None:
+            report_usage(usage)
+        if self.recorder is not None:
+            self.recorder.record(api_params, content, usage=usage)
+        return content
+
+    def _handle_choices(self, api_params: Dict[str, Any], response: Any) -> List[str]:
+        """Report the usage of a multi-choice completion, and return its texts."""
+        if api_params.get("n", 1) == 1:
+            return [self._handle_response(api_params, response)]
+        choices = sorted(response.choices, key=lambda choice: choice.index)
+        usage = _token_usage(response)
+        if usage is not None:
+            report_usage(usage)
+        return [choice.message.content or "" for choice in choices]
+
+    def _request(self, api_params: Dict[str, Any], hedge: bool = True) -> Any:
+        """Send a request with the configured hedging and retry policies.
+
+        Streaming requests are not hedged, since a losing stream would keep
+        its connection open.
+        """
+
+        def attempt(timeout: Optional[float]) -> Any:
+            params = api_params if timeout is None else {**api_params, "timeout": timeout}
+            try:
+                if hedge and self.hedge_policy is not None:
+                    return self.hedge_policy.call(lambda: self._create(params))
+                return self._create(params)
+            except Exception as e:
+                raise translate_error(e) from e
+
+        if self.retry_policy is None:
+            return attempt(None)
+        return self.retry_policy.call(attempt)
+
+    async def _arequest(self, api_params: Dict[str, Any], hedge: bool = True) -> Any:
+        """Async :meth:`_request` using the AsyncOpenAI client."""
+
+        async def attempt(timeout: Optional[float]) -> Any:
+            params = api_params if timeout is None else {**api_params, "timeout": timeout}
+            try:
+                if hedge and self.hedge_policy is not None:
+                    return await self.hedge_policy.acall(lambda: self._acreate(params))
+                return await self._acreate(params)
+            except Exception as e:
+                raise translate_error(e) from e
+
+        if self.retry_policy is None:
+            return await attempt(None)
+        return await self.retry_policy.acall(attempt)
+
+    def _create(self, api_params: Dict[str, Any]) -> Any:
+        """Send a chat completions request, honouring the rate limiter."""
+        if self.rate_limiter is None:
+            return self.client.chat.completions.create(**api_params)
+
+        estimate = self._estimate_tokens(api_params)
+        self.rate_limiter.acquire(estimate)
+        try:
+            raw_response = self.client.chat.completions.with_raw_response.create(**api_params)
+        except APIStatusError as e:
+            self.rate_limiter.update_from_headers(e.response.headers)
+            raise
+        return _parse_limited(self.rate_limiter, raw_response, estimate)
+
+    async def _acreate(self, api_params: Dict[str, Any]) -> Any:
+        """Async :meth:`_create` using the AsyncOpenAI client."""
+        if self.rate_limiter is None:
+            return await self.async_client.chat.completions.create(**api_params)
+
+        estimate = self._estimate_tokens(api_params)
+        await self.rate_limiter.aacquire(estimate)
+        try:
+            raw_response = await self.async_client.chat.completions.with_raw_response.create(
+                **api_params
+            )
+        except APIStatusError as e:
+            self.rate_limiter.update_from_headers(e.response.headers)
+            raise
+        return _parse_limited(self.rate_limiter, raw_response, estimate)
+
+    def _build_client(self) -> OpenAI:
+        """Create the sync OpenAI client."""
+        options = dict(self._client_options)
+        if self.http_settings is not None:
+            options["timeout"] = _timeout(self.http_settings)
+            options["http_client"] = httpx.Client(
+                **_http_client_options(self.http_settings)
+            )
+        return OpenAI(api_key=self.api_key, **options)
+
+    def _build_async_client(self) -> AsyncOpenAI:
+        """Create the AsyncOpenAI client."""
+        options = dict(self._client_options)
+        if self.http_settings is not None:
+            options["timeout"] = _timeout(self.http_settings)
+            options["http_client"] = httpx.AsyncClient(
+                **_http_client_options(self.http_settings)
+            )
+        return AsyncOpenAI(api_key=self.api_key, **options)
+
+    def _estimate_tokens(self, api_params: Dict[str, Any]) -> int:
+        return estimate_request_tokens(
+            api_params["messages"], api_params.get("max_tokens"), api_params.get("n", 1)
+        )
+
+    def _build_params(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Prepare the chat completions API parameters."""
+        return chat_params(self.model_name, messages, max_tokens, temperature, kwargs)
+
+    def _build_n_params(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Prepare the parameters of a request for n choices.
+
+        A single choice is requested exactly like :meth:`chat` does, so that it
+        is recorded and replayed the same way.
+        """
+        check_samples(n)
+        if n > 1:
+            kwargs = {**kwargs, "n": n}
+        return self._build_params(messages, max_tokens, temperature, kwargs)
+
+
+def _stream_params(api_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parameters of a streaming request that reports usage in its last chunk."""
+    params = {**api_params, "stream": True}
+    params.setdefault("stream_options", {"include_usage": True})
+    return params
+
+
+def _token_usage(response: Any) -> Optional[TokenUsage]:
+    """Read the token usage of a response or stream chunk, if it has any."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return TokenUsage(
+        prompt_tokens=int(usage.prompt_tokens or 0),
+        completion_tokens=int(usage.completion_tokens or 0),
+        cached_tokens=int(getattr(details, "cached_tokens", None) or 0),
+    )
+
+
+class _StreamRecording:
+    """Collects the deltas and usage of a stream, recording them at the end."""
+
+    def __init__(
+        self,
+        recorder: Optional[Recorder],
+        api_params: Dict[str, Any],
+        on_usage: Callable[[TokenUsage], None],
+    ) -> None:
+        self.recorder = recorder
+        self.api_params = api_params
+        self.on_usage = on_usage
+        self.chunks: List[str] = []
+        self.token_usage: Optional[TokenUsage] = None
+
+    def add(self, chunk: str) -> str:
+        if self.recorder is not None:
+            self.chunks.append(chunk)
+        return chunk
+
+    def usage(self, usage: Optional[TokenUsage]) -> None:
+        if usage is not None:
+            self.token_usage = usage
+            self.on_usage(usage)
+
+    def finish(self) -> None:
+        if self.recorder is not None:
+            self.recorder.record(
+                self.api_params, "".join(self.chunks), self.chunks, self.token_usage
+            )
+
+
+def _timeout(settings: HTTPSettings) -> httpx.Timeout:
+    return httpx.Timeout(settings.timeout, connect=settings.connect_timeout)
+
+
+def _http_client_options(settings: HTTPSettings) -> Dict[str, Any]:
+    """Keyword arguments of an httpx client implementing the settings."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+        "http2": settings.http2,
+        "timeout": _timeout(settings),
+        "follow_redirects": True,
+    }
+
+
+def _parse_limited(rate_limiter: RateLimiter, raw_response: Any, estimate: int) -> Any:
+    """Feed response headers and usage back to the limiter and parse the body."""
+    rate_limiter.update_from_headers(raw_response.headers)
+    response = raw_response.parse()
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        rate_limiter.record_usage(estimate, usage.total_tokens)
+    return response
+
+
+def translate_error(error: Exception) -> LLMError:
+    """Map an exception raised by the OpenAI SDK onto the LLMError hierarchy.
+
+    Args:
+        error: The exception to translate
+
+    Returns:
+        The matching LLMError; LLMErrors are returned unchanged
+    """
+    if isinstance(error, LLMError):
+        return error
+
+    message = f"OpenAI API error: {str(error)}"
+    if isinstance(error, openai.APITimeoutError):
+        return LLMTimeoutError(message)
+    if isinstance(error, openai.APIConnectionError):
+        return LLMConnectionError(message)
+    if not isinstance(error, APIStatusError):
+        return LLMError(message)
+
+    return error_for_status(
+        error.status_code,
+        message,
+        code=getattr(error, "code", None),
+        retry_after=_retry_after(error.response.headers),
+    )
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Read the delay requested by the retry-after(-ms) headers, in seconds."""
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
@@ -0,0 +1,209 @@
+"""Replay LLM implementation serving responses from a recording."""
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from ..base import BaseLLM
+from ..conversation import Messages
+from ..exceptions import ReplayMissError
+from ..hooks import report_usage
+from ..recording import RecordedResponse, Recording, chat_params
+from ..streaming import AsyncTextStream, TextStream, split_chunks
+
+
+class ReplayLLM(BaseLLM):
+    """LLM answering from a recording made with ``OpenAILLM(recorder=...)``.
+
+    Requests are looked up by the same parameters OpenAILLM would send, so the
+    model name and generation parameters must match the recorded calls. No
+    network is used and there is no simulated latency: calls return as fast
+    as the memory-mapped recording can be read.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "gpt-3.5-turbo",
+        path: Optional[str] = None,
+        recording: Optional[Recording] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the Replay LLM.
+
+        Args:
+            model_name: The model name the calls were recorded with
+            path: Path of the recording log; its index is built next to it
+                ('<path>.idx') if missing or outdated
+            recording: An already opened recording, instead of a path
+            **kwargs: Additional configuration parameters
+
+        Raises:
+            ValueError: If neither a path nor a recording is given
+        """
+        super().__init__(model_name, **kwargs)
+        if recording is None:
+            if path is None:
+                raise ValueError("ReplayLLM needs the path of a recording")
+            recording = Recording(path)
+        self.recording = recording
+
+    def close(self) -> None:
+        """Unmap the recording."""
+        self.recording.close()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Replay the response to a prompt sent as a single user message.
+
+        Args:
+            prompt: The input prompt
+            max_tokens: Maximum number of tokens, as recorded
+            temperature: Sampling temperature, as recorded
+            **kwargs: Additional API parameters, as recorded
+
+        Returns:
+            The recorded response
+
+        Raises:
+            ReplayMissError: If the request was not recorded
+        """
+        messages = [{"role": "user", "content": prompt}]
+        return self._replay(messages, max_tokens, temperature, kwargs).content
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Replay the response to a conversation.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            max_tokens: Maximum number of tokens, as recorded
+            temperature: Sampling temperature, as recorded
+            **kwargs: Additional API parameters, as recorded
+
+        Returns:
+            The recorded response
+
+        Raises:
+            ReplayMissError: If the request was not recorded
+        """
+        return self._replay(messages, max_tokens, temperature, kwargs).content
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Replay :meth:`generate` without going through an executor."""
+        messages = [{"role": "user", "content": prompt}]
+        return self._replay(messages, max_tokens, temperature, kwargs).content
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Replay :meth:`chat` without going through an executor."""
+        return self._replay(messages, max_tokens, temperature, kwargs).content
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Replay the streamed response to a prompt."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.stream_chat(messages, max_tokens, temperature, **kwargs)
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Replay the streamed response to a conversation.
+
+        The recorded chunks are replayed as they were received; responses
+        recorded without streaming are split into words. The recorded usage is
+        available as ``stream.stats.usage``.
+
+        Raises:
+            ReplayMissError: While iterating, if the request was not recorded
+        """
+
+        def chunks() -> Iterator[str]:
+            response = self._replay(messages, max_tokens, temperature, kwargs, report=False)
+            stream.stats.usage = response.usage
+            yield from _chunks_of(response)
+
+        stream = TextStream(chunks())
+        return stream
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.astream_chat(messages, max_tokens, temperature, **kwargs)
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+
+        async def chunks() -> AsyncIterator[str]:
+            response = self._replay(messages, max_tokens, temperature, kwargs, report=False)
+            stream.stats.usage = response.usage
+            for chunk in _chunks_of(response):
+                yield chunk
+
+        stream = AsyncTextStream(chunks())
+        return stream
+
+    def _replay(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+        report: bool = True,
+    ) -> RecordedResponse:
+        """Look up a request, reporting its recorded usage unless streamed."""
+        params = chat_params(self.model_name, messages, max_tokens, temperature, kwargs)
+        response = self.recording.get(params)
+        if response is None:
+            raise ReplayMissError(
+                f"No recorded response for this {self.model_name} request in "
+                f"{self.recording.path}"
+            )
+        if report and response.usage is not None:
+            report_usage(response.usage)
+        return response
+
+
+def _chunks_of(response: RecordedResponse) -> List[str]:
+    if response.chunks is not None:
+        return response.chunks
+    return split_chunks(response.content)
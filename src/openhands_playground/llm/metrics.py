@@ -0,0 +1,251 @@
+"""In-process metrics for LLM calls: latency histograms, token counts and cost."""
+
+import bisect
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .hooks import CallInfo, LLMHook, TokenUsage
+
+# Upper bounds of the latency buckets, in seconds
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """Counts observations in buckets, like a Prometheus histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Initialize the histogram.
+
+        Args:
+            buckets: Increasing upper bounds; an overflow bucket is added
+        """
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError("Histogram buckets must be strictly increasing")
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Cumulative counts per upper bound, ending with +Inf."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket.
+
+        Observations in the overflow bucket are reported as the largest bound.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1] if self.buckets else 0.0
+
+    @property
+    def mean(self) -> float:
+        """Mean of the observations."""
+        return self.sum / self.count if self.count else 0.0
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """Price of a model in USD per million tokens.
+
+    Attributes:
+        input: Price of prompt tokens
+        output: Price of completion tokens
+        cached_input: Price of prompt tokens served from the prompt cache;
+            same as ``input`` if None
+    """
+
+    input: float
+    output: float
+    cached_input: Optional[float] = None
+
+    def cost(self, usage: TokenUsage) -> float:
+        """Estimated cost of a call's usage, in USD."""
+        cached_price = self.input if self.cached_input is None else self.cached_input
+        uncached = usage.prompt_tokens - usage.cached_tokens
+        return (
+            uncached * self.input
+            + usage.cached_tokens * cached_price
+            + usage.completion_tokens * self.output
+        ) / 1_000_000
+
+
+# List prices at the time of writing; pass your own to MetricsCollector
+DEFAULT_PRICES: Dict[str, ModelPrice] = {
+    "gpt-3.5-turbo": ModelPrice(input=0.5, output=1.5),
+    "gpt-4": ModelPrice(input=30.0, output=60.0),
+    "gpt-4-turbo": ModelPrice(input=10.0, output=30.0),
+    "gpt-4o": ModelPrice(input=2.5, output=10.0, cached_input=1.25),
+    "gpt-4o-mini": ModelPrice(input=0.15, output=0.6, cached_input=0.075),
+    "gpt-4.1": ModelPrice(input=2.0, output=8.0, cached_input=0.5),
+    "gpt-4.1-mini": ModelPrice(input=0.4, output=1.6, cached_input=0.1),
+}
+
+
+@dataclass
+class ModelMetrics:
+    """Metrics of the calls to one model.
+
+    Attributes:
+        calls: Completed calls, successful or not
+        errors: Failed calls
+        errors_by_type: Failed calls per exception class name
+        prompt_tokens: Prompt tokens used, including cached ones
+        completion_tokens: Completion tokens generated
+        cached_tokens: Prompt tokens served from the prompt cache
+        cost: Estimated cost in USD, if the model's price is known
+        latency: Histogram of call durations in seconds
+        time_to_first_token: Histogram of stream time-to-first-token in seconds
+    """
+
+    calls: int = 0
+    errors: int = 0
+    errors_by_type: Dict[str, int] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+    time_to_first_token: Histogram = field(default_factory=Histogram)
+
+
+class MetricsCollector(LLMHook):
+    """Hook aggregating per-model latency, token and cost metrics in process.
+
+    Add it to the LLMs to observe with ``llm.add_hook(collector)`` or
+    ``LLMFactory.create_llm(..., hooks=[collector])``.
+    """
+
+    def __init__(
+        self,
+        prices: Optional[Mapping[str, ModelPrice]] = None,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        """Initialize the collector.
+
+        Args:
+            prices: Price per model name; a model also matches the longest
+                known name it starts with, so 'gpt-4o-2024-08-06' uses the
+                'gpt-4o' price. Defaults to DEFAULT_PRICES.
+            buckets: Upper bounds of the latency histogram buckets, in seconds
+        """
+        self.prices = dict(DEFAULT_PRICES if prices is None else prices)
+        self.buckets = tuple(buckets)
+        self._models: Dict[str, ModelMetrics] = {}
+        self._lock = threading.Lock()
+
+    def after_call(self, info: CallInfo, result: Any) -> None:
+        """Record a successful call."""
+        self._record(info)
+
+    def on_error(self, info: CallInfo, error: BaseException) -> None:
+        """Record a failed call."""
+        self._record(info)
+
+    def models(self) -> Dict[str, ModelMetrics]:
+        """The metrics per model name.
+
+        The returned objects are live; read them while no calls are recorded,
+        or use :meth:`snapshot`.
+        """
+        with self._lock:
+            return dict(self._models)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """A JSON-serializable copy of the metrics per model name."""
+        with self._lock:
+            return {name: _summarize(metrics) for name, metrics in self._models.items()}
+
+    def reset(self) -> None:
+        """Forget all recorded metrics."""
+        with self._lock:
+            self._models.clear()
+
+    def price_for(self, model_name: str) -> Optional[ModelPrice]:
+        """The price of a model, matched exactly or by the longest name prefix."""
+        price = self.prices.get(model_name)
+        if price is not None:
+            return price
+        matches = [name for name in self.prices if model_name.startswith(name)]
+        return self.prices[max(matches, key=len)] if matches else None
+
+    def _record(self, info: CallInfo) -> None:
+        price = self.price_for(info.model_name) if info.usage is not None else None
+        with self._lock:
+            metrics = self._models.get(info.model_name)
+            if metrics is None:
+                metrics = ModelMetrics(
+                    latency=Histogram(self.buckets),
+                    time_to_first_token=Histogram(self.buckets),
+                )
+                self._models[info.model_name] = metrics
+
+            metrics.calls += 1
+            if info.duration is not None:
+                metrics.latency.observe(info.duration)
+            if info.time_to_first_token is not None:
+                metrics.time_to_first_token.observe(info.time_to_first_token)
+            if info.error is not None:
+                metrics.errors += 1
+                error_type = type(info.error).__name__
+                metrics.errors_by_type[error_type] = metrics.errors_by_type.get(error_type, 0) + 1
+            if info.usage is not None:
+                metrics.prompt_tokens += info.usage.prompt_tokens
+                metrics.completion_tokens += info.usage.completion_tokens
+                metrics.cached_tokens += info.usage.cached_tokens
+                if price is not None:
+                    metrics.cost += price.cost(info.usage)
+
+
+def _summarize(metrics: ModelMetrics) -> Dict[str, Any]:
+    latency = metrics.latency
+    return {
+        "calls": metrics.calls,
+        "errors": metrics.errors,
+        "errors_by_type": dict(metrics.errors_by_type),
+        "prompt_tokens": metrics.prompt_tokens,
+        "completion_tokens": metrics.completion_tokens,
+        "cached_tokens": metrics.cached_tokens,
+        "cached_token_ratio": (
+            metrics.cached_tokens / metrics.prompt_tokens if metrics.prompt_tokens else 0.0
+        ),
+        "cost_usd": round(metrics.cost, 6),
+        "latency_seconds": {
+            "mean": latency.mean,
+            "p50": latency.quantile(0.5),
+            "p95": latency.quantile(0.95),
+            "p99": latency.quantile(0.99),
+        },
+    }
@@ -0,0 +1,241 @@
+"""Pre-process, call and post-process pipelines around LLM calls.
+
+At high network concurrency the CPU work around each call (templating, token
+counting, parsing and validating responses) becomes the bottleneck when it
+runs on the event loop. A Pipeline runs that work in a process pool and the
+calls themselves in asyncio, so one event loop keeps both the CPUs and the
+network busy. Each stage has its own concurrency limit, and only a bounded
+number of items is in flight between the stages: inputs are consumed no
+faster than results are produced and read.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+from .base import BaseLLM
+from .batching import DEFAULT_MAX_CONCURRENCY
+
+# The stage at which an item failed
+PREPROCESS = "preprocess"
+CALL = "call"
+POSTPROCESS = "postprocess"
+
+# What a pre-processing function returns: a chat request or a prompt
+Request = Union[List[Dict[str, str]], str]
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of one item of a pipeline.
+
+    Attributes:
+        index: Position of the item in the input sequence
+        output: The post-processed response, or None if a stage failed
+        error: Exception raised by the failing stage, or None
+        stage: Stage that raised the error, or None
+    """
+
+    index: int
+    output: Any = None
+    error: Optional[Exception] = None
+    stage: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether every stage succeeded."""
+        return self.error is None
+
+
+class Pipeline:
+    """Runs items through pre-processing, an LLM call and post-processing.
+
+    ``preprocess`` turns an item into a message list (sent with ``achat``) or
+    a prompt (sent with ``agenerate``); ``postprocess`` turns the response
+    text into the output. Both run in the executor, so with the default
+    process pool they must be picklable: module-level functions or
+    ``functools.partial`` objects of them, not lambdas or closures. A missing
+    function skips its stage.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        preprocess: Optional[Callable[[Any], Request]] = None,
+        postprocess: Optional[Callable[[str], Any]] = None,
+        processes: Optional[int] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_pending: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        **call_kwargs: Any,
+    ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            llm: The LLM to call
+            preprocess: Turns an item into a request; items are requests if None
+            postprocess: Turns a response into the output; outputs are the
+                response texts if None
+            processes: Worker processes, and concurrent pre- and post-processing
+                jobs; defaults to the number of CPUs
+            max_concurrency: Maximum number of concurrent LLM calls
+            max_pending: Maximum number of items in flight across all stages;
+                defaults to enough to keep every stage busy
+            executor: Executor for the processing stages; a process pool,
+                created on first use and shut down by close(), if None
+            **call_kwargs: Keyword arguments for every call, e.g. max_tokens
+
+        Raises:
+            ValueError: If a limit is not positive
+        """
+        self.llm = llm
+        self.preprocess = preprocess
+        self.postprocess = postprocess
+        self.processes = processes or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending or max_concurrency + 2 * self.processes
+        if min(self.processes, self.max_concurrency, self.max_pending) < 1:
+            raise ValueError("processes, max_concurrency and max_pending must be at least 1")
+        self.call_kwargs = call_kwargs
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        """The executor running the processing stages."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+        return self._executor
+
+    async def aiter(
+        self, items: Union[Iterable[Any], AsyncIterable[Any]]
+    ) -> AsyncIterator[PipelineResult]:
+        """Run items through the pipeline, yielding results as they finish.
+
+        Args:
+            items: Inputs to process, consumed lazily
+
+        Yields:
+            One PipelineResult per item, in completion order
+        """
+        loop = asyncio.get_running_loop()
+        cpu = asyncio.Semaphore(self.processes)
+        network = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(index: int, item: Any) -> PipelineResult:
+            stage = PREPROCESS
+            try:
+                request = item
+                if self.preprocess is not None:
+                    async with cpu:
+                        request = await loop.run_in_executor(
+                            self.executor, self.preprocess, item
+                        )
+                stage = CALL
+                async with network:
+                    if isinstance(request, str):
+                        text = await self.llm.agenerate(request, **self.call_kwargs)
+                    else:
+                        text = await self.llm.achat(request, **self.call_kwargs)
+                stage = POSTPROCESS
+                output: Any = text
+                if self.postprocess is not None:
+                    async with cpu:
+                        output = await loop.run_in_executor(
+                            self.executor, self.postprocess, text
+                        )
+                return PipelineResult(index, output=output)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return PipelineResult(index, error=e, stage=stage)
+
+        pending: Set["asyncio.Future[PipelineResult]"] = set()
+        try:
+            index = 0
+            async for item in _aiter_items(items):
+                pending.add(asyncio.ensure_future(run_one(index, item)))
+                index += 1
+                if len(pending) >= self.max_pending:
+                    done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def arun(
+        self, items: Union[Iterable[Any], AsyncIterable[Any]]
+    ) -> List[PipelineResult]:
+        """Run items through the pipeline and return the results in input order."""
+        results = [result async for result in self.aiter(items)]
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def run(self, items: Iterable[Any]) -> List[PipelineResult]:
+        """Synchronous :meth:`arun`, running its own event loop."""
+        return asyncio.run(self.arun(items))
+
+    def close(self) -> None:
+        """Shut down the process pool if the pipeline created it."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+async def _aiter_items(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def render_messages(template: str, item: Dict[str, Any], system: Optional[str] = None) -> Request:
+    """Pre-processing helper: fill a ``str.format`` template into a chat request.
+
+    Use it through ``functools.partial(render_messages, template)`` so that it
+    can be sent to worker processes.
+    """
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": template.format(**item)})
+    return messages
+
+
+def parse_json(text: str) -> Any:
+    """Post-processing helper: parse a JSON response, ignoring Markdown code fences.
+
+    Raises:
+        ValueError: If the response is not valid JSON
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return json.loads(text)
@@ -0,0 +1,435 @@
+"""Byte-stable request layout for provider-side prompt caching.
+
+Providers such as OpenAI cache the longest previously seen prefix of a
+prompt, in blocks of 128 tokens after the first 1024. A cache hit needs the
+prefix to be identical down to the byte, so everything shared between
+requests (system prompt, tool definitions, reference documents) has to come
+first, in the same order and serialization every time, and anything that
+varies (turns, timestamps, retrieved snippets) has to come after it.
+
+PromptLayout assembles requests that way and fingerprints their prefix;
+PromptLayoutLLM applies a layout to every chat call; PromptCacheTracker
+reports how many prompt tokens each prefix gets from the cache and how much
+faster cache hits are.
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .base import BaseLLM
+from .conversation import Messages
+from .hooks import CallInfo, LLMHook, current_call
+from .metrics import DEFAULT_LATENCY_BUCKETS, Histogram
+from .streaming import AsyncTextStream, TextStream
+from .wrapper import LLMWrapper
+
+# CallInfo.metadata key under which PromptLayoutLLM names the call's workload
+WORKLOAD_KEY = "prompt_workload"
+
+# Message keys in the order they are serialized
+_MESSAGE_KEY_ORDER = ("role", "name", "content", "tool_call_id", "tool_calls")
+
+
+def canonical_text(text: str) -> str:
+    """Normalize line endings and trailing whitespace, which vary between sources."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def canonical_message(message: Mapping[str, Any]) -> Dict[str, Any]:
+    """Copy a message with its keys in a fixed order and its text normalized.
+
+    The SDK serializes dicts in insertion order, so two messages with the same
+    keys in a different order would otherwise produce different bytes.
+    """
+    ordered = [key for key in _MESSAGE_KEY_ORDER if key in message]
+    ordered += sorted(key for key in message if key not in _MESSAGE_KEY_ORDER)
+    result: Dict[str, Any] = {}
+    for key in ordered:
+        value = message[key]
+        if key == "content" and isinstance(value, str):
+            value = canonical_text(value)
+        result[key] = value
+    return result
+
+
+def canonical_tools(tools: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Sort tool definitions by name and their keys alphabetically, recursively."""
+    copies = [json.loads(json.dumps(tool, sort_keys=True)) for tool in tools]
+    return sorted(copies, key=lambda tool: (tool.get("function") or {}).get("name", ""))
+
+
+def prefix_fingerprint(
+    messages: Sequence[Mapping[str, Any]], tools: Optional[Sequence[Mapping[str, Any]]] = None
+) -> str:
+    """Fingerprint the cacheable prefix of a request.
+
+    The prefix is made of the tools and the leading system messages; two
+    requests with the same fingerprint can share a prompt cache entry.
+
+    Args:
+        messages: The request messages
+        tools: The request's tool definitions, if any
+
+    Returns:
+        16 hex digits identifying the prefix
+    """
+    prefix = []
+    for message in messages:
+        if message.get("role") not in ("system", "developer"):
+            break
+        prefix.append(canonical_message(message))
+    payload = {"tools": canonical_tools(tools or ()), "messages": prefix}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class PromptLayout:
+    """Assembles chat requests with a byte-stable prefix.
+
+    Requests are laid out as: the system prompt, the static context
+    documents, the tools (sent as the ``tools`` parameter), then the varying
+    context and the conversation turns. Only the last two change between
+    requests of a workload.
+    """
+
+    def __init__(
+        self,
+        system: Optional[str] = None,
+        tools: Optional[Sequence[Mapping[str, Any]]] = None,
+        context: Sequence[str] = (),
+        name: Optional[str] = None,
+    ) -> None:
+        """Initialize the layout.
+
+        Args:
+            system: The shared system prompt
+            tools: Tool definitions, sent in canonical order
+            context: Documents shared by every request, e.g. a repository
+                map; each becomes a system message after the system prompt
+            name: Workload name reported by PromptCacheTracker; the prefix
+                fingerprint if None
+        """
+        prefix = [system] if system else []
+        self.prefix: List[Dict[str, Any]] = [
+            canonical_message({"role": "system", "content": text}) for text in [*prefix, *context]
+        ]
+        self.tools = canonical_tools(tools) if tools else None
+        self.fingerprint = prefix_fingerprint(self.prefix, self.tools)
+        self.name = name or self.fingerprint
+
+    def messages(
+        self,
+        turns: Sequence[Mapping[str, Any]],
+        dynamic_context: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """The messages of a request: the stable prefix, then what varies.
+
+        Args:
+            turns: The conversation so far
+            dynamic_context: Per-request context such as the current time or
+                retrieved snippets, placed right after the prefix
+
+        Returns:
+            The assembled messages
+        """
+        messages = list(self.prefix)
+        if dynamic_context:
+            messages.append(canonical_message({"role": "system", "content": dynamic_context}))
+        messages.extend(canonical_message(turn) for turn in turns)
+        return messages
+
+    def request_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments to pass along with the messages, i.e. the tools."""
+        return {"tools": self.tools} if self.tools else {}
+
+
+class PromptLayoutLLM(LLMWrapper):
+    """LLM wrapper laying out every chat request with a PromptLayout.
+
+    The messages passed to ``chat`` are the varying turns; the layout's prefix
+    and tools are added in front of them. A ``dynamic_context`` keyword
+    argument is placed between the two, see PromptLayout.messages. Calls are
+    tagged with the layout's name, see PromptCacheTracker.
+    """
+
+    def __init__(self, llm: BaseLLM, layout: PromptLayout) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            llm: The LLM receiving the assembled requests
+            layout: The layout to apply
+        """
+        super().__init__(llm)
+        self.layout = layout
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Chat with the prompt as the only turn after the layout's prefix."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Chat with the layout's prefix in front of the turns."""
+        messages, kwargs = self._layout(messages, kwargs)
+        return self.llm.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+        messages = [{"role": "user", "content": prompt}]
+        return await self.achat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+        messages, kwargs = self._layout(messages, kwargs)
+        return await self.llm.achat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """:meth:`generate` with n candidates."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.chat_n(messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """:meth:`chat` with n candidates."""
+        messages, kwargs = self._layout(messages, kwargs)
+        return self.llm.chat_n(
+            messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`generate_n`."""
+        messages = [{"role": "user", "content": prompt}]
+        return await self.achat_n(
+            messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`chat_n`."""
+        messages, kwargs = self._layout(messages, kwargs)
+        return await self.llm.achat_n(
+            messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream :meth:`generate`."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream :meth:`chat`."""
+        messages, kwargs = self._layout(messages, kwargs)
+        return self.llm.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        messages = [{"role": "user", "content": prompt}]
+        return self.astream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+        messages, kwargs = self._layout(messages, kwargs)
+        return self.llm.astream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def _layout(
+        self, turns: Sequence[Mapping[str, str]], kwargs: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        info = current_call()
+        if info is not None:
+            info.metadata[WORKLOAD_KEY] = self.layout.name
+        dynamic_context = kwargs.pop("dynamic_context", None)
+        messages = self.layout.messages(turns, dynamic_context)
+        return messages, {**self.layout.request_kwargs(), **kwargs}
+
+
+@dataclass
+class PromptCacheStats:
+    """Prompt cache statistics of one workload.
+
+    Attributes:
+        calls: Calls that reported token usage
+        hits: Calls with at least one cached prompt token
+        prompt_tokens: Prompt tokens, cached or not
+        cached_tokens: Prompt tokens served from the cache
+        latency_hit: Time to first token of streams, or duration of other
+            calls, with a cache hit
+        latency_miss: The same for calls without a cache hit
+    """
+
+    calls: int = 0
+    hits: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    latency_hit: Histogram = field(default_factory=Histogram)
+    latency_miss: Histogram = field(default_factory=Histogram)
+
+    @property
+    def cached_token_ratio(self) -> float:
+        """Share of prompt tokens served from the cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of calls with a cache hit."""
+        return self.hits / self.calls if self.calls else 0.0
+
+
+class PromptCacheTracker(LLMHook):
+    """Hook reporting the provider prompt cache hit rate per workload.
+
+    Calls made through a PromptLayoutLLM are grouped by the layout's name,
+    other calls by model name. Add the tracker to the outermost LLM, e.g.
+    ``PromptLayoutLLM(llm, layout).add_hook(tracker)``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Initialize the tracker.
+
+        Args:
+            buckets: Upper bounds of the latency histogram buckets, in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._workloads: Dict[str, PromptCacheStats] = {}
+        self._lock = threading.Lock()
+
+    def after_call(self, info: CallInfo, result: Any) -> None:
+        """Record the usage and latency of a successful call."""
+        usage = info.usage
+        if usage is None:
+            return
+        workload = str(info.metadata.get(WORKLOAD_KEY, info.model_name))
+        latency = info.time_to_first_token if info.streaming else info.duration
+        with self._lock:
+            stats = self._workloads.get(workload)
+            if stats is None:
+                stats = self._workloads[workload] = PromptCacheStats(
+                    latency_hit=Histogram(self.buckets), latency_miss=Histogram(self.buckets)
+                )
+            stats.calls += 1
+            stats.prompt_tokens += usage.prompt_tokens
+            stats.cached_tokens += usage.cached_tokens
+            hit = usage.cached_tokens > 0
+            stats.hits += hit
+            if latency is not None:
+                (stats.latency_hit if hit else stats.latency_miss).observe(latency)
+
+    def workloads(self) -> Dict[str, PromptCacheStats]:
+        """The live statistics per workload; see :meth:`snapshot` for a copy."""
+        with self._lock:
+            return dict(self._workloads)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """A JSON-serializable summary per workload.
+
+        ``latency_saving_seconds`` is the difference between the mean
+        latency of cache misses and hits, once both were seen.
+        """
+        with self._lock:
+            return {name: _summarize(stats) for name, stats in self._workloads.items()}
+
+    def reset(self) -> None:
+        """Forget all recorded statistics."""
+        with self._lock:
+            self._workloads.clear()
+
+
+def _summarize(stats: PromptCacheStats) -> Dict[str, Any]:
+    hit = stats.latency_hit.mean if stats.latency_hit.count else None
+    miss = stats.latency_miss.mean if stats.latency_miss.count else None
+    return {
+        "calls": stats.calls,
+        "hit_rate": stats.hit_rate,
+        "prompt_tokens": stats.prompt_tokens,
+        "cached_tokens": stats.cached_tokens,
+        "cached_token_ratio": stats.cached_token_ratio,
+        "latency_mean_hit": hit,
+        "latency_mean_miss": miss,
+        "latency_saving_seconds": miss - hit if hit is not None and miss is not None else None,
+    }
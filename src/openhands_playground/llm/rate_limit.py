@@ -0,0 +1,297 @@
+"""Client-side rate limiting with request and token buckets."""
+
+import asyncio
+import re
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Sequence
+
+# Completion budget assumed for requests that do not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 256
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Parse an ``x-ratelimit-reset-*`` value such as '1s', '6m0s' or '20ms'.
+
+    Args:
+        value: The header value
+
+    Returns:
+        The duration in seconds, or None if the value cannot be parsed
+    """
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def estimate_request_tokens(
+    messages: Sequence[Mapping[str, str]], max_tokens: Optional[int] = None, n: int = 1
+) -> int:
+    """Roughly estimate the tokens a chat request counts against a TPM limit.
+
+    Providers charge the prompt plus the requested completion budget, so the
+    estimate is about four characters per prompt token, a small per-message
+    overhead, and ``max_tokens`` for each of the ``n`` choices.
+
+    Args:
+        messages: The chat messages
+        max_tokens: The requested completion budget
+        n: The number of choices requested
+
+    Returns:
+        The estimated number of tokens
+    """
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    prompt_tokens = prompt_chars // 4 + 4 * len(messages) + 3
+    completion_tokens = max_tokens if max_tokens is not None else DEFAULT_COMPLETION_TOKENS
+    return prompt_tokens + n * completion_tokens
+
+
+class TokenBucket:
+    """A token bucket that hands out reservations instead of rejections.
+
+    Reserving more than is available drives the balance negative; the caller
+    is told how long to wait until the balance is back to zero. Callers are
+    therefore served in arrival order without polling.
+
+    This class is not thread-safe on its own; RateLimiter guards it.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            capacity: Maximum number of tokens the bucket holds
+            refill_per_second: Tokens added per second
+            clock: Monotonic clock, replaceable in tests
+        """
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill_per_second must be positive")
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    @property
+    def available(self) -> float:
+        """Current balance; negative while reservations are outstanding."""
+        self._refill()
+        return self._tokens
+
+    def reserve(self, amount: float) -> float:
+        """Take tokens from the bucket.
+
+        Args:
+            amount: Tokens to take; clamped to the capacity so that oversized
+                requests can still proceed
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+        return max(0.0, -self._tokens / self.refill_per_second)
+
+    def refund(self, amount: float) -> None:
+        """Return tokens to the bucket (or take more, if negative)."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def observe(
+        self, remaining: float, limit: Optional[float] = None, reset: Optional[float] = None
+    ) -> None:
+        """Adapt to the provider's view of this limit.
+
+        Args:
+            remaining: Tokens the provider says are left
+            limit: The provider's limit per minute, which becomes the capacity
+            reset: Seconds until the provider fully replenishes the limit
+        """
+        self._refill()
+        if limit is not None and limit > 0:
+            self.capacity = limit
+            self.refill_per_second = limit / 60.0
+        self._tokens = min(self._tokens, remaining)
+        if remaining < 1 and reset is not None:
+            self._tokens = min(self._tokens, -reset * self.refill_per_second)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+
+
+class RateLimiter:
+    """Thread- and asyncio-safe limiter for requests and tokens per minute."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request limit, or None for no request limit
+            tokens_per_minute: Estimated token limit, or None for no token limit
+            clock: Monotonic clock of the buckets, replaceable in tests
+        """
+        self.requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock)
+            if requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock)
+            if tokens_per_minute
+            else None
+        )
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve capacity for one request without waiting.
+
+        Args:
+            tokens: Estimated tokens of the request
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        with self._lock:
+            waits = [0.0]
+            if self.requests is not None:
+                waits.append(self.requests.reserve(1))
+            if self.tokens is not None and tokens:
+                waits.append(self.tokens.reserve(tokens))
+            return max(waits)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request of ``tokens`` estimated tokens may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Await until one request of ``tokens`` estimated tokens may be sent.
+
+        If the waiting task is cancelled, its reservation is returned.
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.release(tokens)
+                raise
+        return wait
+
+    def release(self, tokens: int = 0) -> None:
+        """Return a reservation for a request that was never sent."""
+        with self._lock:
+            if self.requests is not None:
+                self.requests.refund(1)
+            if self.tokens is not None and tokens:
+                self.tokens.refund(tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt to ``x-ratelimit-*`` response headers, if present.
+
+        Args:
+            headers: Response headers (case-insensitive mappings such as
+                httpx.Headers are supported, as are lower-case dicts)
+        """
+        with self._lock:
+            for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                remaining = _float_header(headers, f"x-ratelimit-remaining-{name}")
+                if bucket is None or remaining is None:
+                    continue
+                reset_value = headers.get(f"x-ratelimit-reset-{name}")
+                bucket.observe(
+                    remaining,
+                    limit=_float_header(headers, f"x-ratelimit-limit-{name}"),
+                    reset=parse_reset_duration(reset_value) if reset_value else None,
+                )
+
+
+def _float_header(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+_registry_lock = threading.Lock()
+_registry: Dict[Hashable, RateLimiter] = {}
+
+
+def get_rate_limiter(
+    key: Hashable,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> RateLimiter:
+    """Return the process-wide limiter for a key, creating it on first use.
+
+    Every caller using the same key shares one limiter, so all instances
+    talking to the same deployment draw from the same budget. The limits are
+    only used when the limiter is created.
+
+    Args:
+        key: Identifies the shared budget, e.g. (provider, model_name)
+        requests_per_minute: Request limit for a new limiter
+        tokens_per_minute: Token limit for a new limiter
+
+    Returns:
+        The shared RateLimiter
+    """
+    with _registry_lock:
+        limiter = _registry.get(key)
+        if limiter is None:
+            limiter = _registry[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return limiter
+
+
+def reset_rate_limiters(keys: Optional[List[Hashable]] = None) -> None:
+    """Forget shared limiters, so that they are recreated with new limits.
+
+    Args:
+        keys: The keys to forget; all limiters if None
+    """
+    with _registry_lock:
+        if keys is None:
+            _registry.clear()
+        else:
+            for key in keys:
+                _registry.pop(key, None)
@@ -0,0 +1,348 @@
+"""Recording of LLM requests and responses for offline replay.
+
+A recording is an append-only log of records, each a fixed header holding the
+SHA-256 of the request and the payload length, followed by the zlib-compressed
+JSON response. Replay memory-maps the log together with an index file, an
+open-addressing hash table of record offsets, so that a lookup reads a couple
+of pages whatever the size of the recording::
+
+    <log>       [digest:32][length:4][payload:length] ...
+    <log>.idx   [magic:8][capacity:8][count:8][log size:8] [prefix:8][offset+1:8] ...
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from .conversation import Messages, as_message_list
+from .hooks import TokenUsage
+
+# Request parameters that change how a response is delivered, not what it is
+TRANSPORT_PARAMS = frozenset({"stream", "stream_options", "timeout"})
+
+_RECORD_HEADER = struct.Struct("<32sI")
+_INDEX_HEADER = struct.Struct("<8sQQQ")
+_INDEX_SLOT = struct.Struct("<QQ")
+_INDEX_MAGIC = b"OHPIDX1\0"
+
+
+def chat_params(
+    model_name: str,
+    messages: Messages,
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    kwargs: Mapping[str, Any],
+) -> Dict[str, Any]:
+    """The chat completions API parameters of a call, as OpenAILLM sends them."""
+    params: Dict[str, Any] = {
+        "model": model_name,
+        "messages": as_message_list(messages),
+        **kwargs,
+    }
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+    if temperature is not None:
+        params["temperature"] = temperature
+    return params
+
+
+def request_key(params: Mapping[str, Any]) -> bytes:
+    """SHA-256 digest identifying a chat completions request.
+
+    Parameters in TRANSPORT_PARAMS are ignored, so a streamed request and a
+    regular one with the same parameters share their recording.
+
+    Args:
+        params: The chat completions API parameters
+
+    Returns:
+        The 32-byte digest of the canonical JSON of the request
+    """
+    request = {name: value for name, value in params.items() if name not in TRANSPORT_PARAMS}
+    canonical = json.dumps(
+        request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=repr
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+@dataclass
+class RecordedResponse:
+    """A response as recorded.
+
+    Attributes:
+        content: The full response text
+        chunks: The content deltas, if the response was streamed
+        usage: Token usage reported by the provider, if any
+    """
+
+    content: str
+    chunks: Optional[List[str]] = None
+    usage: Optional[TokenUsage] = None
+
+    def to_bytes(self) -> bytes:
+        """Encode the response as a compressed record payload."""
+        data: Dict[str, Any] = {"content": self.content}
+        if self.chunks is not None:
+            data["chunks"] = self.chunks
+        if self.usage is not None:
+            usage = self.usage
+            data["usage"] = [usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens]
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "RecordedResponse":
+        """Decode a record payload written by :meth:`to_bytes`."""
+        data = json.loads(zlib.decompress(payload))
+        usage = data.get("usage")
+        return cls(
+            content=data["content"],
+            chunks=data.get("chunks"),
+            usage=TokenUsage(*usage) if usage is not None else None,
+        )
+
+
+class Recorder:
+    """Appends request/response pairs to a recording log.
+
+    Safe to share between threads. Each record is written with a single
+    unbuffered ``write`` on a descriptor opened with ``O_APPEND``, so the
+    kernel appends it in one piece and processes can share a log too.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the log for appending, creating it if needed.
+
+        Args:
+            path: Path of the log file
+        """
+        self.path = path
+        self._fd: Optional[int] = os.open(
+            path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644
+        )
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        params: Mapping[str, Any],
+        content: str,
+        chunks: Optional[List[str]] = None,
+        usage: Optional[TokenUsage] = None,
+    ) -> None:
+        """Append the response to a request.
+
+        Args:
+            params: The chat completions API parameters of the request
+            content: The full response text
+            chunks: The content deltas, if the response was streamed
+            usage: Token usage reported by the provider, if any
+
+        Raises:
+            ValueError: If the recorder is closed
+            OSError: If the record could not be written in one piece
+        """
+        payload = RecordedResponse(content, chunks, usage).to_bytes()
+        record = _RECORD_HEADER.pack(request_key(params), len(payload)) + payload
+        with self._lock:
+            if self._fd is None:
+                raise ValueError("Recorder is closed")
+            written = os.write(self._fd, record)
+        if written != len(record):
+            # Writing the rest separately could interleave with other writers
+            raise OSError(f"Short write to {self.path}: {written} of {len(record)} bytes")
+
+    def close(self) -> None:
+        """Close the log."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class Recording:
+    """Read-only, memory-mapped view of a recording log and its index.
+
+    The index is (re)built when it is missing or older than the log. When a
+    request was recorded several times, the last response is returned.
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None) -> None:
+        """Open a recording.
+
+        Args:
+            path: Path of the log file
+            index_path: Path of the index file; '<path>.idx' if None
+
+        Raises:
+            FileNotFoundError: If the log does not exist
+        """
+        self.path = path
+        self.index_path = index_path or path + ".idx"
+        self._log: Optional[mmap.mmap] = None
+        self._index: Optional[mmap.mmap] = None
+        self._capacity = 0
+        self._count = 0
+        self.refresh()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, params: Mapping[str, Any]) -> Optional[RecordedResponse]:
+        """Return the recorded response to a request, or None if there is none.
+
+        Args:
+            params: The chat completions API parameters of the request
+        """
+        offset = self._find(request_key(params))
+        if offset is None or self._log is None:
+            return None
+        _, length = _RECORD_HEADER.unpack_from(self._log, offset)
+        start = offset + _RECORD_HEADER.size
+        return RecordedResponse.from_bytes(self._log[start : start + length])
+
+    def refresh(self) -> None:
+        """Pick up records appended to the log since it was opened."""
+        self.close()
+        log_size = os.path.getsize(self.path)
+        if not _index_is_current(self.index_path, log_size):
+            build_index(self.path, self.index_path)
+        if log_size == 0:
+            return
+
+        with open(self.path, "rb") as f:
+            self._log = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.index_path, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, self._capacity, self._count, _ = _INDEX_HEADER.unpack_from(self._index, 0)
+
+    def close(self) -> None:
+        """Unmap the log and index."""
+        for mapping in (self._log, self._index):
+            if mapping is not None:
+                mapping.close()
+        self._log = self._index = None
+        self._capacity = self._count = 0
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        """Offset of the record of a digest in the log, by linear probing."""
+        if self._index is None or self._log is None or not self._capacity:
+            return None
+        prefix = int.from_bytes(digest[:8], "little")
+        mask = self._capacity - 1
+        slot = prefix & mask
+        while True:
+            slot_prefix, reference = _INDEX_SLOT.unpack_from(
+                self._index, _INDEX_HEADER.size + slot * _INDEX_SLOT.size
+            )
+            if reference == 0:
+                return None
+            offset: int = reference - 1
+            if slot_prefix == prefix and self._log[offset : offset + 32] == digest:
+                return offset
+            slot = (slot + 1) & mask
+
+
+def build_index(path: str, index_path: Optional[str] = None) -> int:
+    """Build the index of a recording log.
+
+    Only record headers are read and the table is written through a memory
+    map, so building the index of a large log needs little memory. A
+    truncated record at the end of the log, left by an interrupted write, is
+    not indexed.
+
+    Args:
+        path: Path of the log file
+        index_path: Path of the index file; '<path>.idx' if None
+
+    Returns:
+        The number of distinct requests indexed
+    """
+    index_path = index_path or path + ".idx"
+    log_size = os.path.getsize(path)
+    directory = os.path.dirname(os.path.abspath(index_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".idx.tmp")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            count = 0
+            if log_size:
+                with open(path, "rb") as log_file, mmap.mmap(
+                    log_file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as log:
+                    capacity = _capacity_for(sum(1 for _ in _record_offsets(log, log_size)))
+                    f.truncate(_INDEX_HEADER.size + capacity * _INDEX_SLOT.size)
+                    with mmap.mmap(f.fileno(), 0) as index:
+                        for offset in _record_offsets(log, log_size):
+                            count += _insert(index, capacity, log, offset)
+                        _INDEX_HEADER.pack_into(
+                            index, 0, _INDEX_MAGIC, capacity, count, log_size
+                        )
+            else:
+                f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, 0, 0, 0))
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def _record_offsets(log: mmap.mmap, log_size: int) -> Iterator[int]:
+    """Yield the offset of every complete record in the log."""
+    offset = 0
+    while offset + _RECORD_HEADER.size <= log_size:
+        _, length = _RECORD_HEADER.unpack_from(log, offset)
+        end = offset + _RECORD_HEADER.size + length
+        if end > log_size:
+            break
+        yield offset
+        offset = end
+
+
+def _capacity_for(records: int) -> int:
+    """Power-of-two table size keeping the load factor at or below one half."""
+    capacity = 8
+    while capacity < 2 * records:
+        capacity *= 2
+    return capacity
+
+
+def _insert(index: mmap.mmap, capacity: int, log: mmap.mmap, offset: int) -> int:
+    """Insert a record into the index; returns 1 if its request is new, 0 if replaced."""
+    digest = log[offset : offset + 32]
+    prefix = int.from_bytes(digest[:8], "little")
+    mask = capacity - 1
+    slot = prefix & mask
+    while True:
+        position = _INDEX_HEADER.size + slot * _INDEX_SLOT.size
+        slot_prefix, reference = _INDEX_SLOT.unpack_from(index, position)
+        if reference == 0:
+            _INDEX_SLOT.pack_into(index, position, prefix, offset + 1)
+            return 1
+        if slot_prefix == prefix and log[reference - 1 : reference + 31] == digest:
+            _INDEX_SLOT.pack_into(index, position, prefix, offset + 1)
+            return 0
+        slot = (slot + 1) & mask
+
+
+def _index_is_current(index_path: str, log_size: int) -> bool:
+    """Whether the index exists and covers the whole log."""
+    try:
+        with open(index_path, "rb") as f:
+            header = f.read(_INDEX_HEADER.size)
+    except FileNotFoundError:
+        return False
+    if len(header) < _INDEX_HEADER.size:
+        return False
+    magic, _, _, indexed_size = _INDEX_HEADER.unpack(header)
+    return bool(magic == _INDEX_MAGIC and indexed_size == log_size)
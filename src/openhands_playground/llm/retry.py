@@ -0,0 +1,344 @@
+"""Retry and hedging policies for LLM calls."""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import (
+    Awaitable,
+    Callable,
+    Deque,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from .exceptions import DeadlineExceededError, RetryableLLMError
+
+T = TypeVar("T")
+
+
+class RetryBudget:
+    """Limits retries to a fraction of the traffic, shared across calls.
+
+    Every first attempt deposits ``ratio`` tokens and every retry withdraws
+    one, so during an outage retries add at most ``ratio`` extra load instead
+    of multiplying it by the number of attempts.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10) -> None:
+        """Initialize the budget.
+
+        Args:
+            ratio: Retries allowed per request, on average
+            min_retries: Retries always available, so quiet clients can retry
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._balance = float(min_retries)
+        self._max_balance = float(min_retries) + 100 * ratio
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Deposit the share of a new request."""
+        with self._lock:
+            self._balance = min(self._max_balance, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Withdraw one retry, if the budget allows it."""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter, a per-call deadline and a retry budget.
+
+    Attributes:
+        max_attempts: Maximum number of attempts, including the first
+        initial_backoff: Delay before the first retry, in seconds
+        max_backoff: Upper bound on any single delay, in seconds
+        multiplier: Growth factor of the delay between retries
+        jitter: 'full' (uniform in [0, delay]), 'equal' (uniform in
+            [delay / 2, delay]) or 'none'
+        deadline: Seconds a call may take across all attempts, if bounded
+        budget: Shared retry budget, if any
+        retry_on: Exception types that are retried
+    """
+
+    max_attempts: int = 3
+    initial_backoff: float = 0.5
+    max_backoff: float = 30.0
+    multiplier: float = 2.0
+    jitter: str = "full"
+    deadline: Optional[float] = None
+    budget: Optional[RetryBudget] = None
+    retry_on: Tuple[Type[BaseException], ...] = field(default=(RetryableLLMError,))
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {self.max_attempts}")
+        if self.jitter not in ("full", "equal", "none"):
+            raise ValueError(f"Unsupported jitter: '{self.jitter}'")
+
+    def backoff(self, retry: int, error: Optional[BaseException] = None) -> float:
+        """Compute the delay before a retry.
+
+        Args:
+            retry: 1 for the first retry, 2 for the second, and so on
+            error: The error being retried; a provider-supplied retry_after
+                is used as a lower bound
+
+        Returns:
+            The delay in seconds
+        """
+        delay = min(self.max_backoff, self.initial_backoff * self.multiplier ** (retry - 1))
+        if self.jitter == "full":
+            delay = random.uniform(0, delay)
+        elif self.jitter == "equal":
+            delay = random.uniform(delay / 2, delay)
+
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    def call(self, fn: Callable[[Optional[float]], T]) -> T:
+        """Call ``fn`` with retries.
+
+        Args:
+            fn: The attempt; it receives the time left before the deadline
+                (None if unbounded) so it can use it as a request timeout
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            DeadlineExceededError: If the deadline passes before an attempt
+            Exception: The last error if it is not retryable or retries are
+                exhausted
+        """
+        deadline_at = self._deadline_at()
+        if self.budget is not None:
+            self.budget.record_request()
+
+        attempt = 1
+        while True:
+            try:
+                return fn(self._remaining(deadline_at))
+            except self.retry_on as e:
+                delay = self._next_delay(attempt, e, deadline_at)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[[Optional[float]], Awaitable[T]]) -> T:
+        """Async :meth:`call`.
+
+        Attempts are additionally cancelled when the deadline passes.
+        """
+        deadline_at = self._deadline_at()
+        if self.budget is not None:
+            self.budget.record_request()
+
+        attempt = 1
+        while True:
+            remaining = self._remaining(deadline_at)
+            try:
+                if remaining is None:
+                    return await fn(None)
+                return await asyncio.wait_for(fn(remaining), remaining)
+            except asyncio.TimeoutError as e:
+                raise DeadlineExceededError(
+                    f"Deadline of {self.deadline}s exceeded after {attempt} attempt(s)"
+                ) from e
+            except self.retry_on as e:
+                delay = self._next_delay(attempt, e, deadline_at)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _deadline_at(self) -> Optional[float]:
+        return time.monotonic() + self.deadline if self.deadline is not None else None
+
+    def _remaining(self, deadline_at: Optional[float]) -> Optional[float]:
+        if deadline_at is None:
+            return None
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"Deadline of {self.deadline}s exceeded")
+        return remaining
+
+    def _next_delay(
+        self, attempt: int, error: BaseException, deadline_at: Optional[float]
+    ) -> Optional[float]:
+        """Return the delay before the next attempt, or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt, error)
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            return None
+        if self.budget is not None and not self.budget.try_spend():
+            return None
+        return delay
+
+
+class HedgePolicy:
+    """Sends a duplicate request when the first one is slower than usual.
+
+    The hedge delay is either fixed or a quantile (p95 by default) of recently
+    observed latencies. Whichever request succeeds first wins; the others are
+    cancelled (async) or their results discarded (sync).
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 1000,
+        max_hedges: int = 1,
+        max_workers: int = 32,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            delay: Fixed hedge delay in seconds; derived from latencies if None
+            quantile: Latency quantile used as the delay when not fixed
+            min_samples: Observations needed before hedging on a quantile
+            window: Number of recent latencies kept
+            max_hedges: Maximum duplicate requests per call
+            max_workers: Threads available to sync hedged calls
+        """
+        self.delay = delay
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.max_workers = max_workers
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def record(self, latency: float) -> None:
+        """Record the latency of a completed call."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """The current hedge delay, or None if there is not enough data yet."""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+        return ordered[index]
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Call ``fn``, hedging with duplicates on a thread pool when it is slow.
+
+        Returns:
+            The result of the first successful request
+
+        Raises:
+            Exception: The first error, if every request failed
+        """
+        delay = self.hedge_delay()
+        start = time.perf_counter()
+        if delay is None:
+            result = fn()
+            self.record(time.perf_counter() - start)
+            return result
+
+        executor = self._get_executor()
+        primary = executor.submit(fn)
+        pending: Set["Future[T]"] = {primary}
+        hedges = 0
+        error: Optional[BaseException] = None
+        while pending:
+            timeout = delay if hedges < self.max_hedges else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                future_error = future.exception()
+                if future_error is None:
+                    for other in pending:
+                        other.cancel()
+                    self._on_success(start, won_by_hedge=future is not primary)
+                    return future.result()
+                error = error or future_error
+            if not done:
+                pending.add(executor.submit(fn))
+                hedges += 1
+                self._on_hedge()
+
+        if error is None:
+            raise RuntimeError("Hedged call ended without a result or an error")
+        raise error
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async :meth:`call`; losing requests are cancelled."""
+        delay = self.hedge_delay()
+        start = time.perf_counter()
+        if delay is None:
+            result = await fn()
+            self.record(time.perf_counter() - start)
+            return result
+
+        primary = asyncio.ensure_future(fn())
+        pending: Set["asyncio.Future[T]"] = {primary}
+        hedges = 0
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = delay if hedges < self.max_hedges else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for task in done:
+                    task_error = task.exception()
+                    if task_error is None:
+                        self._on_success(start, won_by_hedge=task is not primary)
+                        return task.result()
+                    error = error or task_error
+                if not done:
+                    pending.add(asyncio.ensure_future(fn()))
+                    hedges += 1
+                    self._on_hedge()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if error is None:
+            raise RuntimeError("Hedged call ended without a result or an error")
+        raise error
+
+    def _on_success(self, start: float, won_by_hedge: bool) -> None:
+        self.record(time.perf_counter() - start)
+        if won_by_hedge:
+            with self._lock:
+                self.hedge_wins += 1
+
+    def _on_hedge(self) -> None:
+        with self._lock:
+            self.hedges_sent += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm-hedge"
+                )
+            return self._executor
@@ -0,0 +1,514 @@
+"""Routing of LLM calls over several backends with load balancing and failover."""
+
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+from .base import BaseLLM
+from .conversation import Messages
+from .exceptions import LLMError
+from .hooks import TokenUsage
+from .streaming import AsyncTextStream, TextStream
+
+T = TypeVar("T")
+
+# Selection strategies accepted by RouterLLM
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+EWMA_LATENCY = "ewma"
+STRATEGIES = (ROUND_ROBIN, LEAST_OUTSTANDING, EWMA_LATENCY)
+
+# Floor of the success rate the ewma strategy divides latencies by
+MIN_SUCCESS_RATE = 0.01
+
+
+@dataclass
+class Backend:
+    """One LLM a router sends calls to, with its routing statistics.
+
+    Attributes:
+        llm: The backend LLM
+        weight: Relative share of the traffic; a backend of weight 2 gets
+            twice the calls of one of weight 1
+        name: Name used in stats; derived from the LLM if empty
+        calls: Calls sent to the backend
+        errors: Calls that failed
+        outstanding: Calls currently in flight
+        ewma_latency: Exponentially weighted moving average of the
+            durations of successful calls in seconds; None until one ends
+        ewma_error_rate: Exponentially weighted moving average of the share
+            of calls that failed; None until a call ends
+    """
+
+    llm: BaseLLM
+    weight: float = 1.0
+    name: str = ""
+    calls: int = 0
+    errors: int = 0
+    outstanding: int = 0
+    ewma_latency: Optional[float] = None
+    ewma_error_rate: Optional[float] = None
+    _current_weight: float = field(default=0.0, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.weight <= 0:
+            raise ValueError(f"Backend weight must be positive, got {self.weight}")
+        if not self.name:
+            self.name = str(self.llm)
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the backend accepts calls, as reported by its ``is_healthy()``.
+
+        LLMs without an ``is_healthy`` method are always healthy.
+        """
+        is_healthy = getattr(self.llm, "is_healthy", None)
+        return True if is_healthy is None else bool(is_healthy())
+
+
+class RouterLLM(BaseLLM):
+    """LLM spreading calls over several backends, failing over on transient errors.
+
+    Each call goes to one backend picked by the strategy:
+
+    - ``round_robin``: smooth weighted round-robin
+    - ``least_outstanding``: fewest calls in flight relative to the weight
+    - ``ewma``: lowest moving-average latency of successful calls, scaled
+      by the calls in flight so that a fast backend is not overloaded and
+      by the moving-average error rate so that a backend failing fast does
+      not look fastest; backends without measurements are tried first
+
+    If the call fails with a retryable LLMError, it is sent to the next
+    backend, up to ``max_attempts`` backends. Streams fail over only until
+    their first chunk. Backends whose LLM reports ``is_healthy() == False``
+    (such as an open CircuitBreakerLLM) are skipped while others are healthy.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Union[BaseLLM, Backend]],
+        strategy: str = ROUND_ROBIN,
+        max_attempts: Optional[int] = None,
+        ewma_alpha: float = 0.3,
+        model_name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            backends: The backend LLMs, or Backends to set weights and names
+            strategy: One of 'round_robin', 'least_outstanding' and 'ewma'
+            max_attempts: Backends tried per call; all of them if None
+            ewma_alpha: Weight of the latest call in the latency and error
+                rate averages
+            model_name: Name reported by the router; the first backend's
+                model name if None
+            **kwargs: Additional configuration parameters
+
+        Raises:
+            ValueError: If there are no backends or the strategy is unknown
+        """
+        if not backends:
+            raise ValueError("RouterLLM needs at least one backend")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {STRATEGIES}")
+        self.backends = [b if isinstance(b, Backend) else Backend(b) for b in backends]
+        super().__init__(model_name or self.backends[0].llm.model_name, **kwargs)
+        self.strategy = strategy
+        self.max_attempts = max_attempts or len(self.backends)
+        self.ewma_alpha = ewma_alpha
+        self.failovers = 0
+        self._lock = threading.Lock()
+        self._select_strategy: Callable[[List[Backend]], Backend] = {
+            ROUND_ROBIN: self._round_robin,
+            LEAST_OUTSTANDING: self._least_outstanding,
+            EWMA_LATENCY: self._lowest_latency,
+        }[strategy]
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate text on the selected backend, failing over if it fails.
+
+        Raises:
+            LLMError: The last backend's error if every attempt failed
+        """
+        return self._call(
+            lambda llm: llm.generate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Chat on the selected backend, failing over if it fails.
+
+        Raises:
+            LLMError: The last backend's error if every attempt failed
+        """
+        return self._call(lambda llm: llm.chat(messages, max_tokens, temperature, **kwargs))
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+        return await self._acall(
+            lambda llm: llm.agenerate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+        return await self._acall(
+            lambda llm: llm.achat(messages, max_tokens, temperature, **kwargs)
+        )
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate n candidates on the selected backend, failing over if it fails."""
+        return self._call(
+            lambda llm: llm.generate_n(prompt, n, max_tokens, temperature, **kwargs)
+        )
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate n chat candidates on the selected backend, failing over if it fails."""
+        return self._call(
+            lambda llm: llm.chat_n(messages, n, max_tokens, temperature, **kwargs)
+        )
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`generate_n`."""
+        return await self._acall(
+            lambda llm: llm.agenerate_n(prompt, n, max_tokens, temperature, **kwargs)
+        )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`chat_n`."""
+        return await self._acall(
+            lambda llm: llm.achat_n(messages, n, max_tokens, temperature, **kwargs)
+        )
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream from the selected backend, failing over until the first chunk."""
+        return self._stream(
+            lambda llm: llm.stream_generate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a chat from the selected backend, failing over until the first chunk."""
+        return self._stream(
+            lambda llm: llm.stream_chat(messages, max_tokens, temperature, **kwargs)
+        )
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        return self._astream(
+            lambda llm: llm.astream_generate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+        return self._astream(
+            lambda llm: llm.astream_chat(messages, max_tokens, temperature, **kwargs)
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Routing statistics of every backend."""
+        with self._lock:
+            return [
+                {
+                    "name": b.name,
+                    "weight": b.weight,
+                    "calls": b.calls,
+                    "errors": b.errors,
+                    "outstanding": b.outstanding,
+                    "ewma_latency": b.ewma_latency,
+                    "ewma_error_rate": b.ewma_error_rate,
+                    "healthy": b.healthy,
+                }
+                for b in self.backends
+            ]
+
+    def close(self) -> None:
+        """Close every backend."""
+        for backend in self.backends:
+            backend.llm.close()
+
+    async def aclose(self) -> None:
+        """Close every backend, including its async resources."""
+        for backend in self.backends:
+            await backend.llm.aclose()
+
+    def _call(self, call: Callable[[BaseLLM], T]) -> T:
+        tried: List[Backend] = []
+        while True:
+            backend = self._begin(tried)
+            start = time.perf_counter()
+            try:
+                result = call(backend.llm)
+            except Exception as e:
+                self._end(backend, start, e)
+                if not self._can_fail_over(e, tried):
+                    raise
+                continue
+            except BaseException:
+                self._abandon(backend)
+                raise
+            self._end(backend, start)
+            return result
+
+    async def _acall(self, call: Callable[[BaseLLM], Awaitable[T]]) -> T:
+        tried: List[Backend] = []
+        while True:
+            backend = self._begin(tried)
+            start = time.perf_counter()
+            try:
+                result = await call(backend.llm)
+            except Exception as e:
+                self._end(backend, start, e)
+                if not self._can_fail_over(e, tried):
+                    raise
+                continue
+            except BaseException:
+                self._abandon(backend)
+                raise
+            self._end(backend, start)
+            return result
+
+    def _stream(self, open_stream: Callable[[BaseLLM], TextStream]) -> TextStream:
+        def record_usage(usage: Optional[TokenUsage]) -> None:
+            stream.stats.usage = usage
+
+        stream = TextStream(self._iter_stream(open_stream, record_usage))
+        return stream
+
+    def _iter_stream(
+        self,
+        open_stream: Callable[[BaseLLM], TextStream],
+        on_usage: Callable[[Optional[TokenUsage]], None],
+    ) -> Iterator[str]:
+        tried: List[Backend] = []
+        while True:
+            backend = self._begin(tried)
+            start = time.perf_counter()
+            started = False
+            inner: Optional[TextStream] = None
+            try:
+                inner = open_stream(backend.llm)
+                for chunk in inner:
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._end(backend, start, e)
+                if started or not self._can_fail_over(e, tried):
+                    raise
+                continue
+            except BaseException:
+                # Closed or cancelled by the consumer: neither a success nor
+                # a failure, and its duration is not a latency sample
+                self._abandon(backend)
+                raise
+            else:
+                self._end(backend, start)
+                on_usage(inner.stats.usage)
+                return
+            finally:
+                if inner is not None:
+                    inner.close()
+
+    def _astream(self, open_stream: Callable[[BaseLLM], AsyncTextStream]) -> AsyncTextStream:
+        def record_usage(usage: Optional[TokenUsage]) -> None:
+            stream.stats.usage = usage
+
+        stream = AsyncTextStream(self._aiter_stream(open_stream, record_usage))
+        return stream
+
+    async def _aiter_stream(
+        self,
+        open_stream: Callable[[BaseLLM], AsyncTextStream],
+        on_usage: Callable[[Optional[TokenUsage]], None],
+    ) -> AsyncIterator[str]:
+        tried: List[Backend] = []
+        while True:
+            backend = self._begin(tried)
+            start = time.perf_counter()
+            started = False
+            inner: Optional[AsyncTextStream] = None
+            try:
+                inner = open_stream(backend.llm)
+                async for chunk in inner:
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._end(backend, start, e)
+                if started or not self._can_fail_over(e, tried):
+                    raise
+                continue
+            except BaseException:
+                # Closed or cancelled by the consumer: neither a success nor
+                # a failure, and its duration is not a latency sample
+                self._abandon(backend)
+                raise
+            else:
+                self._end(backend, start)
+                on_usage(inner.stats.usage)
+                return
+            finally:
+                if inner is not None:
+                    await inner.aclose()
+
+    def _begin(self, tried: List[Backend]) -> Backend:
+        """Select a backend not tried yet and count the call as outstanding."""
+        with self._lock:
+            candidates = [b for b in self.backends if b not in tried]
+            healthy = [b for b in candidates if b.healthy]
+            backend = self._select_strategy(healthy or candidates)
+            backend.calls += 1
+            backend.outstanding += 1
+        tried.append(backend)
+        return backend
+
+    def _end(self, backend: Backend, start: float, error: Optional[BaseException] = None) -> None:
+        """Record the outcome and duration of a call."""
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            backend.outstanding -= 1
+            failed = error is not None
+            if failed:
+                backend.errors += 1
+            backend.ewma_error_rate = self._average(backend.ewma_error_rate, float(failed))
+            # A failure says nothing about how long a response takes
+            if not failed:
+                backend.ewma_latency = self._average(backend.ewma_latency, elapsed)
+
+    def _abandon(self, backend: Backend) -> None:
+        """Stop counting a call the caller gave up on, without recording an outcome."""
+        with self._lock:
+            backend.outstanding -= 1
+
+    def _average(self, average: Optional[float], sample: float) -> float:
+        """Add a sample to an exponentially weighted moving average."""
+        if average is None:
+            return sample
+        return average + self.ewma_alpha * (sample - average)
+
+    def _can_fail_over(self, error: Exception, tried: List[Backend]) -> bool:
+        """Whether a failed call may be sent to another backend."""
+        if not (isinstance(error, LLMError) and error.retryable):
+            return False
+        if len(tried) >= self.max_attempts:
+            return False
+        with self._lock:
+            self.failovers += 1
+        return True
+
+    def _round_robin(self, candidates: List[Backend]) -> Backend:
+        # Smooth weighted round-robin, as in nginx: interleaves backends in
+        # proportion to their weights instead of sending bursts to each
+        total = sum(b.weight for b in candidates)
+        for b in candidates:
+            b._current_weight += b.weight
+        selected = max(candidates, key=lambda b: b._current_weight)
+        selected._current_weight -= total
+        return selected
+
+    def _least_outstanding(self, candidates: List[Backend]) -> Backend:
+        # Ties go to the backend round-robin would pick, spreading idle traffic
+        fewest = min(b.outstanding / b.weight for b in candidates)
+        return self._round_robin([b for b in candidates if b.outstanding / b.weight == fewest])
+
+    def _lowest_latency(self, candidates: List[Backend]) -> Backend:
+        unmeasured = [b for b in candidates if b.ewma_error_rate is None]
+        if unmeasured:
+            return self._round_robin(unmeasured)
+        return min(candidates, key=self._expected_latency)
+
+    @staticmethod
+    def _expected_latency(backend: Backend) -> float:
+        # Latency of a successful call divided by the success rate, roughly
+        # the time until a success; backends that never succeeded come last
+        if backend.ewma_latency is None:
+            return math.inf
+        success_rate = max(1.0 - (backend.ewma_error_rate or 0.0), MIN_SUCCESS_RATE)
+        return backend.ewma_latency * (backend.outstanding + 1) / backend.weight / success_rate
@@ -0,0 +1,156 @@
+"""Best-of-N sampling: generate several candidates and keep the best one.
+
+Candidates come from a single multi-sample call (``generate_n``/``chat_n``),
+which providers supporting several choices per request, such as OpenAI's
+``n`` parameter, answer with one round-trip. A selector picks the response
+among them: :func:`best_of` keeps the candidate a scorer likes best, and
+:func:`majority_vote` the most frequent answer (self-consistency).
+"""
+
+from collections import Counter
+from typing import Any, Callable, List, Optional
+
+from .base import BaseLLM, check_samples
+from .conversation import Messages
+from .wrapper import LLMWrapper
+
+# Rates a candidate; higher is better
+Scorer = Callable[[str], float]
+
+# Picks the response among the candidates
+Selector = Callable[[List[str]], str]
+
+
+def best_of(scorer: Scorer) -> Selector:
+    """Select the candidate with the highest score, the earliest one on ties."""
+
+    def select(candidates: List[str]) -> str:
+        return max(candidates, key=scorer)
+
+    return select
+
+
+def majority_vote(candidates: List[str]) -> str:
+    """Select the most frequent candidate, the earliest one on ties.
+
+    Candidates are compared without surrounding whitespace, so this suits
+    short answers such as labels or numbers better than free-form text.
+    """
+    counts = Counter(candidate.strip() for candidate in candidates)
+    return max(candidates, key=lambda candidate: counts[candidate.strip()])
+
+
+class BestOfNLLM(LLMWrapper):
+    """LLM answering with the best of n candidates from the wrapped LLM.
+
+    Each call asks the wrapped LLM for n candidates with one multi-sample call,
+    which providers such as OpenAILLM serve with a single request. Streams use
+    the single-chunk defaults of BaseLLM, since the response is only known
+    once every candidate is complete, and so do the multi-sample methods,
+    which return n selected responses.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        n: int = 5,
+        selector: Selector = majority_vote,
+        temperature: Optional[float] = None,
+    ) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            llm: The LLM generating the candidates
+            n: Number of candidates per call
+            selector: Picks the response among the candidates
+            temperature: Sampling temperature of calls that do not set one;
+                candidates need some randomness to differ
+
+        Raises:
+            ValueError: If n is less than 1
+        """
+        super().__init__(llm)
+        check_samples(n)
+        self.n = n
+        self.selector = selector
+        self.temperature = temperature
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate n candidates and return the selected one."""
+        candidates = self.llm.generate_n(
+            prompt,
+            self.n,
+            max_tokens=max_tokens,
+            temperature=self._temperature(temperature),
+            **kwargs,
+        )
+        return self.selector(candidates)
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate n chat candidates and return the selected one."""
+        candidates = self.llm.chat_n(
+            messages,
+            self.n,
+            max_tokens=max_tokens,
+            temperature=self._temperature(temperature),
+            **kwargs,
+        )
+        return self.selector(candidates)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Asynchronous :meth:`generate`."""
+        candidates = await self.llm.agenerate_n(
+            prompt,
+            self.n,
+            max_tokens=max_tokens,
+            temperature=self._temperature(temperature),
+            **kwargs,
+        )
+        return self.selector(candidates)
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Asynchronous :meth:`chat`."""
+        candidates = await self.llm.achat_n(
+            messages,
+            self.n,
+            max_tokens=max_tokens,
+            temperature=self._temperature(temperature),
+            **kwargs,
+        )
+        return self.selector(candidates)
+
+    stream_generate = BaseLLM.stream_generate
+    stream_chat = BaseLLM.stream_chat
+    astream_generate = BaseLLM.astream_generate
+    astream_chat = BaseLLM.astream_chat
+    generate_n = BaseLLM.generate_n
+    chat_n = BaseLLM.chat_n
+    agenerate_n = BaseLLM.agenerate_n
+    achat_n = BaseLLM.achat_n
+
+    def _temperature(self, temperature: Optional[float]) -> Optional[float]:
+        return self.temperature if temperature is None else temperature
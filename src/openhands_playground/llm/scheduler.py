@@ -0,0 +1,604 @@
+"""Priority- and tenant-aware scheduling of calls to a shared LLM.
+
+A RequestScheduler admits at most ``max_concurrency`` calls at a time and
+queues the rest. Queued requests are served by priority class first (lower
+values first, so interactive traffic overtakes bulk jobs), then fairly
+across the tenants of a class in proportion to their weights (stride
+scheduling). A request with a deadline is dropped with DeadlineExceededError
+as soon as it can no longer finish in time, judged by the recent mean call
+duration, instead of taking a slot only to time out.
+
+Sync and async callers share the same queue; cancelling an async caller
+removes its request from the queue or, once admitted, cancels the upstream
+call.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+
+from .base import BaseLLM
+from .batching import DEFAULT_MAX_CONCURRENCY
+from .conversation import Messages
+from .exceptions import DeadlineExceededError
+from .metrics import Histogram
+from .streaming import AsyncTextStream, TextStream
+from .wrapper import LLMWrapper
+
+T = TypeVar("T")
+
+# Priority classes; lower values are served first and any integer may be used
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+
+DEFAULT_TENANT = "default"
+
+# Upper bounds of the queue wait buckets, in seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass(eq=False)
+class _Ticket:
+    """A queued request and how to wake its caller."""
+
+    priority: int
+    tenant: str
+    enqueued_at: float
+    deadline_at: Optional[float]
+    wake: Callable[[], None]
+    granted: bool = False
+    dropped: bool = False
+
+    def remaining(self, now: float) -> Optional[float]:
+        return None if self.deadline_at is None else self.deadline_at - now
+
+
+@dataclass
+class _PriorityClass:
+    """The queues of one priority class with the tenants' stride positions."""
+
+    queues: Dict[str, Deque[_Ticket]] = field(default_factory=dict)
+    passes: Dict[str, float] = field(default_factory=dict)
+    virtual_time: float = 0.0
+    wait: Histogram = field(default_factory=lambda: Histogram(WAIT_BUCKETS))
+
+
+class RequestScheduler:
+    """Admission queue with priority classes, weighted fair sharing and deadlines."""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        tenant_weights: Optional[Mapping[str, float]] = None,
+        latency_alpha: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of calls running at once
+            tenant_weights: Share of each tenant within a priority class;
+                tenants not listed have weight 1
+            latency_alpha: Smoothing factor of the mean call duration used
+                to drop requests that cannot meet their deadline
+            clock: Monotonic clock, replaceable in tests
+
+        Raises:
+            ValueError: If max_concurrency or a weight is not positive
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self.latency_alpha = latency_alpha
+        self.expected_seconds = 0.0
+        self.running = 0
+        self.completed = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self._weights: Dict[str, float] = {}
+        for tenant, weight in (tenant_weights or {}).items():
+            self.set_weight(tenant, weight)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._classes: Dict[int, _PriorityClass] = {}
+
+    def set_weight(self, tenant: str, weight: float) -> None:
+        """Set a tenant's share within its priority classes."""
+        if weight <= 0:
+            raise ValueError(f"Weight of tenant {tenant!r} must be positive, got {weight}")
+        self._weights[tenant] = weight
+
+    def acquire(
+        self,
+        priority: int = NORMAL,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[float] = None,
+    ) -> Optional[float]:
+        """Block until a call may start; release() must follow.
+
+        Args:
+            priority: Priority class; lower values are served first
+            tenant: Tenant sharing its class's capacity with the others
+            deadline: Seconds the request may take, queueing included
+
+        Returns:
+            Seconds left before the deadline, or None without one
+
+        Raises:
+            DeadlineExceededError: If the request can no longer finish in time
+        """
+        event = threading.Event()
+        ticket = self._enqueue(priority, tenant, deadline, event.set)
+        event.wait(ticket.remaining(self._clock()))
+        return self._admitted(ticket)
+
+    async def aacquire(
+        self,
+        priority: int = NORMAL,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[float] = None,
+    ) -> Optional[float]:
+        """Async :meth:`acquire`; cancelling the caller gives up its place."""
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(_resolve, future)
+
+        ticket = self._enqueue(priority, tenant, deadline, wake)
+        try:
+            await asyncio.wait_for(future, ticket.remaining(self._clock()))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                if ticket.granted:
+                    self._release_locked(None)
+                elif not ticket.dropped:
+                    self._remove_locked(ticket)
+                    self.cancelled += 1
+            raise
+        return self._admitted(ticket)
+
+    def release(self, duration: Optional[float] = None) -> None:
+        """Free the slot of a finished call and admit the next request.
+
+        Args:
+            duration: How long the call took, if it completed normally; feeds
+                the mean used for deadline checks
+        """
+        with self._lock:
+            self._release_locked(duration)
+
+    @contextlib.contextmanager
+    def slot(
+        self,
+        priority: int = NORMAL,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[float] = None,
+    ) -> Iterator[Optional[float]]:
+        """Hold a slot for the duration of a ``with`` block; yields the time left."""
+        remaining = self.acquire(priority, tenant, deadline)
+        start = time.perf_counter()
+        duration = None
+        try:
+            yield remaining
+            duration = time.perf_counter() - start
+        finally:
+            self.release(duration)
+
+    @contextlib.asynccontextmanager
+    async def aslot(
+        self,
+        priority: int = NORMAL,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[Optional[float]]:
+        """Async :meth:`slot`."""
+        remaining = await self.aacquire(priority, tenant, deadline)
+        start = time.perf_counter()
+        duration = None
+        try:
+            yield remaining
+            duration = time.perf_counter() - start
+        finally:
+            self.release(duration)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        with self._lock:
+            return sum(
+                len(queue) for cls in self._classes.values() for queue in cls.queues.values()
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depths, counters and queue wait times per priority class."""
+        with self._lock:
+            by_priority = {}
+            by_tenant: Dict[str, int] = {}
+            for priority, cls in sorted(self._classes.items()):
+                depth = 0
+                for tenant, queue in cls.queues.items():
+                    depth += len(queue)
+                    by_tenant[tenant] = by_tenant.get(tenant, 0) + len(queue)
+                by_priority[priority] = {
+                    "queued": depth,
+                    "admitted": cls.wait.count,
+                    "wait_mean": cls.wait.sum / cls.wait.count if cls.wait.count else 0.0,
+                    "wait_p50": cls.wait.quantile(0.5),
+                    "wait_p95": cls.wait.quantile(0.95),
+                    "wait_p99": cls.wait.quantile(0.99),
+                }
+            return {
+                "running": self.running,
+                "queued": sum(by_tenant.values()),
+                "queued_by_tenant": by_tenant,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "cancelled": self.cancelled,
+                "expected_seconds": self.expected_seconds,
+                "priorities": by_priority,
+            }
+
+    def _enqueue(
+        self,
+        priority: int,
+        tenant: str,
+        deadline: Optional[float],
+        wake: Callable[[], None],
+    ) -> _Ticket:
+        now = self._clock()
+        ticket = _Ticket(priority, tenant, now, None if deadline is None else now + deadline, wake)
+        with self._lock:
+            cls = self._classes.setdefault(priority, _PriorityClass())
+            queue = cls.queues.get(tenant)
+            if queue is None:
+                # A tenant returning from idle starts at the current virtual
+                # time instead of spending credit saved while it was away
+                queue = cls.queues[tenant] = deque()
+                cls.passes[tenant] = max(cls.passes.get(tenant, 0.0), cls.virtual_time)
+            queue.append(ticket)
+            self._dispatch_locked()
+        return ticket
+
+    def _admitted(self, ticket: _Ticket) -> Optional[float]:
+        """Settle a ticket after waiting: return the time left or drop it."""
+        with self._lock:
+            if not ticket.granted and not ticket.dropped:
+                # The deadline passed while waiting in the queue
+                self._remove_locked(ticket)
+                ticket.dropped = True
+                self.dropped += 1
+        if ticket.dropped:
+            raise DeadlineExceededError(
+                f"Request of tenant {ticket.tenant!r} (priority {ticket.priority}) "
+                "cannot finish before its deadline"
+            )
+        return ticket.remaining(self._clock())
+
+    def _dispatch_locked(self) -> None:
+        """Admit queued requests while slots are free."""
+        now = self._clock()
+        while self.running < self.max_concurrency:
+            ticket = self._pop_locked()
+            if ticket is None:
+                return
+            remaining = ticket.remaining(now)
+            if remaining is not None and remaining < self.expected_seconds:
+                ticket.dropped = True
+                self.dropped += 1
+            else:
+                ticket.granted = True
+                self.running += 1
+                self._classes[ticket.priority].wait.observe(now - ticket.enqueued_at)
+            ticket.wake()
+
+    def _pop_locked(self) -> Optional[_Ticket]:
+        """Take the next request: best priority, then the tenant furthest behind."""
+        for priority in sorted(self._classes):
+            cls = self._classes[priority]
+            if not cls.queues:
+                continue
+            tenant = min(cls.queues, key=lambda t: (cls.passes[t], cls.queues[t][0].enqueued_at))
+            queue = cls.queues[tenant]
+            ticket = queue.popleft()
+            if not queue:
+                del cls.queues[tenant]
+            cls.virtual_time = cls.passes[tenant]
+            cls.passes[tenant] += 1.0 / self._weights.get(tenant, 1.0)
+            return ticket
+        return None
+
+    def _remove_locked(self, ticket: _Ticket) -> None:
+        cls = self._classes[ticket.priority]
+        queue = cls.queues.get(ticket.tenant)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del cls.queues[ticket.tenant]
+
+    def _release_locked(self, duration: Optional[float]) -> None:
+        self.running -= 1
+        if duration is not None:
+            self.completed += 1
+            if self.completed == 1:
+                self.expected_seconds = duration
+            else:
+                self.expected_seconds += self.latency_alpha * (duration - self.expected_seconds)
+        self._dispatch_locked()
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ScheduledLLM(LLMWrapper):
+    """LLM wrapper queueing every call through a RequestScheduler.
+
+    Each call may override the wrapper's defaults with the ``priority``,
+    ``tenant`` and ``deadline`` keyword arguments. Async calls still running
+    at their deadline are cancelled; sync calls can only be dropped before
+    they start. Streams hold their slot until they are exhausted or closed.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        scheduler: Optional[RequestScheduler] = None,
+        priority: int = NORMAL,
+        tenant: str = DEFAULT_TENANT,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """Initialize the scheduling wrapper.
+
+        Args:
+            llm: The LLM to call
+            scheduler: Scheduler to queue calls in, typically shared by the
+                wrappers of all callers; a new one if None
+            priority: Default priority class of the calls
+            tenant: Default tenant of the calls
+            deadline: Default seconds a call may take, queueing included
+        """
+        super().__init__(llm)
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.priority = priority
+        self.tenant = tenant
+        self.deadline = deadline
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a response once the scheduler admits the call."""
+        with self.scheduler.slot(**self._schedule(kwargs)):
+            return self.llm.generate(
+                prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Chat once the scheduler admits the call."""
+        with self.scheduler.slot(**self._schedule(kwargs)):
+            return self.llm.chat(
+                messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`, cancelled if it runs past its deadline."""
+        async with self.scheduler.aslot(**self._schedule(kwargs)) as remaining:
+            return await _within(
+                self.llm.agenerate(
+                    prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+                remaining,
+            )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`, cancelled if it runs past its deadline."""
+        async with self.scheduler.aslot(**self._schedule(kwargs)) as remaining:
+            return await _within(
+                self.llm.achat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs),
+                remaining,
+            )
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate n candidates once the scheduler admits the call."""
+        with self.scheduler.slot(**self._schedule(kwargs)):
+            return self.llm.generate_n(
+                prompt, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Generate n chat candidates once the scheduler admits the call."""
+        with self.scheduler.slot(**self._schedule(kwargs)):
+            return self.llm.chat_n(
+                messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`generate_n`, cancelled if it runs past its deadline."""
+        async with self.scheduler.aslot(**self._schedule(kwargs)) as remaining:
+            return await _within(
+                self.llm.agenerate_n(
+                    prompt, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+                remaining,
+            )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`chat_n`, cancelled if it runs past its deadline."""
+        async with self.scheduler.aslot(**self._schedule(kwargs)) as remaining:
+            return await _within(
+                self.llm.achat_n(
+                    messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+                remaining,
+            )
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a response, queueing before the first chunk is read."""
+        schedule = self._schedule(kwargs)
+        return TextStream(
+            self._iter_stream(
+                schedule,
+                lambda: self.llm.stream_generate(
+                    prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+            )
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a chat response, queueing before the first chunk is read."""
+        schedule = self._schedule(kwargs)
+        return TextStream(
+            self._iter_stream(
+                schedule,
+                lambda: self.llm.stream_chat(
+                    messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+            )
+        )
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        schedule = self._schedule(kwargs)
+        return AsyncTextStream(
+            self._aiter_stream(
+                schedule,
+                lambda: self.llm.astream_generate(
+                    prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+            )
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+        schedule = self._schedule(kwargs)
+        return AsyncTextStream(
+            self._aiter_stream(
+                schedule,
+                lambda: self.llm.astream_chat(
+                    messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ),
+            )
+        )
+
+    def _schedule(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Pop the scheduling arguments of a call, falling back to the defaults."""
+        return {
+            "priority": kwargs.pop("priority", self.priority),
+            "tenant": kwargs.pop("tenant", self.tenant),
+            "deadline": kwargs.pop("deadline", self.deadline),
+        }
+
+    def _iter_stream(
+        self, schedule: Dict[str, Any], open_stream: Callable[[], TextStream]
+    ) -> Iterator[str]:
+        with self.scheduler.slot(**schedule):
+            yield from open_stream()
+
+    async def _aiter_stream(
+        self, schedule: Dict[str, Any], open_stream: Callable[[], AsyncTextStream]
+    ) -> AsyncIterator[str]:
+        async with self.scheduler.aslot(**schedule):
+            async for chunk in open_stream():
+                yield chunk
+
+
+async def _within(call: Awaitable[T], remaining: Optional[float]) -> T:
+    """Await a call, cancelling it and raising DeadlineExceededError after ``remaining``."""
+    try:
+        return await asyncio.wait_for(call, remaining)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceededError("Call did not finish before its deadline") from e
@@ -0,0 +1,694 @@
+"""Semantic response caching: answers near-duplicate requests from earlier responses.
+
+The last user message of a request (or the prompt) is embedded into a unit
+vector; a cached response is reused if an earlier request with the same
+context (model, parameters and preceding messages) had a message whose
+cosine similarity reaches the threshold. Candidates are found with
+random-hyperplane locality-sensitive hashing, so lookups only compare a few
+stored vectors instead of all of them.
+
+Entries live in a memory-mapped file of fixed-size slots (vector, LSH
+signatures and the location of the response) next to an append-only file of
+responses, so a persistent cache opens without re-embedding anything and
+vectors are only read when compared. The least recently used entry is
+evicted once the cache is full.
+"""
+
+import hashlib
+import io
+import math
+import mmap
+import operator
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import IO, Any, AsyncIterator, Dict, FrozenSet, List, Optional, Tuple
+
+from .base import BaseLLM
+from .cache import CachePredicate, CacheStats, is_deterministic, make_request_key
+from .conversation import Messages
+from .streaming import AsyncTextStream, TextStream
+from .wrapper import LLMWrapper
+
+# Words ignored by HashingEmbedder since they rarely change what is asked
+DEFAULT_STOPWORDS = frozenset(
+    "a an and are am be been can could did do does for how i in is it me my of on or "
+    "please s should that the these this those to was we were what whats will with "
+    "would you your".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_MAGIC = b"OHPSEM1\x00"
+# magic, dimensions, capacity, tables, bits, embedder fingerprint
+_HEADER = struct.Struct("<8sIIIIQ")
+_HEADER_SIZE = 64
+# used, response length, namespace, response offset, last use (epoch seconds)
+_SLOT_HEADER = struct.Struct("<BxxxIQQd")
+
+# Compact the response file once it holds this many bytes of evicted responses
+_COMPACT_MIN_BYTES = 1 << 20
+
+
+class Embedder(ABC):
+    """Turns text into unit vectors whose dot product measures similarity."""
+
+    dimensions: int
+
+    @abstractmethod
+    def embed(self, text: str) -> List[float]:
+        """Embed a text into a vector of ``dimensions`` floats with unit norm."""
+
+    @property
+    def identity(self) -> str:
+        """Identifies the embedding space; persisted caches only open with the same one."""
+        return f"{type(self).__name__}/{self.dimensions}"
+
+
+class HashingEmbedder(Embedder):
+    """Offline embedder hashing words, word pairs and character trigrams.
+
+    Texts differing in case, punctuation, whitespace or filler words embed
+    to (nearly) the same vector, while different content words lower the
+    similarity sharply. It has no notion of synonyms; plug in a model-based
+    Embedder for that.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 512,
+        char_ngram_weight: float = 0.25,
+        stopwords: FrozenSet[str] = DEFAULT_STOPWORDS,
+    ) -> None:
+        """Initialize the embedder.
+
+        Args:
+            dimensions: Length of the vectors
+            char_ngram_weight: Weight of character trigrams relative to words;
+                they make small typos cost less
+            stopwords: Lower-case words to ignore
+        """
+        self.dimensions = dimensions
+        self.char_ngram_weight = char_ngram_weight
+        self.stopwords = stopwords
+
+    @property
+    def identity(self) -> str:
+        """Identifies the embedding space, including the feature weights."""
+        return f"{super().identity}/{self.char_ngram_weight}/{sorted(self.stopwords)}"
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a text by signed feature hashing."""
+        words = [w for w in _TOKEN.findall(text.lower()) if w not in self.stopwords]
+        features: List[Tuple[str, float]] = [("w:" + word, 1.0) for word in words]
+        features += [(f"b:{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+        if self.char_ngram_weight:
+            for word in words:
+                padded = f" {word} "
+                features += [
+                    ("c:" + padded[i : i + 3], self.char_ngram_weight)
+                    for i in range(len(padded) - 2)
+                ]
+
+        vector = [0.0] * self.dimensions
+        for feature, weight in features:
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dimensions] += weight if h & 0x80000000 else -weight
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+
+@dataclass
+class SemanticMatch:
+    """A cached response similar enough to a request.
+
+    Attributes:
+        response: The cached response
+        similarity: Cosine similarity between the request and the cached one
+    """
+
+    response: str
+    similarity: float
+
+
+class SemanticCache:
+    """Approximate nearest-neighbour store of responses, optionally persistent.
+
+    Thread-safe within a process; a persistent cache must not be opened by
+    several processes at once.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: float = 0.9,
+        max_entries: int = 10_000,
+        path: Optional[str] = None,
+        tables: int = 16,
+        bits: int = 12,
+        max_candidates: int = 64,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the cache, loading it from ``path`` if the file exists.
+
+        Args:
+            embedder: Embeds request texts; a HashingEmbedder if None
+            threshold: Minimum cosine similarity for a cached response to be used
+            max_entries: Entries kept before the least recently used is evicted
+            path: File storing the entries, with the responses in
+                ``path + '.responses'``; kept in memory only if None
+            tables: Number of LSH hash tables; more tables find more
+                matches at the cost of more comparisons
+            bits: Hyperplanes per table (at most 16); more bits mean fewer,
+                closer candidates per table
+            max_candidates: Most candidates compared per lookup, taking those
+                sharing a bucket with the request in the most tables
+            seed: Seed of the random hyperplanes
+
+        Raises:
+            ValueError: If the settings are invalid, or the file at ``path``
+                was created with different settings
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if min(max_entries, tables, max_candidates) < 1 or not 1 <= bits <= 16:
+            raise ValueError(
+                "max_entries, tables and max_candidates must be positive and bits within 1..16"
+            )
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.tables = tables
+        self.bits = bits
+        self.max_candidates = max_candidates
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        dimensions = self.embedder.dimensions
+        rng = random.Random(seed)
+        # Hyperplane coordinates grouped by dimension, so that sparse vectors
+        # only touch the columns of their non-zero entries
+        self._columns = [
+            [rng.gauss(0.0, 1.0) for _ in range(tables * bits)] for _ in range(dimensions)
+        ]
+        self._signature_offset = _SLOT_HEADER.size
+        self._vector_offset = _SLOT_HEADER.size + 4 * ((2 * tables + 3) // 4)
+        self._slot_size = self._vector_offset + 4 * dimensions
+        self._header = _HEADER.pack(
+            _MAGIC, dimensions, max_entries, tables, bits, _fingerprint(self._identity(seed))
+        )
+
+        self._buckets: Dict[Tuple[int, int, int], List[int]] = {}
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._free: List[int] = []
+        self._live_bytes = 0
+        self._open()
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a request text with the cache's embedder."""
+        return self.embedder.embed(text)
+
+    def search(self, namespace: str, vector: List[float]) -> Optional[SemanticMatch]:
+        """Find the most similar cached response within a namespace.
+
+        Args:
+            namespace: Only entries added with the same namespace match
+            vector: Embedding of the request text
+
+        Returns:
+            The best match at or above the threshold, or None
+        """
+        ns = _fingerprint(namespace)
+        signatures = self._signatures(vector)
+        with self._lock:
+            collisions: Counter[int] = Counter()
+            for table, signature in enumerate(signatures):
+                collisions.update(self._buckets.get((table, ns, signature), ()))
+            best_slot, best = -1, self.threshold
+            for slot, _ in collisions.most_common(self.max_candidates):
+                similarity = sum(map(operator.mul, self._vector(slot), vector))
+                if similarity >= best:
+                    best_slot, best = slot, similarity
+            if best_slot < 0:
+                return None
+            self._lru.move_to_end(best_slot)
+            used, length, _, offset, _ = _SLOT_HEADER.unpack_from(
+                self._map, self._slot_offset(best_slot)
+            )
+            _SLOT_HEADER.pack_into(
+                self._map, self._slot_offset(best_slot), used, length, ns, offset, time.time()
+            )
+            self._responses.seek(offset)
+            response = self._responses.read(length).decode("utf-8")
+        return SemanticMatch(response, min(best, 1.0))
+
+    def add(self, namespace: str, vector: List[float], response: str) -> None:
+        """Store a response, evicting the least recently used entry if full.
+
+        Args:
+            namespace: Namespace of the request, see search
+            vector: Embedding of the request text
+            response: The response to store
+        """
+        ns = _fingerprint(namespace)
+        signatures = self._signatures(vector)
+        payload = response.encode("utf-8")
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot, _ = self._lru.popitem(last=False)
+                self._unindex(slot)
+                self.evictions += 1
+
+            self._responses.seek(0, io.SEEK_END)
+            offset = self._responses.tell()
+            self._responses.write(payload)
+            self._live_bytes += len(payload)
+
+            base = self._slot_offset(slot)
+            _SLOT_HEADER.pack_into(self._map, base, 1, len(payload), ns, offset, time.time())
+            start = base + self._signature_offset
+            self._map[start : start + 2 * self.tables] = array("H", signatures).tobytes()
+            start = base + self._vector_offset
+            self._map[start : start + 4 * len(vector)] = array("f", vector).tobytes()
+            self._index(slot, ns, signatures)
+
+            if offset + len(payload) - self._live_bytes > max(
+                self._live_bytes, _COMPACT_MIN_BYTES
+            ):
+                self._compact()
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            for slot in list(self._lru):
+                _SLOT_HEADER.pack_into(self._map, self._slot_offset(slot), 0, 0, 0, 0, 0.0)
+            self._buckets.clear()
+            self._lru.clear()
+            self._free = list(reversed(range(self.max_entries)))
+            self._live_bytes = 0
+            self._responses.seek(0)
+            self._responses.truncate()
+
+    def flush(self) -> None:
+        """Write pending changes of a persistent cache to disk."""
+        with self._lock:
+            self._map.flush()
+            self._responses.flush()
+
+    def close(self) -> None:
+        """Flush and release the files."""
+        if self._map.closed:
+            return
+        self.flush()
+        self._map.close()
+        self._responses.close()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def __enter__(self) -> "SemanticCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _identity(self, seed: int) -> str:
+        return f"{self.embedder.identity}/{seed}"
+
+    def _open(self) -> None:
+        size = _HEADER_SIZE + self.max_entries * self._slot_size
+        self._responses: IO[bytes]
+        if self.path is None:
+            self._map = mmap.mmap(-1, size)
+            self._map[: _HEADER.size] = self._header
+            self._responses = io.BytesIO()
+            self._free = list(reversed(range(self.max_entries)))
+            return
+
+        exists = os.path.exists(self.path)
+        with open(self.path, "r+b" if exists else "w+b") as f:
+            if not exists:
+                f.write(self._header)
+                f.truncate(size)
+            elif f.read(_HEADER.size) != self._header or os.path.getsize(self.path) != size:
+                raise ValueError(
+                    f"{self.path} was created with another embedder or cache settings"
+                )
+            self._map = mmap.mmap(f.fileno(), size)
+        responses_path = self.path + ".responses"
+        self._responses = open(responses_path, "r+b" if exists else "w+b")  # noqa: SIM115
+        self._load()
+
+    def _load(self) -> None:
+        """Index the entries of an existing file, most recently used last."""
+        used_slots: List[Tuple[float, int]] = []
+        for slot in range(self.max_entries):
+            base = self._slot_offset(slot)
+            used, length, ns, _, last_used = _SLOT_HEADER.unpack_from(self._map, base)
+            if not used:
+                self._free.append(slot)
+                continue
+            start = base + self._signature_offset
+            signatures = array("H", self._map[start : start + 2 * self.tables])
+            self._index(slot, ns, list(signatures), touch=False)
+            self._live_bytes += length
+            used_slots.append((last_used, slot))
+        self._free.reverse()
+        for _, slot in sorted(used_slots):
+            self._lru[slot] = None
+
+    def _compact(self) -> None:
+        """Rewrite the responses file without the evicted responses."""
+        compacted: IO[bytes] = (
+            io.BytesIO() if self.path is None else open(self.path + ".compact", "w+b")  # noqa: SIM115
+        )
+        for slot in self._lru:
+            base = self._slot_offset(slot)
+            used, length, ns, offset, last_used = _SLOT_HEADER.unpack_from(self._map, base)
+            self._responses.seek(offset)
+            new_offset = compacted.tell()
+            compacted.write(self._responses.read(length))
+            _SLOT_HEADER.pack_into(self._map, base, used, length, ns, new_offset, last_used)
+        self._responses.close()
+        if self.path is not None:
+            compacted.close()
+            os.replace(self.path + ".compact", self.path + ".responses")
+            compacted = open(self.path + ".responses", "r+b")  # noqa: SIM115
+        self._responses = compacted
+
+    def _signatures(self, vector: List[float]) -> List[int]:
+        """One signature per table: the sides of its hyperplanes the vector lies on."""
+        projections = [0.0] * (self.tables * self.bits)
+        for value, column in zip(vector, self._columns):
+            if value:
+                projections = [p + value * c for p, c in zip(projections, column)]
+        signatures = []
+        for table in range(self.tables):
+            signature = 0
+            for p in projections[table * self.bits : (table + 1) * self.bits]:
+                signature = signature << 1 | (p > 0)
+            signatures.append(signature)
+        return signatures
+
+    def _index(self, slot: int, ns: int, signatures: List[int], touch: bool = True) -> None:
+        for table, signature in enumerate(signatures):
+            self._buckets.setdefault((table, ns, signature), []).append(slot)
+        if touch:
+            self._lru[slot] = None
+
+    def _unindex(self, slot: int) -> None:
+        base = self._slot_offset(slot)
+        _, length, ns, _, _ = _SLOT_HEADER.unpack_from(self._map, base)
+        start = base + self._signature_offset
+        signatures = array("H", self._map[start : start + 2 * self.tables])
+        for table, signature in enumerate(signatures):
+            key = (table, ns, signature)
+            bucket = self._buckets[key]
+            bucket.remove(slot)
+            if not bucket:
+                del self._buckets[key]
+        self._live_bytes -= length
+
+    def _vector(self, slot: int) -> array:
+        start = self._slot_offset(slot) + self._vector_offset
+        return array("f", self._map[start : start + 4 * self.embedder.dimensions])
+
+    def _slot_offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self._slot_size
+
+
+def _fingerprint(text: str) -> int:
+    """A stable 64-bit hash of a string."""
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+
+@dataclass
+class SemanticCacheStats(CacheStats):
+    """Counters describing semantic cache effectiveness and the time it saved.
+
+    Attributes:
+        upstream_calls: Calls that went to the wrapped LLM on a miss
+        upstream_seconds: Time those calls took
+        hit_seconds: Time spent answering hits, embedding and lookup included
+    """
+
+    upstream_calls: int = 0
+    upstream_seconds: float = 0.0
+    hit_seconds: float = 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        """Estimated latency saved: hits times the mean upstream call, minus the hits' cost."""
+        if not self.upstream_calls:
+            return 0.0
+        return self.hits * self.upstream_seconds / self.upstream_calls - self.hit_seconds
+
+
+class SemanticCacheLLM(LLMWrapper):
+    """LLM wrapper answering near-duplicate requests from a SemanticCache.
+
+    Only the prompt, or the last message of a chat when it comes from the
+    user, is compared by similarity; the model, the parameters and the
+    earlier messages must match exactly.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        cache: Optional[SemanticCache] = None,
+        predicate: CachePredicate = is_deterministic,
+    ) -> None:
+        """Initialize the caching wrapper.
+
+        Args:
+            llm: The LLM whose responses are cached
+            cache: The cache to use; an in-memory SemanticCache if None
+            predicate: Decides which requests may be cached; by default only
+                requests with temperature 0
+        """
+        super().__init__(llm)
+        self.cache = cache if cache is not None else SemanticCache()
+        self.predicate = predicate
+        self.stats = SemanticCacheStats()
+        self._stats_lock = threading.Lock()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Return a cached response to a similar prompt, or generate and cache one."""
+        start = time.perf_counter()
+        request = self._request("generate", None, prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return cached
+        response = self.llm.generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(request, response, start)
+        return response
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Return a cached response to a similar chat, or generate and cache one."""
+        start = time.perf_counter()
+        request = self._chat_request(messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return cached
+        response = self.llm.chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(request, response, start)
+        return response
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+        start = time.perf_counter()
+        request = self._request("generate", None, prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return cached
+        response = await self.llm.agenerate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(request, response, start)
+        return response
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+        start = time.perf_counter()
+        request = self._chat_request(messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return cached
+        response = await self.llm.achat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        self._store(request, response, start)
+        return response
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a cached response, or stream and cache the full text on completion."""
+        start = time.perf_counter()
+        request = self._request("generate", None, prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return TextStream([cached])
+        stream = self.llm.stream_generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(request, stream.text, start))
+        return stream
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream a cached chat response, or stream and cache it on completion."""
+        start = time.perf_counter()
+        request = self._chat_request(messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return TextStream([cached])
+        stream = self.llm.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(request, stream.text, start))
+        return stream
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        start = time.perf_counter()
+        request = self._request("generate", None, prompt, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return AsyncTextStream(_aiter_one(cached))
+        stream = self.llm.astream_generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(request, stream.text, start))
+        return stream
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`."""
+        start = time.perf_counter()
+        request = self._chat_request(messages, max_tokens, temperature, kwargs)
+        cached = self._lookup(request, start)
+        if cached is not None:
+            return AsyncTextStream(_aiter_one(cached))
+        stream = self.llm.astream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        stream.add_done_callback(lambda _: self._store(request, stream.text, start))
+        return stream
+
+    def _chat_request(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Optional[Tuple[str, List[float]]]:
+        if not messages or messages[-1].get("role") != "user":
+            return self._request("chat", None, None, max_tokens, temperature, kwargs)
+        text = messages[-1].get("content") or ""
+        return self._request("chat", messages[:-1], text, max_tokens, temperature, kwargs)
+
+    def _request(
+        self,
+        kind: str,
+        context: Any,
+        text: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Optional[Tuple[str, List[float]]]:
+        """Return the namespace and embedding of a request, or None if it is not cached."""
+        if text is None or not self.predicate(temperature, kwargs):
+            with self._stats_lock:
+                self.stats.bypassed += 1
+            return None
+        namespace = make_request_key(
+            self.model_name, kind, context, max_tokens, temperature, kwargs
+        )
+        return namespace, self.cache.embed(text)
+
+    def _lookup(self, request: Optional[Tuple[str, List[float]]], start: float) -> Optional[str]:
+        if request is None:
+            return None
+        match = self.cache.search(*request)
+        with self._stats_lock:
+            if match is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self.stats.hit_seconds += time.perf_counter() - start
+        return match.response
+
+    def _store(
+        self, request: Optional[Tuple[str, List[float]]], response: str, start: float
+    ) -> None:
+        if request is None:
+            return
+        with self._stats_lock:
+            self.stats.upstream_calls += 1
+            self.stats.upstream_seconds += time.perf_counter() - start
+        self.cache.add(request[0], request[1], response)
+
+
+async def _aiter_one(text: str) -> AsyncIterator[str]:
+    """Yield a cached response as a single chunk."""
+    yield text
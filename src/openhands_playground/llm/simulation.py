@@ -0,0 +1,120 @@
+"""Latency models for simulating LLM providers."""
+
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Union
+
+
+class LatencyModel(ABC):
+    """A distribution of response latencies, in seconds."""
+
+    @abstractmethod
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency.
+
+        Args:
+            rng: Source of randomness, so that runs can be seeded
+
+        Returns:
+            A non-negative latency in seconds
+        """
+
+    @property
+    @abstractmethod
+    def mean(self) -> float:
+        """Expected latency in seconds."""
+
+
+class FixedLatency(LatencyModel):
+    """The same latency for every call."""
+
+    def __init__(self, seconds: float) -> None:
+        """Initialize the model.
+
+        Args:
+            seconds: The latency of every call
+        """
+        if seconds < 0:
+            raise ValueError(f"Latency must not be negative, got {seconds}")
+        self.seconds = seconds
+
+    def sample(self, rng: random.Random) -> float:
+        """Return the fixed latency."""
+        return self.seconds
+
+    @property
+    def mean(self) -> float:
+        """Expected latency in seconds."""
+        return self.seconds
+
+    def __repr__(self) -> str:
+        return f"FixedLatency({self.seconds})"
+
+
+class NormalLatency(LatencyModel):
+    """Normally distributed latencies, clipped at a minimum."""
+
+    def __init__(self, mean: float, stddev: float, minimum: float = 0.0) -> None:
+        """Initialize the model.
+
+        Args:
+            mean: Mean latency in seconds
+            stddev: Standard deviation in seconds
+            minimum: Lower bound applied to every sample
+        """
+        self._mean = mean
+        self.stddev = stddev
+        self.minimum = minimum
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a clipped normal latency."""
+        return max(self.minimum, rng.gauss(self._mean, self.stddev))
+
+    @property
+    def mean(self) -> float:
+        """Expected latency in seconds, ignoring the clipping."""
+        return self._mean
+
+    def __repr__(self) -> str:
+        return f"NormalLatency(mean={self._mean}, stddev={self.stddev})"
+
+
+class LongTailLatency(LatencyModel):
+    """Log-normal latencies: most calls are near the median, a few are much slower.
+
+    With the default ``sigma`` of 0.6 the p99 is about four times the median,
+    which resembles hosted LLM APIs under load.
+    """
+
+    def __init__(self, median: float, sigma: float = 0.6) -> None:
+        """Initialize the model.
+
+        Args:
+            median: Median latency in seconds
+            sigma: Standard deviation of the latency's logarithm; larger
+                values give a heavier tail
+        """
+        if median <= 0:
+            raise ValueError(f"Median latency must be positive, got {median}")
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a log-normal latency."""
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+    @property
+    def mean(self) -> float:
+        """Expected latency in seconds."""
+        return self.median * math.exp(self.sigma**2 / 2)
+
+    def __repr__(self) -> str:
+        return f"LongTailLatency(median={self.median}, sigma={self.sigma})"
+
+
+def as_latency_model(latency: Union[float, LatencyModel]) -> LatencyModel:
+    """Accept a number of seconds as shorthand for a FixedLatency."""
+    if isinstance(latency, LatencyModel):
+        return latency
+    return FixedLatency(float(latency))
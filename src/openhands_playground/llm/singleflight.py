@@ -0,0 +1,219 @@
+"""Coalescing of concurrent duplicate LLM calls."""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .base import BaseLLM
+from .cache import CachePredicate, is_deterministic, make_request_key
+from .conversation import Messages
+from .wrapper import LLMWrapper
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A call in flight that other threads can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome.
+
+    Callers that arrive while a call for the same key is in flight wait for it
+    and receive its result, or its exception. Nothing is remembered once the
+    call completes. Threads are coalesced with threads, and coroutines with
+    coroutines on the same event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty group."""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, str], "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run ``fn`` unless a call with the same key is in flight, then share it.
+
+        Args:
+            key: Identifies duplicate calls
+            fn: The call to run
+
+        Returns:
+            The result of the (possibly shared) call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[no-any-return]
+
+        try:
+            call.result = fn()
+            return call.result  # type: ignore[no-any-return]
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async :meth:`do`: await ``fn`` or join the in-flight call for ``key``.
+
+        The shared call runs in its own task, so cancelling one waiter does not
+        cancel the call for the others.
+
+        Args:
+            key: Identifies duplicate calls
+            fn: Coroutine function performing the call
+
+        Returns:
+            The result of the (possibly shared) call
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda _: self._forget(task_key))
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
+
+    def _forget(self, task_key: Tuple[asyncio.AbstractEventLoop, str]) -> None:
+        with self._lock:
+            task = self._tasks.pop(task_key, None)
+        # Mark the exception as retrieved if every waiter was cancelled
+        if task is not None and not task.cancelled():
+            task.exception()
+
+
+class SingleFlightLLM(LLMWrapper):
+    """LLM wrapper that shares one upstream call among concurrent duplicates."""
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        predicate: Optional[CachePredicate] = is_deterministic,
+        group: Optional[SingleFlight] = None,
+    ) -> None:
+        """Initialize the coalescing wrapper.
+
+        Args:
+            llm: The LLM whose calls are coalesced
+            predicate: Decides which requests may be coalesced; by default only
+                greedy (temperature 0), single-sample ones, since sampled
+                requests should each get their own completion. All identical
+                requests are coalesced if None
+            group: SingleFlight group to use, e.g. one shared by several wrappers
+        """
+        super().__init__(llm)
+        self.predicate = predicate
+        self.group = group if group is not None else SingleFlight()
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate text, joining an identical call already in flight."""
+
+        def call() -> str:
+            return self.llm.generate(
+                prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+        key = self._key("generate", prompt, max_tokens, temperature, kwargs)
+        return call() if key is None else self.group.do(key, call)
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate a chat response, joining an identical call already in flight."""
+
+        def call() -> str:
+            return self.llm.chat(
+                messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+        key = self._key("chat", messages, max_tokens, temperature, kwargs)
+        return call() if key is None else self.group.do(key, call)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+
+        def call() -> Awaitable[str]:
+            return self.llm.agenerate(
+                prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+        key = self._key("generate", prompt, max_tokens, temperature, kwargs)
+        return await (call() if key is None else self.group.ado(key, call))
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+
+        def call() -> Awaitable[str]:
+            return self.llm.achat(
+                messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+            )
+
+        key = self._key("chat", messages, max_tokens, temperature, kwargs)
+        return await (call() if key is None else self.group.ado(key, call))
+
+    def _key(
+        self,
+        kind: str,
+        payload: Any,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+    ) -> Optional[str]:
+        """Return the coalescing key, or None if the request runs on its own."""
+        if self.predicate is not None and not self.predicate(temperature, kwargs):
+            return None
+        return make_request_key(self.model_name, kind, payload, max_tokens, temperature, kwargs)
@@ -0,0 +1,210 @@
+"""Streaming response wrappers with latency reporting."""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+
+from .hooks import TokenUsage
+
+_CHUNK_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+
+@dataclass
+class StreamStats:
+    """Latency statistics of a streamed response.
+
+    Both durations are measured from the moment the consumer starts iterating.
+
+    Attributes:
+        time_to_first_token: Seconds until the first non-empty chunk arrived
+        total_latency: Seconds until the stream was exhausted
+        chunk_count: Number of non-empty chunks received
+        usage: Token usage, if the provider reported it at the end of the stream
+    """
+
+    time_to_first_token: Optional[float] = None
+    total_latency: Optional[float] = None
+    chunk_count: int = 0
+    usage: Optional[TokenUsage] = None
+
+
+def split_chunks(text: str) -> List[str]:
+    """Split text into word-sized chunks that concatenate back to the original."""
+    return _CHUNK_PATTERN.findall(text)
+
+
+class _StreamBase:
+    """Bookkeeping shared by the sync and async streams."""
+
+    def __init__(self) -> None:
+        self.stats = StreamStats()
+        self._parts: List[str] = []
+        self._start: Optional[float] = None
+        self._finished = False
+        self._callbacks: List[Callable[[StreamStats], None]] = []
+        self._error_callbacks: List[Callable[[BaseException], None]] = []
+        self._error: Optional[BaseException] = None
+
+    @property
+    def finished(self) -> bool:
+        """Whether the stream has been fully consumed."""
+        return self._finished
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        return "".join(self._parts)
+
+    def add_done_callback(self, callback: Callable[[StreamStats], None]) -> None:
+        """Register a callback invoked with the stats once the stream finishes.
+
+        Args:
+            callback: Function called with the final StreamStats. It is called
+                immediately if the stream has already finished.
+        """
+        if self._finished:
+            callback(self.stats)
+        else:
+            self._callbacks.append(callback)
+
+    def add_error_callback(self, callback: Callable[[BaseException], None]) -> None:
+        """Register a callback invoked with the exception if the stream fails.
+
+        Args:
+            callback: Function called with the exception raised while
+                iterating, including cancellation, or with GeneratorExit if
+                the stream is closed before it finishes. It is called
+                immediately if the stream already failed.
+        """
+        if self._error is not None:
+            callback(self._error)
+        else:
+            self._error_callbacks.append(callback)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since iteration started (0 if it has not)."""
+        return 0.0 if self._start is None else time.perf_counter() - self._start
+
+    def _on_started(self) -> None:
+        if self._start is None:
+            self._start = time.perf_counter()
+
+    def _on_chunk(self, chunk: str) -> None:
+        if not chunk:
+            return
+        if self.stats.time_to_first_token is None:
+            self.stats.time_to_first_token = time.perf_counter() - self._elapsed_origin()
+        self.stats.chunk_count += 1
+        self._parts.append(chunk)
+
+    def _on_finished(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self.stats.total_latency = time.perf_counter() - self._elapsed_origin()
+        for callback in self._callbacks:
+            callback(self.stats)
+        self._callbacks.clear()
+
+    def _on_error(self, error: BaseException) -> None:
+        if self._error is not None or self._finished:
+            return
+        self._error = error
+        for callback in self._error_callbacks:
+            callback(error)
+        self._error_callbacks.clear()
+
+    def _elapsed_origin(self) -> float:
+        return self._start if self._start is not None else time.perf_counter()
+
+
+class TextStream(_StreamBase, Iterator[str]):
+    """Iterator over the text chunks of a streamed response."""
+
+    def __init__(self, chunks: Iterable[str]) -> None:
+        """Wrap an iterable of text chunks.
+
+        Args:
+            chunks: Source of text chunks; typically a lazy generator that only
+                starts the request when iteration begins
+        """
+        super().__init__()
+        self._chunks = iter(chunks)
+
+    def __iter__(self) -> "TextStream":
+        return self
+
+    def __next__(self) -> str:
+        self._on_started()
+        while True:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._on_finished()
+                raise
+            except BaseException as e:
+                self._on_error(e)
+                raise
+            if chunk:
+                self._on_chunk(chunk)
+                return chunk
+
+    def read(self) -> str:
+        """Consume the rest of the stream and return the full text."""
+        for _ in self:
+            pass
+        return self.text
+
+    def close(self) -> None:
+        """Stop the stream early, releasing the underlying response."""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        self._on_error(GeneratorExit())
+
+
+class AsyncTextStream(_StreamBase, AsyncIterator[str]):
+    """Async iterator over the text chunks of a streamed response."""
+
+    def __init__(self, chunks: AsyncIterable[str]) -> None:
+        """Wrap an async iterable of text chunks.
+
+        Args:
+            chunks: Source of text chunks; typically a lazy async generator
+                that only starts the request when iteration begins
+        """
+        super().__init__()
+        self._chunks = chunks.__aiter__()
+
+    def __aiter__(self) -> "AsyncTextStream":
+        return self
+
+    async def __anext__(self) -> str:
+        self._on_started()
+        while True:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._on_finished()
+                raise
+            except BaseException as e:
+                self._on_error(e)
+                raise
+            if chunk:
+                self._on_chunk(chunk)
+                return chunk
+
+    async def read(self) -> str:
+        """Consume the rest of the stream and return the full text."""
+        async for _ in self:
+            pass
+        return self.text
+
+    async def aclose(self) -> None:
+        """Stop the stream early, releasing the underlying response."""
+        aclose = getattr(self._chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        self._on_error(GeneratorExit())
@@ -0,0 +1,723 @@
+"""Token counting and context-window budgeting for chat message lists.
+
+Counting uses tiktoken when it is installed (``pip install tiktoken``) and a
+fast character-based approximation otherwise. :class:`BudgetedLLM` fits every
+conversation into the model's context window before the call goes out, by
+truncating or summarizing older messages, and clamps ``max_tokens`` to what
+is left of the window.
+"""
+
+import json
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .base import BaseLLM
+from .conversation import Conversation, Messages, as_message_list
+from .exceptions import ContextLengthExceededError
+from .hooks import TokenUsage
+from .streaming import AsyncTextStream, TextStream
+from .wrapper import LLMWrapper
+
+Message = Dict[str, str]
+
+# Tokens chat models add around every message, for a message name, and to
+# prime the reply, following OpenAI's accounting
+MESSAGE_OVERHEAD = 3
+NAME_OVERHEAD = 1
+REPLY_OVERHEAD = 3
+
+# Context window sizes in tokens; dated model names match by prefix
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-32k": 32_768,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+}
+
+
+def context_window(model_name: str) -> Optional[int]:
+    """The context window of a model, matched exactly or by the longest name prefix.
+
+    Args:
+        model_name: The model name, e.g. 'gpt-4o-2024-08-06'
+
+    Returns:
+        The window size in tokens, or None if the model is unknown
+    """
+    window = CONTEXT_WINDOWS.get(model_name)
+    if window is not None:
+        return window
+    matches = [name for name in CONTEXT_WINDOWS if model_name.startswith(name)]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else None
+
+
+class Tokenizer(ABC):
+    """Counts the tokens of a text."""
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Return the number of tokens in a text."""
+
+
+class ApproximateTokenizer(Tokenizer):
+    """Dependency-free estimate based on the average characters per token.
+
+    English text averages about four characters per token with OpenAI's
+    tokenizers; code and other languages use more tokens, so budgets computed
+    with this estimate should keep a margin.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0) -> None:
+        """Initialize the tokenizer.
+
+        Args:
+            chars_per_token: Average number of characters per token
+        """
+        if chars_per_token <= 0:
+            raise ValueError(f"chars_per_token must be positive, got {chars_per_token}")
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        """Estimate the number of tokens in a text."""
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact counts with OpenAI's tiktoken library."""
+
+    def __init__(self, model_name: str = "gpt-4o", encoding_name: Optional[str] = None) -> None:
+        """Initialize the tokenizer.
+
+        Args:
+            model_name: Model whose encoding to use
+            encoding_name: Encoding to use instead, e.g. 'cl100k_base'. Models
+                tiktoken does not know use 'o200k_base'.
+
+        Raises:
+            ImportError: If tiktoken is not installed
+        """
+        import tiktoken
+
+        if encoding_name is not None:
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        else:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+
+    def count(self, text: str) -> int:
+        """Count the tokens of a text; special tokens are counted as plain text."""
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+_tokenizers_lock = threading.Lock()
+_tokenizers: Dict[str, Tokenizer] = {}
+
+
+def get_tokenizer(model_name: str) -> Tokenizer:
+    """The tokenizer of a model: tiktoken if installed, else an approximation.
+
+    Tokenizers are created once per model name.
+    """
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(model_name)
+        if tokenizer is None:
+            try:
+                tokenizer = TiktokenTokenizer(model_name)
+            except ImportError:
+                tokenizer = ApproximateTokenizer()
+            _tokenizers[model_name] = tokenizer
+        return tokenizer
+
+
+class TokenCounter:
+    """Counts the prompt tokens of chat message lists.
+
+    The count of every message is cached, keyed by its role, name and
+    content, so counting a conversation after a message was appended only
+    tokenizes the new message. Running totals of Conversation histories and
+    message lists are cached as well, so the earlier counts are not summed
+    again either. Lists are assumed to grow only by appending: a list whose
+    earlier messages were replaced in place may be counted with stale totals.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Optional[Tokenizer] = None,
+        model_name: str = "gpt-4o",
+        max_cached_messages: int = 10_000,
+        max_cached_lists: int = 256,
+    ) -> None:
+        """Initialize the counter.
+
+        Args:
+            tokenizer: Tokenizer to use; get_tokenizer(model_name) if None
+            model_name: Model whose tokenizer to use if none is given
+            max_cached_messages: Number of message counts, and of running
+                totals of Conversation histories, kept, least recently used
+                first out
+            max_cached_lists: Number of message lists whose running totals
+                are kept; the lists stay referenced until they are evicted
+        """
+        self.tokenizer = tokenizer or get_tokenizer(model_name)
+        self.max_cached_messages = max_cached_messages
+        self.max_cached_lists = max_cached_lists
+        self._cache: "OrderedDict[Tuple[Any, ...], int]" = OrderedDict()
+        self._history_totals: "OrderedDict[Hashable, int]" = OrderedDict()
+        # Keyed by id(); holding the list keeps the id from being reused
+        self._list_totals: "OrderedDict[int, Tuple[Sequence[Any], int, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count_text(self, text: str) -> int:
+        """Count the tokens of a text."""
+        return self.tokenizer.count(text)
+
+    def count_message(self, message: Mapping[str, Any]) -> int:
+        """Count the tokens of one message, including its overhead."""
+        key = (message.get("role"), message.get("name"), _text(message.get("content")))
+        with self._lock:
+            count = self._cache.get(key)
+            if count is not None:
+                self._cache.move_to_end(key)
+                return count
+
+        count = MESSAGE_OVERHEAD + self.tokenizer.count(key[2])
+        count += self.tokenizer.count(str(key[0] or ""))
+        if key[1]:
+            count += NAME_OVERHEAD + self.tokenizer.count(str(key[1]))
+
+        with self._lock:
+            self._cache[key] = count
+            if len(self._cache) > self.max_cached_messages:
+                self._cache.popitem(last=False)
+        return count
+
+    def message_counts(self, messages: Sequence[Mapping[str, Any]]) -> List[int]:
+        """Count the tokens of every message."""
+        return [self.count_message(message) for message in messages]
+
+    def count_messages(self, messages: Sequence[Mapping[str, Any]]) -> int:
+        """Count the prompt tokens of a chat request, including the reply priming."""
+        if isinstance(messages, Conversation):
+            return self._count_history(messages) + REPLY_OVERHEAD
+        if isinstance(messages, list):
+            return self._count_list(messages) + REPLY_OVERHEAD
+        return sum(self.message_counts(messages)) + REPLY_OVERHEAD
+
+    def _count_history(self, conversation: Conversation) -> int:
+        """Sum the message counts of a conversation, from the nearest counted prefix."""
+        total = 0
+        pending = []
+        for key, record in conversation.prefixes():
+            with self._lock:
+                cached = self._history_totals.get(key)
+                if cached is not None:
+                    self._history_totals.move_to_end(key)
+            if cached is not None:
+                total = cached
+                break
+            pending.append((key, record))
+
+        for key, record in reversed(pending):
+            total += self.count_message(record.as_dict())
+            with self._lock:
+                self._history_totals[key] = total
+                if len(self._history_totals) > self.max_cached_messages:
+                    self._history_totals.popitem(last=False)
+        return total
+
+    def _count_list(self, messages: List[Mapping[str, Any]]) -> int:
+        """Sum the message counts of a list, from its length when last counted."""
+        with self._lock:
+            entry = self._list_totals.get(id(messages))
+        start = total = 0
+        if entry is not None:
+            _, length, last, cached = entry
+            if length <= len(messages) and messages[length - 1] is last:
+                start, total = length, cached
+
+        total += sum(self.message_counts(messages[start:]))
+        if messages:
+            with self._lock:
+                self._list_totals[id(messages)] = (messages, len(messages), messages[-1], total)
+                self._list_totals.move_to_end(id(messages))
+                if len(self._list_totals) > self.max_cached_lists:
+                    self._list_totals.popitem(last=False)
+        return total
+
+
+class ContextStrategy(ABC):
+    """Shortens a conversation that does not fit into a token budget."""
+
+    @abstractmethod
+    def fit(self, messages: List[Message], budget: int, counter: TokenCounter) -> List[Message]:
+        """Return a conversation of at most ``budget`` prompt tokens.
+
+        Args:
+            messages: The conversation, which exceeds the budget
+            budget: Maximum number of prompt tokens
+            counter: Counts the tokens of messages
+
+        Raises:
+            ContextLengthExceededError: If the conversation cannot be shortened enough
+        """
+
+    async def afit(
+        self, messages: List[Message], budget: int, counter: TokenCounter
+    ) -> List[Message]:
+        """Async :meth:`fit`; strategies that call an LLM override it."""
+        return self.fit(messages, budget, counter)
+
+
+class TruncationStrategy(ContextStrategy):
+    """Drops the oldest messages, keeping leading system messages and the latest ones."""
+
+    def __init__(self, keep_last: int = 1) -> None:
+        """Initialize the strategy.
+
+        Args:
+            keep_last: Number of most recent messages that are never dropped
+        """
+        self.keep_last = keep_last
+
+    def fit(self, messages: List[Message], budget: int, counter: TokenCounter) -> List[Message]:
+        """Drop messages after the system prompt, oldest first, until the rest fits."""
+        counts = counter.message_counts(messages)
+        total = sum(counts) + REPLY_OVERHEAD
+        head = _system_prefix_length(messages)
+        last_droppable = max(head, len(messages) - self.keep_last)
+
+        cut = head
+        while total > budget and cut < last_droppable:
+            total -= counts[cut]
+            cut += 1
+        if total > budget:
+            raise ContextLengthExceededError(
+                f"Conversation needs {total} tokens after truncation, "
+                f"more than the budget of {budget}"
+            )
+        return messages[:head] + messages[cut:]
+
+
+# Instruction sent to the summarizer, followed by the transcript to summarize
+SUMMARY_PROMPT = (
+    "Summarize the following conversation between a user and an assistant. "
+    "Keep every fact, decision, open question and instruction that later "
+    "messages may depend on. Answer with the summary only."
+)
+
+
+class SummarizationStrategy(ContextStrategy):
+    """Replaces older messages with a summary written by an LLM.
+
+    Leading system messages and the latest messages are kept verbatim. If the
+    summarized conversation still does not fit, it is truncated. Summaries are
+    cached, so a long conversation is not summarized again on every turn
+    while its older part stays the same.
+    """
+
+    def __init__(
+        self,
+        summarizer: BaseLLM,
+        keep_last: int = 4,
+        summary_tokens: int = 512,
+        prompt: str = SUMMARY_PROMPT,
+        max_cached_summaries: int = 128,
+    ) -> None:
+        """Initialize the strategy.
+
+        Args:
+            summarizer: LLM writing the summaries; a small, cheap model works
+            keep_last: Number of most recent messages kept verbatim
+            summary_tokens: max_tokens of the summarization call
+            prompt: Instruction given to the summarizer
+            max_cached_summaries: Number of summaries kept
+        """
+        self.summarizer = summarizer
+        self.keep_last = keep_last
+        self.summary_tokens = summary_tokens
+        self.prompt = prompt
+        self.max_cached_summaries = max_cached_summaries
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fit(self, messages: List[Message], budget: int, counter: TokenCounter) -> List[Message]:
+        """Summarize the older messages, then truncate if still needed."""
+        head, middle, tail = self._split(messages)
+        if not middle:
+            return TruncationStrategy(self.keep_last).fit(messages, budget, counter)
+
+        key = _transcript(middle)
+        summary = self._cached(key)
+        if summary is None:
+            summary = self.summarizer.chat(
+                self._request(key), max_tokens=self.summary_tokens, temperature=0
+            )
+            self._store(key, summary)
+        return self._assemble(head, summary, tail, budget, counter)
+
+    async def afit(
+        self, messages: List[Message], budget: int, counter: TokenCounter
+    ) -> List[Message]:
+        """Async :meth:`fit` using the summarizer's achat."""
+        head, middle, tail = self._split(messages)
+        if not middle:
+            return TruncationStrategy(self.keep_last).fit(messages, budget, counter)
+
+        key = _transcript(middle)
+        summary = self._cached(key)
+        if summary is None:
+            summary = await self.summarizer.achat(
+                self._request(key), max_tokens=self.summary_tokens, temperature=0
+            )
+            self._store(key, summary)
+        return self._assemble(head, summary, tail, budget, counter)
+
+    def _split(self, messages: List[Message]) -> Tuple[List[Message], List[Message], List[Message]]:
+        head = _system_prefix_length(messages)
+        start = max(head, len(messages) - self.keep_last)
+        return messages[:head], messages[head:start], messages[start:]
+
+    def _request(self, transcript: str) -> List[Message]:
+        return [
+            {"role": "system", "content": self.prompt},
+            {"role": "user", "content": transcript},
+        ]
+
+    def _assemble(
+        self,
+        head: List[Message],
+        summary: str,
+        tail: List[Message],
+        budget: int,
+        counter: TokenCounter,
+    ) -> List[Message]:
+        summary_message = {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary}",
+        }
+        fitted = head + [summary_message] + tail
+        if counter.count_messages(fitted) <= budget:
+            return fitted
+        return TruncationStrategy(self.keep_last).fit(fitted, budget, counter)
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def _store(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[key] = summary
+            if len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+
+
+class BudgetedLLM(LLMWrapper):
+    """Fits chat requests into the model's context window before sending them.
+
+    Conversations longer than the window minus the completion reserve are
+    shortened by the strategy, and ``max_tokens`` is clamped to the tokens
+    left in the window, so requests are neither rejected for their length nor
+    charged against the TPM quota for a completion that cannot happen.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        strategy: Optional[ContextStrategy] = None,
+        context_window: Optional[int] = None,
+        completion_reserve: int = 1024,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            llm: The LLM to send the fitted requests to
+            strategy: How to shorten conversations; drops the oldest messages
+                (TruncationStrategy) if None
+            context_window: Window size in tokens; looked up from the model
+                name if None
+            completion_reserve: Tokens kept free for the completion, or
+                max_tokens if that is smaller
+            counter: Counts tokens; uses the model's tokenizer if None
+
+        Raises:
+            ValueError: If no context window is given and the model is unknown
+        """
+        super().__init__(llm)
+        window = context_window or _lookup_window(llm.model_name)
+        if window is None:
+            raise ValueError(
+                f"Unknown context window for model '{llm.model_name}'; "
+                "pass context_window explicitly"
+            )
+        self.context_window = window
+        self.strategy = strategy or TruncationStrategy()
+        self.completion_reserve = completion_reserve
+        self.counter = counter or TokenCounter(model_name=llm.model_name)
+        self.fitted_calls = 0
+
+    def fit(
+        self, messages: Messages, max_tokens: Optional[int] = None
+    ) -> Tuple[Messages, Optional[int]]:
+        """Fit a conversation and its max_tokens into the context window.
+
+        Args:
+            messages: The conversation
+            max_tokens: The requested completion limit, if any
+
+        Returns:
+            The conversation to send and the max_tokens to request
+
+        Raises:
+            ContextLengthExceededError: If the conversation cannot be shortened enough
+        """
+        budget = self._prompt_budget(max_tokens)
+        if self.counter.count_messages(messages) > budget:
+            messages = self.strategy.fit(as_message_list(messages), budget, self.counter)
+            self.fitted_calls += 1
+        return messages, self._clamp(self.counter.count_messages(messages), max_tokens)
+
+    async def afit(
+        self, messages: Messages, max_tokens: Optional[int] = None
+    ) -> Tuple[Messages, Optional[int]]:
+        """Async :meth:`fit`."""
+        budget = self._prompt_budget(max_tokens)
+        if self.counter.count_messages(messages) > budget:
+            messages = await self.strategy.afit(as_message_list(messages), budget, self.counter)
+            self.fitted_calls += 1
+        return messages, self._clamp(self.counter.count_messages(messages), max_tokens)
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Generate with max_tokens clamped to the space left in the window."""
+        return self.llm.generate(
+            prompt, self._clamp_prompt(prompt, max_tokens), temperature, **kwargs
+        )
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Chat with the conversation fitted into the context window."""
+        messages, max_tokens = self.fit(messages, max_tokens)
+        return self.llm.chat(messages, max_tokens, temperature, **kwargs)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`generate`."""
+        return await self.llm.agenerate(
+            prompt, self._clamp_prompt(prompt, max_tokens), temperature, **kwargs
+        )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async :meth:`chat`."""
+        messages, max_tokens = await self.afit(messages, max_tokens)
+        return await self.llm.achat(messages, max_tokens, temperature, **kwargs)
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """:meth:`generate` with n candidates."""
+        return self.llm.generate_n(
+            prompt, n, self._clamp_prompt(prompt, max_tokens), temperature, **kwargs
+        )
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """:meth:`chat` with n candidates."""
+        messages, max_tokens = self.fit(messages, max_tokens)
+        return self.llm.chat_n(messages, n, max_tokens, temperature, **kwargs)
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`generate_n`."""
+        return await self.llm.agenerate_n(
+            prompt, n, self._clamp_prompt(prompt, max_tokens), temperature, **kwargs
+        )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Async :meth:`chat_n`."""
+        messages, max_tokens = await self.afit(messages, max_tokens)
+        return await self.llm.achat_n(messages, n, max_tokens, temperature, **kwargs)
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream :meth:`generate`."""
+        return self.llm.stream_generate(
+            prompt, self._clamp_prompt(prompt, max_tokens), temperature, **kwargs
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Stream :meth:`chat`; the conversation is fitted before the stream is created."""
+        messages, max_tokens = self.fit(messages, max_tokens)
+        return self.llm.stream_chat(messages, max_tokens, temperature, **kwargs)
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_generate`."""
+        return self.llm.astream_generate(
+            prompt, self._clamp_prompt(prompt, max_tokens), temperature, **kwargs
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Async :meth:`stream_chat`.
+
+        The conversation is fitted with :meth:`afit` once iteration begins, so
+        a summarizing strategy does not block the event loop.
+        """
+
+        def record_usage(usage: Optional[TokenUsage]) -> None:
+            stream.stats.usage = usage
+
+        stream = AsyncTextStream(
+            self._aiter_fitted(messages, max_tokens, temperature, kwargs, record_usage)
+        )
+        return stream
+
+    async def _aiter_fitted(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        kwargs: Dict[str, Any],
+        on_usage: Callable[[Optional[TokenUsage]], None],
+    ) -> AsyncIterator[str]:
+        messages, max_tokens = await self.afit(messages, max_tokens)
+        inner = self.llm.astream_chat(messages, max_tokens, temperature, **kwargs)
+        async for chunk in inner:
+            yield chunk
+        on_usage(inner.stats.usage)
+
+    def _prompt_budget(self, max_tokens: Optional[int]) -> int:
+        reserve = self.completion_reserve
+        if max_tokens is not None:
+            reserve = min(reserve, max_tokens)
+        return self.context_window - reserve
+
+    def _clamp(self, prompt_tokens: int, max_tokens: Optional[int]) -> Optional[int]:
+        if max_tokens is None:
+            return None
+        return max(1, min(max_tokens, self.context_window - prompt_tokens))
+
+    def _clamp_prompt(self, prompt: str, max_tokens: Optional[int]) -> Optional[int]:
+        if max_tokens is None:
+            return None
+        prompt_tokens = self.counter.count_messages([{"role": "user", "content": prompt}])
+        return self._clamp(prompt_tokens, max_tokens)
+
+
+def _lookup_window(model_name: str) -> Optional[int]:
+    # BudgetedLLM's context_window parameter shadows the module function
+    return context_window(model_name)
+
+
+def _system_prefix_length(messages: Sequence[Mapping[str, Any]]) -> int:
+    """Number of system messages at the start of a conversation."""
+    length = 0
+    while length < len(messages) and messages[length].get("role") == "system":
+        length += 1
+    return length
+
+
+def _text(content: Any) -> str:
+    """The text of a message content; structured content is counted as JSON."""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, ensure_ascii=False)
+
+
+def _transcript(messages: Sequence[Mapping[str, Any]]) -> str:
+    """Render messages as a plain-text transcript for the summarizer."""
+    return "\n\n".join(
+        f"{message.get('role', 'user')}: {_text(message.get('content'))}" for message in messages
+    )
@@ -0,0 +1,188 @@
+"""Base class for LLMs that add behaviour around another LLM."""
+
+from typing import Any, List, Optional
+
+from .base import BaseLLM
+from .conversation import Messages
+from .streaming import AsyncTextStream, TextStream
+
+
+class LLMWrapper(BaseLLM):
+    """An LLM that delegates every call to a wrapped LLM.
+
+    Subclasses override the methods they need to intercept; everything else,
+    including the batch helpers inherited from BaseLLM, reaches the wrapped LLM
+    through these delegating methods. Multi-sample calls (``chat_n`` and its
+    variants) are delegated as well, so that a provider with native support
+    makes one request for all candidates; subclasses that rewrite or guard
+    calls must override them too.
+    """
+
+    def __init__(self, llm: BaseLLM) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            llm: The LLM to delegate calls to
+        """
+        super().__init__(llm.model_name, **llm.config)
+        self.llm = llm
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Delegate to the wrapped LLM's generate."""
+        return self.llm.generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Delegate to the wrapped LLM's chat."""
+        return self.llm.chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Delegate to the wrapped LLM's agenerate."""
+        return await self.llm.agenerate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def achat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Delegate to the wrapped LLM's achat."""
+        return await self.llm.achat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def stream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Delegate to the wrapped LLM's stream_generate."""
+        return self.llm.stream_generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def stream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TextStream:
+        """Delegate to the wrapped LLM's stream_chat."""
+        return self.llm.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def astream_generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Delegate to the wrapped LLM's astream_generate."""
+        return self.llm.astream_generate(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def astream_chat(
+        self,
+        messages: Messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncTextStream:
+        """Delegate to the wrapped LLM's astream_chat."""
+        return self.llm.astream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def generate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Delegate to the wrapped LLM's generate_n."""
+        return self.llm.generate_n(
+            prompt, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def chat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Delegate to the wrapped LLM's chat_n."""
+        return self.llm.chat_n(
+            messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def agenerate_n(
+        self,
+        prompt: str,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Delegate to the wrapped LLM's agenerate_n."""
+        return await self.llm.agenerate_n(
+            prompt, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    async def achat_n(
+        self,
+        messages: Messages,
+        n: int,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Delegate to the wrapped LLM's achat_n."""
+        return await self.llm.achat_n(
+            messages, n, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+
+    def close(self) -> None:
+        """Close the wrapped LLM."""
+        self.llm.close()
+
+    async def aclose(self) -> None:
+        """Close the wrapped LLM, including its async resources."""
+        await self.llm.aclose()
+
+    def __str__(self) -> str:
+        """String representation of the wrapper and the wrapped LLM."""
+        return f"{self.__class__.__name__}({self.llm})"
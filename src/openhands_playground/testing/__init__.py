@@ -0,0 +1,5 @@
+"""Test doubles for exercising LLM clients without a real provider."""
+
+from .stub_server import StubServer, StubStats
+
+__all__ = ["StubServer", "StubStats"]
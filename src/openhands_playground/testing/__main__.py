@@ -0,0 +1,5 @@
+"""Run the stub server: ``python -m openhands_playground.testing --port 8000``."""
+
+from .stub_server import main
+
+main()
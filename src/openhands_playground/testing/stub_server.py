@@ -0,0 +1,411 @@
+"""A local server speaking the OpenAI chat completions protocol, for load tests.
+
+StubServer answers ``POST /v1/chat/completions`` like the OpenAI API,
+including ``n`` choices, token usage and streamed server-sent events, so
+that OpenAILLM can be pointed at it through ``base_url`` and exercised over
+real HTTP: request serialization, connection pooling and response parsing.
+Latency, generation throughput and error injection are configurable, as for
+MockLLM.
+
+The server runs on an asyncio event loop, either one the caller owns
+(``async with StubServer() as server``) or one on a background thread
+(``with StubServer() as server``). To keep its CPU time out of client-side
+measurements, run it in another process::
+
+    python -m openhands_playground.testing --port 8000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from ..llm.rate_limit import estimate_request_tokens
+from ..llm.simulation import LatencyModel, as_latency_model
+from ..llm.streaming import split_chunks
+
+# Paths answered with chat completions; anything else is a 404
+COMPLETIONS_PATHS = ("/v1/chat/completions", "/chat/completions")
+
+# Words the default reply is made of
+FILLER = (
+    "The quick brown fox jumps over the lazy dog while the stub server "
+    "simulates a language model answering at a steady pace"
+).split()
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+@dataclass
+class StubStats:
+    """Counters of the requests a StubServer answered.
+
+    Attributes:
+        requests: Chat completion requests received
+        streams: Requests answered with a stream
+        errors: Requests answered with an injected error
+        completion_tokens: Tokens generated across all choices
+    """
+
+    requests: int = 0
+    streams: int = 0
+    errors: int = 0
+    completion_tokens: int = 0
+
+
+def default_reply(messages: List[Dict[str, Any]], words: int) -> str:
+    """A reply of the given number of words, starting with the last message."""
+    last = str(messages[-1].get("content") or "") if messages else ""
+    opening = f"[STUB] {last[:40]}".split()
+    body = [FILLER[i % len(FILLER)] for i in range(max(0, words - len(opening)))]
+    return " ".join(opening + body)
+
+
+class StubServer:
+    """OpenAI-compatible chat completions server with simulated latency and errors."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Union[float, LatencyModel] = 0.0,
+        tokens_per_second: Optional[float] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        reply_words: int = 32,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the server; it listens once started.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one, see :attr:`port`
+            latency: Simulated time to first token, in seconds or as a
+                LatencyModel (see ``simulation``)
+            tokens_per_second: Simulated generation rate of each choice; each
+                word then takes ``1 / tokens_per_second`` seconds. No
+                generation time if None.
+            error_rate: Probability that a request fails with error_status
+            error_status: HTTP status of injected errors, e.g. 429 or 503
+            reply_words: Words per reply, unless the request's max_tokens is lower
+            seed: Seed for the latency and error sampling, for reproducible runs
+
+        Raises:
+            ValueError: If error_rate is not between 0 and 1
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"error_rate must be between 0 and 1, got {error_rate}")
+        self.host = host
+        self.port = port
+        self.latency = as_latency_model(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reply_words = reply_words
+        self.stats = StubStats()
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The URL to pass as OpenAILLM's base_url."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> None:
+        """Start listening on the running event loop."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def aclose(self) -> None:
+        """Stop listening and close open connections."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def start_in_thread(self) -> "StubServer":
+        """Start the server on an event loop running in a daemon thread.
+
+        Returns:
+            This server, once it is listening
+        """
+        loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=loop.run_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        self._loop = loop
+        asyncio.run_coroutine_threadsafe(self.start(), loop).result()
+        return self
+
+    def stop(self) -> None:
+        """Stop a server started with :meth:`start_in_thread`."""
+        if self._loop is None or self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start_in_thread()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    async def __aenter__(self) -> "StubServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one keep-alive connection."""
+        self._writers.add(writer)
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                await self._respond(writer, *request)
+                if request[2].get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> None:
+        if method != "POST" or path.split("?", 1)[0] not in COMPLETIONS_PATHS:
+            await _send_error(writer, 404, f"No route for {method} {path}", "invalid_request_error")
+            return
+        try:
+            params = json.loads(body)
+            messages = params["messages"]
+        except (ValueError, KeyError, TypeError):
+            await _send_error(
+                writer, 400, "Invalid chat completions request", "invalid_request_error"
+            )
+            return
+
+        self.stats.requests += 1
+        delay = self.latency.sample(self._rng)
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            self.stats.errors += 1
+            await asyncio.sleep(delay)
+            kind = "rate_limit_error" if self.error_status == 429 else "server_error"
+            await _send_error(writer, self.error_status, "Simulated failure", kind)
+            return
+
+        words = self.reply_words
+        if params.get("max_tokens"):
+            words = min(words, int(params["max_tokens"]))
+        replies = [default_reply(messages, words) for _ in range(int(params.get("n") or 1))]
+        replies = [reply if i == 0 else f"{reply} ({i})" for i, reply in enumerate(replies)]
+        chunks = [split_chunks(reply) for reply in replies]
+        completion_tokens = sum(len(choice) for choice in chunks)
+        self.stats.completion_tokens += completion_tokens
+        usage = {
+            "prompt_tokens": estimate_request_tokens(messages, 0),
+            "completion_tokens": completion_tokens,
+            "total_tokens": estimate_request_tokens(messages, 0) + completion_tokens,
+        }
+        completion = _completion_id(params.get("model", "stub"))
+
+        if params.get("stream"):
+            self.stats.streams += 1
+            include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+            await self._stream(writer, completion, chunks, usage if include_usage else None, delay)
+            return
+
+        await asyncio.sleep(delay + self._generation_time(max(map(len, chunks))))
+        payload = {
+            **completion,
+            "object": "chat.completion",
+            "choices": [
+                {
+                    "index": i,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }
+                for i, reply in enumerate(replies)
+            ],
+            "usage": usage,
+        }
+        await _send_json(writer, 200, payload)
+
+    async def _stream(
+        self,
+        writer: asyncio.StreamWriter,
+        completion: Dict[str, Any],
+        chunks: List[List[str]],
+        usage: Optional[Dict[str, int]],
+        delay: float,
+    ) -> None:
+        """Send the choices word by word as server-sent events."""
+        writer.write(
+            _head(200, {"content-type": "text/event-stream", "transfer-encoding": "chunked"})
+        )
+        await asyncio.sleep(delay)
+        for position in range(max(map(len, chunks))):
+            choices = []
+            for i, words in enumerate(chunks):
+                if position < len(words):
+                    delta = {"content": words[position]}
+                    if position == 0:
+                        delta["role"] = "assistant"
+                    choices.append({"index": i, "delta": delta, "finish_reason": None})
+            await _send_event(writer, {**completion, "choices": choices})
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+        finished = [{"index": i, "delta": {}, "finish_reason": "stop"} for i in range(len(chunks))]
+        await _send_event(writer, {**completion, "choices": finished})
+        if usage is not None:
+            await _send_event(writer, {**completion, "choices": [], "usage": usage})
+        writer.write(_chunk(b"data: [DONE]\n\n") + b"0\r\n\r\n")
+        await writer.drain()
+
+    def _generation_time(self, words: int) -> float:
+        return words / self.tokens_per_second if self.tokens_per_second else 0.0
+
+
+_completion_ids = itertools.count(1)
+
+
+def _completion_id(model: str) -> Dict[str, Any]:
+    """The fields identifying a completion and its chunks."""
+    return {
+        "id": f"chatcmpl-stub-{next(_completion_ids)}",
+        "created": int(time.time()),
+        "model": model,
+    }
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read one HTTP/1.1 request, or return None once the client hung up."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise
+        return None
+    request_line, *lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    method, path, _ = request_line.split(" ", 2)
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _chunk(data: bytes) -> bytes:
+    """Frame data with chunked transfer encoding."""
+    return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+
+async def _send_event(writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
+    writer.write(_chunk(b"data: " + json.dumps(payload).encode() + b"\n\n"))
+    await writer.drain()
+
+
+async def _send_json(
+    writer: asyncio.StreamWriter,
+    status: int,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
+    body = json.dumps(payload).encode()
+    head = {"content-type": "application/json", "content-length": str(len(body)), **(headers or {})}
+    writer.write(_head(status, head) + body)
+    await writer.drain()
+
+
+async def _send_error(writer: asyncio.StreamWriter, status: int, message: str, kind: str) -> None:
+    # Rate limit errors tell the client when to retry, like OpenAI's do
+    headers = {"retry-after": "0"} if status == 429 else None
+    payload = {"error": {"message": message, "type": kind, "param": None, "code": None}}
+    await _send_json(writer, status, payload, headers)
+
+
+async def _serve_forever(server: StubServer, started: Callable[[], None]) -> None:
+    async with server:
+        started()
+        await asyncio.Event().wait()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a stub server until interrupted, printing its base URL first."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=float, help="Generation rate per choice")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--reply-words", type=int, default=32)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = StubServer(
+        args.host,
+        args.port,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        reply_words=args.reply_words,
+        seed=args.seed,
+    )
+
+    def announce() -> None:
+        # The first line of output tells scripts such as the load test where to connect
+        sys.stdout.write(server.base_url + "\n")
+        sys.stdout.flush()
+
+    try:
+        asyncio.run(_serve_forever(server, announce))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Tests for offline chat completions through the Batch API."""
+
+import json
+import os
+
+import pytest
+from openhands_playground.llm.batch_api import (
+    BatchRunner,
+    FakeBatchClient,
+    parse_result_line,
+)
+from openhands_playground.llm.exceptions import (
+    BatchJobError,
+    ContextLengthExceededError,
+    DeadlineExceededError,
+    RateLimitError,
+)
+from openhands_playground.llm.llms import MockLLM, OpenAILLM
+
+
+class EchoLLM(MockLLM):
+    """Mock LLM answering with the last message, failing on 'fail'."""
+
+    def chat(self, messages, max_tokens=None, temperature=None, **kwargs):
+        content = messages[-1]["content"]
+        if content == "fail":
+            raise RateLimitError("slow down", status_code=429)
+        return f"echo: {content}"
+
+
+@pytest.fixture
+def client(tmp_path):
+    """A fake batch client storing its files in a temporary directory."""
+    return FakeBatchClient(EchoLLM(), directory=str(tmp_path))
+
+
+def requests(count):
+    """Chat completions parameters of numbered prompts."""
+    for i in range(count):
+        yield {"model": "gpt-4o", "messages": [{"role": "user", "content": f"q{i}"}]}
+
+
+class TestBatchRunner:
+    """Test cases for submitting batches and reading their results."""
+
+    def test_results_mapped_to_inputs(self, client):
+        """Test that every request gets its own result back."""
+        runner = BatchRunner(client, poll_interval=0)
+        results = sorted(runner.run(requests(25)), key=lambda r: r.index)
+
+        assert [r.index for r in results] == list(range(25))
+        assert all(r.ok for r in results)
+        assert results[7].output == "echo: q7"
+
+    def test_split_into_batches(self, client):
+        """Test that large inputs are split by request count and file size."""
+        runner = BatchRunner(client, poll_interval=0, max_requests_per_batch=10)
+        jobs = runner.submit(requests(25))
+        assert [(job.first_index, job.count) for job in jobs] == [(0, 10), (10, 10), (20, 5)]
+
+        line_size = len(json.dumps({"custom_id": "request-0"})) * 3
+        runner = BatchRunner(client, poll_interval=0, max_bytes_per_batch=line_size)
+        jobs = runner.submit(requests(3))
+        assert [job.count for job in jobs] == [1, 1, 1]
+        assert sorted(r.output for r in runner.results(jobs)) == ["echo: q0", "echo: q1", "echo: q2"]
+
+    def test_polls_until_complete(self, tmp_path):
+        """Test that pending batches are polled with the configured interval."""
+        client = FakeBatchClient(EchoLLM(), directory=str(tmp_path), polls_until_complete=3)
+        sleeps = []
+        runner = BatchRunner(client, poll_interval=5, sleep=sleeps.append)
+        assert len(list(runner.run(requests(2)))) == 2
+        assert sleeps == [5, 5]
+
+    def test_failed_requests(self, client):
+        """Test that per-request errors are mapped onto LLMErrors."""
+        batch = [
+            {"model": "gpt-4o", "messages": [{"role": "user", "content": "fail"}]},
+            {"model": "gpt-4o", "messages": [{"role": "user", "content": "ok"}]},
+        ]
+        results = {r.index: r for r in BatchRunner(client, poll_interval=0).run(batch)}
+        assert isinstance(results[0].error, RateLimitError)
+        assert results[1].output == "echo: ok"
+
+    def test_deadline_cancels_batches(self, tmp_path):
+        """Test that batches still running at max_wait are cancelled."""
+        client = FakeBatchClient(EchoLLM(), directory=str(tmp_path), polls_until_complete=100)
+        runner = BatchRunner(client, poll_interval=0, max_wait=0)
+        jobs = runner.submit(requests(2))
+        with pytest.raises(DeadlineExceededError):
+            list(runner.results(jobs))
+        assert client.batches.retrieve(jobs[0].id).status == "cancelled"
+
+    def test_cancelled_batch_reports_missing_results(self, client):
+        """Test that requests without a result get a BatchJobError."""
+        runner = BatchRunner(client, poll_interval=0)
+        jobs = runner.submit(requests(3))
+        client.batches.cancel(jobs[0].id)
+        results = list(runner.results(jobs))
+        assert len(results) == 3
+        assert all(isinstance(r.error, BatchJobError) for r in results)
+
+    def test_files_deleted(self, client):
+        """Test that uploaded and produced files are removed once read."""
+        list(BatchRunner(client, poll_interval=0).run(requests(3)))
+        assert os.listdir(client.directory) == []
+
+    def test_parse_error_lines(self):
+        """Test parsing of request and job-level errors."""
+        line = json.dumps(
+            {
+                "custom_id": "request-4",
+                "response": {
+                    "status_code": 400,
+                    "body": {"error": {"message": "too long", "code": "context_length_exceeded"}},
+                },
+            }
+        )
+        assert isinstance(parse_result_line(line).error, ContextLengthExceededError)
+
+        expired = json.dumps(
+            {"custom_id": "request-2", "response": None, "error": {"code": "batch_expired"}}
+        )
+        result = parse_result_line(expired)
+        assert result.index == 2
+        assert isinstance(result.error, BatchJobError)
+
+
+class TestOpenAIBatch:
+    """Test cases for the OpenAILLM batch methods."""
+
+    def test_iter_batch_chat(self, client):
+        """Test that OpenAILLM builds the requests and yields mapped results."""
+        llm = OpenAILLM("gpt-4o", api_key="test-key")
+        runner = BatchRunner(client, poll_interval=0)
+        conversations = ([{"role": "user", "content": f"c{i}"}] for i in range(4))
+
+        results = list(llm.iter_batch_chat(conversations, max_tokens=5, runner=runner))
+        assert sorted(r.output for r in results) == [f"echo: c{i}" for i in range(4)]
+
+        results = list(llm.iter_batch_generate(["hello"], runner=runner))
+        assert results[0].output == "echo: hello"
+        llm.close()
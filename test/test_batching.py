@@ -0,0 +1,142 @@
+"""Tests for the batched generation API."""
+
+import asyncio
+import contextvars
+import time
+
+import pytest
+from openhands_playground.llm import BaseLLM, BatchResult
+from openhands_playground.llm.llms import MockLLM
+
+request_id = contextvars.ContextVar("request_id", default="unset")
+
+
+class FlakyLLM(BaseLLM):
+    """LLM that fails on prompts containing 'fail' and sleeps per prompt."""
+
+    def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        delay = kwargs.get("delays", {}).get(prompt, 0.0)
+        time.sleep(delay)
+        if "fail" in prompt:
+            raise RuntimeError(f"cannot answer {prompt}")
+        return prompt.upper()
+
+    def chat(self, messages, max_tokens=None, temperature=None, **kwargs):
+        return self.generate(messages[-1]["content"], **kwargs)
+
+
+class TestBatchedGeneration:
+    """Test cases for generate_many/chat_many and their variants."""
+
+    def test_generate_many_preserves_order_and_captures_errors(self):
+        """Test that results are ordered and failures do not abort the batch."""
+        llm = FlakyLLM("flaky")
+        prompts = ["a", "fail-b", "c", "d"]
+
+        results = llm.generate_many(prompts, max_concurrency=2)
+
+        assert [result.index for result in results] == [0, 1, 2, 3]
+        assert [result.output for result in results] == ["A", None, "C", "D"]
+        assert not results[1].ok
+        assert isinstance(results[1].error, RuntimeError)
+        assert all(result.ok for result in results if result.index != 1)
+
+    def test_chat_many_runs_concurrently(self):
+        """Test that chat_many overlaps calls on a MockLLM with latency."""
+        llm = MockLLM(latency=0.05)
+        conversations = [[{"role": "user", "content": f"Question {i}?"}] for i in range(40)]
+
+        start = time.perf_counter()
+        results = llm.chat_many(conversations, max_concurrency=20)
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 40
+        assert all(result.ok for result in results)
+        assert elapsed < 1.0  # Serial execution would take 2 seconds
+
+    def test_iter_generate_many_yields_in_completion_order(self):
+        """Test that iter_generate_many streams results as they finish."""
+        llm = FlakyLLM("flaky")
+        delays = {"slow": 0.3, "fast": 0.0}
+
+        results = list(llm.iter_generate_many(["slow", "fast"], max_concurrency=2, delays=delays))
+
+        assert [result.output for result in results] == ["FAST", "SLOW"]
+        assert [result.index for result in results] == [1, 0]
+
+    def test_iter_generate_many_consumes_input_lazily(self):
+        """Test that prompts are only pulled as concurrency slots free up."""
+        llm = FlakyLLM("flaky")
+        pulled = []
+
+        def prompts():
+            for i in range(100):
+                pulled.append(i)
+                yield f"p{i}"
+
+        iterator = llm.iter_generate_many(prompts(), max_concurrency=4)
+        next(iterator)
+        assert len(pulled) <= 5
+        iterator.close()
+
+    def test_async_many_methods(self):
+        """Test the async batch methods on a MockLLM."""
+        llm = MockLLM(latency=0.05)
+        prompts = [f"prompt {i}" for i in range(100)]
+
+        async def run():
+            ordered = await llm.agenerate_many(prompts, max_concurrency=50)
+            streamed = [
+                result
+                async for result in llm.aiter_chat_many(
+                    [[{"role": "user", "content": p}] for p in prompts], max_concurrency=50
+                )
+            ]
+            return ordered, streamed
+
+        start = time.perf_counter()
+        ordered, streamed = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        assert [result.output for result in ordered] == [MockLLM().generate(p) for p in prompts]
+        assert sorted(result.index for result in streamed) == list(range(100))
+        assert elapsed < 1.0  # Two serial passes would take 10 seconds
+
+    def test_achat_many_captures_errors(self):
+        """Test that async batches capture per-item errors."""
+        llm = FlakyLLM("flaky")
+        conversations = [
+            [{"role": "user", "content": "ok"}],
+            [{"role": "user", "content": "fail"}],
+        ]
+
+        results = asyncio.run(llm.achat_many(conversations))
+
+        assert results[0] == BatchResult(0, output="OK")
+        assert isinstance(results[1].error, RuntimeError)
+
+    def test_calls_run_in_the_callers_context(self):
+        """Test that sync and async batched calls see the caller's context variables."""
+
+        class ContextLLM(FlakyLLM):
+            def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+                return f"{prompt}:{request_id.get()}"
+
+        llm = ContextLLM("context")
+
+        async def run():
+            request_id.set("async-caller")
+            return await llm.agenerate_many(["a", "b"])
+
+        token = request_id.set("sync-caller")
+        try:
+            outputs = [r.output for r in llm.generate_many(["a", "b"])]
+        finally:
+            request_id.reset(token)
+        assert outputs == ["a:sync-caller", "b:sync-caller"]
+        assert [r.output for r in asyncio.run(run())] == ["a:async-caller", "b:async-caller"]
+
+    def test_invalid_concurrency(self):
+        """Test that a non-positive max_concurrency is rejected."""
+        with pytest.raises(ValueError, match="max_concurrency must be at least 1"):
+            MockLLM().generate_many(["a"], max_concurrency=0)
@@ -0,0 +1,228 @@
+"""Tests for the response cache layer."""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+from openhands_playground.llm import BaseLLM, LLMFactory
+from openhands_playground.llm.cache import (
+    CachedLLM,
+    InMemoryCache,
+    SQLiteCache,
+    is_deterministic,
+    make_request_key,
+    resolve_cache,
+)
+from openhands_playground.llm.llms import MockLLM
+
+
+class CountingLLM(BaseLLM):
+    """LLM that returns a fresh response for every call."""
+
+    def __init__(self, model_name="counting", **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.calls = 0
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        return f"{prompt} #{self.calls}"
+
+    def chat(self, messages, **kwargs):
+        return self.generate(messages[-1]["content"], **kwargs)
+
+
+def write_entry(path, key, value):
+    """Write one cache entry from a separate process."""
+    SQLiteCache(path).set(key, value)
+
+
+class TestRequestKey:
+    """Test cases for canonical request keys."""
+
+    def test_key_ignores_dict_order(self):
+        """Test that logically identical requests share a key."""
+        first = make_request_key(
+            "m", "chat", [{"role": "user", "content": "hi"}], 10, 0.0, {"a": 1, "b": 2}
+        )
+        second = make_request_key(
+            "m", "chat", [{"content": "hi", "role": "user"}], 10, 0.0, {"b": 2, "a": 1}
+        )
+        assert first == second
+
+    def test_key_distinguishes_parameters(self):
+        """Test that any request field changes the key."""
+        base = make_request_key("m", "generate", "hi", 10, 0.0, {})
+        assert base != make_request_key("other", "generate", "hi", 10, 0.0, {})
+        assert base != make_request_key("m", "chat", "hi", 10, 0.0, {})
+        assert base != make_request_key("m", "generate", "hi", 11, 0.0, {})
+        assert base != make_request_key("m", "generate", "hi", 10, 0.5, {})
+        assert base != make_request_key("m", "generate", "hi", 10, 0.0, {"top_p": 1})
+
+    def test_default_predicate(self):
+        """Test that only deterministic requests are cacheable by default."""
+        assert is_deterministic(0, {})
+        assert not is_deterministic(None, {})
+        assert not is_deterministic(0.7, {})
+        assert not is_deterministic(0, {"n": 3})
+
+
+class TestInMemoryCache:
+    """Test cases for the in-process LRU cache."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = InMemoryCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        assert cache.get("a") == "1"
+        cache.set("c", "3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert len(cache) == 2
+
+    def test_size_eviction(self):
+        """Test that the total size bound evicts old entries."""
+        cache = InMemoryCache(max_bytes=10)
+        cache.set("a", "12345")
+        cache.set("b", "12345")
+        cache.set("c", "1")
+        cache.set("huge", "x" * 11)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == "12345"
+        assert cache.get("huge") is None
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        cache = InMemoryCache(ttl=0.05)
+        cache.set("a", "1")
+        assert cache.get("a") == "1"
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestSQLiteCache:
+    """Test cases for the persistent SQLite cache."""
+
+    def test_round_trip_and_ttl(self, tmp_path):
+        """Test storing, expiring and pruning entries."""
+        cache = SQLiteCache(tmp_path / "cache.db", ttl=0.05)
+        cache.set("a", "1")
+        assert cache.get("a") == "1"
+        assert cache.get("missing") is None
+
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        assert cache.prune() == 1
+        assert len(cache) == 0
+
+    def test_shared_between_processes(self, tmp_path):
+        """Test that entries written by another process are visible."""
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteCache(path)
+
+        process = multiprocessing.get_context("spawn").Process(
+            target=write_entry, args=(path, "key", "from child")
+        )
+        process.start()
+        process.join(timeout=30)
+
+        assert process.exitcode == 0
+        assert cache.get("key") == "from child"
+
+    def test_close_releases_every_connection(self, tmp_path):
+        """Test that close checkpoints the WAL and the cache reconnects after it."""
+        path = tmp_path / "cache.db"
+        cache = SQLiteCache(path)
+        threads = [threading.Thread(target=cache.set, args=(f"key{i}", str(i))) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(cache._connections) == 5
+
+        cache.close()
+        cache.close()
+        assert cache._connections == []
+        assert not (tmp_path / "cache.db-wal").exists()
+        assert cache.get("key3") == "3"
+
+    def test_resolve_cache(self, tmp_path):
+        """Test cache specifications."""
+        assert isinstance(resolve_cache("memory"), InMemoryCache)
+        assert isinstance(resolve_cache(f"sqlite:{tmp_path / 'c.db'}"), SQLiteCache)
+        with pytest.raises(ValueError, match="Unsupported cache"):
+            resolve_cache("redis://localhost")
+
+
+class TestCachedLLM:
+    """Test cases for the caching wrapper."""
+
+    def test_caches_deterministic_requests(self):
+        """Test hits, misses and bypasses for sync calls."""
+        inner = CountingLLM()
+        llm = CachedLLM(inner)
+
+        assert llm.generate("q", temperature=0) == "q #1"
+        assert llm.generate("q", temperature=0) == "q #1"
+        assert llm.chat([{"role": "user", "content": "q"}], temperature=0) == "q #2"
+        assert llm.generate("q", temperature=0.7) == "q #3"
+        assert llm.generate("q", temperature=0.7) == "q #4"
+
+        assert inner.calls == 4
+        assert llm.stats.hits == 1
+        assert llm.stats.misses == 2
+        assert llm.stats.bypassed == 2
+        assert llm.stats.hit_rate == pytest.approx(1 / 3)
+
+    def test_custom_predicate(self):
+        """Test caching everything with a custom predicate."""
+        inner = CountingLLM()
+        llm = CachedLLM(inner, predicate=lambda temperature, kwargs: True)
+
+        llm.generate("q", temperature=1.0)
+        llm.generate("q", temperature=1.0)
+        assert inner.calls == 1
+
+    def test_async_and_streaming_share_the_cache(self):
+        """Test that async and streaming calls read and fill the cache."""
+        inner = CountingLLM()
+        llm = CachedLLM(inner)
+
+        assert asyncio.run(llm.agenerate("q", temperature=0)) == "q #1"
+        assert llm.stream_generate("q", temperature=0).read() == "q #1"
+        assert llm.stream_chat([{"role": "user", "content": "c"}], temperature=0).read() == "c #2"
+        assert asyncio.run(llm.achat([{"role": "user", "content": "c"}], temperature=0)) == "c #2"
+
+        assert inner.calls == 2
+        assert llm.stats.hits == 2
+
+    def test_close_closes_the_backend(self, tmp_path):
+        """Test that closing the wrapper closes the cache backend too."""
+        llm = CachedLLM(CountingLLM(), f"sqlite:{tmp_path / 'cache.db'}")
+        llm.generate("q", temperature=0)
+        assert llm.backend._connections
+
+        llm.close()
+        assert llm.backend._connections == []
+        llm.generate("q", temperature=0)
+        asyncio.run(llm.aclose())
+        assert llm.backend._connections == []
+
+    def test_factory_cache_parameter(self, tmp_path):
+        """Test choosing a cache through the factory."""
+        llm = LLMFactory.create_llm("mock", cache="memory", load_env=False)
+        assert isinstance(llm, CachedLLM)
+        assert isinstance(llm.llm, MockLLM)
+
+        path = tmp_path / "cache.db"
+        first = LLMFactory.create_llm("mock", cache=f"sqlite:{path}", load_env=False)
+        response = first.generate("shared", temperature=0)
+        second = LLMFactory.create_llm("mock", cache=SQLiteCache(path), load_env=False)
+        assert second.generate("shared", temperature=0) == response
+        assert second.stats.hits == 1
@@ -0,0 +1,157 @@
+"""Tests for model cascades."""
+
+import asyncio
+import time
+
+import pytest
+from openhands_playground.llm import BaseLLM, LLMFactory
+from openhands_playground.llm.cascade import CascadeLLM, Tier, is_json, min_length
+from openhands_playground.llm.exceptions import RateLimitError, ServerError
+from openhands_playground.llm.metrics import ModelPrice
+
+
+class ScriptedLLM(BaseLLM):
+    """LLM answering from a function of the prompt after a delay."""
+
+    def __init__(self, model_name, answer, delay=0.0):
+        super().__init__(model_name)
+        self.answer = answer
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.answer(prompt)
+
+    def chat(self, messages, max_tokens=None, temperature=None, **kwargs):
+        return self.generate(messages[-1]["content"], max_tokens, temperature, **kwargs)
+
+    async def agenerate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.answer(prompt)
+
+
+def small_answer(prompt):
+    """A small model that only knows short answers."""
+    if prompt == "hard":
+        return "?"
+    if prompt == "down":
+        raise ServerError("overloaded", status_code=503)
+    return f"small: {prompt}"
+
+
+def cascade(**kwargs):
+    """A two-tier cascade of a cheap fast model and an expensive slow one."""
+    small = ScriptedLLM("gpt-4o-mini", small_answer, delay=0.01)
+    large = ScriptedLLM("gpt-4o", lambda prompt: f"large: {prompt}", delay=0.2)
+    return CascadeLLM([small, large], checks=[min_length(3)], **kwargs), small, large
+
+
+class TestChecks:
+    """Test cases for the built-in acceptance checks."""
+
+    def test_checks(self):
+        """Test the length and JSON checks."""
+        assert min_length(3)(" abc ")
+        assert not min_length(3)(" ab ")
+        assert is_json('```json\n{"a": 1}\n```')
+        assert not is_json("{'a': 1}")
+
+
+class TestCascadeLLM:
+    """Test cases for escalation and cascade statistics."""
+
+    def test_escalates_rejected_and_failed_responses(self):
+        """Test that rejected responses and errors go to the next tier."""
+        llm, small, large = cascade()
+        assert llm.generate("easy") == "small: easy"
+        assert llm.generate("hard") == "large: hard"
+        assert llm.chat([{"role": "user", "content": "down"}]) == "large: down"
+
+        stats = llm.stats()
+        assert [t["accepted"] for t in stats["tiers"]] == [1, 2]
+        assert stats["tiers"][0]["rejected"] == 1
+        assert stats["tiers"][0]["errors"] == 1
+        assert stats["tiers"][0]["hit_rate"] == pytest.approx(1 / 3)
+        assert stats["tiers"][1]["hit_rate"] == 1.0
+
+    def test_savings(self):
+        """Test that answering from the cheap tier saves latency and cost."""
+        llm, _, _ = cascade()
+        for prompt in ["easy", "easy", "easy", "hard"]:
+            llm.generate(prompt)
+        assert llm.latency_saved > 0.05
+        assert llm.cost_saved > 0
+        assert llm.stats()["requests"] == 4
+
+    def test_last_tier_error_raised(self):
+        """Test that the last tier's error is raised if no tier answers."""
+        failing = ScriptedLLM("b", lambda p: (_ for _ in ()).throw(RateLimitError("slow")))
+        llm = CascadeLLM([ScriptedLLM("a", small_answer), failing], checks=[min_length(3)])
+        with pytest.raises(RateLimitError):
+            llm.generate("hard")
+
+    def test_tier_checks_and_prices(self):
+        """Test per-tier checks and custom prices."""
+        small = ScriptedLLM("local", lambda p: "not json")
+        large = ScriptedLLM("remote", lambda p: '{"ok": true}')
+        llm = CascadeLLM(
+            [Tier(small, checks=[is_json], price=ModelPrice(0, 0)), Tier(large, name="big")]
+        )
+        assert llm.generate("q") == '{"ok": true}'
+        assert llm.stats()["tiers"][1]["name"] == "big"
+        assert llm.cost_saved == 0.0
+
+    def test_async_sequential(self):
+        """Test that async calls escalate like sync ones."""
+        llm, small, large = cascade()
+        assert asyncio.run(llm.agenerate("hard")) == "large: hard"
+        assert asyncio.run(llm.achat([{"role": "user", "content": "easy"}])) == "small: easy"
+        assert (small.calls, large.calls) == (2, 1)
+
+    def test_parallel_cancels_slower_tiers(self):
+        """Test that the first acceptable response wins and the others are cancelled."""
+        llm, small, large = cascade(parallel=True)
+        start = time.perf_counter()
+        assert asyncio.run(llm.agenerate("easy")) == "small: easy"
+        assert time.perf_counter() - start < 0.15
+        assert large.cancelled == 1
+        assert llm.stats()["tiers"][1]["cancelled"] == 1
+
+        assert asyncio.run(llm.agenerate("hard")) == "large: hard"
+        assert llm.stats()["tiers"][0]["rejected"] == 1
+
+    def test_parallel_sync(self):
+        """Test parallel mode for sync calls."""
+        llm, _, _ = cascade(parallel=True)
+        start = time.perf_counter()
+        assert llm.generate("easy") == "small: easy"
+        assert time.perf_counter() - start < 0.15
+        assert llm.generate("down") == "large: down"
+
+    def test_streams_return_accepted_response(self):
+        """Test that streams yield the accepted response."""
+        llm, _, _ = cascade()
+        assert llm.stream_generate("hard").read() == "large: hard"
+
+    def test_create_cascade(self):
+        """Test that tiers are created from provider specifications."""
+        llm = LLMFactory.create_cascade(
+            [
+                {"provider": "mock", "model_name": "gpt-4o-mini", "checks": [is_json]},
+                {"provider": "mock", "model_name": "gpt-4o", "name": "large"},
+            ],
+            parallel=True,
+        )
+        assert isinstance(llm, CascadeLLM)
+        assert llm.model_name == "cascade:gpt-4o-mini+gpt-4o"
+        assert llm.tiers[1].name == "large"
+        assert llm.generate("hi").startswith("[MOCK]")
+        assert llm.stats()["tiers"][0]["rejected"] == 1
@@ -0,0 +1,246 @@
+"""Tests for circuit breakers and endpoint health tracking."""
+
+import asyncio
+
+import pytest
+from openhands_playground.llm import LLMFactory
+from openhands_playground.llm.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerLLM,
+    circuit_breaker_states,
+    get_circuit_breaker,
+    reset_circuit_breakers,
+)
+from openhands_playground.llm.exceptions import (
+    CircuitOpenError,
+    InvalidRequestError,
+    ServerError,
+)
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.router import RouterLLM
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class SwitchableLLM(MockLLM):
+    """Mock LLM that fails with a given error until it is cleared."""
+
+    def __init__(self, model_name="mock-model"):
+        super().__init__(model_name)
+        self.error = None
+        self.calls = 0
+
+    def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return super().generate(prompt, max_tokens, temperature, **kwargs)
+
+
+@pytest.fixture
+def clock():
+    """A fake clock."""
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def isolated_breakers(monkeypatch):
+    """Keep factory settings and shared breakers from leaking between tests."""
+    monkeypatch.setattr(LLMFactory, "_circuit_breakers", {})
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+def trip(breaker, failures=None):
+    """Record enough failures to open a breaker."""
+    for _ in range(failures or breaker.minimum_calls):
+        breaker.acquire()
+        breaker.record_failure(0.01)
+
+
+class TestCircuitBreaker:
+    """Test cases for the breaker state machine."""
+
+    def test_opens_at_failure_rate(self, clock):
+        """Test that the circuit opens once the failure share reaches the threshold."""
+        breaker = CircuitBreaker(failure_threshold=0.5, minimum_calls=4, clock=clock)
+        for _ in range(3):
+            breaker.record_failure(0.1)
+        assert breaker.state == "closed"  # too few calls to judge
+        breaker.record_success(0.1)
+        assert breaker.state == "open"
+
+        with pytest.raises(CircuitOpenError) as info:
+            breaker.acquire()
+        assert info.value.retryable
+        assert info.value.retry_after == 30.0
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_half_open_probe(self, clock):
+        """Test that a successful trial call closes the circuit."""
+        breaker = CircuitBreaker(minimum_calls=2, open_seconds=10, clock=clock)
+        trip(breaker)
+        clock.now += 10
+        assert breaker.state == "half_open"
+
+        breaker.acquire()
+        assert not breaker.allows_calls()  # the single trial is in flight
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        breaker.record_success(0.1)
+        assert breaker.state == "closed"
+        assert breaker.snapshot()["calls"] == 0
+
+    def test_failed_probe_reopens(self, clock):
+        """Test that a failed trial call opens the circuit again."""
+        breaker = CircuitBreaker(minimum_calls=2, open_seconds=10, clock=clock)
+        trip(breaker)
+        clock.now += 10
+        breaker.acquire()
+        breaker.record_failure(0.1)
+        assert breaker.state == "open"
+        assert breaker.snapshot()["times_opened"] == 2
+
+    def test_released_probe(self, clock):
+        """Test that an abandoned trial call frees its slot."""
+        breaker = CircuitBreaker(minimum_calls=2, open_seconds=10, clock=clock)
+        trip(breaker)
+        clock.now += 10
+        breaker.acquire()
+        breaker.release()
+        assert breaker.allows_calls()
+
+    def test_old_failures_expire(self, clock):
+        """Test that failures leave the rolling window."""
+        breaker = CircuitBreaker(minimum_calls=4, window_seconds=10, clock=clock)
+        for _ in range(3):
+            breaker.record_failure(0.1)
+        clock.now += 11
+        breaker.record_failure(0.1)
+        assert breaker.state == "closed"
+        assert breaker.snapshot()["calls"] == 1
+
+    def test_slow_calls_count_as_failures(self, clock):
+        """Test that calls slower than slow_call_seconds trip the circuit."""
+        breaker = CircuitBreaker(minimum_calls=2, slow_call_seconds=1.0, clock=clock)
+        breaker.record_success(5.0)
+        breaker.record_success(5.0)
+        assert breaker.state == "open"
+        assert breaker.snapshot()["mean_latency"] == 5.0
+
+    def test_request_errors_do_not_count(self, clock):
+        """Test that errors caused by the request leave the circuit closed."""
+        breaker = CircuitBreaker(minimum_calls=2, clock=clock)
+        for _ in range(5):
+            breaker.record(0.1, InvalidRequestError("bad"))
+        assert breaker.state == "closed"
+        assert breaker.snapshot()["failures"] == 0
+
+    def test_invalid_settings(self):
+        """Test that settings are validated."""
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+        with pytest.raises(ValueError):
+            CircuitBreaker(minimum_calls=0)
+
+
+class TestCircuitBreakerLLM:
+    """Test cases for guarding LLM calls."""
+
+    def test_fails_fast_when_open(self, clock):
+        """Test that calls are rejected without reaching the LLM while open."""
+        inner = SwitchableLLM()
+        inner.error = ServerError("down")
+        llm = CircuitBreakerLLM(inner, CircuitBreaker(minimum_calls=3, clock=clock))
+
+        for _ in range(3):
+            with pytest.raises(ServerError):
+                llm.generate("hi")
+        with pytest.raises(CircuitOpenError):
+            llm.generate("hi")
+        assert inner.calls == 3
+        assert not llm.is_healthy()
+
+        inner.error = None
+        clock.now += 30
+        assert llm.generate("hi").startswith("[MOCK]")
+        assert llm.breaker.state == "closed"
+
+    def test_async_calls(self, clock):
+        """Test that async calls are recorded and rejected."""
+        llm = CircuitBreakerLLM(
+            MockLLM(error_rate=1.0), CircuitBreaker(minimum_calls=2, clock=clock)
+        )
+
+        async def run():
+            for _ in range(2):
+                with pytest.raises(ServerError):
+                    await llm.achat([{"role": "user", "content": "hi"}])
+            with pytest.raises(CircuitOpenError):
+                await llm.agenerate("hi")
+
+        asyncio.run(run())
+
+    def test_streams(self, clock):
+        """Test that streams fail fast and count once their first chunk arrives."""
+        breaker = CircuitBreaker(minimum_calls=2, clock=clock)
+        llm = CircuitBreakerLLM(MockLLM(), breaker)
+        assert llm.stream_generate("hi").read().startswith("[MOCK]")
+        assert asyncio.run(llm.astream_chat([{"role": "user", "content": "hi"}]).read())
+        assert breaker.snapshot()["calls"] == 2
+
+        trip(breaker)
+        with pytest.raises(CircuitOpenError):
+            llm.stream_generate("hi").read()
+
+    def test_router_skips_open_circuits(self, clock):
+        """Test that a router sends traffic away from an open circuit."""
+        broken = CircuitBreakerLLM(
+            MockLLM("broken", error_rate=1.0), CircuitBreaker(minimum_calls=2, clock=clock)
+        )
+        router = RouterLLM([broken, MockLLM("healthy")])
+        for _ in range(10):
+            assert router.generate("hi").startswith("[MOCK]")
+
+        stats = router.stats()
+        assert stats[0]["calls"] == 2
+        assert stats[0]["healthy"] is False
+        assert router.failovers == 2
+
+
+class TestFactoryBreakers:
+    """Test cases for breakers configured on the factory."""
+
+    def test_shared_per_endpoint(self):
+        """Test that LLMs of one endpoint share a breaker and others do not."""
+        LLMFactory.set_circuit_breaker("mock", minimum_calls=2)
+        first = LLMFactory.create_llm("mock", model_name="a", load_env=False)
+        second = LLMFactory.create_llm("mock", model_name="a", load_env=False)
+        other = LLMFactory.create_llm("mock", model_name="b", load_env=False)
+
+        assert isinstance(first, CircuitBreakerLLM)
+        assert first.breaker is second.breaker
+        assert first.breaker is not other.breaker
+        assert first.breaker.minimum_calls == 2
+        assert first.breaker is get_circuit_breaker(("mock", "a", None))
+
+        first.generate("hi")
+        states = circuit_breaker_states()
+        assert states[("mock", "a", None)]["calls"] == 1
+        assert states[("mock", "b", None)]["state"] == "closed"
+
+    def test_disable(self):
+        """Test that disabling breakers affects LLMs created afterwards."""
+        LLMFactory.set_circuit_breaker("mock")
+        LLMFactory.set_circuit_breaker("mock", enabled=False)
+        assert isinstance(LLMFactory.create_llm("mock", load_env=False), MockLLM)
+        assert circuit_breaker_states() == {}
@@ -0,0 +1,194 @@
+"""Tests for shared HTTP clients and LLM lifecycle."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openhands_playground.llm import LLMFactory
+from openhands_playground.llm.clients import ClientRegistry, HTTPSettings
+from openhands_playground.llm.llms import MockLLM, OpenAILLM
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub-model",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "stub reply"},
+            "finish_reason": "stop",
+        }
+    ],
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a fixed chat completion, keeping connections alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Run a local OpenAI-compatible server counting TCP connections."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    """Give each test its own factory client registry."""
+    registry = ClientRegistry()
+    monkeypatch.setattr(LLMFactory, "_client_registry", registry)
+    yield registry
+    registry.close_all()
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+class TestClientRegistry:
+    """Test cases for the reference-counted registry."""
+
+    def test_acquire_and_release(self):
+        """Test that a client is built once and closed with its last holder."""
+        registry = ClientRegistry()
+        closed = []
+
+        class Client:
+            def close(self):
+                closed.append(self)
+
+        first = registry.acquire("key", Client)
+        assert registry.acquire("key", Client) is first
+        assert registry.references("key") == 2
+
+        registry.release("key")
+        assert closed == []
+        registry.release("key")
+        assert closed == [first]
+        assert len(registry) == 0
+
+    def test_async_clients_are_per_loop(self):
+        """Test that async clients are not shared across event loops."""
+        registry = ClientRegistry()
+
+        class Client:
+            async def close(self):
+                pass
+
+        async def acquire():
+            key, client = registry.acquire_async("key", Client)
+            await registry.arelease(key)
+            return client
+
+        assert asyncio.run(acquire()) is not asyncio.run(acquire())
+        assert len(registry) == 0
+
+
+class TestSharedClients:
+    """Test cases for connection reuse across OpenAILLM instances."""
+
+    def test_factory_instances_share_connections(self, stub_server, isolated_registry):
+        """Test that instances from the factory reuse one pooled connection."""
+        llms = [
+            LLMFactory.create_openai_llm(
+                api_key="test-key", base_url=base_url(stub_server), load_env=False
+            )
+            for _ in range(3)
+        ]
+
+        for llm in llms:
+            for _ in range(3):
+                assert llm.generate("Hello") == "stub reply"
+
+        assert stub_server.connections == 1
+        assert llms[0].client is llms[1].client is llms[2].client
+
+        for llm in llms:
+            llm.close()
+        assert llms[0].client.is_closed()
+        assert len(isolated_registry) == 0
+
+    def test_separate_keys_use_separate_clients(self, stub_server):
+        """Test that different settings do not share a client."""
+        url = base_url(stub_server)
+        first = LLMFactory.create_openai_llm(api_key="test-key", base_url=url, load_env=False)
+        second = LLMFactory.create_openai_llm(
+            api_key="test-key",
+            base_url=url,
+            http_settings=HTTPSettings(max_connections=4),
+            load_env=False,
+        )
+        assert first.client is not second.client
+
+    def test_unshared_instance_uses_pool_settings(self, stub_server):
+        """Test that http_settings apply to an instance's own client."""
+        with OpenAILLM(
+            api_key="test-key",
+            base_url=base_url(stub_server),
+            http_settings=HTTPSettings(max_keepalive_connections=0),
+        ) as llm:
+            llm.generate("Hello")
+            llm.generate("Hello")
+        assert llm.client.is_closed()
+        assert stub_server.connections == 2
+
+    def test_async_context_manager(self, stub_server, isolated_registry):
+        """Test that async instances share a client and close it on exit."""
+        url = base_url(stub_server)
+
+        async def run():
+            async with LLMFactory.create_openai_llm(
+                api_key="test-key", base_url=url, load_env=False
+            ) as first, LLMFactory.create_openai_llm(
+                api_key="test-key", base_url=url, load_env=False
+            ) as second:
+                results = await asyncio.gather(
+                    *(llm.agenerate("Hello") for llm in (first, second))
+                )
+                assert first.async_client is second.async_client
+                return results, first.async_client
+
+        results, async_client = asyncio.run(run())
+        assert results == ["stub reply", "stub reply"]
+        assert async_client.is_closed()
+        assert len(isolated_registry) == 0
+
+    def test_wrappers_close_the_wrapped_llm(self):
+        """Test that closing a wrapped LLM reaches the inner LLM."""
+        closed = []
+        mock_llm = MockLLM()
+        mock_llm.close = lambda: closed.append(True)
+
+        with LLMFactory.create_llm("mock", cache="memory", load_env=False) as llm:
+            llm.llm = mock_llm
+        assert closed == [True]
@@ -0,0 +1,125 @@
+"""Tests for cached .env loading and shared LLM instances."""
+
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+from openhands_playground.llm import LLMFactory
+from openhands_playground.llm.config import load_env, reload_env, reset_env_cache
+from openhands_playground.llm.llms import MockLLM
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Start every test with nothing loaded or shared."""
+    reset_env_cache()
+    LLMFactory.clear_shared()
+    yield
+    reset_env_cache()
+    LLMFactory.clear_shared()
+
+
+class TestLoadEnv:
+    """Test cases for loading .env files once."""
+
+    def test_file_is_read_once(self, tmp_path):
+        """Test that later calls use the cached result until reloaded."""
+        path = tmp_path / ".env"
+        path.write_text("PLAYGROUND_TEST_VALUE=first\n")
+
+        with patch.dict(os.environ):
+            assert load_env(str(path)) is True
+            assert os.environ["PLAYGROUND_TEST_VALUE"] == "first"
+
+            path.write_text("PLAYGROUND_TEST_VALUE=second\n")
+            with patch("dotenv.load_dotenv") as mock_load_dotenv:
+                assert load_env(str(path)) is True
+            mock_load_dotenv.assert_not_called()
+
+            assert reload_env(str(path), override=True) is True
+            assert os.environ["PLAYGROUND_TEST_VALUE"] == "second"
+
+    def test_search_from_working_directory(self, tmp_path, monkeypatch):
+        """Test that the .env file is searched from the working directory."""
+        (tmp_path / ".env").write_text("PLAYGROUND_TEST_SEARCH=found\n")
+        (tmp_path / "nested").mkdir()
+        monkeypatch.chdir(tmp_path / "nested")
+
+        with patch.dict(os.environ):
+            assert load_env() is True
+            assert os.environ["PLAYGROUND_TEST_SEARCH"] == "found"
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file is reported and cached."""
+        assert load_env(str(tmp_path / "missing.env")) is False
+
+    def test_factory_uses_cache(self):
+        """Test that creating many LLMs loads the .env file once."""
+        with patch("openhands_playground.llm.config._load", return_value=False) as mock_load:
+            for _ in range(5):
+                LLMFactory.create_llm("mock")
+        mock_load.assert_called_once()
+
+
+class TestSharedInstances:
+    """Test cases for create_llm(shared=True)."""
+
+    def test_same_arguments_share_an_instance(self):
+        """Test that identical arguments return the same instance."""
+        first = LLMFactory.create_llm("mock", "m", load_env=False, shared=True, latency=0.0)
+        second = LLMFactory.create_llm("mock", "m", load_env=False, shared=True, latency=0.0)
+        other = LLMFactory.create_llm("mock", "m", load_env=False, shared=True, latency=0.1)
+        unshared = LLMFactory.create_llm("mock", "m", load_env=False, latency=0.0)
+
+        assert isinstance(first, MockLLM)
+        assert first is second
+        assert other is not first
+        assert unshared is not first
+
+    def test_unhashable_arguments_are_frozen(self):
+        """Test that dict and list arguments can be part of the key."""
+        kwargs = {"default_params": {"stop": ["\n"]}}
+        with patch.object(MockLLM, "__init__", return_value=None) as mock_init:
+            first = LLMFactory.create_llm("mock", load_env=False, shared=True, **kwargs)
+            second = LLMFactory.create_llm("mock", load_env=False, shared=True, **kwargs)
+
+        assert first is second
+        mock_init.assert_called_once()
+
+    def test_unhashable_argument(self):
+        """Test that arguments that cannot be keyed are rejected."""
+
+        class Unhashable:
+            __hash__ = None
+
+        with pytest.raises(TypeError, match="hashable"):
+            LLMFactory.create_llm("mock", load_env=False, shared=True, option=Unhashable())
+
+    def test_created_once_across_threads(self):
+        """Test that concurrent first calls build a single instance."""
+        barrier = threading.Barrier(8)
+        results = []
+
+        def create():
+            barrier.wait()
+            results.append(LLMFactory.create_llm("mock", load_env=False, shared=True))
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(llm) for llm in results}) == 1
+
+    def test_clear_and_reconfigure(self):
+        """Test that clearing or re-registering a provider stops sharing."""
+        first = LLMFactory.create_llm("mock", load_env=False, shared=True)
+        LLMFactory.clear_shared()
+        second = LLMFactory.create_llm("mock", load_env=False, shared=True)
+        assert second is not first
+
+        LLMFactory.register_provider("mock", MockLLM)
+        third = LLMFactory.create_llm("mock", load_env=False, shared=True)
+        assert third is not second
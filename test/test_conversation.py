@@ -0,0 +1,80 @@
+"""Tests for prefix-sharing conversations."""
+
+import asyncio
+import json
+
+from openhands_playground.llm import Conversation
+from openhands_playground.llm.cache import CachedLLM, InMemoryCache
+from openhands_playground.llm.conversation import MessageRecord, as_message_list
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.recording import chat_params
+from openhands_playground.llm.tokens import BudgetedLLM
+
+SYSTEM = {"role": "system", "content": "You are terse."}
+
+
+class TestConversation:
+    """Test cases for building, forking and serializing conversations."""
+
+    def test_sequence_of_message_dicts(self):
+        """Test that a conversation behaves like the equivalent message list."""
+        conversation = Conversation([SYSTEM]).append("user", "hi", name="ann")
+        expected = [SYSTEM, {"role": "user", "content": "hi", "name": "ann"}]
+        assert conversation == expected
+        assert list(conversation) == expected
+        assert len(conversation) == 2
+        assert conversation[-1] == expected[-1]
+        assert conversation[:1] == [SYSTEM]
+        assert json.loads(json.dumps(as_message_list(conversation))) == expected
+
+    def test_forks_share_their_prefix(self):
+        """Test that forks continue independently and share the records they have in common."""
+        base = Conversation([SYSTEM]).append("user", "question")
+        left = base.fork().append("assistant", "a")
+        right = base.fork().append("assistant", "b")
+        assert [m["content"] for m in left] == ["You are terse.", "question", "a"]
+        assert [m["content"] for m in right] == ["You are terse.", "question", "b"]
+        assert len(base) == 2
+        assert left.records()[1] is right.records()[1]
+        assert left[1] is right[1]
+
+    def test_roles_are_interned(self):
+        """Test that records with the same role share one string."""
+        role = "".join(["assis", "tant"])
+        assert MessageRecord(role, "x").role is MessageRecord("assistant", "y").role
+
+    def test_serialization_is_cached(self):
+        """Test that the message list is built once and extended after appends."""
+        conversation = Conversation([SYSTEM]).append("user", "hi")
+        first = conversation.to_messages()
+        assert conversation.to_messages() is first
+
+        conversation.append("assistant", "hello")
+        second = conversation.to_messages()
+        assert second is not first
+        assert second[0] is first[0]
+        assert len(first) == 2
+
+    def test_chat_accepts_conversations(self):
+        """Test that providers and wrappers take a conversation in place of a list."""
+        conversation = Conversation([SYSTEM]).append("user", "hello")
+        messages = conversation.to_messages()
+        llm = MockLLM()
+        assert llm.chat(conversation) == llm.chat(messages)
+        assert asyncio.run(llm.achat(conversation)) == llm.chat(messages)
+        assert llm.stream_chat(conversation).read() == llm.chat(messages)
+        assert [r.output for r in llm.chat_many([conversation, messages])] == [
+            llm.chat(messages)
+        ] * 2
+
+        cached = CachedLLM(llm, InMemoryCache())
+        cached.chat(conversation, temperature=0)
+        cached.chat(messages, temperature=0)
+        assert cached.stats.hits == 1
+
+        budgeted = BudgetedLLM(llm, context_window=4096)
+        assert budgeted.chat(conversation) == llm.chat(messages)
+
+        params = chat_params("gpt-4o", conversation, None, None, {})
+        assert params["messages"] == messages
+        assert isinstance(params["messages"], list)
@@ -0,0 +1,311 @@
+"""Tests for per-call instrumentation hooks."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from openhands_playground.llm import BaseLLM, CallInfo, LLMFactory, LLMHook, TokenUsage
+from openhands_playground.llm.exceptions import ServerError
+from openhands_playground.llm.hooks import current_call, report_usage
+from openhands_playground.llm.llms import MockLLM, OpenAILLM
+
+
+class RecordingHook(LLMHook):
+    """Hook remembering every callback it receives."""
+
+    def __init__(self):
+        self.events = []
+
+    def before_call(self, info):
+        self.events.append(("before", info.method))
+
+    def after_call(self, info, result):
+        self.events.append(("after", info.method, result))
+        self.info = info
+
+    def on_error(self, info, error):
+        self.events.append(("error", info.method, type(error).__name__))
+        self.info = info
+
+
+def make_usage(prompt_tokens, completion_tokens, cached_tokens=0):
+    """Build a fake usage object as returned by the OpenAI SDK."""
+    usage = MagicMock()
+    usage.prompt_tokens = prompt_tokens
+    usage.completion_tokens = completion_tokens
+    usage.prompt_tokens_details.cached_tokens = cached_tokens
+    return usage
+
+
+def make_response(content, usage):
+    """Build a fake chat completion with usage."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.usage = usage
+    return response
+
+
+def make_chunk(content=None, usage=None):
+    """Build a fake streaming chunk."""
+    chunk = MagicMock()
+    chunk.choices = [MagicMock()] if content is not None else []
+    if content is not None:
+        chunk.choices[0].delta.content = content
+    chunk.usage = usage
+    return chunk
+
+
+class TestHooks:
+    """Test cases for hook callbacks on BaseLLM."""
+
+    def test_sync_call(self):
+        """Test that hooks see a successful call with its timing."""
+        hook = RecordingHook()
+        llm = MockLLM(latency=0.01)
+        llm.add_hook(hook)
+
+        response = llm.generate("Hello")
+
+        assert hook.events == [("before", "generate"), ("after", "generate", response)]
+        assert hook.info.model_name == "mock-model"
+        assert hook.info.llm_class == "MockLLM"
+        assert hook.info.duration >= 0.01
+        assert hook.info.error is None
+
+    def test_error(self):
+        """Test that failures reach on_error and are re-raised."""
+        hook = RecordingHook()
+        llm = MockLLM(error_rate=1.0)
+        llm.add_hook(hook)
+
+        with pytest.raises(ServerError):
+            llm.chat([{"role": "user", "content": "Hi"}])
+        assert hook.events == [("before", "chat"), ("error", "chat", "ServerError")]
+        assert isinstance(hook.info.error, ServerError)
+
+    def test_async_call(self):
+        """Test that coroutine calls are instrumented."""
+        hook = RecordingHook()
+        llm = MockLLM()
+        llm.add_hook(hook)
+
+        response = asyncio.run(llm.achat([{"role": "user", "content": "Hi"}]))
+        assert hook.events == [("before", "achat"), ("after", "achat", response)]
+
+    def test_nested_calls_are_reported_once(self):
+        """Test that a method calling another one on the same LLM counts once."""
+
+        class SyncOnlyLLM(BaseLLM):
+            def generate(self, prompt, **kwargs):
+                return self.chat([{"role": "user", "content": prompt}])
+
+            def chat(self, messages, **kwargs):
+                report_usage(TokenUsage(prompt_tokens=3, completion_tokens=2))
+                return "reply"
+
+        hook = RecordingHook()
+        llm = SyncOnlyLLM("sync-model")
+        llm.add_hook(hook)
+
+        assert llm.generate("Hi") == "reply"
+        assert asyncio.run(llm.agenerate("Hi")) == "reply"
+        assert hook.events == [
+            ("before", "generate"),
+            ("after", "generate", "reply"),
+            ("before", "agenerate"),
+            ("after", "agenerate", "reply"),
+        ]
+        # Usage reported in the executor thread reaches the async call
+        assert hook.info.usage == TokenUsage(3, 2)
+
+    def test_no_hooks(self):
+        """Test that calls without hooks are not tracked."""
+        seen = []
+
+        class ProbeLLM(MockLLM):
+            def generate(self, prompt, **kwargs):
+                seen.append(current_call())
+                return super().generate(prompt, **kwargs)
+
+        ProbeLLM().generate("x")
+        assert seen == [None]
+
+    def test_failing_hook_does_not_break_calls(self, caplog):
+        """Test that hook exceptions are logged instead of raised."""
+
+        class BrokenHook(LLMHook):
+            def after_call(self, info, result):
+                raise RuntimeError("hook bug")
+
+        llm = MockLLM()
+        llm.add_hook(BrokenHook())
+        assert llm.generate("x").startswith("[MOCK]")
+        assert "hook bug" in caplog.text
+
+    def test_remove_hook(self):
+        """Test that removed hooks stop receiving calls."""
+        hook = RecordingHook()
+        llm = MockLLM()
+        llm.add_hook(hook)
+        llm.remove_hook(hook)
+        llm.generate("x")
+
+        assert hook.events == []
+        assert llm.hooks == ()
+        with pytest.raises(ValueError):
+            llm.remove_hook(hook)
+
+    def test_factory_hooks_see_cache_hits(self):
+        """Test that hooks passed to the factory observe the outermost LLM."""
+        hook = RecordingHook()
+        llm = LLMFactory.create_llm("mock", cache="memory", hooks=[hook], load_env=False)
+        llm.generate("x", temperature=0)
+        llm.generate("x", temperature=0)
+
+        assert [event[0] for event in hook.events] == ["before", "after"] * 2
+        assert hook.info.llm_class == "CachedLLM"
+
+    def test_interrupted_calls_report_an_outcome(self):
+        """Test that cancellation and interrupts reach on_error."""
+
+        class InterruptedLLM(MockLLM):
+            def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+                raise KeyboardInterrupt
+
+        hook = RecordingHook()
+        interrupted = InterruptedLLM()
+        interrupted.add_hook(hook)
+        slow = MockLLM(latency=1.0)
+        slow.add_hook(hook)
+
+        with pytest.raises(KeyboardInterrupt):
+            interrupted.generate("Hi")
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(slow.agenerate("Hi"), timeout=0.01))
+        assert hook.events == [
+            ("before", "generate"),
+            ("error", "generate", "KeyboardInterrupt"),
+            ("before", "agenerate"),
+            ("error", "agenerate", "CancelledError"),
+        ]
+
+
+class TestStreamHooks:
+    """Test cases for instrumented streams."""
+
+    def test_stream_completes_on_exhaustion(self):
+        """Test that stream calls complete with the text and time to first token."""
+        hook = RecordingHook()
+        llm = MockLLM(latency=0.01)
+        llm.add_hook(hook)
+
+        stream = llm.stream_generate("Hello")
+        assert hook.events == [("before", "stream_generate")]
+        text = stream.read()
+
+        assert hook.events[-1] == ("after", "stream_generate", text)
+        assert hook.info.streaming
+        assert 0.01 <= hook.info.time_to_first_token <= hook.info.duration
+
+    def test_stream_error(self):
+        """Test that errors while iterating reach on_error."""
+        hook = RecordingHook()
+        llm = MockLLM(error_rate=1.0)
+        llm.add_hook(hook)
+
+        async def consume():
+            await llm.astream_chat([{"role": "user", "content": "Hi"}]).read()
+
+        with pytest.raises(ServerError):
+            asyncio.run(consume())
+        assert hook.events == [("before", "astream_chat"), ("error", "astream_chat", "ServerError")]
+
+    def test_stream_closed_early(self):
+        """Test that a stream closed before it finishes reports an outcome."""
+        hook = RecordingHook()
+        llm = MockLLM()
+        llm.add_hook(hook)
+
+        stream = llm.stream_generate("Hello there, how are you?")
+        next(stream)
+        stream.close()
+        stream.close()
+        assert hook.events == [
+            ("before", "stream_generate"),
+            ("error", "stream_generate", "GeneratorExit"),
+        ]
+
+    def test_cancelled_stream(self):
+        """Test that cancelling a task consuming a stream reaches on_error."""
+        hook = RecordingHook()
+        llm = MockLLM(latency=1.0)
+        llm.add_hook(hook)
+
+        async def consume():
+            stream = llm.astream_generate("Hello")
+            await asyncio.wait_for(stream.read(), timeout=0.01)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(consume())
+        assert hook.events == [
+            ("before", "astream_generate"),
+            ("error", "astream_generate", "CancelledError"),
+        ]
+
+
+class TestOpenAIUsage:
+    """Test cases for token usage reported by OpenAILLM."""
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_usage_reaches_hooks(self, mock_openai_class):
+        """Test that response usage, including cached tokens, is reported once."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.return_value = make_response(
+            "Hi!", make_usage(100, 20, cached_tokens=64)
+        )
+
+        hook = RecordingHook()
+        llm = OpenAILLM(api_key="test-key")
+        llm.add_hook(hook)
+
+        assert llm.generate("Hello") == "Hi!"
+        assert hook.events == [("before", "generate"), ("after", "generate", "Hi!")]
+        assert hook.info.usage == TokenUsage(100, 20, 64)
+
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_stream_usage(self, mock_async_openai_class):
+        """Test that streams request and expose the final usage chunk."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+
+        chunks = MagicMock()
+        chunks.__aiter__.return_value = [
+            make_chunk("Hel"),
+            make_chunk("lo"),
+            make_chunk(usage=make_usage(10, 2)),
+        ]
+        chunks.close = AsyncMock()
+
+        mock_client.chat.completions.create = AsyncMock(return_value=chunks)
+        hook = RecordingHook()
+        llm = OpenAILLM(api_key="test-key")
+        llm.add_hook(hook)
+
+        async def run():
+            stream = llm.astream_generate("Hi")
+            return await stream.read(), stream
+
+        text, stream = asyncio.run(run())
+        assert text == "Hello"
+        assert stream.stats.usage == TokenUsage(10, 2)
+        assert hook.info.usage == TokenUsage(10, 2)
+        params = mock_client.chat.completions.create.call_args[1]
+        assert params["stream_options"] == {"include_usage": True}
+
+    def test_call_info_defaults(self):
+        """Test the fields of a fresh CallInfo."""
+        info = CallInfo("gpt-4o", "OpenAILLM", "achat")
+        assert info.duration is None
+        assert not info.streaming
+        assert info.started_at > 0
@@ -1,7 +1,10 @@
 """Tests for the LLM module."""
 
+import asyncio
 import os
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from openhands_playground.llm import BaseLLM, LLMFactory
@@ -29,6 +32,30 @@ class TestBaseLLM:
         expected_repr = "MockLLM(model_name='test-model', config={'param1': 'value1'})"
         assert repr(llm) == expected_repr
 
+    def test_default_async_methods_offload_to_executor(self):
+        """Test that the default agenerate/achat run the sync methods off the loop."""
+        calling_threads = []
+
+        class SyncOnlyLLM(BaseLLM):
+            def generate(self, prompt, **kwargs):
+                calling_threads.append(threading.get_ident())
+                return f"generated: {prompt}"
+
+            def chat(self, messages, **kwargs):
+                calling_threads.append(threading.get_ident())
+                return f"chat: {messages[-1]['content']}"
+
+        llm = SyncOnlyLLM("sync-model")
+
+        async def run():
+            return (
+                await llm.agenerate("prompt", temperature=0.1),
+                await llm.achat([{"role": "user", "content": "hi"}]),
+            )
+
+        assert asyncio.run(run()) == ("generated: prompt", "chat: hi")
+        assert threading.get_ident() not in calling_threads
+
 
 class TestMockLLM:
     """Test cases for the MockLLM implementation."""
@@ -97,6 +124,36 @@ class TestMockLLM:
         short_response = llm.chat(messages, max_tokens=20)
         assert len(short_response) <= 30  # Account for "[MOCK]" prefix and truncation
 
+    def test_mock_llm_async_matches_sync(self):
+        """Test that the async MockLLM methods return the sync responses."""
+        llm = MockLLM()
+        messages = [{"role": "user", "content": "What is the meaning of life?"}]
+
+        async def run():
+            return (
+                await llm.agenerate("test prompt", temperature=0.2),
+                await llm.achat(messages, temperature=0.9),
+            )
+
+        generated, chatted = asyncio.run(run())
+        assert generated == llm.generate("test prompt", temperature=0.2)
+        assert chatted == llm.chat(messages, temperature=0.9)
+
+    def test_mock_llm_async_latency_does_not_block(self):
+        """Test that simulated latency overlaps across concurrent coroutines."""
+        llm = MockLLM(latency=0.2)
+        assert llm.config == {}
+
+        async def run():
+            return await asyncio.gather(*(llm.agenerate(f"p{i}") for i in range(200)))
+
+        start = time.perf_counter()
+        responses = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        assert len(responses) == 200
+        assert elapsed < 2.0  # 200 serial calls would take 40 seconds
+
 
 class TestOpenAILLM:
     """Test cases for the OpenAILLM implementation."""
@@ -189,6 +246,46 @@ class TestOpenAILLM:
         with pytest.raises(Exception, match="OpenAI API error: API Error"):
             llm.chat([{"role": "user", "content": "Test"}])
 
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_openai_llm_achat(self, mock_async_openai_class):
+        """Test OpenAILLM async chat through the AsyncOpenAI client."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = "Async response"
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        llm = OpenAILLM(api_key="test-key")
+        messages = [{"role": "user", "content": "Hello"}]
+
+        async def run():
+            return (
+                await llm.achat(messages, max_tokens=10),
+                await llm.agenerate("Test prompt", temperature=0.3),
+            )
+
+        assert asyncio.run(run()) == ("Async response", "Async response")
+        mock_async_openai_class.assert_called_once_with(api_key="test-key")
+
+        first_call, second_call = mock_client.chat.completions.create.call_args_list
+        assert first_call[1]["messages"] == messages
+        assert first_call[1]["max_tokens"] == 10
+        assert second_call[1]["messages"] == [{"role": "user", "content": "Test prompt"}]
+        assert second_call[1]["temperature"] == 0.3
+
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_openai_llm_async_error_handling(self, mock_async_openai_class):
+        """Test OpenAILLM async error handling."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+        llm = OpenAILLM(api_key="test-key")
+
+        with pytest.raises(Exception, match="OpenAI API error: API Error"):
+            asyncio.run(llm.agenerate("Test prompt"))
+
 
 class TestLLMFactory:
     """Test cases for the LLMFactory."""
@@ -0,0 +1,166 @@
+"""Tests for the metrics collector and exporters."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from openhands_playground.llm import CallInfo, MetricsCollector, TokenUsage
+from openhands_playground.llm.exceptions import ServerError
+from openhands_playground.llm.exporters import OTelSpanExporter, PrometheusExporter
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.metrics import Histogram, ModelPrice
+
+
+def finished_call(model="gpt-4o", duration=0.2, usage=None, error=None):
+    """Build the CallInfo of a completed call."""
+    info = CallInfo(model, "OpenAILLM", "chat", started_at=1700000000.0)
+    info.duration = duration
+    info.usage = usage
+    info.error = error
+    return info
+
+
+class TestHistogram:
+    """Test cases for the bucketed histogram."""
+
+    def test_counts_and_quantiles(self):
+        """Test bucketing, cumulative counts and interpolated quantiles."""
+        histogram = Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == [(1, 1), (2, 3), (4, 4), (float("inf"), 5)]
+        assert histogram.count == 5
+        assert histogram.sum == 16.5
+        assert histogram.quantile(0.5) == pytest.approx(1.75)
+        assert histogram.quantile(0.99) == 4
+
+    def test_invalid_buckets(self):
+        """Test that buckets must increase."""
+        with pytest.raises(ValueError):
+            Histogram(buckets=(2, 1))
+
+
+class TestMetricsCollector:
+    """Test cases for the in-process collector."""
+
+    def test_cost_with_cached_tokens(self):
+        """Test that cached prompt tokens are priced separately."""
+        price = ModelPrice(input=2.0, output=8.0, cached_input=0.5)
+        usage = TokenUsage(prompt_tokens=1_000_000, completion_tokens=500_000, cached_tokens=600_000)
+        assert price.cost(usage) == pytest.approx(0.8 + 0.3 + 4.0)
+
+    def test_price_prefix_match(self):
+        """Test that dated model names use the longest matching price."""
+        collector = MetricsCollector()
+        assert collector.price_for("gpt-4o-mini-2024-07-18") is collector.prices["gpt-4o-mini"]
+        assert collector.price_for("unknown-model") is None
+
+    def test_records_calls(self):
+        """Test latency, token, cost and error aggregation per model."""
+        collector = MetricsCollector(prices={"gpt-4o": ModelPrice(input=1.0, output=2.0)})
+        collector.after_call(finished_call(usage=TokenUsage(1000, 500)), "ok")
+        collector.on_error(finished_call(error=ServerError("503")), ServerError("503"))
+        collector.after_call(finished_call(model="other", usage=TokenUsage(10, 5)), "ok")
+
+        snapshot = collector.snapshot()
+        assert snapshot["gpt-4o"]["calls"] == 2
+        assert snapshot["gpt-4o"]["errors_by_type"] == {"ServerError": 1}
+        assert snapshot["gpt-4o"]["prompt_tokens"] == 1000
+        assert snapshot["gpt-4o"]["cost_usd"] == pytest.approx(0.002)
+        assert snapshot["other"]["cost_usd"] == 0
+        assert 0.1 < snapshot["gpt-4o"]["latency_seconds"]["p50"] <= 0.25
+        json.dumps(snapshot)
+
+        collector.reset()
+        assert collector.snapshot() == {}
+
+    def test_as_hook(self):
+        """Test collecting metrics from a live LLM."""
+        collector = MetricsCollector()
+        llm = MockLLM(error_rate=0.5, seed=1)
+        llm.add_hook(collector)
+        for _ in range(20):
+            try:
+                llm.generate("x")
+            except ServerError:
+                pass
+
+        metrics = collector.models()["mock-model"]
+        assert metrics.calls == 20
+        assert 0 < metrics.errors < 20
+        assert metrics.latency.count == 20
+
+
+class TestPrometheusExporter:
+    """Test cases for the Prometheus text format."""
+
+    def test_render(self):
+        """Test that counters and histograms are rendered per model."""
+        collector = MetricsCollector()
+        collector.after_call(finished_call(usage=TokenUsage(100, 20, 50)), "ok")
+        text = PrometheusExporter(collector).render()
+
+        assert "# TYPE llm_request_duration_seconds histogram" in text
+        assert 'llm_requests_total{model="gpt-4o"} 1' in text
+        assert 'llm_tokens_total{model="gpt-4o",type="cached"} 50' in text
+        assert 'llm_request_duration_seconds_bucket{model="gpt-4o",le="0.25"} 1' in text
+        assert 'llm_request_duration_seconds_bucket{model="gpt-4o",le="+Inf"} 1' in text
+        assert 'llm_request_duration_seconds_count{model="gpt-4o"} 1' in text
+
+    def test_write(self, tmp_path):
+        """Test writing the textfile atomically."""
+        path = tmp_path / "llm.prom"
+        collector = MetricsCollector()
+        collector.after_call(finished_call(), "ok")
+        PrometheusExporter(collector).write(str(path))
+
+        assert "llm_requests_total" in path.read_text()
+        assert [p.name for p in tmp_path.iterdir()] == ["llm.prom"]
+
+
+class TestOTelSpanExporter:
+    """Test cases for OTLP/JSON span export."""
+
+    def test_spans_written_to_file(self, tmp_path):
+        """Test that calls become GenAI spans in batches."""
+        path = tmp_path / "spans.jsonl"
+        exporter = OTelSpanExporter(path=str(path), batch_size=2)
+        llm = MockLLM()
+        llm.add_hook(exporter)
+
+        llm.chat([{"role": "user", "content": "Hi"}])
+        assert not path.exists()
+        llm.generate("x")
+
+        batch = json.loads(path.read_text())
+        spans = batch["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [span["name"] for span in spans] == ["chat mock-model", "text_completion mock-model"]
+        assert len(spans[0]["traceId"]) == 32
+        assert spans[0]["status"] == {"code": 1}
+        attributes = {a["key"]: a["value"] for a in spans[0]["attributes"]}
+        assert attributes["gen_ai.request.model"] == {"stringValue": "mock-model"}
+
+    def test_error_spans_and_endpoint(self):
+        """Test that failed calls are exported with an error status."""
+        exporter = OTelSpanExporter(endpoint="http://collector:4318/v1/traces")
+        exporter.on_error(
+            finished_call(usage=TokenUsage(5, 0), error=ServerError("down")), ServerError("down")
+        )
+
+        with patch("openhands_playground.llm.exporters.urlopen") as mock_urlopen:
+            mock_urlopen.return_value = MagicMock()
+            exporter.close()
+
+        request = mock_urlopen.call_args[0][0]
+        assert request.full_url == "http://collector:4318/v1/traces"
+        span = json.loads(request.data)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["status"] == {"code": 2, "message": "down"}
+        attributes = {a["key"]: a["value"] for a in span["attributes"]}
+        assert attributes["gen_ai.usage.input_tokens"] == {"intValue": "5"}
+        assert attributes["error.type"] == {"stringValue": "ServerError"}
+
+    def test_requires_destination(self):
+        """Test that a path or endpoint is required."""
+        with pytest.raises(ValueError):
+            OTelSpanExporter()
@@ -0,0 +1,117 @@
+"""Tests for pre-process, call and post-process pipelines."""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from openhands_playground.llm import BaseLLM
+from openhands_playground.llm.exceptions import RateLimitError
+from openhands_playground.llm.pipeline import (
+    CALL,
+    POSTPROCESS,
+    Pipeline,
+    parse_json,
+    render_messages,
+)
+
+
+class JsonLLM(BaseLLM):
+    """LLM answering with a fenced JSON object, tracking its concurrency."""
+
+    def __init__(self, model_name="json", **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.active = 0
+        self.peak = 0
+
+    def generate(self, prompt, **kwargs):
+        return self.chat([{"role": "user", "content": prompt}], **kwargs)
+
+    def chat(self, messages, **kwargs):
+        content = messages[-1]["content"]
+        if content == "fail":
+            raise RateLimitError("slow down", status_code=429)
+        if content == "garbage":
+            return "not json"
+        return f'```json\n{{"echo": "{content}"}}\n```'
+
+    async def achat(self, messages, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            return self.chat(messages, **kwargs)
+        finally:
+            self.active -= 1
+
+
+def words(item):
+    """Module-level pre-processing function, picklable for worker processes."""
+    return " ".join(item["words"])
+
+
+def parse_in_worker(text):
+    """Post-processing function recording the process it ran in."""
+    return dict(parse_json(text), pid=os.getpid())
+
+
+class TestPipeline:
+    """Test cases for running items through the three stages."""
+
+    def test_process_pool(self):
+        """Test that processing runs in worker processes and results map to inputs."""
+        items = [{"words": ["item", str(i)]} for i in range(6)]
+        pipe = Pipeline(JsonLLM(), preprocess=words, postprocess=parse_in_worker, processes=2)
+        with pipe:
+            results = pipe.run(items)
+
+        assert [r.index for r in results] == list(range(6))
+        assert results[3].output["echo"] == "item 3"
+        assert os.getpid() not in {r.output["pid"] for r in results}
+
+    def test_templates_and_thread_executor(self):
+        """Test rendering templates with a shared executor."""
+        template = functools.partial(render_messages, "Translate {text}", system="Be brief.")
+        with ThreadPoolExecutor(2) as executor:
+            pipe = Pipeline(JsonLLM(), preprocess=template, executor=executor, max_tokens=5)
+            (result,) = pipe.run([{"text": "hello"}])
+            pipe.close()
+            assert executor.submit(len, "still open").result() == 10
+        assert parse_json(result.output)["echo"] == "Translate hello"
+
+    def test_failures_report_their_stage(self):
+        """Test that a failing stage is recorded without stopping the others."""
+        pipe = Pipeline(JsonLLM(), postprocess=parse_json, executor=ThreadPoolExecutor(1))
+        results = pipe.run(["ok", "fail", "garbage"])
+
+        assert results[0].ok
+        assert (results[1].stage, type(results[1].error)) == (CALL, RateLimitError)
+        assert results[2].stage == POSTPROCESS
+        assert isinstance(results[2].error, ValueError)
+
+    def test_backpressure(self):
+        """Test that calls and items in flight stay within their limits."""
+        llm = JsonLLM()
+        pulled = []
+
+        def items():
+            for i in range(20):
+                pulled.append(i)
+                yield [{"role": "user", "content": f"q{i}"}]
+
+        async def consume():
+            pipe = Pipeline(llm, max_concurrency=3, max_pending=4, processes=1)
+            seen = 0
+            async for _ in pipe.aiter(items()):
+                seen += 1
+                assert len(pulled) - seen <= 4
+            return seen
+
+        assert asyncio.run(consume()) == 20
+        assert llm.peak == 3
+
+    def test_invalid_limits(self):
+        """Test that non-positive limits are rejected."""
+        with pytest.raises(ValueError):
+            Pipeline(JsonLLM(), max_concurrency=0)
@@ -0,0 +1,132 @@
+"""Tests for prompt-cache-friendly request layout and cache tracking."""
+
+import asyncio
+import json
+import time
+
+from openhands_playground.llm import MetricsCollector, TokenUsage
+from openhands_playground.llm.hooks import report_usage
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.prompt_layout import (
+    PromptCacheTracker,
+    PromptLayout,
+    PromptLayoutLLM,
+    canonical_message,
+    prefix_fingerprint,
+)
+
+TOOLS = [
+    {"type": "function", "function": {"name": "write_file", "parameters": {"type": "object"}}},
+    {"type": "function", "function": {"parameters": {"type": "object"}, "name": "read_file"}},
+]
+
+
+class CachingLLM(MockLLM):
+    """Mock LLM emulating a provider prompt cache keyed by the request prefix."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self._seen = set()
+
+    def chat(self, messages, max_tokens=None, temperature=None, **kwargs):
+        self.requests.append((messages, kwargs))
+        prefix = prefix_fingerprint(messages, kwargs.get("tools"))
+        hit = prefix in self._seen
+        self._seen.add(prefix)
+        if not hit:
+            time.sleep(0.02)
+        report_usage(TokenUsage(2000, 10, cached_tokens=1792 if hit else 0))
+        return "ok"
+
+
+class TestCanonicalization:
+    """Test cases for byte-stable serialization."""
+
+    def test_message_key_order_and_whitespace(self):
+        """Test that equivalent messages serialize to the same bytes."""
+        a = canonical_message({"content": "Be brief.  \r\nThanks\n", "role": "system"})
+        b = canonical_message({"role": "system", "content": "Be brief.\nThanks"})
+        assert json.dumps(a) == json.dumps(b)
+        assert list(a) == ["role", "content"]
+
+    def test_fingerprint_ignores_turns_and_tool_order(self):
+        """Test that the fingerprint covers only the stable prefix."""
+        system = [{"role": "system", "content": "You are an agent."}]
+        first = prefix_fingerprint(system + [{"role": "user", "content": "a"}], TOOLS)
+        second = prefix_fingerprint(system + [{"role": "user", "content": "b"}], TOOLS[::-1])
+        assert first == second
+        assert prefix_fingerprint([{"role": "system", "content": "Other"}], TOOLS) != first
+
+    def test_layout(self):
+        """Test that prefix, dynamic context and turns are laid out in order."""
+        layout = PromptLayout("You are an agent.", tools=TOOLS, context=["repo map"])
+        messages = layout.messages(
+            [{"content": "hi", "role": "user"}], dynamic_context="Time: 12:00"
+        )
+        assert [m["content"] for m in messages] == [
+            "You are an agent.",
+            "repo map",
+            "Time: 12:00",
+            "hi",
+        ]
+        tools = layout.request_kwargs()["tools"]
+        assert [t["function"]["name"] for t in tools] == ["read_file", "write_file"]
+        assert layout.name == layout.fingerprint
+
+
+class TestPromptCacheTracker:
+    """Test cases for reporting cache hit rates per workload."""
+
+    def test_requests_share_prefix(self):
+        """Test that every request of a layout reuses the same prefix."""
+        inner = CachingLLM()
+        llm = PromptLayoutLLM(inner, PromptLayout("You are an agent.", tools=TOOLS))
+        llm.chat([{"role": "user", "content": "one"}])
+        llm.generate("two", dynamic_context="Time: 12:01")
+
+        (first, first_kwargs), (second, second_kwargs) = inner.requests
+        assert first[0] == second[0]
+        assert json.dumps(first_kwargs["tools"]) == json.dumps(second_kwargs["tools"])
+
+    def test_cached_ratio_and_latency_saving(self):
+        """Test that the hit rate and latency difference are reported per workload."""
+        tracker = PromptCacheTracker()
+        layout = PromptLayout("You are an agent.", tools=TOOLS, name="coder")
+        llm = PromptLayoutLLM(CachingLLM(), layout)
+        llm.add_hook(tracker)
+        for i in range(4):
+            llm.chat([{"role": "user", "content": f"turn {i}"}])
+
+        stats = tracker.snapshot()["coder"]
+        assert stats["calls"] == 4
+        assert stats["hit_rate"] == 0.75
+        assert stats["cached_token_ratio"] == 1792 * 3 / 8000
+        assert stats["latency_saving_seconds"] > 0
+
+    def test_async_and_streams(self):
+        """Test that async calls and streams are laid out and tracked."""
+        tracker = PromptCacheTracker()
+        llm = PromptLayoutLLM(MockLLM(), PromptLayout("System", name="w"))
+        llm.add_hook(tracker)
+        assert asyncio.run(llm.achat([{"role": "user", "content": "hi"}])).startswith("[MOCK]")
+        assert llm.stream_generate("hi").read()
+        # MockLLM reports no usage, so nothing is recorded
+        assert tracker.snapshot() == {}
+
+    def test_untagged_calls_grouped_by_model(self):
+        """Test that calls outside a layout are grouped by model name."""
+        tracker = PromptCacheTracker()
+        llm = CachingLLM()
+        llm.add_hook(tracker)
+        llm.chat([{"role": "user", "content": "hi"}])
+        assert tracker.snapshot()["mock-model"]["hit_rate"] == 0.0
+
+    def test_metrics_collector_ratio(self):
+        """Test that MetricsCollector reports the cached token ratio."""
+        collector = MetricsCollector()
+        llm = CachingLLM()
+        llm.add_hook(collector)
+        llm.chat([{"role": "user", "content": "hi"}])
+        llm.chat([{"role": "user", "content": "hi"}])
+        assert collector.snapshot()["mock-model"]["cached_token_ratio"] == 1792 / 4000
@@ -0,0 +1,108 @@
+"""Tests for lazy provider resolution in LLMFactory."""
+
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+from unittest.mock import patch
+
+import pytest
+from openhands_playground.llm import BaseLLM, LLMFactory
+from openhands_playground.llm.llms import MockLLM
+
+
+class EchoLLM(BaseLLM):
+    """Minimal provider used to test registration by import path."""
+
+    def generate(self, prompt, **kwargs):
+        return prompt
+
+    def chat(self, messages, **kwargs):
+        return messages[-1]["content"]
+
+
+@pytest.fixture
+def providers():
+    """Restore the provider registry after a test."""
+    saved = dict(LLMFactory._providers)
+    loaded = LLMFactory._entry_points_loaded
+    yield LLMFactory._providers
+    LLMFactory._providers.clear()
+    LLMFactory._providers.update(saved)
+    LLMFactory._entry_points_loaded = loaded
+
+
+class TestLazyProviders:
+    """Test cases for providers registered by import path."""
+
+    def test_import_does_not_load_provider_sdks(self):
+        """Test that importing the package imports neither openai, dotenv nor unused layers."""
+        unused = ("openai", "dotenv", "sqlite3", "concurrent.futures.process")
+        code = (
+            "import sys, openhands_playground\n"
+            "from openhands_playground.llm import LLMFactory\n"
+            "LLMFactory.create_llm('mock', load_env=False)\n"
+            f"print(sorted(m for m in {unused!r} if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        assert output.strip() == "[]"
+
+    def test_builtin_providers_resolve_on_use(self, providers):
+        """Test that built-in providers start as paths and are cached once imported."""
+        providers["mock"] = "openhands_playground.llm.llms.mock_llm:MockLLM"
+        llm = LLMFactory.create_llm("mock", load_env=False)
+
+        assert isinstance(llm, MockLLM)
+        assert providers["mock"] is MockLLM
+
+    @pytest.mark.parametrize("path", [f"{__name__}:EchoLLM", f"{__name__}.EchoLLM"])
+    def test_register_import_path(self, providers, path):
+        """Test registering a provider as 'module:Class' or 'module.Class'."""
+        LLMFactory.register_provider("echo", path)
+        llm = LLMFactory.create_llm("echo", model_name="echo-1", load_env=False)
+
+        assert isinstance(llm, EchoLLM)
+        assert llm.generate("ping") == "ping"
+
+    def test_import_path_must_be_an_llm(self, providers):
+        """Test that a path to something other than an LLM class is rejected on use."""
+        LLMFactory.register_provider("broken", "collections:OrderedDict")
+        with pytest.raises(TypeError):
+            LLMFactory.create_llm("broken", model_name="x", load_env=False)
+
+
+class TestEntryPointProviders:
+    """Test cases for providers discovered through entry points."""
+
+    def entry_points(self, *entries):
+        return patch(
+            "importlib.metadata.entry_points",
+            return_value=[
+                EntryPoint(name, value, "openhands_playground.llms") for name, value in entries
+            ],
+        )
+
+    def test_discovered_providers(self, providers):
+        """Test that entry points are listed and created like built-in providers."""
+        LLMFactory._entry_points_loaded = False
+        with self.entry_points(("echo", f"{__name__}:EchoLLM")) as mock_entry_points:
+            assert "echo" in LLMFactory.get_available_providers()
+            llm = LLMFactory.create_llm("echo", model_name="echo-1", load_env=False)
+
+        assert isinstance(llm, EchoLLM)
+        mock_entry_points.assert_called_once_with(group="openhands_playground.llms")
+
+    def test_explicit_registration_wins(self, providers):
+        """Test that an entry point cannot replace a registered provider."""
+        LLMFactory._entry_points_loaded = False
+        with self.entry_points(("mock", f"{__name__}:EchoLLM")):
+            llm = LLMFactory.create_llm("mock", load_env=False)
+
+        assert isinstance(llm, MockLLM)
+
+    def test_unknown_provider(self, providers):
+        """Test that unknown providers still raise ValueError after discovery."""
+        LLMFactory._entry_points_loaded = False
+        with self.entry_points(), pytest.raises(ValueError, match="Unsupported LLM provider"):
+            LLMFactory.create_llm("nope", load_env=False)
@@ -0,0 +1,222 @@
+"""Tests for client-side rate limiting."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from openhands_playground.llm import LLMFactory
+from openhands_playground.llm.llms import OpenAILLM
+from openhands_playground.llm.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+    get_rate_limiter,
+    parse_reset_duration,
+    reset_rate_limiters,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_limits(monkeypatch):
+    """Keep factory limits and shared limiters from leaking between tests."""
+    monkeypatch.setattr(LLMFactory, "_rate_limits", {})
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
+
+
+class TestTokenBucket:
+    """Test cases for the token bucket."""
+
+    def test_reservations_queue_in_order(self):
+        """Test that reservations beyond the balance return growing waits."""
+        bucket = TokenBucket(capacity=10, refill_per_second=10)
+
+        assert bucket.reserve(10) == 0
+        assert bucket.reserve(5) == pytest.approx(0.5, abs=0.01)
+        assert bucket.reserve(5) == pytest.approx(1.0, abs=0.01)
+
+    def test_oversized_reservation_is_clamped(self):
+        """Test that a request larger than the capacity can still proceed."""
+        bucket = TokenBucket(capacity=10, refill_per_second=1)
+        assert bucket.reserve(100) == 0
+        assert bucket.available == pytest.approx(0, abs=0.01)
+
+    def test_refill(self):
+        """Test that tokens refill over time up to the capacity."""
+        bucket = TokenBucket(capacity=100, refill_per_second=1000)
+        bucket.reserve(100)
+        time.sleep(0.05)
+        assert 40 <= bucket.available <= 100
+
+
+class TestRateLimiter:
+    """Test cases for the request and token limiter."""
+
+    def test_request_limit(self):
+        """Test that requests beyond the RPM budget must wait."""
+        limiter = RateLimiter(requests_per_minute=60)
+        waits = [limiter.reserve() for _ in range(61)]
+
+        assert waits[:60] == [0] * 60
+        assert waits[60] == pytest.approx(1.0, abs=0.01)
+
+    def test_token_limit(self):
+        """Test that the TPM budget is charged by estimated tokens."""
+        limiter = RateLimiter(tokens_per_minute=600)
+
+        assert limiter.reserve(600) == 0
+        assert limiter.reserve(100) == pytest.approx(10.0, abs=0.01)
+
+    def test_acquire_blocks_until_capacity(self):
+        """Test that acquire sleeps instead of failing."""
+        limiter = RateLimiter(requests_per_minute=600)
+        for _ in range(600):
+            limiter.reserve()
+
+        start = time.perf_counter()
+        waited = limiter.acquire()
+        elapsed = time.perf_counter() - start
+
+        assert waited == pytest.approx(0.1, abs=0.01)
+        assert elapsed >= 0.09
+
+    def test_aacquire_and_cancellation_refund(self):
+        """Test that a cancelled waiter gives its reservation back."""
+        limiter = RateLimiter(requests_per_minute=60)
+        for _ in range(60):
+            limiter.reserve()
+
+        async def run():
+            task = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+
+    def test_record_usage_refunds_overestimates(self):
+        """Test that actual usage corrects the token estimate."""
+        limiter = RateLimiter(tokens_per_minute=600)
+        limiter.reserve(600)
+        limiter.record_usage(estimated_tokens=600, actual_tokens=100)
+        assert limiter.reserve(500) == 0
+
+    def test_update_from_headers(self):
+        """Test adapting to the provider's rate limit headers."""
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000)
+        limiter.update_from_headers(
+            {
+                "x-ratelimit-limit-requests": "120",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "2s",
+                "x-ratelimit-remaining-tokens": "5000",
+            }
+        )
+
+        assert limiter.requests.capacity == 120
+        assert limiter.reserve() == pytest.approx(2.5, abs=0.05)
+        assert limiter.tokens.available == pytest.approx(5000, abs=1)
+
+    def test_parse_reset_duration(self):
+        """Test the reset header duration format."""
+        assert parse_reset_duration("1s") == 1.0
+        assert parse_reset_duration("6m0s") == 360.0
+        assert parse_reset_duration("20ms") == pytest.approx(0.02)
+        assert parse_reset_duration("1.5") == 1.5
+        assert parse_reset_duration("soon") is None
+
+    def test_estimate_request_tokens(self):
+        """Test the token estimate includes prompt and completion budget."""
+        messages = [{"role": "user", "content": "x" * 400}]
+        assert estimate_request_tokens(messages, max_tokens=50) == 100 + 4 + 3 + 50
+
+    def test_shared_registry(self):
+        """Test that limiters are shared per key."""
+        first = get_rate_limiter(("openai", "gpt-4"), requests_per_minute=10)
+        assert get_rate_limiter(("openai", "gpt-4")) is first
+        assert get_rate_limiter(("openai", "gpt-4o")) is not first
+
+
+class TestOpenAILLMRateLimiting:
+    """Test cases for the OpenAILLM integration."""
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_requests_go_through_the_limiter(self, mock_openai_class):
+        """Test that requests are admitted, adapt to headers and record usage."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+
+        parsed = MagicMock()
+        parsed.choices[0].message.content = "Limited response"
+        parsed.usage.total_tokens = 20
+        raw_response = MagicMock()
+        raw_response.headers = {"x-ratelimit-remaining-requests": "3"}
+        raw_response.parse.return_value = parsed
+        mock_client.chat.completions.with_raw_response.create.return_value = raw_response
+
+        # A stopped clock, so that the buckets do not refill during the call
+        limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=10000, clock=lambda: 0.0)
+        llm = OpenAILLM(api_key="test-key", rate_limiter=limiter)
+
+        assert llm.generate("Hello", max_tokens=10) == "Limited response"
+        mock_client.chat.completions.create.assert_not_called()
+        assert limiter.requests.available == 3
+        assert limiter.tokens.available == 10000 - 20
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_stream_usage_is_recorded(self, mock_openai_class):
+        """Test that a stream's final usage chunk corrects the token estimate."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+
+        delta = MagicMock(usage=None)
+        delta.choices[0].delta.content = "Streamed"
+        final = MagicMock(choices=[])
+        final.usage.prompt_tokens = 12
+        final.usage.completion_tokens = 3
+        final.usage.prompt_tokens_details.cached_tokens = 0
+        stream = MagicMock(usage=None)
+        stream.__iter__.return_value = [delta, final]
+        raw_response = MagicMock()
+        raw_response.headers = {}
+        raw_response.parse.return_value = stream
+        mock_client.chat.completions.with_raw_response.create.return_value = raw_response
+
+        limiter = RateLimiter(tokens_per_minute=10000, clock=lambda: 0.0)
+        llm = OpenAILLM(api_key="test-key", rate_limiter=limiter)
+
+        assert llm.stream_generate("Hello", max_tokens=10).read() == "Streamed"
+        assert limiter.tokens.available == 10000 - 15
+
+
+class TestFactoryRateLimits:
+    """Test cases for per-model limits configured through the factory."""
+
+    def test_instances_share_a_limiter(self):
+        """Test that instances for the same model share one limiter."""
+        LLMFactory.set_rate_limit("openai", "gpt-4", requests_per_minute=500)
+
+        first = LLMFactory.create_openai_llm("gpt-4", api_key="test-key", load_env=False)
+        second = LLMFactory.create_openai_llm("gpt-4", api_key="other-key", load_env=False)
+        unlimited = LLMFactory.create_openai_llm("gpt-4o", api_key="test-key", load_env=False)
+
+        assert first.rate_limiter is not None
+        assert first.rate_limiter is second.rate_limiter
+        assert first.rate_limiter.requests.capacity == 500
+        assert unlimited.rate_limiter is None
+
+    def test_providers_without_limiter_support(self):
+        """Test that no limiter is passed to providers that do not accept one."""
+        LLMFactory.set_rate_limit("mock", "mock-model", requests_per_minute=500)
+        llm = LLMFactory.create_llm("mock", load_env=False)
+        assert "rate_limiter" not in llm.config
+
+    def test_default_model_name_is_resolved(self):
+        """Test that limits apply when the provider's default model is used."""
+        LLMFactory.set_rate_limit("openai", "gpt-3.5-turbo", tokens_per_minute=1000)
+        llm = LLMFactory.create_llm("openai", api_key="test-key", load_env=False)
+        assert llm.rate_limiter.tokens.capacity == 1000
@@ -0,0 +1,182 @@
+"""Tests for recording OpenAILLM traffic and replaying it."""
+
+import asyncio
+import base64
+import os
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from openhands_playground.llm import LLMFactory, TokenUsage
+from openhands_playground.llm.exceptions import ReplayMissError
+from openhands_playground.llm.llms import OpenAILLM, ReplayLLM
+from openhands_playground.llm.recording import Recorder, Recording, build_index, request_key
+
+
+def make_usage(prompt_tokens, completion_tokens):
+    """Build a fake usage object as returned by the OpenAI SDK."""
+    usage = MagicMock()
+    usage.prompt_tokens = prompt_tokens
+    usage.completion_tokens = completion_tokens
+    usage.prompt_tokens_details.cached_tokens = 0
+    return usage
+
+
+def make_chunk(content=None, usage=None):
+    """Build a fake streaming chunk."""
+    chunk = MagicMock()
+    chunk.choices = [MagicMock()] if content is not None else []
+    if content is not None:
+        chunk.choices[0].delta.content = content
+    chunk.usage = usage
+    return chunk
+
+
+def chat_request(content, **kwargs):
+    """Chat completions parameters of a single user message."""
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": content}], **kwargs}
+
+
+class TestRecording:
+    """Test cases for the append-only log and its index."""
+
+    def test_lookup(self, tmp_path):
+        """Test that every recorded request is found and others are not."""
+        path = str(tmp_path / "calls.log")
+        with Recorder(path) as recorder:
+            for i in range(500):
+                recorder.record(chat_request(f"q{i}"), f"a{i}", usage=TokenUsage(i, 1))
+
+        recording = Recording(path)
+        assert len(recording) == 500
+        assert recording.get(chat_request("q123")).content == "a123"
+        assert recording.get(chat_request("q7")).usage == TokenUsage(7, 1)
+        assert recording.get(chat_request("unknown")) is None
+        recording.close()
+
+    def test_key_ignores_transport_params(self):
+        """Test that streaming and timeouts do not change the request key."""
+        assert request_key(chat_request("q", stream=True, timeout=3)) == request_key(
+            chat_request("q")
+        )
+        assert request_key(chat_request("q", temperature=0)) != request_key(chat_request("q"))
+
+    def test_last_record_wins(self, tmp_path):
+        """Test that a request recorded twice replays its latest response."""
+        path = str(tmp_path / "calls.log")
+        with Recorder(path) as recorder:
+            recorder.record(chat_request("q"), "old")
+            recorder.record(chat_request("q"), "new")
+
+        recording = Recording(path)
+        assert len(recording) == 1
+        assert recording.get(chat_request("q")).content == "new"
+
+    def test_writers_sharing_a_log(self, tmp_path):
+        """Test that large records appended through separate descriptors do not interleave."""
+        path = str(tmp_path / "calls.log")
+        recorders = [Recorder(path), Recorder(path)]
+
+        def write(writer, recorder):
+            for i in range(20):
+                # Incompressible, so every record is larger than an I/O buffer
+                content = base64.b64encode(os.urandom(48 * 1024)).decode()
+                recorder.record(chat_request(f"w{writer}-{i}"), content)
+
+        threads = [
+            threading.Thread(target=write, args=(writer, recorder))
+            for writer, recorder in enumerate(recorders)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for recorder in recorders:
+            recorder.close()
+
+        recording = Recording(path)
+        assert len(recording) == 40
+        assert len(recording.get(chat_request("w1-19")).content) == 64 * 1024
+        recording.close()
+        with pytest.raises(ValueError):
+            recorders[0].record(chat_request("late"), "closed")
+
+    def test_refresh_and_truncated_tail(self, tmp_path):
+        """Test that appended records are indexed and a partial record is skipped."""
+        path = str(tmp_path / "calls.log")
+        with Recorder(path) as recorder:
+            recorder.record(chat_request("first"), "1")
+        recording = Recording(path)
+
+        with Recorder(path) as recorder:
+            recorder.record(chat_request("second"), "2")
+        with open(path, "ab") as f:
+            f.write(b"\x00" * 10)
+
+        assert recording.get(chat_request("second")) is None
+        recording.refresh()
+        assert recording.get(chat_request("second")).content == "2"
+        assert build_index(path) == 2
+
+    def test_empty_recording(self, tmp_path):
+        """Test opening a recording without any record."""
+        path = tmp_path / "empty.log"
+        path.touch()
+        assert Recording(str(path)).get(chat_request("q")) is None
+
+
+class TestRecordReplay:
+    """Test cases for OpenAILLM recording and ReplayLLM."""
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_chat_round_trip(self, mock_openai_class, tmp_path):
+        """Test that a recorded chat is replayed with its usage."""
+        response = MagicMock()
+        response.choices[0].message.content = "Paris"
+        response.usage = make_usage(12, 1)
+        mock_openai_class.return_value.chat.completions.create.return_value = response
+
+        path = str(tmp_path / "calls.log")
+        with Recorder(path) as recorder:
+            llm = OpenAILLM("gpt-4o", api_key="test-key", recorder=recorder)
+            assert llm.generate("Capital of France?", temperature=0) == "Paris"
+
+        replay = LLMFactory.create_llm("replay", model_name="gpt-4o", path=path, load_env=False)
+        assert isinstance(replay, ReplayLLM)
+        assert replay.generate("Capital of France?", temperature=0) == "Paris"
+        assert asyncio.run(replay.agenerate("Capital of France?", temperature=0)) == "Paris"
+
+        with pytest.raises(ReplayMissError):
+            replay.generate("Capital of France?", temperature=1)
+        replay.close()
+
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_stream_round_trip(self, mock_async_openai_class, tmp_path):
+        """Test that streamed chunks and usage are replayed as recorded."""
+
+        chunks = MagicMock()
+        chunks.__aiter__.return_value = [
+            make_chunk("Hel"),
+            make_chunk("lo"),
+            make_chunk(usage=make_usage(10, 2)),
+        ]
+        chunks.close = AsyncMock()
+
+        mock_async_openai_class.return_value.chat.completions.create = AsyncMock(
+            return_value=chunks
+        )
+        path = str(tmp_path / "calls.log")
+        with Recorder(path) as recorder:
+            llm = OpenAILLM("gpt-4o", api_key="test-key", recorder=recorder)
+            assert asyncio.run(llm.astream_generate("Hi").read()) == "Hello"
+
+        replay = ReplayLLM("gpt-4o", path=path)
+        stream = replay.stream_generate("Hi")
+        assert list(stream) == ["Hel", "lo"]
+        assert stream.stats.usage == TokenUsage(10, 2)
+        assert replay.chat([{"role": "user", "content": "Hi"}]) == "Hello"
+
+    def test_requires_recording(self):
+        """Test that a path or recording is required."""
+        with pytest.raises(ValueError):
+            ReplayLLM()
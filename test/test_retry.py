@@ -0,0 +1,302 @@
+"""Tests for structured errors, retries and hedged requests."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+from openhands_playground.llm.exceptions import (
+    AuthenticationError,
+    ContextLengthExceededError,
+    DeadlineExceededError,
+    FatalLLMError,
+    InvalidRequestError,
+    LLMConnectionError,
+    LLMError,
+    LLMTimeoutError,
+    QuotaExceededError,
+    RateLimitError,
+    RetryableLLMError,
+    ServerError,
+)
+from openhands_playground.llm.llms import OpenAILLM
+from openhands_playground.llm.llms.openai_llm import translate_error
+from openhands_playground.llm.retry import HedgePolicy, RetryBudget, RetryPolicy
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def status_error(error_class, status, code=None, headers=None):
+    """Build an OpenAI SDK status error."""
+    response = httpx.Response(status, request=REQUEST, headers=headers or {})
+    return error_class("upstream said no", response=response, body={"code": code})
+
+
+def make_response(content):
+    """Build a fake chat completion."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+class Flaky:
+    """Callable failing with the given errors before succeeding."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, timeout=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class TestErrorTranslation:
+    """Test cases for mapping OpenAI SDK errors."""
+
+    @pytest.mark.parametrize(
+        ("error", "expected"),
+        [
+            (status_error(openai.RateLimitError, 429), RateLimitError),
+            (status_error(openai.RateLimitError, 429, "insufficient_quota"), QuotaExceededError),
+            (status_error(openai.AuthenticationError, 401), AuthenticationError),
+            (status_error(openai.PermissionDeniedError, 403), AuthenticationError),
+            (
+                status_error(openai.BadRequestError, 400, "context_length_exceeded"),
+                ContextLengthExceededError,
+            ),
+            (status_error(openai.BadRequestError, 400), InvalidRequestError),
+            (status_error(openai.InternalServerError, 503), ServerError),
+            (openai.APITimeoutError(request=REQUEST), LLMTimeoutError),
+            (openai.APIConnectionError(request=REQUEST), LLMConnectionError),
+            (ValueError("boom"), LLMError),
+        ],
+    )
+    def test_translate_error(self, error, expected):
+        """Test that SDK errors map onto the hierarchy."""
+        translated = translate_error(error)
+        assert type(translated) is expected
+        assert str(translated).startswith("OpenAI API error: ")
+
+    def test_retryable_classification(self):
+        """Test the retryable and fatal branches of the hierarchy."""
+        assert translate_error(status_error(openai.RateLimitError, 429)).retryable
+        assert isinstance(translate_error(openai.APITimeoutError(request=REQUEST)), RetryableLLMError)
+        assert isinstance(translate_error(status_error(openai.BadRequestError, 400)), FatalLLMError)
+        assert not translate_error(ValueError("boom")).retryable
+
+    def test_retry_after_and_status(self):
+        """Test that retry hints and status codes are preserved."""
+        error = status_error(openai.RateLimitError, 429, headers={"retry-after-ms": "1500"})
+        translated = translate_error(error)
+        assert translated.status_code == 429
+        assert translated.retry_after == 1.5
+
+
+class TestRetryPolicy:
+    """Test cases for the retry policy."""
+
+    def test_retries_transient_errors(self):
+        """Test that retryable errors are retried until success."""
+        fn = Flaky(ServerError("503"), LLMTimeoutError("slow"))
+        policy = RetryPolicy(max_attempts=3, initial_backoff=0.001)
+
+        assert policy.call(fn) == "ok"
+        assert fn.calls == 3
+
+    def test_fatal_errors_are_not_retried(self):
+        """Test that fatal errors propagate immediately."""
+        fn = Flaky(AuthenticationError("bad key"))
+        with pytest.raises(AuthenticationError):
+            RetryPolicy(initial_backoff=0.001).call(fn)
+        assert fn.calls == 1
+
+    def test_max_attempts(self):
+        """Test that the last error is raised once attempts are exhausted."""
+        fn = Flaky(*(ServerError(f"fail {i}") for i in range(5)))
+        with pytest.raises(ServerError, match="fail 1"):
+            RetryPolicy(max_attempts=2, initial_backoff=0.001).call(fn)
+        assert fn.calls == 2
+
+    def test_backoff_growth_and_retry_after(self):
+        """Test exponential growth, the cap and the retry_after lower bound."""
+        policy = RetryPolicy(initial_backoff=1, multiplier=2, max_backoff=5, jitter="none")
+        assert [policy.backoff(retry) for retry in (1, 2, 3, 4)] == [1, 2, 4, 5]
+        assert policy.backoff(1, RateLimitError("429", retry_after=3)) == 3
+
+        jittered = RetryPolicy(initial_backoff=1, jitter="full")
+        assert all(0 <= jittered.backoff(1) <= 1 for _ in range(100))
+
+    def test_deadline_stops_retries(self):
+        """Test that no retry is scheduled past the deadline."""
+        fn = Flaky(*(ServerError("503") for _ in range(10)))
+        policy = RetryPolicy(max_attempts=10, initial_backoff=0.05, jitter="none", deadline=0.1)
+
+        start = time.perf_counter()
+        with pytest.raises(ServerError):
+            policy.call(fn)
+        assert time.perf_counter() - start < 0.2
+        assert fn.calls <= 3
+
+    def test_deadline_passed_to_attempt(self):
+        """Test that attempts receive the remaining time as a timeout."""
+        timeouts = []
+        RetryPolicy(deadline=5).call(timeouts.append)
+        assert 4.9 < timeouts[0] <= 5
+
+    def test_async_deadline_cancels_attempt(self):
+        """Test that a slow async attempt is cut off at the deadline."""
+
+        async def slow(timeout):
+            await asyncio.sleep(1)
+
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(RetryPolicy(deadline=0.05).acall(slow))
+
+    def test_async_retries(self):
+        """Test async retries of transient errors."""
+        fn = Flaky(LLMConnectionError("reset"))
+
+        async def attempt(timeout):
+            return fn(timeout)
+
+        assert asyncio.run(RetryPolicy(initial_backoff=0.001).acall(attempt)) == "ok"
+        assert fn.calls == 2
+
+    def test_retry_budget(self):
+        """Test that a shared budget caps retries across calls."""
+        budget = RetryBudget(ratio=0.1, min_retries=1)
+        policy = RetryPolicy(max_attempts=5, initial_backoff=0.001, budget=budget)
+
+        first = Flaky(ServerError("1"), ServerError("2"), ServerError("3"))
+        with pytest.raises(ServerError):
+            policy.call(first)
+        assert first.calls == 2  # one retry from the initial budget
+
+        second = Flaky(ServerError("1"))
+        with pytest.raises(ServerError):
+            policy.call(second)
+        assert second.calls == 1  # budget exhausted
+
+
+class TestHedgePolicy:
+    """Test cases for hedged requests."""
+
+    def test_hedge_delay_from_latency_quantile(self):
+        """Test that the delay tracks the configured latency quantile."""
+        policy = HedgePolicy(min_samples=10)
+        assert policy.hedge_delay() is None
+        for latency in range(1, 101):
+            policy.record(latency / 100)
+        assert policy.hedge_delay() == pytest.approx(0.96)
+        assert HedgePolicy(delay=0.2).hedge_delay() == 0.2
+
+    def test_sync_hedge_wins_over_slow_request(self):
+        """Test that a duplicate request beats a stalled one."""
+        delays = [0.5, 0.0]
+
+        def call():
+            time.sleep(delays.pop(0))
+            return "done"
+
+        policy = HedgePolicy(delay=0.05)
+        start = time.perf_counter()
+        assert policy.call(call) == "done"
+
+        assert time.perf_counter() - start < 0.3
+        assert policy.hedges_sent == 1
+        assert policy.hedge_wins == 1
+
+    def test_no_hedge_for_fast_requests(self):
+        """Test that fast requests do not send duplicates."""
+        policy = HedgePolicy(delay=0.5)
+        assert policy.call(lambda: "fast") == "fast"
+        assert policy.hedges_sent == 0
+
+    def test_async_hedge_cancels_loser(self):
+        """Test that the slower async request is cancelled."""
+        delays = [1.0, 0.0]
+        cancelled = []
+
+        async def call():
+            try:
+                await asyncio.sleep(delays.pop(0))
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return "done"
+
+        policy = HedgePolicy(delay=0.05)
+        assert asyncio.run(policy.acall(call)) == "done"
+        assert cancelled == [True]
+        assert policy.hedge_wins == 1
+
+    def test_all_requests_fail(self):
+        """Test that the first error is raised when every request fails."""
+
+        def call():
+            time.sleep(0.05)
+            raise ServerError("down")
+
+        with pytest.raises(ServerError):
+            HedgePolicy(delay=0.01).call(call)
+
+
+class TestOpenAILLMRetries:
+    """Test cases for the OpenAILLM integration."""
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_retries_transient_failures(self, mock_openai_class):
+        """Test that OpenAILLM retries connection errors with its policy."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.side_effect = [
+            openai.APIConnectionError(request=REQUEST),
+            make_response("recovered"),
+        ]
+
+        llm = OpenAILLM(
+            api_key="test-key", retry_policy=RetryPolicy(initial_backoff=0.001, deadline=30)
+        )
+
+        assert llm.generate("Hello") == "recovered"
+        assert mock_client.chat.completions.create.call_count == 2
+        mock_openai_class.assert_called_once_with(api_key="test-key", max_retries=0)
+        assert 0 < mock_client.chat.completions.create.call_args[1]["timeout"] <= 30
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_fatal_failures_are_raised(self, mock_openai_class):
+        """Test that fatal errors surface as typed exceptions without retries."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.side_effect = status_error(
+            openai.AuthenticationError, 401
+        )
+
+        llm = OpenAILLM(api_key="test-key", retry_policy=RetryPolicy(initial_backoff=0.001))
+
+        with pytest.raises(AuthenticationError, match="OpenAI API error"):
+            llm.chat([{"role": "user", "content": "Hi"}])
+        assert mock_client.chat.completions.create.call_count == 1
+
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_async_hedged_request(self, mock_async_openai_class):
+        """Test that the async path hedges slow requests."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+        delays = [1.0, 0.0]
+
+        async def create(**kwargs):
+            await asyncio.sleep(delays.pop(0))
+            return make_response("hedged")
+
+        mock_client.chat.completions.create = AsyncMock(side_effect=create)
+        policy = HedgePolicy(delay=0.05)
+        llm = OpenAILLM(api_key="test-key", hedge_policy=policy)
+
+        assert asyncio.run(llm.agenerate("Hello")) == "hedged"
+        assert policy.hedge_wins == 1
@@ -0,0 +1,282 @@
+"""Tests for routing calls over several LLM backends."""
+
+import asyncio
+from collections import Counter
+
+import pytest
+from openhands_playground.llm import LLMFactory, TokenUsage
+from openhands_playground.llm.exceptions import AuthenticationError, ServerError
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.router import Backend, RouterLLM
+from openhands_playground.llm.streaming import AsyncTextStream, TextStream
+
+
+class FailingLLM(MockLLM):
+    """Mock LLM failing every call with a given exception."""
+
+    def __init__(self, error, model_name="failing-model"):
+        super().__init__(model_name)
+        self.error = error
+        self.calls = 0
+
+    def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        raise self.error
+
+    def chat(self, messages, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+class UsageLLM(MockLLM):
+    """Mock LLM whose streams report token usage."""
+
+    def stream_generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        stream = TextStream(["a", "b"])
+        stream.stats.usage = TokenUsage(3, 2)
+        return stream
+
+
+class ReleasingLLM(MockLLM):
+    """Mock LLM whose streams record whether they were released."""
+
+    def __init__(self, model_name="releasing-model"):
+        super().__init__(model_name)
+        self.released = 0
+
+    def stream_generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        def chunks():
+            try:
+                yield from ["a", "b", "c"]
+            finally:
+                self.released += 1
+
+        return TextStream(chunks())
+
+    def astream_generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        async def chunks():
+            try:
+                for chunk in ["a", "b", "c"]:
+                    yield chunk
+            finally:
+                self.released += 1
+
+        return AsyncTextStream(chunks())
+
+
+def picks(router, calls):
+    """Count how often each backend served a call."""
+    for _ in range(calls):
+        router.generate("hi")
+    return Counter({s["name"]: s["calls"] for s in router.stats()})
+
+
+class TestSelection:
+    """Test cases for the selection strategies."""
+
+    def test_weighted_round_robin(self):
+        """Test that calls are interleaved in proportion to the weights."""
+        router = RouterLLM(
+            [Backend(MockLLM("a"), weight=3, name="a"), Backend(MockLLM("b"), name="b")]
+        )
+        order = []
+        for _ in range(8):
+            router.generate("hi")
+            order.append([s["calls"] for s in router.stats()])
+        assert order[-1] == [6, 2]
+        # Smooth round-robin never sends more than three calls in a row to "a"
+        assert order[3] == [3, 1]
+
+    def test_least_outstanding(self):
+        """Test that the backend with fewest calls in flight is selected."""
+        a, b = Backend(MockLLM("a"), name="a"), Backend(MockLLM("b"), name="b")
+        router = RouterLLM([a, b], strategy="least_outstanding")
+        a.outstanding = 2
+        assert router._begin([]) is b
+        assert router._begin([]) is b
+        assert b.outstanding == 2
+
+    def test_ewma_prefers_fast_backend(self):
+        """Test that latency-aware routing sends most calls to the fastest backend."""
+        router = RouterLLM(
+            [
+                Backend(MockLLM("slow", latency=0.02), name="slow"),
+                Backend(MockLLM("fast", latency=0.001), name="fast"),
+            ],
+            strategy="ewma",
+        )
+        counts = picks(router, 20)
+        assert counts["slow"] == 1
+        assert counts["fast"] == 19
+        assert router.stats()[0]["ewma_latency"] > router.stats()[1]["ewma_latency"]
+
+    def test_ewma_avoids_fast_failing_backend(self):
+        """Test that a backend failing instantly does not look like the fastest one."""
+        failing = MockLLM("failing", error_rate=1.0)
+        router = RouterLLM(
+            [
+                Backend(failing, name="failing"),
+                Backend(MockLLM("slow", latency=0.02), name="slow"),
+            ],
+            strategy="ewma",
+        )
+        for _ in range(20):
+            router.generate("hi")
+        stats = {s["name"]: s for s in router.stats()}
+        assert stats["failing"]["calls"] == 1
+        assert stats["failing"]["ewma_error_rate"] == 1.0
+        assert stats["failing"]["ewma_latency"] is None
+        assert stats["slow"]["calls"] == 20
+        assert router.failovers == 1
+
+    def test_ewma_spreads_concurrent_load(self):
+        """Test that calls in flight make a fast backend less attractive."""
+
+        async def run():
+            fast = MockLLM("fast", latency=0.01)
+            slow = MockLLM("slow", latency=0.05)
+            router = RouterLLM(
+                [Backend(fast, name="fast"), Backend(slow, name="slow")], strategy="ewma"
+            )
+            await asyncio.gather(*(router.agenerate("hi") for _ in range(2)))
+            await asyncio.gather(*(router.agenerate("hi") for _ in range(30)))
+            return {s["name"]: s["calls"] for s in router.stats()}
+
+        calls = asyncio.run(run())
+        assert calls["fast"] > calls["slow"] > 1
+
+    def test_invalid_configuration(self):
+        """Test that backends and strategy are validated."""
+        with pytest.raises(ValueError):
+            RouterLLM([])
+        with pytest.raises(ValueError, match="strategy"):
+            RouterLLM([MockLLM()], strategy="random")
+        with pytest.raises(ValueError, match="weight"):
+            Backend(MockLLM(), weight=0)
+
+
+class TestFailover:
+    """Test cases for failing over to other backends."""
+
+    def test_retryable_error_fails_over(self):
+        """Test that a transient failure is retried on another backend."""
+        broken = MockLLM("broken", error_rate=1.0)
+        router = RouterLLM([broken, MockLLM("healthy")])
+
+        for _ in range(4):
+            assert router.generate("hi").startswith("[MOCK]")
+        stats = router.stats()
+        assert stats[0]["errors"] == 2
+        assert router.failovers == 2
+        assert all(s["outstanding"] == 0 for s in stats)
+
+    def test_fatal_error_is_raised(self):
+        """Test that errors other backends would repeat are not failed over."""
+        failing = FailingLLM(AuthenticationError("bad key"))
+        healthy = MockLLM("healthy")
+        router = RouterLLM([failing, healthy])
+
+        with pytest.raises(AuthenticationError):
+            router.chat([{"role": "user", "content": "hi"}])
+        assert router.failovers == 0
+
+    def test_all_backends_fail(self):
+        """Test that the last error is raised once every backend was tried."""
+        router = RouterLLM([MockLLM("a", error_rate=1.0), MockLLM("b", error_rate=1.0)])
+        with pytest.raises(ServerError):
+            router.generate("hi")
+        assert [s["calls"] for s in router.stats()] == [1, 1]
+
+    def test_max_attempts(self):
+        """Test that failover stops after max_attempts backends."""
+        first = FailingLLM(ServerError("down"))
+        second = FailingLLM(ServerError("down"))
+        router = RouterLLM([first, second, MockLLM()], max_attempts=2)
+        with pytest.raises(ServerError):
+            router.generate("hi")
+        assert (first.calls, second.calls) == (1, 1)
+
+    def test_async_failover(self):
+        """Test failover of async calls."""
+        router = RouterLLM([MockLLM("broken", error_rate=1.0), MockLLM("healthy")])
+        response = asyncio.run(router.achat([{"role": "user", "content": "hi"}]))
+        assert response.startswith("[MOCK]")
+        assert router.failovers == 1
+
+    def test_unhealthy_backends_are_skipped(self):
+        """Test that backends reporting themselves unhealthy get no calls."""
+        unhealthy = MockLLM("unhealthy")
+        unhealthy.is_healthy = lambda: False
+        router = RouterLLM([unhealthy, MockLLM("healthy")])
+        picks(router, 3)
+        assert [s["calls"] for s in router.stats()] == [0, 3]
+        assert router.stats()[0]["healthy"] is False
+
+
+class TestStreaming:
+    """Test cases for routed streams."""
+
+    def test_stream_fails_over_before_first_chunk(self):
+        """Test that a stream failing to start is opened on another backend."""
+        router = RouterLLM([MockLLM("broken", error_rate=1.0), MockLLM("healthy")])
+        assert router.stream_generate("hi").read().startswith("[MOCK]")
+        assert router.failovers == 1
+        assert all(s["outstanding"] == 0 for s in router.stats())
+
+    def test_stream_usage(self):
+        """Test that the backend's stream usage is reported on the routed stream."""
+        router = RouterLLM([UsageLLM()])
+        stream = router.stream_generate("hi")
+        assert stream.read() == "ab"
+        assert stream.stats.usage == TokenUsage(3, 2)
+
+    def test_abandoned_stream_is_released(self):
+        """Test that closing a routed stream closes the backend's stream uncounted."""
+        backend = ReleasingLLM()
+        router = RouterLLM([backend], strategy="ewma")
+        stream = router.stream_generate("hi")
+        assert next(stream) == "a"
+        stream.close()
+
+        async def run():
+            stream = router.astream_generate("hi")
+            assert await stream.__anext__() == "a"
+            await stream.aclose()
+
+        asyncio.run(run())
+        assert backend.released == 2
+        stats = router.stats()[0]
+        assert stats["outstanding"] == 0
+        assert stats["errors"] == 0
+        assert stats["ewma_latency"] is None
+        assert stats["ewma_error_rate"] is None
+
+    def test_async_stream(self):
+        """Test async streams through the router."""
+        router = RouterLLM([MockLLM("broken", error_rate=1.0), MockLLM("healthy")])
+        text = asyncio.run(router.astream_chat([{"role": "user", "content": "hi"}]).read())
+        assert text.startswith("[MOCK]")
+
+
+class TestFactory:
+    """Test cases for creating routers from the registry."""
+
+    def test_create_router(self):
+        """Test that backends are created from provider specifications."""
+        router = LLMFactory.create_router(
+            [
+                {"provider": "mock", "model_name": "a", "weight": 2, "name": "primary"},
+                {"provider": "mock", "model_name": "b", "load_env": False},
+            ],
+            strategy="least_outstanding",
+        )
+        assert isinstance(router, RouterLLM)
+        assert router.model_name == "a"
+        assert [b.name for b in router.backends] == ["primary", "MockLLM(model=b)"]
+        assert router.backends[0].weight == 2
+        assert router.generate("hi").startswith("[MOCK]")
+
+    def test_missing_provider(self):
+        """Test that every backend needs a provider."""
+        with pytest.raises(ValueError, match="provider"):
+            LLMFactory.create_router([{"model_name": "a"}])
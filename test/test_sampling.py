@@ -0,0 +1,210 @@
+"""Tests for multi-sample calls and best-of-N selection."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from openhands_playground.llm import BaseLLM, LLMHook, TokenUsage
+from openhands_playground.llm.cache import CachedLLM, InMemoryCache
+from openhands_playground.llm.circuit_breaker import CircuitBreakerLLM
+from openhands_playground.llm.exceptions import ServerError
+from openhands_playground.llm.hooks import report_usage
+from openhands_playground.llm.llms import MockLLM, OpenAILLM
+from openhands_playground.llm.rate_limit import estimate_request_tokens
+from openhands_playground.llm.router import RouterLLM
+from openhands_playground.llm.sampling import BestOfNLLM, best_of, majority_vote
+from openhands_playground.llm.tokens import BudgetedLLM
+
+
+class CountingLLM(BaseLLM):
+    """LLM without native multi-sample support, numbering its calls."""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        super().__init__("counting-model")
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        if call == self.fail_on:
+            raise ServerError("overloaded", 503)
+        report_usage(TokenUsage(prompt_tokens=10, completion_tokens=2))
+        return f"{prompt} {call}"
+
+    def chat(self, messages, max_tokens=None, temperature=None, **kwargs):
+        return self.generate(messages[-1]["content"], max_tokens, temperature, **kwargs)
+
+
+class UsageHook(LLMHook):
+    """Hook remembering the calls it sees."""
+
+    def __init__(self):
+        self.calls = []
+
+    def after_call(self, info, result):
+        self.calls.append((info.method, info.usage, result))
+
+
+def make_choice(index, content):
+    """Build a fake chat completion choice."""
+    choice = MagicMock()
+    choice.index = index
+    choice.message.content = content
+    return choice
+
+
+class TestMultiSample:
+    """Test cases for generate_n/chat_n and their fallbacks."""
+
+    def test_fan_out_fallback(self):
+        """Test that LLMs without native support make n concurrent calls."""
+        llm = CountingLLM(delay=0.05)
+        start = time.perf_counter()
+        candidates = llm.generate_n("q", 4)
+        assert time.perf_counter() - start < 0.15
+        assert sorted(candidates) == ["q 1", "q 2", "q 3", "q 4"]
+        assert len(asyncio.run(llm.achat_n([{"role": "user", "content": "q"}], 3))) == 3
+
+    def test_fan_out_errors(self):
+        """Test that a failing call fails the multi-sample call, and n is validated."""
+        with pytest.raises(ServerError):
+            CountingLLM(fail_on=2).generate_n("q", 3)
+        with pytest.raises(ValueError):
+            CountingLLM().chat_n([], 0)
+
+    def test_fan_out_is_one_instrumented_call(self):
+        """Test that hooks see one call with the usage of every fanned-out call."""
+        hook = UsageHook()
+        llm = CountingLLM()
+        llm.add_hook(hook)
+        llm.generate_n("q", 3)
+        asyncio.run(llm.agenerate_n("q", 2))
+        assert [(method, usage) for method, usage, _ in hook.calls] == [
+            ("generate_n", TokenUsage(30, 6)),
+            ("agenerate_n", TokenUsage(20, 4)),
+        ]
+
+    def test_mock_samples(self):
+        """Test that MockLLM returns distinct candidates in the time of one response."""
+        llm = MockLLM(latency=0.05)
+        start = time.perf_counter()
+        candidates = llm.chat_n([{"role": "user", "content": "hello"}], 3)
+        assert time.perf_counter() - start < 0.1
+        assert candidates[0] == llm.chat([{"role": "user", "content": "hello"}])
+        assert len(set(candidates)) == 3
+        assert asyncio.run(llm.agenerate_n("q", 2))[0] == llm.generate("q")
+        with pytest.raises(ValueError):
+            llm.generate_n("q", 0)
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_openai_single_request(self, mock_openai_class):
+        """Test that OpenAILLM gets every candidate from one request with n."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        response = MagicMock()
+        response.choices = [make_choice(1, "b"), make_choice(0, "a")]
+        response.usage.prompt_tokens = 100
+        response.usage.completion_tokens = 10
+        response.usage.prompt_tokens_details.cached_tokens = 0
+        mock_client.chat.completions.create.return_value = response
+
+        hook = UsageHook()
+        llm = OpenAILLM(api_key="test-key")
+        llm.add_hook(hook)
+
+        assert llm.generate_n("Hello", 2, temperature=1.0) == ["a", "b"]
+        mock_client.chat.completions.create.assert_called_once_with(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": "Hello"}],
+            n=2,
+            temperature=1.0,
+        )
+        assert hook.calls == [("generate_n", TokenUsage(100, 10), ["a", "b"])]
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_openai_single_choice(self, mock_openai_class):
+        """Test that one candidate is requested like a regular chat call."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.return_value.choices[0].message.content = "a"
+
+        llm = OpenAILLM(api_key="test-key")
+        assert llm.chat_n([{"role": "user", "content": "Hello"}], 1) == ["a"]
+        assert "n" not in mock_client.chat.completions.create.call_args.kwargs
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_wrappers_forward_to_native_support(self, mock_openai_class):
+        """Test that wrappers pass multi-sample calls on instead of fanning out."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.return_value.choices = [
+            make_choice(0, "a"),
+            make_choice(1, "b"),
+            make_choice(2, "c"),
+        ]
+
+        breaker = CircuitBreakerLLM(CachedLLM(OpenAILLM(api_key="test-key"), InMemoryCache()))
+        messages = [{"role": "user", "content": "Hello"}]
+        assert breaker.chat_n(messages, 3, temperature=1.0) == ["a", "b", "c"]
+        assert mock_client.chat.completions.create.call_count == 1
+        assert mock_client.chat.completions.create.call_args.kwargs["n"] == 3
+        assert breaker.breaker.snapshot()["calls"] == 1
+
+        router = RouterLLM([BudgetedLLM(MockLLM(), context_window=4096)])
+        candidates = asyncio.run(router.achat_n(messages, 2))
+        assert candidates == MockLLM().chat_n(messages, 2)
+
+    def test_rate_limit_estimate_counts_every_choice(self):
+        """Test that the completion budget is reserved once per choice."""
+        messages = [{"role": "user", "content": "Hello"}]
+        single = estimate_request_tokens(messages, 100)
+        assert estimate_request_tokens(messages, 100, n=3) == single + 200
+
+
+class TestSelectors:
+    """Test cases for candidate selection."""
+
+    def test_best_of(self):
+        """Test that the highest-scoring candidate wins, the earliest on ties."""
+        select = best_of(len)
+        assert select(["a", "ccc", "bb"]) == "ccc"
+        assert select(["x", "y"]) == "x"
+
+    def test_majority_vote(self):
+        """Test that the most frequent answer wins, ignoring surrounding whitespace."""
+        assert majority_vote(["4", "5", " 5\n", "4 ", "5"]) == "5"
+        assert majority_vote(["a", "b"]) == "a"
+
+
+class TestBestOfNLLM:
+    """Test cases for the best-of-N wrapper."""
+
+    def test_selects_among_candidates(self):
+        """Test that calls return the selected candidate of one multi-sample call."""
+        llm = BestOfNLLM(MockLLM(), n=3, selector=best_of(lambda text: "[sample 3]" in text))
+        messages = [{"role": "user", "content": "hello"}]
+        assert llm.chat(messages).endswith("[sample 3]")
+        assert asyncio.run(llm.agenerate("q")).endswith("[sample 3]")
+        assert llm.stream_chat(messages).read().endswith("[sample 3]")
+
+    def test_default_temperature(self):
+        """Test that the wrapper's temperature applies unless a call sets one."""
+        inner = MockLLM()
+        inner.generate_n = MagicMock(return_value=["a"])
+        llm = BestOfNLLM(inner, n=2, temperature=0.8)
+        llm.generate("q")
+        llm.generate("q", temperature=0.0)
+        temperatures = [call.kwargs["temperature"] for call in inner.generate_n.call_args_list]
+        assert temperatures == [0.8, 0.0]
+
+    def test_invalid_n(self):
+        """Test that n must be positive."""
+        with pytest.raises(ValueError):
+            BestOfNLLM(MockLLM(), n=0)
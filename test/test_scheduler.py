@@ -0,0 +1,194 @@
+"""Tests for priority- and tenant-aware request scheduling."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from openhands_playground.llm.exceptions import DeadlineExceededError
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    RequestScheduler,
+    ScheduledLLM,
+)
+
+
+class TrackingLLM(MockLLM):
+    """Mock LLM recording concurrency, keyword arguments and cancellations."""
+
+    def __init__(self, latency=0.02):
+        super().__init__(latency=latency)
+        self.active = 0
+        self.peak = 0
+        self.kwargs = []
+        self.cancelled = 0
+        self._track_lock = threading.Lock()
+
+    def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.kwargs.append(kwargs)
+        with self._track_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.latency)
+            return prompt
+        finally:
+            with self._track_lock:
+                self.active -= 1
+
+    async def agenerate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return prompt
+
+
+async def admission_order(scheduler, requests):
+    """Queue (priority, tenant) requests behind a held slot and record their order."""
+    await scheduler.aacquire()
+    order = []
+
+    async def request(priority, tenant):
+        async with scheduler.aslot(priority, tenant):
+            order.append((priority, tenant))
+
+    tasks = [asyncio.ensure_future(request(*r)) for r in requests]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestRequestScheduler:
+    """Test cases for queueing order, deadlines and cancellation."""
+
+    def test_priority_classes(self):
+        """Test that lower priority values are admitted first."""
+        scheduler = RequestScheduler(max_concurrency=1)
+        requests = [(BACKGROUND, "bulk"), (BACKGROUND, "bulk"), (INTERACTIVE, "chat")]
+        order = asyncio.run(admission_order(scheduler, requests))
+        assert order[0] == (INTERACTIVE, "chat")
+
+    def test_weighted_fair_sharing(self):
+        """Test that tenants of a class are served in proportion to their weights."""
+        scheduler = RequestScheduler(max_concurrency=1, tenant_weights={"a": 3})
+        requests = [(BACKGROUND, "a")] * 12 + [(BACKGROUND, "b")] * 12
+        order = asyncio.run(admission_order(scheduler, requests))
+        first = [tenant for _, tenant in order[:8]]
+        assert first.count("a") == 6
+        assert first.count("b") == 2
+
+    def test_deadline_passes_in_queue(self):
+        """Test that a request still queued at its deadline is dropped."""
+        scheduler = RequestScheduler(max_concurrency=1)
+        scheduler.acquire()
+        with pytest.raises(DeadlineExceededError):
+            scheduler.acquire(deadline=0.02)
+        assert scheduler.dropped == 1
+        assert scheduler.queue_depth == 0
+
+    def test_drops_requests_that_cannot_finish(self):
+        """Test that requests with less time left than a typical call are dropped."""
+        scheduler = RequestScheduler(max_concurrency=1)
+        scheduler.acquire()
+        scheduler.release(duration=1.0)
+
+        async def run():
+            await scheduler.aacquire()
+            waiter = asyncio.ensure_future(scheduler.aacquire(deadline=0.5))
+            await asyncio.sleep(0)
+            scheduler.release()
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceededError):
+                await waiter
+            return time.monotonic() - start
+
+        assert asyncio.run(run()) < 0.25
+        assert scheduler.dropped == 1
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test that cancelling a queued caller frees its place."""
+        scheduler = RequestScheduler(max_concurrency=1)
+
+        async def run():
+            await scheduler.aacquire()
+            waiter = asyncio.ensure_future(scheduler.aacquire())
+            await asyncio.sleep(0)
+            assert scheduler.queue_depth == 1
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            scheduler.release()
+
+        asyncio.run(run())
+        assert (scheduler.queue_depth, scheduler.running, scheduler.cancelled) == (0, 0, 1)
+
+    def test_snapshot(self):
+        """Test queue depth and wait-time metrics."""
+        scheduler = RequestScheduler(max_concurrency=1)
+        asyncio.run(admission_order(scheduler, [(INTERACTIVE, "chat")] * 3))
+        snapshot = scheduler.snapshot()
+        assert snapshot["queued"] == 0
+        assert snapshot["completed"] == 3
+        assert snapshot["priorities"][INTERACTIVE]["admitted"] == 3
+        assert snapshot["priorities"][INTERACTIVE]["wait_mean"] >= 0
+
+
+class TestScheduledLLM:
+    """Test cases for the scheduling wrapper."""
+
+    def test_concurrency_limit_across_threads(self):
+        """Test that sync callers share the global concurrency limit."""
+        llm = TrackingLLM()
+        scheduler = RequestScheduler(max_concurrency=2)
+        wrappers = [ScheduledLLM(llm, scheduler, tenant=f"t{i % 3}") for i in range(8)]
+        threads = [threading.Thread(target=w.generate, args=("hi",)) for w in wrappers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert llm.peak == 2
+        assert scheduler.completed == 8
+
+    def test_scheduling_arguments_not_forwarded(self):
+        """Test that per-call scheduling arguments override the defaults and are consumed."""
+        llm = TrackingLLM(latency=0)
+        scheduled = ScheduledLLM(llm, priority=BACKGROUND, tenant="bulk")
+        assert scheduled.generate("hi", priority=INTERACTIVE, tenant="chat", top_p=1) == "hi"
+        assert scheduled.stream_generate("hi", tenant="chat").read()
+        assert llm.kwargs == [{"top_p": 1}]
+        assert scheduled.scheduler.snapshot()["priorities"].keys() == {INTERACTIVE, BACKGROUND}
+
+    def test_deadline_cancels_upstream_call(self):
+        """Test that an async call running past its deadline is cancelled."""
+        llm = TrackingLLM(latency=5)
+        scheduled = ScheduledLLM(llm, deadline=0.05)
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(scheduled.agenerate("slow"))
+        assert llm.cancelled == 1
+        assert scheduled.scheduler.running == 0
+
+    def test_cancellation_propagates(self):
+        """Test that cancelling the caller cancels the upstream call and frees the slot."""
+        llm = TrackingLLM(latency=5)
+        scheduled = ScheduledLLM(llm)
+
+        async def run():
+            task = asyncio.ensure_future(scheduled.agenerate("slow"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+        assert llm.cancelled == 1
+        assert scheduled.scheduler.running == 0
+
+    def test_async_streams(self):
+        """Test that async streams are scheduled and release their slot."""
+        scheduled = ScheduledLLM(MockLLM())
+        assert asyncio.run(scheduled.astream_chat([{"role": "user", "content": "x"}]).read())
+        assert scheduled.scheduler.running == 0
+        assert scheduled.scheduler.completed == 1
@@ -0,0 +1,165 @@
+"""Tests for the semantic (near-duplicate) response cache."""
+
+import asyncio
+import math
+
+import pytest
+from openhands_playground.llm import BaseLLM
+from openhands_playground.llm.semantic_cache import (
+    HashingEmbedder,
+    SemanticCache,
+    SemanticCacheLLM,
+)
+
+
+class CountingLLM(BaseLLM):
+    """LLM that returns a fresh response for every call."""
+
+    def __init__(self, model_name="counting", **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.calls = 0
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        return f"{prompt} #{self.calls}"
+
+    def chat(self, messages, **kwargs):
+        return self.generate(messages[-1]["content"], **kwargs)
+
+
+def similarity(embedder, first, second):
+    """Cosine similarity of two texts."""
+    return sum(a * b for a, b in zip(embedder.embed(first), embedder.embed(second)))
+
+
+class TestHashingEmbedder:
+    """Test cases for the offline embedder."""
+
+    def test_unit_vectors(self):
+        """Test that embeddings have the configured size and unit norm."""
+        vector = HashingEmbedder(dimensions=64).embed("Hello, world")
+        assert len(vector) == 64
+        assert math.sqrt(sum(x * x for x in vector)) == pytest.approx(1.0)
+        assert not any(HashingEmbedder().embed("the"))
+
+    def test_near_duplicates_score_high(self):
+        """Test that rephrasings score above and different questions below 0.9."""
+        embedder = HashingEmbedder()
+        question = "What's the capital of France?"
+        assert similarity(embedder, question, "what is the capital of france") > 0.99
+        assert similarity(embedder, question, "Please, what is the capital of France") > 0.99
+        assert similarity(embedder, question, "What's the capital of Germany?") < 0.5
+        assert similarity(embedder, "How do I reverse a list?", "How do I sort a list?") < 0.8
+
+
+class TestSemanticCache:
+    """Test cases for the vector index and its storage."""
+
+    def test_threshold_and_namespaces(self):
+        """Test that only similar entries of the same namespace match."""
+        cache = SemanticCache()
+        cache.add("geo", cache.embed("What's the capital of France?"), "Paris")
+
+        match = cache.search("geo", cache.embed("what is the capital of france"))
+        assert match.response == "Paris"
+        assert match.similarity == pytest.approx(1.0)
+        assert cache.search("geo", cache.embed("What's the capital of Germany?")) is None
+        assert cache.search("other", cache.embed("What's the capital of France?")) is None
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = SemanticCache(max_entries=2)
+        for text in ["reverse a list", "sort a dict"]:
+            cache.add("ns", cache.embed(text), text)
+        assert cache.search("ns", cache.embed("reverse a list")) is not None
+        cache.add("ns", cache.embed("read a csv file"), "csv")
+
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        assert cache.search("ns", cache.embed("sort a dict")) is None
+        assert cache.search("ns", cache.embed("reverse a list")).response == "reverse a list"
+
+    def test_persistence(self, tmp_path):
+        """Test that a persistent cache reopens with its entries and LRU order."""
+        path = str(tmp_path / "semantic.cache")
+        with SemanticCache(path=path, max_entries=2) as cache:
+            cache.add("ns", cache.embed("reverse a list"), "reversed")
+            cache.add("ns", cache.embed("sort a dict"), "sorted")
+            cache.search("ns", cache.embed("reverse a list"))
+
+        with SemanticCache(path=path, max_entries=2) as cache:
+            assert len(cache) == 2
+            assert cache.search("ns", cache.embed("Sort a dict.")).response == "sorted"
+            cache.add("ns", cache.embed("read a csv file"), "csv")
+            assert cache.search("ns", cache.embed("reverse a list")) is None
+
+        with pytest.raises(ValueError):
+            SemanticCache(path=path, max_entries=3)
+        with pytest.raises(ValueError):
+            SemanticCache(HashingEmbedder(dimensions=64), path=path, max_entries=2)
+
+    def test_compaction(self, tmp_path):
+        """Test that evicted responses are dropped from the response file."""
+        path = str(tmp_path / "semantic.cache")
+        response = "x" * 400_000
+        with SemanticCache(path=path, max_entries=1) as cache:
+            for i in range(8):
+                cache.add("ns", cache.embed(f"question {i}"), f"{i}{response}")
+            assert cache.search("ns", cache.embed("question 7")).response == f"7{response}"
+        assert (tmp_path / "semantic.cache.responses").stat().st_size < 3 * len(response)
+
+    def test_clear(self):
+        """Test that clearing removes every entry."""
+        cache = SemanticCache()
+        cache.add("ns", cache.embed("hello"), "hi")
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.search("ns", cache.embed("hello")) is None
+
+
+class TestSemanticCacheLLM:
+    """Test cases for the semantic caching wrapper."""
+
+    def test_near_duplicate_requests_hit(self):
+        """Test hits, misses, bypasses and the latency saved."""
+        inner = CountingLLM()
+        llm = SemanticCacheLLM(inner)
+
+        assert llm.generate("What's the capital of France?", temperature=0).endswith("#1")
+        assert llm.generate("what is the capital of france", temperature=0).endswith("#1")
+        assert llm.generate("What's the capital of Germany?", temperature=0).endswith("#2")
+        assert llm.generate("What's the capital of France?", temperature=0.7).endswith("#3")
+
+        assert inner.calls == 3
+        assert (llm.stats.hits, llm.stats.misses, llm.stats.bypassed) == (1, 2, 1)
+        assert llm.stats.upstream_calls == 2
+        assert llm.stats.hit_seconds > 0
+
+    def test_chat_context_must_match(self):
+        """Test that only the last user message is compared by similarity."""
+        inner = CountingLLM()
+        llm = SemanticCacheLLM(inner)
+        system = {"role": "system", "content": "Answer briefly."}
+
+        llm.chat([system, {"role": "user", "content": "Capital of France?"}], temperature=0)
+        llm.chat([system, {"role": "user", "content": "capital of france"}], temperature=0)
+        llm.chat([{"role": "user", "content": "Capital of France?"}], temperature=0)
+        llm.chat([{"role": "assistant", "content": "Capital of France?"}], temperature=0)
+
+        assert inner.calls == 3
+        assert llm.stats.hits == 1
+        assert llm.stats.bypassed == 1
+
+    def test_async_and_streaming_share_the_cache(self):
+        """Test that async and streaming calls read and fill the cache."""
+        inner = CountingLLM()
+        llm = SemanticCacheLLM(inner)
+
+        assert asyncio.run(llm.agenerate("Reverse a list", temperature=0)) == "Reverse a list #1"
+        assert llm.stream_generate("reverse a list", temperature=0).read() == "Reverse a list #1"
+        messages = [{"role": "user", "content": "Sort a dict"}]
+        assert llm.stream_chat(messages, temperature=0).read() == "Sort a dict #2"
+        assert asyncio.run(llm.achat(messages, temperature=0)) == "Sort a dict #2"
+
+        assert inner.calls == 2
+        assert llm.stats.hits == 2
@@ -0,0 +1,149 @@
+"""Tests for simulated latency, generation rate and errors, and the benchmarks."""
+
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from openhands_playground.llm.exceptions import ServerError
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.simulation import (
+    FixedLatency,
+    LongTailLatency,
+    NormalLatency,
+    as_latency_model,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestLatencyModels:
+    """Test cases for the latency distributions."""
+
+    def test_fixed(self):
+        """Test that a fixed latency is returned unchanged."""
+        assert FixedLatency(0.25).sample(random.Random()) == 0.25
+        assert as_latency_model(0.5).mean == 0.5
+        with pytest.raises(ValueError):
+            FixedLatency(-1)
+
+    def test_normal_is_clipped(self):
+        """Test that normal samples never fall below the minimum."""
+        rng = random.Random(1)
+        samples = [NormalLatency(0.01, 0.05).sample(rng) for _ in range(1000)]
+        assert min(samples) == 0.0
+        assert 0 < sum(samples) / len(samples) < 0.1
+
+    def test_long_tail(self):
+        """Test that the long tail has the median and a heavy p99."""
+        rng = random.Random(2)
+        model = LongTailLatency(median=0.1, sigma=0.6)
+        samples = sorted(model.sample(rng) for _ in range(10000))
+        assert samples[5000] == pytest.approx(0.1, rel=0.1)
+        assert samples[9900] > 3 * samples[5000]
+        assert model.mean > model.median
+
+
+class TestMockLLMSimulation:
+    """Test cases for MockLLM's simulation options."""
+
+    def test_latency_model(self):
+        """Test that calls take the sampled latency."""
+        llm = MockLLM(latency=NormalLatency(0.05, 0.001))
+        start = time.perf_counter()
+        llm.generate("Hello")
+        assert 0.04 < time.perf_counter() - start < 0.2
+
+    def test_tokens_per_second_paces_streams(self):
+        """Test that streams yield chunks at the configured rate."""
+        llm = MockLLM(tokens_per_second=200)
+        stream = llm.stream_generate("Hello")
+        stream.read()
+
+        chunks = stream.stats.chunk_count
+        assert stream.stats.total_latency >= chunks / 200 * 0.9
+        assert stream.stats.time_to_first_token < stream.stats.total_latency / 2
+
+    def test_tokens_per_second_adds_generation_time(self):
+        """Test that non-streaming calls include the generation time."""
+        llm = MockLLM(tokens_per_second=100)
+        start = time.perf_counter()
+        response = asyncio.run(llm.agenerate("Hello"))
+        assert time.perf_counter() - start >= len(response.split()) / 100 * 0.9
+
+    def test_error_rate(self):
+        """Test that failures are injected at roughly the configured rate."""
+        llm = MockLLM(error_rate=0.3, seed=7)
+        errors = 0
+        for i in range(1000):
+            try:
+                llm.generate(f"prompt {i}")
+            except ServerError as e:
+                assert e.retryable
+                errors += 1
+        assert 250 < errors < 350
+
+    def test_seed_reproduces_runs(self):
+        """Test that the same seed fails the same calls."""
+
+        def failures(seed):
+            llm = MockLLM(error_rate=0.5, seed=seed)
+            outcome = []
+            for _ in range(50):
+                try:
+                    llm.chat([{"role": "user", "content": "Hi"}])
+                    outcome.append(True)
+                except ServerError:
+                    outcome.append(False)
+            return outcome
+
+        assert failures(3) == failures(3)
+        assert failures(3) != failures(4)
+
+    def test_invalid_error_rate(self):
+        """Test that the error rate must be a probability."""
+        with pytest.raises(ValueError, match="error_rate"):
+            MockLLM(error_rate=1.5)
+
+
+class TestBenchmark:
+    """Smoke test of the benchmark script."""
+
+    def test_writes_json_results(self, tmp_path):
+        """Test that every pattern is reported with its metrics."""
+        output = tmp_path / "results.json"
+        env = {**os.environ, "PYTHONPATH": str(ROOT / "src")}
+        subprocess.run(
+            [
+                sys.executable,
+                str(ROOT / "benchmarks" / "bench_llm.py"),
+                "--requests",
+                "20",
+                "--latency",
+                "0.001",
+                "--output",
+                str(output),
+            ],
+            check=True,
+            env=env,
+            capture_output=True,
+        )
+
+        results = json.loads(output.read_text())["results"]
+        assert [r["pattern"] for r in results] == [
+            "serial",
+            "threaded",
+            "asyncio",
+            "batched",
+            "async_batched",
+        ]
+        for result in results:
+            assert result["errors"] == 0
+            assert result["throughput_rps"] > 0
+            assert set(result["latency_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+            assert result["memory_bytes_per_request"] > 0
@@ -0,0 +1,176 @@
+"""Tests for in-flight request coalescing."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from openhands_playground.llm import BaseLLM, LLMFactory
+from openhands_playground.llm.cache import CachedLLM
+from openhands_playground.llm.singleflight import SingleFlight, SingleFlightLLM
+
+
+class SlowCountingLLM(BaseLLM):
+    """LLM that counts upstream calls and takes a while to answer."""
+
+    def __init__(self, model_name="slow", fail=False, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.calls = 0
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.1)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"answer to {prompt}"
+
+    def chat(self, messages, **kwargs):
+        return self.generate(messages[-1]["content"], **kwargs)
+
+    async def agenerate(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"answer to {prompt}"
+
+
+class TestSingleFlight:
+    """Test cases for the SingleFlight group."""
+
+    def test_threads_share_one_call(self):
+        """Test that concurrent threads with one key share a single call."""
+        inner = SlowCountingLLM()
+        llm = SingleFlightLLM(inner)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            calls = [executor.submit(llm.generate, "bootstrap", temperature=0) for _ in range(10)]
+            results = [call.result() for call in calls]
+
+        assert results == ["answer to bootstrap"] * 10
+        assert inner.calls == 1
+        assert llm.group.coalesced == 9
+        assert llm.group.in_flight == 0
+
+    def test_distinct_requests_are_not_coalesced(self):
+        """Test that different prompts or parameters run separately."""
+        inner = SlowCountingLLM()
+        llm = SingleFlightLLM(inner)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            executor.submit(llm.generate, "a")
+            executor.submit(llm.generate, "b")
+            executor.submit(llm.generate, "a", temperature=0.5)
+
+        assert inner.calls == 3
+
+    def test_errors_fan_out_to_threads(self):
+        """Test that every waiting thread receives the shared error."""
+        llm = SingleFlightLLM(SlowCountingLLM(fail=True))
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(llm.generate, "x", temperature=0) for _ in range(5)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="upstream down"):
+                future.result()
+        assert llm.llm.calls == 1
+
+    def test_tasks_share_one_call(self):
+        """Test that concurrent asyncio tasks share a single call."""
+        inner = SlowCountingLLM()
+        llm = SingleFlightLLM(inner)
+
+        async def run():
+            calls = (llm.agenerate("bootstrap", temperature=0) for _ in range(50))
+            return await asyncio.gather(*calls)
+
+        assert asyncio.run(run()) == ["answer to bootstrap"] * 50
+        assert inner.calls == 1
+
+        # Nothing is remembered once the call has completed
+        asyncio.run(run())
+        assert inner.calls == 2
+
+    def test_errors_fan_out_to_tasks(self):
+        """Test that every waiting task receives the shared error."""
+        llm = SingleFlightLLM(SlowCountingLLM(fail=True))
+
+        async def run():
+            return await asyncio.gather(
+                *(llm.agenerate("x", temperature=0) for _ in range(5)), return_exceptions=True
+            )
+
+        errors = asyncio.run(run())
+        assert all(isinstance(error, RuntimeError) for error in errors)
+        assert llm.llm.calls == 1
+
+    def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Test that cancelling one waiter leaves the call running for others."""
+        group = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(group.ado("k", work))
+            second = asyncio.ensure_future(group.ado("k", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "done"
+        assert calls == [1]
+
+    def test_sampled_requests_are_not_coalesced(self):
+        """Test that identical sampled requests each get their own completion by default."""
+        inner = SlowCountingLLM()
+        llm = SingleFlightLLM(inner)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for temperature in (None, 0.7, 0.7, 0.7):
+                executor.submit(llm.generate, "x", temperature=temperature)
+
+        assert inner.calls == 4
+        assert llm.group.coalesced == 0
+
+    def test_default_arguments_are_not_coalesced(self):
+        """Test that calls leaving temperature unset are sent individually."""
+        inner = SlowCountingLLM()
+        llm = SingleFlightLLM(inner)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(4):
+                executor.submit(llm.generate, "x")
+        assert inner.calls == 4
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(4):
+                executor.submit(llm.generate, "x", temperature=0)
+        assert inner.calls == 5
+        assert llm.group.coalesced == 3
+
+    def test_predicate_limits_coalescing(self):
+        """Test that requests rejected by the predicate run individually."""
+        inner = SlowCountingLLM()
+        llm = SingleFlightLLM(inner, predicate=lambda temperature, kwargs: temperature == 0)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(4):
+                executor.submit(llm.generate, "x", temperature=0.9)
+
+        assert inner.calls == 4
+
+    def test_factory_coalesce_parameter(self):
+        """Test enabling coalescing and caching through the factory."""
+        llm = LLMFactory.create_llm("mock", coalesce=True, cache="memory", load_env=False)
+        assert isinstance(llm, CachedLLM)
+        assert isinstance(llm.llm, SingleFlightLLM)
+        assert llm.generate("hi") == llm.llm.llm.generate("hi")
@@ -0,0 +1,235 @@
+"""Tests for streaming responses."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from openhands_playground.llm import BaseLLM
+from openhands_playground.llm.llms import MockLLM, OpenAILLM
+from openhands_playground.llm.streaming import TextStream, split_chunks
+
+
+def make_chunk(content):
+    """Build a fake chat.completion.chunk object."""
+    chunk = MagicMock()
+    chunk.choices[0].delta.content = content
+    return chunk
+
+
+class ChunkIterator:
+    """Iterator over fake chunks, like openai.Stream; exceptions are raised."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self._chunks)
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncChunkIterator(ChunkIterator):
+    """Async iterator over fake chunks, like openai.AsyncStream."""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return self.__next__()
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+    async def close(self):
+        self.closed = True
+
+
+class TestTextStream:
+    """Test cases for the stream wrappers."""
+
+    def test_split_chunks_round_trips(self):
+        """Test that chunks concatenate back to the original text."""
+        text = "  Hello,  streaming world!\n"
+        assert "".join(split_chunks(text)) == text
+        assert len(split_chunks(text)) == 3
+
+    def test_stats_and_callbacks(self):
+        """Test that a stream reports TTFT, total latency and chunk count."""
+
+        def slow_chunks():
+            time.sleep(0.05)
+            yield "first "
+            yield ""
+            time.sleep(0.05)
+            yield "second"
+
+        finished = []
+        stream = TextStream(slow_chunks())
+        stream.add_done_callback(finished.append)
+
+        assert list(stream) == ["first ", "second"]
+        assert stream.finished
+        assert stream.text == "first second"
+        assert stream.stats.chunk_count == 2
+        assert 0.04 < stream.stats.time_to_first_token < stream.stats.total_latency
+        assert finished == [stream.stats]
+
+        late = []
+        stream.add_done_callback(late.append)
+        assert late == [stream.stats]
+
+
+class TestBaseLLMStreaming:
+    """Test cases for the default streaming implementation."""
+
+    def test_default_stream_yields_single_chunk(self):
+        """Test that providers without native streaming yield one chunk."""
+
+        class PlainLLM(BaseLLM):
+            def generate(self, prompt, **kwargs):
+                return f"generated {prompt}"
+
+            def chat(self, messages, **kwargs):
+                return "chat reply"
+
+        llm = PlainLLM("plain")
+        assert list(llm.stream_generate("x")) == ["generated x"]
+        assert llm.stream_chat([]).read() == "chat reply"
+        assert asyncio.run(llm.astream_generate("y").read()) == "generated y"
+
+
+class TestMockLLMStreaming:
+    """Test cases for MockLLM simulated streaming."""
+
+    def test_stream_matches_non_streaming_response(self):
+        """Test that streamed chunks concatenate to the regular response."""
+        llm = MockLLM()
+        messages = [{"role": "user", "content": "What is streaming?"}]
+
+        stream = llm.stream_chat(messages, temperature=0.9)
+        chunks = list(stream)
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == llm.chat(messages, temperature=0.9)
+        assert stream.stats.chunk_count == len(chunks)
+        assert llm.stream_generate("prompt").read() == llm.generate("prompt")
+
+    def test_async_stream_reports_latency(self):
+        """Test that the simulated latency shows up as time-to-first-token."""
+        llm = MockLLM(latency=0.05)
+
+        async def run():
+            stream = llm.astream_generate("prompt")
+            text = await stream.read()
+            return stream, text
+
+        stream, text = asyncio.run(run())
+
+        assert text == MockLLM().generate("prompt")
+        assert stream.stats.time_to_first_token >= 0.05
+        assert stream.stats.total_latency >= stream.stats.time_to_first_token
+
+
+class TestOpenAILLMStreaming:
+    """Test cases for OpenAILLM streaming."""
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_stream_chat(self, mock_openai_class):
+        """Test that stream_chat requests stream=True and yields deltas."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        response = ChunkIterator([make_chunk("Hel"), make_chunk(None), make_chunk("lo")])
+        mock_client.chat.completions.create.return_value = response
+
+        llm = OpenAILLM(api_key="test-key")
+        stream = llm.stream_chat([{"role": "user", "content": "Hi"}], max_tokens=5)
+
+        mock_client.chat.completions.create.assert_not_called()
+        assert list(stream) == ["Hel", "lo"]
+        assert stream.stats.chunk_count == 2
+
+        call_args = mock_client.chat.completions.create.call_args[1]
+        assert call_args["stream"] is True
+        assert call_args["max_tokens"] == 5
+        assert response.closed
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_stream_releases_response(self, mock_openai_class):
+        """Test that the response is closed when a stream is abandoned or fails."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        llm = OpenAILLM(api_key="test-key")
+
+        abandoned = ChunkIterator([make_chunk("a"), make_chunk("b")])
+        mock_client.chat.completions.create.return_value = abandoned
+        stream = llm.stream_generate("prompt")
+        assert next(stream) == "a"
+        stream.close()
+        assert abandoned.closed
+
+        failed = ChunkIterator([make_chunk("a"), Exception("connection reset")])
+        mock_client.chat.completions.create.return_value = failed
+        with pytest.raises(Exception, match="OpenAI API error: connection reset"):
+            llm.stream_generate("prompt").read()
+        assert failed.closed
+
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_astream_releases_response(self, mock_async_openai_class):
+        """Test that async responses are closed when a stream is abandoned or fails."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+        abandoned = AsyncChunkIterator([make_chunk("a"), make_chunk("b")])
+        failed = AsyncChunkIterator([make_chunk("a"), Exception("connection reset")])
+        mock_client.chat.completions.create = AsyncMock(side_effect=[abandoned, failed])
+        llm = OpenAILLM(api_key="test-key")
+
+        async def run():
+            stream = llm.astream_generate("prompt")
+            assert await stream.__anext__() == "a"
+            await stream.aclose()
+            with pytest.raises(Exception, match="OpenAI API error: connection reset"):
+                await llm.astream_generate("prompt").read()
+
+        asyncio.run(run())
+        assert abandoned.closed
+        assert failed.closed
+
+    @patch("openhands_playground.llm.llms.openai_llm.OpenAI")
+    def test_stream_error_handling(self, mock_openai_class):
+        """Test that streaming errors are wrapped like non-streaming ones."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.side_effect = Exception("API Error")
+
+        llm = OpenAILLM(api_key="test-key")
+
+        with pytest.raises(Exception, match="OpenAI API error: API Error"):
+            llm.stream_generate("Test prompt").read()
+
+    @patch("openhands_playground.llm.llms.openai_llm.AsyncOpenAI")
+    def test_astream_generate(self, mock_async_openai_class):
+        """Test streaming through the AsyncOpenAI client."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=AsyncChunkIterator([make_chunk("a"), make_chunk("b")])
+        )
+
+        llm = OpenAILLM(api_key="test-key")
+
+        async def run():
+            return [chunk async for chunk in llm.astream_generate("prompt")]
+
+        assert asyncio.run(run()) == ["a", "b"]
+        call_args = mock_client.chat.completions.create.call_args[1]
+        assert call_args["messages"] == [{"role": "user", "content": "prompt"}]
+        assert call_args["stream"] is True
@@ -0,0 +1,101 @@
+"""Tests for the OpenAI-compatible stub server, through OpenAILLM over HTTP."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from openhands_playground.llm import TokenUsage
+from openhands_playground.llm.exceptions import RateLimitError, ServerError
+from openhands_playground.llm.llms import OpenAILLM
+from openhands_playground.llm.retry import RetryPolicy
+from openhands_playground.testing import StubServer
+
+MESSAGES = [{"role": "user", "content": "hello there"}]
+
+
+@pytest.fixture
+def server():
+    """A stub server running on a background thread."""
+    with StubServer(reply_words=8) as stub:
+        yield stub
+
+
+def client(server):
+    """An OpenAILLM talking to the stub server, without retries."""
+    return OpenAILLM(
+        api_key="stub-key", base_url=server.base_url, retry_policy=RetryPolicy(max_attempts=1)
+    )
+
+
+class TestStubServer:
+    """Test cases for the chat completions protocol and simulated behaviour."""
+
+    def test_chat_completion(self, server):
+        """Test that sync and async chat calls get a reply with usage."""
+        with client(server) as llm:
+            reply = llm.chat(MESSAGES)
+            assert reply.startswith("[STUB] hello there")
+            assert len(reply.split()) == 8
+            assert asyncio.run(llm.achat(MESSAGES, max_tokens=3)) == "[STUB] hello there"
+        assert server.stats.requests == 2
+        assert server.stats.completion_tokens == 11
+
+    def test_choices(self, server):
+        """Test that n choices come back distinct from one request."""
+        with client(server) as llm:
+            candidates = llm.chat_n(MESSAGES, 3)
+        assert len(set(candidates)) == 3
+        assert server.stats.requests == 1
+
+    def test_streaming(self, server):
+        """Test that streams arrive word by word, with usage in the last event."""
+        with client(server) as llm:
+            stream = llm.stream_chat(MESSAGES)
+            text = stream.read()
+
+            async def consume():
+                async_stream = llm.astream_chat(MESSAGES)
+                return await async_stream.read()
+
+            assert asyncio.run(consume()) == text
+        assert stream.stats.chunk_count == 8
+        assert stream.stats.usage == TokenUsage(
+            prompt_tokens=stream.stats.usage.prompt_tokens, completion_tokens=8
+        )
+        assert server.stats.streams == 2
+
+    def test_latency_and_throughput(self):
+        """Test that the reply takes the time to first token plus generation time."""
+        with StubServer(latency=0.05, tokens_per_second=100, reply_words=5) as server:
+            with client(server) as llm:
+                llm.chat(MESSAGES)
+                start = time.perf_counter()
+                llm.chat(MESSAGES)
+                assert time.perf_counter() - start >= 0.1
+
+    def test_error_injection(self):
+        """Test that injected errors map to the provider exceptions."""
+        with StubServer(error_rate=1.0) as server, client(server) as llm:
+            with pytest.raises(ServerError):
+                llm.chat(MESSAGES)
+            server.error_status = 429
+            with pytest.raises(RateLimitError):
+                llm.chat(MESSAGES)
+            assert server.stats.errors == 2
+
+    def test_unknown_route(self, server):
+        """Test that other paths are answered with 404."""
+        response = httpx.get(server.base_url + "/models")
+        assert response.status_code == 404
+        assert "error" in response.json()
+
+    def test_async_context_manager(self):
+        """Test running the server on the caller's event loop."""
+
+        async def run():
+            async with StubServer() as server:
+                async with client(server) as llm:
+                    return await llm.achat(MESSAGES)
+
+        assert asyncio.run(run()).startswith("[STUB]")
@@ -0,0 +1,230 @@
+"""Tests for token counting and context-window budgeting."""
+
+import asyncio
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from openhands_playground.llm import Conversation
+from openhands_playground.llm.exceptions import ContextLengthExceededError
+from openhands_playground.llm.llms import MockLLM
+from openhands_playground.llm.tokens import (
+    ApproximateTokenizer,
+    BudgetedLLM,
+    SummarizationStrategy,
+    TokenCounter,
+    Tokenizer,
+    TruncationStrategy,
+    context_window,
+    get_tokenizer,
+)
+
+
+class WordTokenizer(Tokenizer):
+    """One token per whitespace-separated word, counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+def conversation(turns, words=10):
+    """A system prompt followed by alternating user and assistant messages."""
+    messages = [{"role": "system", "content": "be brief"}]
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": " ".join([f"w{i}"] * words)})
+    return messages
+
+
+class TestTokenCounter:
+    """Test cases for counting message tokens."""
+
+    def test_message_overhead(self):
+        """Test that role, name and per-message overhead are counted."""
+        counter = TokenCounter(WordTokenizer())
+        assert counter.count_message({"role": "user", "content": "one two"}) == 3 + 2 + 1
+        assert counter.count_message({"role": "user", "name": "bob", "content": "x"}) == 7
+        assert counter.count_messages([{"role": "user", "content": "one two"}]) == 6 + 3
+
+    def test_appending_only_counts_the_new_message(self):
+        """Test that counts of earlier messages are reused."""
+        tokenizer = WordTokenizer()
+        counter = TokenCounter(tokenizer)
+        messages = conversation(20)
+        counter.count_messages(messages)
+        calls = tokenizer.calls
+
+        messages.append({"role": "user", "content": "one more"})
+        counter.count_messages(messages)
+        assert tokenizer.calls - calls == 2  # content and role of the new message
+
+    def test_running_totals(self):
+        """Test that appending to a list or Conversation only counts the new message."""
+        counter = TokenCounter(WordTokenizer())
+        messages = conversation(20)
+        history = Conversation(messages)
+        expected = sum(counter.message_counts(messages)) + 3
+        assert counter.count_messages(messages) == expected
+        assert counter.count_messages(history) == expected
+
+        with patch.object(counter, "count_message", wraps=counter.count_message) as count:
+            messages.append({"role": "user", "content": "one more"})
+            history.append("user", "one more")
+            fork = history.fork().append("assistant", "a reply")
+            assert counter.count_messages(messages) == expected + 6
+            assert counter.count_messages(history) == expected + 6
+            assert counter.count_messages(fork) == expected + 12
+        assert count.call_count == 3
+
+        messages[-1] = {"role": "user", "content": "replaced"}
+        assert counter.count_messages(messages) == expected + 5
+
+    def test_approximate_tokenizer(self):
+        """Test the character-based estimate."""
+        assert ApproximateTokenizer().count("") == 0
+        assert ApproximateTokenizer().count("abcdefgh!") == 3
+        with pytest.raises(ValueError):
+            ApproximateTokenizer(0)
+
+    def test_fallback_without_tiktoken(self):
+        """Test that the approximation is used when tiktoken is missing."""
+        with patch.dict(sys.modules, {"tiktoken": None}), patch(
+            "openhands_playground.llm.tokens._tokenizers", {}
+        ):
+            assert isinstance(get_tokenizer("gpt-4o"), ApproximateTokenizer)
+
+    def test_tiktoken(self):
+        """Test exact counts when tiktoken is installed."""
+        pytest.importorskip("tiktoken")
+        from openhands_playground.llm.tokens import TiktokenTokenizer
+
+        assert TiktokenTokenizer("gpt-4o").count("hello world") == 2
+
+    def test_context_window(self):
+        """Test window lookup by exact name and by prefix."""
+        assert context_window("gpt-4") == 8192
+        assert context_window("gpt-4o-mini-2024-07-18") == 128_000
+        assert context_window("unknown") is None
+
+
+class TestStrategies:
+    """Test cases for truncation and summarization."""
+
+    def test_truncation_keeps_system_and_latest(self):
+        """Test that the oldest messages after the system prompt are dropped."""
+        counter = TokenCounter(WordTokenizer())
+        messages = conversation(6)
+        fitted = TruncationStrategy(keep_last=2).fit(messages, 50, counter)
+
+        assert fitted[0] == messages[0]
+        assert fitted[-2:] == messages[-2:]
+        assert counter.count_messages(fitted) <= 50
+        assert len(fitted) < len(messages)
+
+    def test_truncation_impossible(self):
+        """Test that an unfittable conversation raises ContextLengthExceededError."""
+        counter = TokenCounter(WordTokenizer())
+        with pytest.raises(ContextLengthExceededError):
+            TruncationStrategy(keep_last=3).fit(conversation(6), 30, counter)
+
+    def test_summarization(self):
+        """Test that older messages are summarized once and the summary is reused."""
+        summarizer = MagicMock()
+        summarizer.chat.return_value = "short summary"
+        counter = TokenCounter(WordTokenizer())
+        strategy = SummarizationStrategy(summarizer, keep_last=2)
+        messages = conversation(8)
+
+        fitted = strategy.fit(messages, 60, counter)
+        assert fitted[0] == messages[0]
+        assert fitted[1]["role"] == "system"
+        assert "short summary" in fitted[1]["content"]
+        assert fitted[2:] == messages[-2:]
+
+        strategy.fit(messages, 60, counter)
+        summarizer.chat.assert_called_once()
+        transcript = summarizer.chat.call_args[0][0][1]["content"]
+        assert transcript.startswith("user: w0")
+
+    def test_async_summarization(self):
+        """Test that afit uses the summarizer's achat."""
+        summarizer = MockLLM()
+        strategy = SummarizationStrategy(summarizer, keep_last=2)
+        counter = TokenCounter(WordTokenizer())
+
+        fitted = asyncio.run(strategy.afit(conversation(8), 80, counter))
+        assert "Summary of the earlier conversation" in fitted[1]["content"]
+
+
+class TestBudgetedLLM:
+    """Test cases for fitting requests before they go out."""
+
+    def make_llm(self, **kwargs):
+        inner = MagicMock(spec=MockLLM)
+        inner.model_name = "custom-model"
+        inner.config = {}
+        inner.chat.return_value = "ok"
+        llm = BudgetedLLM(
+            inner, context_window=100, counter=TokenCounter(WordTokenizer()), **kwargs
+        )
+        return llm, inner
+
+    def test_fits_and_clamps_max_tokens(self):
+        """Test that long conversations are truncated and max_tokens clamped."""
+        llm, inner = self.make_llm(completion_reserve=40)
+        messages = conversation(10)
+
+        assert llm.chat(messages, max_tokens=500) == "ok"
+        sent, max_tokens = inner.chat.call_args[0][:2]
+        prompt_tokens = llm.counter.count_messages(sent)
+        assert prompt_tokens <= 60
+        assert max_tokens == 100 - prompt_tokens
+        assert llm.fitted_calls == 1
+
+    def test_short_conversation_untouched(self):
+        """Test that conversations within budget are sent as is."""
+        llm, inner = self.make_llm()
+        messages = conversation(1, words=3)
+        llm.chat(messages, max_tokens=20)
+
+        assert inner.chat.call_args[0][:2] == (messages, 20)
+        assert llm.fitted_calls == 0
+
+    def test_unknown_model(self):
+        """Test that the context window must be known."""
+        with pytest.raises(ValueError, match="context window"):
+            BudgetedLLM(MockLLM())
+
+    def test_async_stream_fits_asynchronously(self):
+        """Test that async streams are fitted with the summarizer's achat, not chat."""
+        summarizer = MockLLM()
+        summarizer.chat = MagicMock(side_effect=AssertionError("blocking call"))
+        inner = MockLLM("custom-model")
+        llm = BudgetedLLM(
+            inner,
+            strategy=SummarizationStrategy(summarizer, keep_last=2),
+            context_window=100,
+            completion_reserve=20,
+            counter=TokenCounter(WordTokenizer()),
+        )
+
+        async def consume():
+            stream = llm.astream_chat(conversation(10))
+            assert llm.fitted_calls == 0
+            return await stream.read()
+
+        assert asyncio.run(consume()).startswith("[MOCK]")
+        assert llm.fitted_calls == 1
+
+    def test_wraps_real_llm(self):
+        """Test budgeting in front of an LLM, including streams."""
+        llm = BudgetedLLM(MockLLM("gpt-4"), completion_reserve=8000)
+        messages = conversation(200, words=50)
+
+        assert llm.chat(messages).startswith("[MOCK]")
+        assert asyncio.run(llm.achat(messages)).startswith("[MOCK]")
+        assert llm.stream_chat(messages).read()